@@ -0,0 +1,93 @@
+"""Benchmarks the models repositories and the HTTP endpoints
+
+Usage:
+    python -m benchmarks run --suite repositories --backend fs --output results.json
+    python -m benchmarks run --suite endpoints --backend mongo --concurrency 32 --output results.json
+    python -m benchmarks compare benchmarks/baselines/fs.json results.json --tolerance 0.2
+
+`compare` exits with 1 when the median latency of a benchmark exceeds the baseline by more
+than the tolerance
+"""
+
+import argparse
+import asyncio
+import sys
+
+from benchmarks.endpoints import benchmark_endpoints
+from benchmarks.harness import BenchmarkReport, compare
+from benchmarks.repositories import BACKENDS, benchmark_repository
+from src.core.logger import logger
+
+
+def _parse_sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(",")]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of the benchmarks
+
+    :param argv: command line arguments
+    :return: exit code
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--suite", choices=("repositories", "endpoints"), required=True)
+    run_parser.add_argument("--backend", choices=tuple(BACKENDS), default="fs")
+    run_parser.add_argument(
+        "--model-sizes", type=_parse_sizes, default=[1024, 1024**2, 16 * 1024**2]
+    )
+    run_parser.add_argument(
+        "--registry-sizes",
+        type=_parse_sizes,
+        default=[10, 1000, 10000],
+        help="numbers of the other models in the registry, e.g. 10,1000,1000000",
+    )
+    run_parser.add_argument("--iterations", type=int, default=100)
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--base-url", help="running service, the app is served in-process")
+    run_parser.add_argument("--output", required=True, help="JSON file of the results")
+
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    if args.action == "compare":
+        regressions = compare(
+            BenchmarkReport.load(args.baseline), BenchmarkReport.load(args.results), args.tolerance
+        )
+        for key, baseline_median, median in regressions:
+            print(f"{key}: {baseline_median * 1e3:.3f} ms -> {median * 1e3:.3f} ms")
+        return 1 if regressions else 0
+
+    # request logs of the in-process app would dominate the measured latencies
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    report = BenchmarkReport()
+    for model_size in args.model_sizes:
+        if args.suite == "repositories":
+            for registry_size in args.registry_sizes:
+                report.results.extend(
+                    benchmark_repository(args.backend, model_size, registry_size, args.iterations)
+                )
+        else:
+            report.results.extend(
+                asyncio.run(
+                    benchmark_endpoints(
+                        args.backend, model_size, args.requests, args.concurrency, args.base_url
+                    )
+                )
+            )
+    report.save(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import httpx
+
+from benchmarks.harness import BenchmarkResult
+from benchmarks.repositories import BACKENDS
+from src.api.run import app, create_models_repository
+
+ROLLOUT_MODEL_NAME = "rollout-model"
+
+
+@asynccontextmanager
+async def create_http_client(
+    backend: str, base_url: str | None
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Creates the client of a running service or of the app served in-process
+
+    :param backend: backend of the in-process app, `fs` or `mongo`
+    :param base_url: URL of a running service, the app is served in-process when it's None
+    """
+
+    if base_url is not None:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            yield client
+        return
+
+    with BACKENDS[backend]() as repo:
+        app.dependency_overrides[create_models_repository] = lambda: repo
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://benchmark", timeout=60
+            ) as client:
+                yield client
+        finally:
+            app.dependency_overrides.pop(create_models_repository, None)
+
+
+async def timed(samples: list[float], request) -> httpx.Response:
+    start = time.perf_counter()
+    response = await request
+    samples.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+
+async def upload(client: httpx.AsyncClient, name: str, version: str, content: bytes):
+    files = {"file": (f"{name}-{version}.bin", content)}
+    return await client.post("/", params={"name": name, "version": version}, files=files)
+
+
+async def put(client: httpx.AsyncClient, name: str, version: str, content: bytes):
+    return await client.put(
+        f"/models/{name}/{version}",
+        params={"file_extension": "bin"},
+        content=content,
+        headers={"Content-Type": "application/octet-stream"},
+    )
+
+
+async def run_concurrently(concurrency: int, requests: list) -> float:
+    """Runs the coroutines with the bounded concurrency
+
+    :return: wall time in seconds
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(request):
+        async with semaphore:
+            await request
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(request) for request in requests))
+    return time.perf_counter() - start
+
+
+async def benchmark_uploads_and_downloads(
+    client: httpx.AsyncClient, parameters: dict, requests: int, concurrency: int
+) -> list[BenchmarkResult]:
+    content = os.urandom(parameters["model_size"])
+    prefix = f"load-{time.time_ns()}"
+
+    upload_samples: list[float] = []
+    wall_time = await run_concurrently(
+        concurrency,
+        [
+            timed(upload_samples, upload(client, f"{prefix}-{index}", "1.0.0", content))
+            for index in range(requests)
+        ],
+    )
+    uploads = BenchmarkResult.from_samples("http_upload", parameters, upload_samples, wall_time)
+
+    put_samples: list[float] = []
+    wall_time = await run_concurrently(
+        concurrency,
+        [
+            timed(put_samples, put(client, f"{prefix}-{index}", "2.0.0", content))
+            for index in range(requests)
+        ],
+    )
+    puts = BenchmarkResult.from_samples("http_put", parameters, put_samples, wall_time)
+
+    download_samples: list[float] = []
+    wall_time = await run_concurrently(
+        concurrency,
+        [
+            timed(
+                download_samples,
+                client.get("/", params={"name": f"{prefix}-{index}", "version": "1.0.0"}),
+            )
+            for index in range(requests)
+        ],
+    )
+    downloads = BenchmarkResult.from_samples(
+        "http_download", parameters, download_samples, wall_time
+    )
+    return [uploads, puts, downloads]
+
+
+async def benchmark_hot_key_rollout(
+    client: httpx.AsyncClient, parameters: dict, requests: int, concurrency: int
+) -> BenchmarkResult:
+    """Readers fetch the `@production` alias of one model while new versions are published
+    and the alias is moved to them"""
+
+    content = os.urandom(parameters["model_size"])
+    name = f"{ROLLOUT_MODEL_NAME}-{time.time_ns()}"
+    await upload(client, name, "1.0.0", content)
+    await client.put("/aliases", params={"name": name, "alias": "production", "version": "1.0.0"})
+
+    async def publish() -> None:
+        for minor in range(1, 11):
+            version = f"1.{minor}.0"
+            await upload(client, name, version, content)
+            await client.put(
+                "/aliases", params={"name": name, "alias": "production", "version": version}
+            )
+
+    read_samples: list[float] = []
+    reads = [
+        timed(read_samples, client.get("/", params={"name": name, "version": "@production"}))
+        for _ in range(requests)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(publish(), run_concurrently(concurrency, reads))
+    wall_time = time.perf_counter() - start
+    return BenchmarkResult.from_samples(
+        "http_hot_key_rollout", parameters, read_samples, wall_time
+    )
+
+
+async def benchmark_endpoints(
+    backend: str, model_size: int, requests: int, concurrency: int, base_url: str | None = None
+) -> list[BenchmarkResult]:
+    """Runs the HTTP load scenarios
+
+    :param backend: backend of the in-process app, `fs` or `mongo`
+    :param model_size: size of the uploaded models in bytes
+    :param requests: number of the requests of every scenario
+    :param concurrency: number of the requests in flight
+    :param base_url: URL of a running service, the app is served in-process when it's None
+    :return: benchmark results
+    """
+
+    parameters = {
+        "backend": backend if base_url is None else base_url,
+        "model_size": model_size,
+        "concurrency": concurrency,
+    }
+    async with create_http_client(backend, base_url) as client:
+        results = await benchmark_uploads_and_downloads(client, parameters, requests, concurrency)
+        results.append(await benchmark_hot_key_rollout(client, parameters, requests, concurrency))
+
+    for result in results:
+        print(f"{result.key}: p99 {result.p99 * 1e3:.3f} ms, {result.throughput:.1f} requests/s")
+    return results
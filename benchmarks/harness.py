@@ -0,0 +1,142 @@
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass(kw_only=True)
+class BenchmarkResult:
+    """Latency statistics of one benchmark in seconds"""
+
+    name: str
+    parameters: dict[str, str | int]
+    iterations: int
+    mean: float
+    median: float
+    p95: float
+    p99: float
+    min: float
+    max: float
+    throughput: float
+
+    @property
+    def key(self) -> str:
+        """Identifier of the benchmark and its parameters used to match the baseline"""
+
+        parameters = ",".join(f"{name}={value}" for name, value in sorted(self.parameters.items()))
+        return f"{self.name}[{parameters}]"
+
+    @classmethod
+    def from_samples(
+        cls, name: str, parameters: dict, samples: list[float], wall_time: float | None = None
+    ) -> "BenchmarkResult":
+        """Aggregates the latencies
+
+        :param name: name of the benchmark
+        :param parameters: parameters of the benchmark, e.g. the model size
+        :param samples: latencies in seconds
+        :param wall_time: duration of the concurrent run, the latencies are summed up when None
+        :return: benchmark result
+        """
+
+        ordered = sorted(samples)
+        wall_time = wall_time if wall_time is not None else sum(samples)
+        return cls(
+            name=name,
+            parameters=parameters,
+            iterations=len(samples),
+            mean=statistics.fmean(samples),
+            median=statistics.median(ordered),
+            p95=percentile(ordered, 0.95),
+            p99=percentile(ordered, 0.99),
+            min=ordered[0],
+            max=ordered[-1],
+            throughput=len(samples) / wall_time if wall_time else 0.0,
+        )
+
+
+@dataclass(kw_only=True)
+class BenchmarkReport:
+    """Results of a benchmark run with the environment they were measured in"""
+
+    results: list[BenchmarkResult] = field(default_factory=list)
+    environment: dict[str, str] = field(
+        default_factory=lambda: {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        }
+    )
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(asdict(self), file, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "BenchmarkReport":
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        results = [BenchmarkResult(**result) for result in data["results"]]
+        return cls(results=results, environment=data["environment"])
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of the sorted values"""
+
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(
+    name: str,
+    parameters: dict,
+    function: Callable[[int], object],
+    iterations: int,
+    warmup: int = 3,
+) -> BenchmarkResult:
+    """Measures the latency of the function
+
+    :param name: name of the benchmark
+    :param parameters: parameters of the benchmark
+    :param function: measured function receiving the number of the iteration
+    :param iterations: number of the measured calls
+    :param warmup: number of the calls made before the measurement
+    :return: benchmark result
+    """
+
+    for iteration in range(warmup):
+        function(-iteration - 1)
+
+    samples = []
+    for iteration in range(iterations):
+        start = time.perf_counter()
+        function(iteration)
+        samples.append(time.perf_counter() - start)
+
+    result = BenchmarkResult.from_samples(name, parameters, samples)
+    print(f"{result.key}: median {result.median * 1e3:.3f} ms, p99 {result.p99 * 1e3:.3f} ms")
+    return result
+
+
+def compare(
+    baseline: BenchmarkReport, report: BenchmarkReport, tolerance: float
+) -> list[tuple[str, float, float]]:
+    """Finds the benchmarks whose median latency regressed against the baseline
+
+    :param baseline: stored results
+    :param report: new results
+    :param tolerance: allowed relative slowdown, e.g. 0.2 for 20%
+    :return: keys of the regressed benchmarks with the baseline and the new median latencies
+    """
+
+    baseline_results = {result.key: result for result in baseline.results}
+    regressions = []
+    for result in report.results:
+        baseline_result = baseline_results.get(result.key)
+        if baseline_result is not None and result.median > baseline_result.median * (
+            1 + tolerance
+        ):
+            regressions.append((result.key, baseline_result.median, result.median))
+    return regressions
@@ -0,0 +1,118 @@
+import os
+import tempfile
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+
+from benchmarks.harness import BenchmarkResult, measure
+from src.core.models_repositories import (
+    FileSystemModelsRepository,
+    Model,
+    ModelsRepository,
+    MongoModelsRepository,
+)
+from src.core.settings import (
+    FileSystemModelsRepositorySettings,
+    MongoModelsRepositorySettings,
+)
+from src.core.versions import VersionRange
+from src.integrations.mongo.client import MongoClient
+
+BENCHMARK_MODEL_NAME = "benchmark-model"
+FILLER_BATCH_SIZE = 1000
+
+
+@contextmanager
+def create_fs_repository() -> Iterator[ModelsRepository]:
+    with tempfile.TemporaryDirectory(prefix="model-registry-benchmark-") as directory:
+        settings = FileSystemModelsRepositorySettings(source="fs", directory=directory)
+        yield FileSystemModelsRepository(settings)
+
+
+@contextmanager
+def create_mongo_repository() -> Iterator[ModelsRepository]:
+    """Connects to the Mongo DB stand-in started by `make up`, the database is dropped afterwards"""
+
+    settings = MongoModelsRepositorySettings(
+        source="mongo",
+        host=os.getenv("BENCHMARK_MONGO_HOST", "localhost"),
+        port=int(os.getenv("BENCHMARK_MONGO_PORT", "27017")),
+        username=os.getenv("BENCHMARK_MONGO_USERNAME", "username"),
+        password=os.getenv("BENCHMARK_MONGO_PASSWORD", "password"),
+        database_name="model-registry-benchmark",
+    )
+    client = MongoClient(settings)
+    client.database.client.drop_database(settings.database_name)
+    try:
+        yield MongoModelsRepository(client)
+    finally:
+        client.database.client.drop_database(settings.database_name)
+
+
+BACKENDS: dict[str, Callable[[], AbstractContextManager[ModelsRepository]]] = {
+    "fs": create_fs_repository,
+    "mongo": create_mongo_repository,
+}
+
+
+def fill_registry(repo: ModelsRepository, registry_size: int) -> None:
+    """Saves small models of other names, so lookups run against a registry of the size"""
+
+    for start in range(0, registry_size, FILLER_BATCH_SIZE):
+        repo.save_models(
+            Model(name=f"filler-{index}", version="1.0.0", content=b"0", file_extension="bin")
+            for index in range(start, min(start + FILLER_BATCH_SIZE, registry_size))
+        )
+
+
+def benchmark_repository(
+    backend: str, model_size: int, registry_size: int, iterations: int
+) -> list[BenchmarkResult]:
+    """Measures the operations of the models repository
+
+    :param backend: `fs` or `mongo`
+    :param model_size: size of the saved and fetched models in bytes
+    :param registry_size: number of the other models stored in the registry
+    :param iterations: number of the measured calls of every operation
+    :return: benchmark results
+    """
+
+    parameters = {"backend": backend, "model_size": model_size, "registry_size": registry_size}
+    content = os.urandom(model_size)
+    results = []
+
+    with BACKENDS[backend]() as repo:
+        fill_registry(repo, registry_size)
+
+        def create_model(iteration: int) -> Model:
+            return Model(
+                name=BENCHMARK_MODEL_NAME,
+                version=f"{iteration + 1000}.0.0",
+                content=content,
+                file_extension="bin",
+            )
+
+        def get_version(iteration: int) -> str:
+            return f"{iteration + 1000}.0.0"
+
+        range_latest = VersionRange.parse("latest")
+        operations = {
+            "save_model": lambda i: repo.save_model(create_model(i)),
+            "get_model": lambda i: repo.get_model(BENCHMARK_MODEL_NAME, get_version(i)),
+            "get_model_info": lambda i: repo.get_model_info(BENCHMARK_MODEL_NAME, get_version(i)),
+            "find_latest_version": lambda i: repo.find_latest_version(
+                BENCHMARK_MODEL_NAME, range_latest
+            ),
+            "delete_model": lambda i: repo.delete_model(BENCHMARK_MODEL_NAME, get_version(i)),
+        }
+        if isinstance(repo, FileSystemModelsRepository):
+            operations["find_model_path"] = lambda i: repo.find_model_path(
+                BENCHMARK_MODEL_NAME, get_version(i)
+            )
+            # the paths are looked up before the models are deleted
+            operations["delete_model"] = operations.pop("delete_model")
+
+        for operation, function in operations.items():
+            # warm up calls use negative iterations, so they touch their own versions
+            results.append(measure(operation, parameters, function, iterations, warmup=3))
+
+    return results
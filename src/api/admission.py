@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.core.metrics import admission_in_flight_bytes, admission_rejections
+from src.core.settings import AdmissionSettings
+
+
+class AdmissionTimeoutError(Exception):
+    """Raises when the request hasn't been admitted before the deadline"""
+
+
+class ByteBudget:
+    """Budget of the bytes of the requests handled at once, waiters are admitted in FIFO order
+    so a large request isn't starved by the small ones"""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.used = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+
+    async def acquire(self, cost: int, timeout: float) -> int:
+        """Takes the bytes from the budget waiting for them up to the timeout
+
+        :param cost: number of bytes, requests larger than the budget take all of it
+        :param timeout: number of seconds to wait
+        :return: number of the taken bytes
+        :raise AdmissionTimeoutError: when the bytes haven't been released in time
+        """
+
+        cost = min(cost, self.capacity)
+        if not self._waiters and self.used + cost <= self.capacity:
+            self.used += cost
+            return cost
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((cost, waiter))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError as err:
+            self._waiters.remove((cost, waiter))
+            # the requests queued behind this one may fit now
+            self._wake_up()
+            raise AdmissionTimeoutError from err
+        return cost
+
+    def release(self, cost: int) -> None:
+        """Returns the bytes to the budget
+
+        :param cost: number of the taken bytes
+        """
+
+        self.used -= cost
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        while self._waiters and self.used + self._waiters[0][0] <= self.capacity:
+            cost, waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.used += cost
+                waiter.set_result(None)
+
+
+class AdmissionController:
+    """Admits the requests within the in-flight byte budget and the concurrency limits of the routes
+
+    Limits are disabled until configured
+    """
+
+    def __init__(self) -> None:
+        self.settings = AdmissionSettings()
+        self.budget = ByteBudget(self.settings.max_in_flight_bytes)
+        self.route_slots: dict[str, asyncio.Semaphore] = {}
+
+    def configure(self, settings: AdmissionSettings) -> None:
+        """Applies the settings, the call is no-op if they haven't changed
+
+        :param settings: admission settings
+        """
+
+        if settings == self.settings:
+            return
+
+        self.settings = settings
+        self.budget = ByteBudget(settings.max_in_flight_bytes)
+        self.route_slots = {
+            route: asyncio.Semaphore(limit) for route, limit in settings.route_limits.items()
+        }
+
+    @staticmethod
+    def get_route(scope: Scope) -> str:
+        """Returns the route the limits of the request are looked up by
+
+        The middleware runs before the router, so the route is matched against the routes
+        of the app the same way the router does
+
+        :param scope: ASGI scope of the request
+        :return: method and path template of the route, e.g. `PUT /models/{name}/{version}`,
+            or the path of the request if no route matches it
+        """
+
+        router = getattr(scope.get("app"), "router", None)
+        for route in getattr(router, "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return f"{scope['method']} {route.path}"
+        return f"{scope['method']} {scope['path']}"
+
+    def get_cost(self, scope: Scope) -> int:
+        """Returns the number of bytes the request takes from the budget
+
+        :param scope: ASGI scope of the request
+        :return: content length or the assumed size of the requests without it
+        """
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit():
+                return max(int(value), self.settings.min_request_bytes)
+        if scope["method"] in ("POST", "PUT", "PATCH"):
+            return self.settings.unknown_request_bytes
+        return self.settings.min_request_bytes
+
+
+# the ASGI interface of the middleware is the call
+class AdmissionMiddleware:  # pylint: disable=too-few-public-methods
+    """ASGI middleware queueing the requests over the limits and rejecting the ones that waited
+    longer than the timeout with 503 and `Retry-After`"""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController | None = None) -> None:
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        settings = self.controller.settings
+        if (
+            scope["type"] != "http"
+            or not settings.enabled
+            or scope["path"] in settings.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        route = self.controller.get_route(scope)
+        deadline = time.monotonic() + settings.queue_timeout_seconds
+        slots = self.controller.route_slots.get(route)
+        budget = self.controller.budget
+
+        try:
+            if slots is not None:
+                await asyncio.wait_for(slots.acquire(), settings.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            await self._reject(route, scope, receive, send)
+            return
+
+        try:
+            try:
+                cost = await budget.acquire(
+                    self.controller.get_cost(scope), max(0.0, deadline - time.monotonic())
+                )
+            except AdmissionTimeoutError:
+                await self._reject(route, scope, receive, send)
+                return
+
+            admission_in_flight_bytes.inc(amount=cost)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                admission_in_flight_bytes.dec(amount=cost)
+                budget.release(cost)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    async def _reject(self, route: str, scope: Scope, receive: Receive, send: Send) -> None:
+        admission_rejections.inc(route)
+        retry_after = self.controller.settings.retry_after_seconds
+        response = JSONResponse(
+            {"detail": "Service is overloaded, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(retry_after)},
+        )
+        await response(scope, receive, send)
+
+
+admission_controller = AdmissionController()
@@ -2,23 +2,61 @@ from typing import Annotated
 
 from fastapi import Depends
 
+from src.core.events import ModelEventsBus, model_events
+from src.core.models_cache import SharedModelsCache
 from src.core.models_repositories import (
     FileSystemModelsRepository,
+    MirroredModelsRepository,
     ModelsRepository,
     MongoModelsRepository,
+    ShardedModelsRepository,
 )
-from src.core.settings import Settings
+from src.core.settings import ModelsRepository as ModelsRepositorySettings
+from src.core.settings import QuotaSettings, Settings
+from src.core.tracing import tracer
 from src.integrations.mongo.client import MongoClient
 
+# repositories are kept for the app lifetime to reuse connection pools between requests
+_models_repositories: dict[str, ModelsRepository] = {}
+_models_caches: dict[str, SharedModelsCache] = {}
+
 
 def create_settings() -> Settings:
     """Creates the instance of the app's settings"""
 
-    return Settings()
+    with tracer.span("create_settings"):
+        return Settings()
+
+
+def create_quota_settings(
+    settings: Annotated[Settings, Depends(create_settings)],
+) -> QuotaSettings:
+    """Creates the quotas of the models"""
+
+    return settings.quotas
+
+
+def create_models_cache(
+    settings: Annotated[Settings, Depends(create_settings)],
+) -> SharedModelsCache | None:
+    """Creates the cache of the model contents shared by the workers
+
+    :return: instance of the SharedModelsCache or None if the cache is disabled
+    """
+
+    if not settings.cache.enabled:
+        return None
+    key = settings.cache.model_dump_json()
+    models_cache = _models_caches.get(key)
+    if models_cache is None:
+        models_cache = SharedModelsCache(settings.cache.directory, settings.cache.max_bytes)
+        model_events.add_listener(models_cache.on_model_event)
+        _models_caches[key] = models_cache
+    return models_cache
 
 
 def create_models_repository(
-    settings: Annotated[Settings, Depends(create_settings)]
+    settings: Annotated[Settings, Depends(create_settings)],
 ) -> ModelsRepository:
     """Creates an instance of the models repository
 
@@ -26,11 +64,59 @@ def create_models_repository(
     :raise ValueError: when received unknown source
     """
 
-    if settings.models_repository.source == "mongo":
-        client = MongoClient(settings.models_repository)
-        return MongoModelsRepository(client)
+    with tracer.span("create_models_repository", source=settings.models_repository.source):
+        key = settings.models_repository.model_dump_json() + settings.quotas.model_dump_json()
+        models_repository = _models_repositories.get(key)
+        if models_repository is None:
+            models_repository = _create_models_repository(
+                settings.models_repository, settings.quotas
+            )
+            _models_repositories[key] = models_repository
+        return models_repository
+
 
-    if settings.models_repository.source == "fs":
-        return FileSystemModelsRepository(settings.models_repository)
+def _create_models_repository(
+    settings: ModelsRepositorySettings, quotas: QuotaSettings | None = None
+) -> ModelsRepository:
+    # the quotas are enforced by the storages that count the usage, the secondary
+    # repositories only replicate the models accepted by the primary one
+    if settings.source == "mongo":
+        client = MongoClient(settings)
+        return MongoModelsRepository(client, quotas)
+
+    if settings.source == "fs":
+        return FileSystemModelsRepository(settings)
+
+    if settings.source == "mirror":
+        return MirroredModelsRepository(
+            primary=_create_models_repository(settings.primary, quotas),
+            secondaries=[_create_models_repository(item) for item in settings.secondaries],
+            queue_path=settings.queue_path,
+            retry_delay=settings.retry_delay_seconds,
+            max_retry_delay=settings.max_retry_delay_seconds,
+        )
+
+    if settings.source == "sharded":
+        return ShardedModelsRepository(
+            shards={
+                key: _create_models_repository(item, quotas)
+                for key, item in settings.shards.items()
+            },
+            virtual_nodes=settings.virtual_nodes,
+            rebalance_interval=settings.rebalance_interval_seconds,
+            lock_path=settings.rebalance_lock_path,
+        )
+
+    raise ValueError(f"Received unknown source: {settings.source}")
+
+
+def create_model_events(
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+) -> ModelEventsBus:
+    """Returns the bus of the model events fed by the changes of the models repository
+
+    :return: bus of the model events
+    """
 
-    raise ValueError(f"Received unknown source: {settings.models_repository.source}")
+    model_events.watch(models_repo)
+    return model_events
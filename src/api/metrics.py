@@ -0,0 +1,62 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.metrics import (
+    http_request_duration,
+    http_request_size,
+    http_requests_in_flight,
+    http_response_size,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# the ASGI interface of the middleware is the call
+class MetricsMiddleware:  # pylint: disable=too-few-public-methods
+    """ASGI middleware recording latency, payload sizes and in-flight HTTP requests
+
+    Requests are labeled by the route template rather than the URL to keep the number
+    of the series bounded
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        request_size = 0
+        response_size = 0
+
+        async def receive_with_size() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_with_size(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_with_size, send_with_size)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec(method)
+            # the router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            http_request_duration.observe(duration, method, route, str(status))
+            http_request_size.observe(request_size, method, route)
+            http_response_size.observe(response_size, method, route)
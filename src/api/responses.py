@@ -0,0 +1,110 @@
+import re
+from collections.abc import Callable
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from src.core.models_repositories.base import ModelInfo, ModelsRepository
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def create_model_etag(digest: str) -> str:
+    """Creates a strong entity tag of the model content
+
+    :param digest: sha256 hex digest of the model content
+    :return: quoted digest of the model content
+    """
+
+    return f'"{digest}"'
+
+
+def parse_range_header(range_header: str, size: int) -> tuple[int, int]:
+    """Parses a single byte range of the `Range` header
+
+    :param range_header: value of the `Range` header, e.g. `bytes=0-1023`
+    :param size: size of the whole content in bytes
+    :return: first and last (inclusive) positions of the requested range
+    :raise HTTPException: with 416 status code when the range can't be satisfied
+    """
+
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if match is None or match.groups() == ("", ""):
+        raise _range_not_satisfiable(range_header, size)
+
+    first, last = match.groups()
+    if not first:
+        # suffix range, e.g. `bytes=-500` requests the last 500 bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+
+    if start > end or start >= size:
+        raise _range_not_satisfiable(range_header, size)
+    return start, end
+
+
+# the conditional and range headers of the request are passed as they are
+def create_model_response(  # pylint: disable=too-many-arguments
+    model_info: ModelInfo,
+    digest: str,
+    read_content: Callable[[int, int], bytes | memoryview],
+    *,
+    range_header: str | None = None,
+    if_none_match: str | None = None,
+    if_range: str | None = None,
+) -> Response:
+    """Creates the response that contains the model file
+
+    Supports conditional requests through `If-None-Match`
+    and partial downloads of a single byte range through `Range` and `If-Range`
+
+    :param model_info: metadata of the model
+    :param digest: sha256 hex digest of the model content
+    :param read_content: reads the part of the model content by its offset and size,
+        only the requested part is read
+    :param range_header: value of the `Range` header
+    :param if_none_match: value of the `If-None-Match` header
+    :param if_range: value of the `If-Range` header,
+        the range is ignored when it doesn't match the entity tag of the model
+    :return: response with the whole model, a part of it or 304 status code
+    :raise HTTPException: with 416 status code when the range can't be satisfied
+    """
+
+    filename = ModelsRepository.create_model_file_name(
+        model_info.name, model_info.version, model_info.file_extension
+    )
+    etag = create_model_etag(digest)
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "X-Model-Version": model_info.version,
+    }
+
+    if if_none_match is not None and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+
+    size = model_info.size
+    # an empty model has no satisfiable ranges, so the range is ignored like the stale `If-Range`
+    if range_header is None or not size or (if_range is not None and if_range.strip() != etag):
+        return Response(
+            content=read_content(0, size), media_type="application/octet-stream", headers=headers
+        )
+
+    start, end = parse_range_header(range_header, size)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(
+        content=read_content(start, end - start + 1),
+        status_code=206,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
+def _range_not_satisfiable(range_header: str, size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail=f"Range can't be satisfied: {range_header}",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
@@ -1,19 +1,109 @@
+# the endpoints take the parameters and dependencies injected by FastAPI from the request
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+import asyncio
+import contextlib
+import dataclasses
+import functools
+import io
+import tarfile
+from collections.abc import AsyncIterator, Callable
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import Depends, FastAPI, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 
-from src.api.deps import create_models_repository
+from src.api.admission import AdmissionMiddleware, admission_controller
+from src.api.deps import (
+    create_model_events,
+    create_models_cache,
+    create_models_repository,
+    create_quota_settings,
+    create_settings,
+)
+from src.api.metrics import MetricsMiddleware
+from src.api.responses import create_model_response
+from src.api.streams import SyncStreamReader, iter_server_sent_events
+from src.api.tracing import TracingMiddleware
+from src.core.events import ModelEventsBus, ModelEventType, model_events
 from src.core.logger import logger
+from src.core.metrics import registry
+from src.core.models_cache import SharedModelsCache
 from src.core.models_repositories.base import (
+    AliasNotFoundError,
+    IncompleteUploadError,
+    InvalidChunkError,
     Model,
     ModelExistsError,
+    ModelInfo,
     ModelNotFoundError,
     ModelsRepository,
+    QuotaExceededError,
+    UploadNotFoundError,
+    UploadSession,
+)
+from src.core.models_repositories.mirror import MirroredModelsRepository
+from src.core.preloading import PinnedModelsPreloader
+from src.core.profiling import (
+    ProfiledThreadPoolExecutor,
+    SamplingProfiler,
+    iter_profiled,
+    profiled,
+    profiles,
 )
+from src.core.retention import RetentionScheduler, plan_retention
+from src.core.settings import QuotaSettings, Settings
+from src.core.snapshots import SnapshotCompression, iter_snapshot, restore_snapshot
+from src.core.tracing import tracer
+from src.core.versions import Version, VersionRange, is_newer_version
+
+
+@contextlib.asynccontextmanager
+async def lifespan(fastapi_app: FastAPI) -> AsyncIterator[None]:
+    """Preloads the pinned models into the shared cache before the app starts serving requests
+    and starts the background jobs of the app
+    """
+
+    # the worker threads the requests are handed to are sampled by the profilers of the requests
+    asyncio.get_running_loop().set_default_executor(ProfiledThreadPoolExecutor())
+    settings = create_settings()
+    # the settings are read once per worker, the requests don't reconfigure the middlewares
+    tracer.configure(settings.tracing)
+    admission_controller.configure(settings.admission)
+    retention_scheduler = None
+    if settings.retention.enabled:
+        retention_scheduler = RetentionScheduler(
+            create_models_repository(settings), settings.retention
+        )
+        retention_scheduler.start()
+
+    models_cache = create_models_cache(settings)
+    preloader = None
+    if models_cache is not None and settings.cache.pinned:
+        models_repo = create_models_repository(settings)
+        preloader = PinnedModelsPreloader(models_repo, models_cache, settings.cache)
+        with tracer.span("preload_pinned_models"):
+            loaded = await asyncio.to_thread(preloader.preload)
+        logger.info(f"Preloaded {loaded} of {len(settings.cache.pinned)} pinned models")
+
+        model_events.add_listener(preloader.on_model_event)
+        model_events.watch(models_repo)
+        preloader.start()
+        # the bus keeps weak references to the listeners
+        fastapi_app.state.preloader = preloader
+    try:
+        yield
+    finally:
+        if preloader is not None:
+            preloader.stop()
+        if retention_scheduler is not None:
+            retention_scheduler.stop()
+
 
-app = FastAPI(title="model-registry")
+app = FastAPI(title="model-registry", lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/health_check")
@@ -23,16 +113,26 @@ async def health_check() -> str:
     return "I shouldn't have to die to feel alive"
 
 
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    """Exposes the metrics in the Prometheus text format"""
+
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/")
 async def save_model(
     name: str,
     version: str,
     file: UploadFile,
     models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    quotas: Annotated[QuotaSettings, Depends(create_quota_settings)],
 ):
     """Save the model endpoint"""
 
     logger.info("Received the saved model request")
+    if file.size is not None:
+        check_quota(models_repo, quotas, name, file.size)
     input_file_extension = "mlmodel"
     if file.filename is not None:
         path = Path(file.filename)
@@ -40,6 +140,8 @@ async def save_model(
             input_file_extension = path.suffix[1:]
 
     model_content = await file.read()
+    if file.size is None:
+        check_quota(models_repo, quotas, name, len(model_content))
     model = Model(
         name=name,
         version=version,
@@ -57,37 +159,195 @@ async def save_model(
         message = str(err)
         raise HTTPException(status_code=409, detail=message) from err
 
+    except QuotaExceededError as err:
+        message = str(err)
+        raise HTTPException(status_code=413, detail=message) from err
+
+
+@app.put("/models/{name}/{version}")
+async def put_model(
+    name: str,
+    version: str,
+    request: Request,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    quotas: Annotated[QuotaSettings, Depends(create_quota_settings)],
+    content_length: Annotated[int | None, Header(alias="Content-Length", ge=0)] = None,
+    file_extension: Annotated[str | None, Query()] = None,
+    file_extension_header: Annotated[str | None, Header(alias="X-File-Extension")] = None,
+):
+    """Save the model sent as the raw request body endpoint
+
+    The body is streamed right into the storage through an upload session,
+    so it's neither parsed as a form nor spooled to a temporary file
+    """
+
+    logger.info("Received the put model request")
+    if content_length is None:
+        raise HTTPException(status_code=411, detail="Content-Length header is required")
+    file_extension = file_extension or file_extension_header or "mlmodel"
+    check_quota(models_repo, quotas, name, content_length)
+
+    try:
+        session = models_repo.create_upload(name, version, file_extension, content_length)
+    except ModelExistsError as err:
+        message = str(err)
+        raise HTTPException(status_code=409, detail=message) from err
+
+    model_info = None
+    try:
+        await write_upload_stream(models_repo, session, 0, request.stream())
+        model_info = await asyncio.to_thread(models_repo.complete_upload, session.id)
+        message = f"Model {model_info} successfully saved"
+        logger.info(message)
+        return message
+
+    except ModelExistsError as err:
+        message = str(err)
+        raise HTTPException(status_code=409, detail=message) from err
+
+    except QuotaExceededError as err:
+        message = str(err)
+        raise HTTPException(status_code=413, detail=message) from err
+
+    except (InvalidChunkError, IncompleteUploadError) as err:
+        message = f"Body doesn't match the Content-Length header: {err}"
+        raise HTTPException(status_code=400, detail=message) from err
+
+    finally:
+        # the completion removes the session, the failed or disconnected ones are cleaned up here
+        if model_info is None:
+            with contextlib.suppress(UploadNotFoundError):
+                models_repo.abort_upload(session.id)
+
+
+@app.post("/models/{name}/{version}/link")
+async def link_model(
+    name: str,
+    version: str,
+    digest: Annotated[str, Query(pattern=r"^[0-9a-f]{64}$")],
+    size: Annotated[int, Query(ge=0)],
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    quotas: Annotated[QuotaSettings, Depends(create_quota_settings)],
+    file_extension: str = "mlmodel",
+) -> dict:
+    """Save the model by reference to the stored content with the same sha256 digest endpoint
+
+    Publishers send the digest first and upload the model only when the content isn't found
+    """
+
+    logger.info("Received the link model request")
+    check_quota(models_repo, quotas, name, size)
+
+    try:
+        model_info = await asyncio.to_thread(
+            models_repo.save_model_by_digest, name, version, file_extension, digest, size
+        )
+
+    except ModelExistsError as err:
+        message = str(err)
+        raise HTTPException(status_code=409, detail=message) from err
+
+    except QuotaExceededError as err:
+        message = str(err)
+        raise HTTPException(status_code=413, detail=message) from err
+
+    if model_info is None:
+        message = f"No content with digest {digest} and size {size}, upload the model"
+        raise HTTPException(status_code=404, detail=message)
+    logger.info(f"Model {model_info} successfully saved by digest {digest}")
+    return model_info.to_dict()
+
 
 @app.get("/", response_class=Response)
 async def get_model(
     name: str,
     version: str,
     models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    models_cache: Annotated[SharedModelsCache | None, Depends(create_models_cache)],
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    if_range: Annotated[str | None, Header()] = None,
 ):
     """Fetch the model endpoint"""
 
     logger.info("Received the get model request")
 
     try:
-        model = models_repo.get_model(name, version)
-        filename = ModelsRepository.create_model_file_name(name, version, model.file_extension)
-        logger.info(f"Fetched {model} model")
-        return Response(
-            content=model.content,
-            media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
-        )
+        version = models_repo.resolve_version(name, version)
+        cached_model = models_cache.get(name, version) if models_cache is not None else None
+        read_content: Callable[[int, int], bytes | memoryview]
+        if cached_model is not None:
+            # hits are served without the storage, the models deleted or saved again are
+            # invalidated by the model events
+            model_info, digest = cached_model.to_info(), cached_model.digest
+            read_content = functools.partial(slice_content, cached_model.content)
+        else:
+            model_info, digest, read_content = read_stored_model(
+                models_repo, models_cache, name, version
+            )
+        logger.info(f"Fetched {model_info} model")
+        with tracer.span("create_model_response"):
+            return create_model_response(
+                model_info,
+                digest,
+                read_content,
+                range_header=range_header,
+                if_none_match=if_none_match,
+                if_range=if_range,
+            )
 
-    except ModelNotFoundError as err:
+    except (ModelNotFoundError, AliasNotFoundError) as err:
         message = str(err)
         raise HTTPException(status_code=404, detail=message) from err
 
 
+def read_stored_model(
+    models_repo: ModelsRepository,
+    models_cache: SharedModelsCache | None,
+    name: str,
+    version: str,
+) -> tuple[ModelInfo, str, Callable[[int, int], bytes | memoryview]]:
+    """Reads the model missing from the shared cache from the storage
+
+    :param models_repo: repository of the models
+    :param models_cache: shared cache the model is put into, if enabled
+    :param name: name of the model
+    :param version: resolved version of the model
+    :return: info and digest of the model, and the reader of its content parts
+    """
+
+    digest = models_repo.get_model_digest(name, version)
+    if models_cache is None and digest is not None:
+        # only the requested range is read unless the model is cached
+        model_info = models_repo.get_model_info(name, version)
+        return model_info, digest, functools.partial(models_repo.read_model_range, name, version)
+
+    model = models_repo.get_model(name, version)
+    if digest is None:
+        digest = models_repo.calculate_digest(model.content)
+    if models_cache is not None:
+        models_cache.put(model, digest)
+    return model.to_info(), digest, functools.partial(slice_content, model.content)
+
+
+def slice_content(content: bytes | memoryview, offset: int, size: int) -> bytes | memoryview:
+    """Reads a part of the model content kept in memory
+
+    :param content: content of the model
+    :param offset: position of the first byte of the part
+    :param size: number of bytes of the part
+    :return: part of the model content
+    """
+
+    return content[offset : offset + size]
+
+
 @app.delete("/")
 async def delete_model(
     name: str,
     version: str,
     models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    models_cache: Annotated[SharedModelsCache | None, Depends(create_models_cache)],
 ):
     """Delete the model endpoint"""
 
@@ -95,6 +355,10 @@ async def delete_model(
 
     try:
         models_repo.delete_model(name, version)
+        # storages that report the deletions only through their change streams may not notify
+        # the cache of this process
+        if models_cache is not None:
+            models_cache.invalidate(name, version)
         message = f"Model {name}:{version} successfully deleted"
         logger.info(message)
         return message
@@ -102,3 +366,460 @@ async def delete_model(
     except ModelNotFoundError as err:
         message = str(err)
         raise HTTPException(status_code=404, detail=message) from err
+
+
+@app.delete("/models/{name}")
+async def delete_models(
+    name: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    models_cache: Annotated[SharedModelsCache | None, Depends(create_models_cache)],
+    version: str | None = None,
+) -> dict:
+    """Delete every version of the model or the versions that satisfy the range endpoint"""
+
+    logger.info("Received the delete models request")
+    version_range = None
+    if version is not None:
+        version_range = VersionRange.parse(version)
+        if version_range is None:
+            message = f"{version} isn't a range of versions, e.g. `^1.2` or `<2`"
+            raise HTTPException(status_code=400, detail=message)
+
+    deleted = await asyncio.to_thread(models_repo.delete_models, name, version_range)
+    if models_cache is not None:
+        models_cache.invalidate(name)
+    logger.info(f"{deleted} versions of {name} successfully deleted")
+    return {"deleted": deleted}
+
+
+@app.get("/search")
+async def search_models(
+    query: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    mode: Literal["prefix", "substring"] = "prefix",
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    after: str | None = None,
+) -> dict:
+    """Find the model names that start with the query or contain it endpoint
+
+    The next page starts after the `next` name of the previous one, it's null on the last page
+    """
+
+    names = await asyncio.to_thread(
+        models_repo.search_model_names, query, mode == "substring", limit, after
+    )
+    return {"names": names, "next": names[-1] if len(names) == limit else None}
+
+
+@app.get("/usage")
+async def get_usage(
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    name: str | None = None,
+) -> dict:
+    """Returns the number of the stored versions, their total size and the largest version
+    of the model or of every model when the name isn't sent"""
+
+    usage = await asyncio.to_thread(models_repo.get_usage, name)
+    return usage.to_dict()
+
+
+def check_quota(
+    models_repo: ModelsRepository, quotas: QuotaSettings, name: str, size: int
+) -> None:
+    """Rejects the model version that doesn't fit into the quota of the model
+    before its content is received, the storages that count the usage enforce
+    the quota once again when the version is saved
+
+    :raise HTTPException: when the quota is exceeded
+    """
+
+    try:
+        models_repo.check_quota(name, size, quotas.find_max_bytes(name))
+    except QuotaExceededError as err:
+        raise HTTPException(status_code=413, detail=str(err)) from err
+
+
+@app.get("/events", response_class=StreamingResponse)
+async def stream_model_events(
+    request: Request,
+    events: Annotated[ModelEventsBus, Depends(create_model_events)],
+    name: Annotated[list[str] | None, Query()] = None,
+):
+    """Stream the saved and deleted model events as server-sent events endpoint"""
+
+    logger.info("Received the model events subscription request")
+    subscription = events.subscribe(name)
+    return StreamingResponse(
+        iter_server_sent_events(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.put("/aliases")
+async def set_alias(
+    name: str,
+    alias: str,
+    version: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+):
+    """Create the alias of the model version or move it to another version endpoint"""
+
+    logger.info("Received the set alias request")
+
+    try:
+        # aliases point at immutable versions, so ranges are resolved once here
+        version = models_repo.resolve_version(name, version)
+        models_repo.set_alias(name, alias, version)
+        message = f"Alias {name}@{alias} successfully points at {name}:{version}"
+        logger.info(message)
+        return message
+
+    except (ModelNotFoundError, AliasNotFoundError) as err:
+        message = str(err)
+        raise HTTPException(status_code=404, detail=message) from err
+
+
+@app.get("/aliases")
+async def list_aliases(
+    name: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+) -> dict[str, str]:
+    """List the aliases of the model endpoint"""
+
+    logger.info("Received the list aliases request")
+    return models_repo.list_aliases(name)
+
+
+@app.delete("/aliases")
+async def delete_alias(
+    name: str,
+    alias: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+):
+    """Delete the alias of the model endpoint"""
+
+    logger.info("Received the delete alias request")
+
+    try:
+        models_repo.delete_alias(name, alias)
+        message = f"Alias {name}@{alias} successfully deleted"
+        logger.info(message)
+        return message
+
+    except AliasNotFoundError as err:
+        message = str(err)
+        raise HTTPException(status_code=404, detail=message) from err
+
+
+@app.post("/uploads", status_code=201)
+async def create_upload(
+    name: str,
+    version: str,
+    file_extension: str,
+    size: Annotated[int, Query(ge=0)],
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    quotas: Annotated[QuotaSettings, Depends(create_quota_settings)],
+) -> dict:
+    """Start the resumable upload of the model endpoint"""
+
+    logger.info("Received the create upload request")
+    check_quota(models_repo, quotas, name, size)
+
+    try:
+        session = models_repo.create_upload(name, version, file_extension, size)
+        logger.info(f"Upload {session.id} of {name}:{version} successfully created")
+        return session.to_dict()
+
+    except ModelExistsError as err:
+        message = str(err)
+        raise HTTPException(status_code=409, detail=message) from err
+
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(
+    upload_id: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+) -> dict:
+    """Fetch the received chunks and the committed offset of the upload endpoint"""
+
+    try:
+        return models_repo.get_upload(upload_id).to_dict()
+
+    except UploadNotFoundError as err:
+        message = str(err)
+        raise HTTPException(status_code=404, detail=message) from err
+
+
+@app.patch("/uploads/{upload_id}")
+async def write_upload_chunks(
+    upload_id: str,
+    offset: Annotated[int, Query(ge=0)],
+    request: Request,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+) -> dict:
+    """Write the chunks of the upload endpoint
+
+    The body holds one or several consecutive chunks starting at the offset,
+    chunks of one upload may be written in parallel
+    """
+
+    try:
+        session = models_repo.get_upload(upload_id)
+        await write_upload_stream(models_repo, session, offset, request.stream())
+        return models_repo.get_upload(upload_id).to_dict()
+
+    except UploadNotFoundError as err:
+        message = str(err)
+        raise HTTPException(status_code=404, detail=message) from err
+
+    except InvalidChunkError as err:
+        message = str(err)
+        raise HTTPException(status_code=400, detail=message) from err
+
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    quotas: Annotated[QuotaSettings, Depends(create_quota_settings)],
+) -> dict:
+    """Commit the received chunks as the model endpoint
+
+    The quota is checked again, the versions saved since the upload has been created
+    may have taken it
+    """
+
+    logger.info("Received the complete upload request")
+
+    try:
+        session = await asyncio.to_thread(models_repo.get_upload, upload_id)
+        check_quota(models_repo, quotas, session.name, session.size)
+        model_info = await asyncio.to_thread(models_repo.complete_upload, upload_id)
+        logger.info(f"Model {model_info} successfully saved from the upload {upload_id}")
+        return model_info.to_dict()
+
+    except UploadNotFoundError as err:
+        message = str(err)
+        raise HTTPException(status_code=404, detail=message) from err
+
+    except ModelExistsError as err:
+        message = str(err)
+        raise HTTPException(status_code=409, detail=message) from err
+
+    except IncompleteUploadError as err:
+        message = str(err)
+        raise HTTPException(status_code=400, detail=message) from err
+
+    except QuotaExceededError as err:
+        message = str(err)
+        raise HTTPException(status_code=413, detail=message) from err
+
+
+@app.delete("/uploads/{upload_id}")
+async def abort_upload(
+    upload_id: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+):
+    """Abort the upload and remove its chunks endpoint"""
+
+    try:
+        models_repo.abort_upload(upload_id)
+        message = f"Upload {upload_id} successfully aborted"
+        logger.info(message)
+        return message
+
+    except UploadNotFoundError as err:
+        message = str(err)
+        raise HTTPException(status_code=404, detail=message) from err
+
+
+async def write_upload_stream(
+    models_repo: ModelsRepository,
+    session: UploadSession,
+    offset: int,
+    stream: AsyncIterator[bytes],
+) -> None:
+    """Writes the stream to the upload chunk by chunk, so at most one chunk is kept in memory
+
+    :param models_repo: models repository
+    :param session: upload session
+    :param offset: offset of the first chunk
+    :param stream: content of the consecutive chunks
+    :raise InvalidChunkError: when the chunks aren't aligned with the chunks of the session
+    """
+
+    buffer = bytearray()
+    async for data in stream:
+        buffer += data
+        # a full chunk is kept until more data arrives, so the body's last chunk is never empty
+        while len(buffer) > session.chunk_size and offset + session.chunk_size < session.size:
+            with memoryview(buffer) as view:
+                chunk = bytes(view[: session.chunk_size])
+            del buffer[: session.chunk_size]
+            await asyncio.to_thread(models_repo.write_upload_chunk, session.id, offset, chunk)
+            offset += len(chunk)
+        if len(buffer) > session.chunk_size:
+            raise InvalidChunkError(session, offset, len(buffer))
+
+    # the last chunk of the body is either a full one or the last chunk of the model
+    await asyncio.to_thread(models_repo.write_upload_chunk, session.id, offset, bytes(buffer))
+
+
+@app.get("/wait")
+async def wait_for_model(
+    name: str,
+    version: str,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    events: Annotated[ModelEventsBus, Depends(create_model_events)],
+    timeout: Annotated[float, Query(gt=0, le=300)] = 30.0,
+) -> dict:
+    """Wait until the model or any newer version of it is saved endpoint"""
+
+    logger.info("Received the wait for model request")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    # subscribe before looking the model up to not miss it being saved in between
+    with events.subscribe([name]) as subscription:
+        model_info = find_awaited_model(models_repo, name, version)
+        while model_info is None and (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await subscription.get(timeout=remaining)
+            except TimeoutError:
+                break
+
+            if event.type == ModelEventType.SAVED and event.version is not None:
+                if event.version == version or is_newer_version(event.version, version):
+                    model_info = find_awaited_model(models_repo, name, event.version)
+
+    if model_info is None:
+        message = str(ModelNotFoundError(name, version))
+        raise HTTPException(status_code=404, detail=message)
+
+    logger.info(f"Awaited {model_info} model")
+    return model_info.to_dict()
+
+
+def find_awaited_model(models_repo: ModelsRepository, name: str, version: str) -> ModelInfo | None:
+    """Looks up the model or the newest of its newer versions
+
+    :param models_repo: models repository
+    :param name: name of the model
+    :param version: version of the model
+    :return: metadata of the found model or None if neither of the versions exist
+    """
+
+    try:
+        return models_repo.get_model_info(name, version)
+    except ModelNotFoundError:
+        pass
+
+    parsed_version = Version.parse(version)
+    if parsed_version is None:
+        return None
+    newer_version = models_repo.find_latest_version(
+        name, VersionRange(lower=parsed_version, lower_inclusive=False)
+    )
+    if newer_version is None:
+        return None
+    return models_repo.get_model_info(name, newer_version)
+
+
+@app.get("/admin/snapshot", response_class=StreamingResponse)
+@profiled
+def export_snapshot(
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    compression: SnapshotCompression = "none",
+):
+    """Stream every model of the registry as a tar archive endpoint"""
+
+    logger.info("Received the export snapshot request")
+    suffix = "" if compression == "none" else f".{compression}"
+    return StreamingResponse(
+        iter_profiled(iter_snapshot(models_repo, compression)),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f"attachment; filename=snapshot.tar{suffix}"},
+    )
+
+
+@app.post("/admin/snapshot")
+async def import_snapshot(
+    request: Request,
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    compression: SnapshotCompression = "none",
+    batch_size: Annotated[int, Query(gt=0)] = 100,
+    batch_bytes: Annotated[int, Query(gt=0)] = 64 * 1024**2,
+):
+    """Restore the models from the tar archive sent as the request body endpoint"""
+
+    logger.info("Received the import snapshot request")
+    # the archive is read in small blocks, so the chunks of the body are buffered
+    stream = io.BufferedReader(SyncStreamReader(request.stream(), asyncio.get_running_loop()))
+
+    try:
+        restored = await asyncio.to_thread(
+            restore_snapshot, models_repo, stream, compression, batch_size, batch_bytes
+        )
+        message = f"{restored} models successfully restored"
+        logger.info(message)
+        return message
+
+    except ModelExistsError as err:
+        message = str(err)
+        raise HTTPException(status_code=409, detail=message) from err
+
+    except (ValueError, tarfile.TarError) as err:
+        message = f"Invalid snapshot: {err}"
+        raise HTTPException(status_code=400, detail=message) from err
+
+
+@app.get("/admin/replication")
+async def get_replication_status(
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+) -> list[dict]:
+    """Returns the replication lag of every secondary storage of the mirrored repository"""
+
+    if not isinstance(models_repo, MirroredModelsRepository):
+        raise HTTPException(status_code=404, detail="Models repository is not mirrored")
+
+    return [dataclasses.asdict(status) for status in models_repo.get_replication_status()]
+
+
+@app.get("/admin/retention")
+async def get_retention_report(
+    models_repo: Annotated[ModelsRepository, Depends(create_models_repository)],
+    settings: Annotated[Settings, Depends(create_settings)],
+) -> list[dict]:
+    """Returns the model versions the retention rules would delete now without deleting them"""
+
+    expired_models = await asyncio.to_thread(plan_retention, models_repo, settings.retention.rules)
+    return [model_info.to_dict() for model_info in expired_models]
+
+
+@app.post("/admin/profile", response_class=Response)
+async def profile(
+    settings: Annotated[Settings, Depends(create_settings)],
+    seconds: Annotated[float, Query(gt=0, le=60)] = 10.0,
+) -> Response:
+    """Samples the stacks of every thread of the process for the number of seconds
+    and returns them in the folded format of the flame graph tools"""
+
+    if not settings.tracing.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+    profiler = SamplingProfiler(interval=settings.tracing.profiling_interval_seconds)
+    with profiler:
+        await asyncio.sleep(seconds)
+    return Response(content=profiler.render(), media_type="text/plain")
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=Response)
+async def get_profile(profile_id: str) -> Response:
+    """Returns the profile of the request sent with the `X-Profile` header
+    in the folded format of the flame graph tools"""
+
+    folded_stacks = profiles.get(profile_id)
+    if folded_stacks is None:
+        raise HTTPException(status_code=404, detail=f"No such profile: {profile_id}")
+    return Response(content=folded_stacks, media_type="text/plain")
@@ -0,0 +1,80 @@
+import asyncio
+import io
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import Request
+
+from src.core.events import ModelEvent, ModelEventsSubscription
+
+
+class SyncStreamReader(io.RawIOBase):
+    """Blocking file object over an asynchronous stream of chunks
+
+    Lets synchronous code running in a worker thread consume a request body
+    chunk by chunk while the event loop keeps receiving it
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop) -> None:
+        super().__init__()
+        self.chunks = chunks
+        self.loop = loop
+        self.buffer = memoryview(b"")
+        self.exhausted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[override]
+        while not self.buffer and not self.exhausted:
+            future = asyncio.run_coroutine_threadsafe(self._next_chunk(), self.loop)
+            chunk = future.result()
+            if chunk is None:
+                self.exhausted = True
+            else:
+                self.buffer = memoryview(chunk)
+
+        size = min(len(buffer), len(self.buffer))
+        buffer[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    async def _next_chunk(self) -> bytes | None:
+        try:
+            return await anext(self.chunks)
+        except StopAsyncIteration:
+            return None
+
+
+def format_server_sent_event(event: ModelEvent) -> str:
+    """Formats the model event as a server-sent event
+
+    :param event: model event
+    :return: text of the server-sent event
+    """
+
+    return f"event: {event.type}\ndata: {json.dumps(event.to_dict())}\n\n"
+
+
+async def iter_server_sent_events(
+    request: Request, subscription: ModelEventsSubscription, heartbeat_interval: float = 15.0
+) -> AsyncIterator[str]:
+    """Streams the model events of the subscription until the client disconnects
+
+    Comments are sent periodically to keep idle connections open through proxies
+
+    :param request: request of the subscriber
+    :param subscription: subscription to the model events
+    :param heartbeat_interval: number of seconds between the heartbeats
+    :return: iterator over the server-sent events
+    """
+
+    with subscription:
+        yield ": subscribed\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await subscription.get(timeout=heartbeat_interval)
+            except TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            yield format_server_sent_event(event)
@@ -0,0 +1,70 @@
+import threading
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.profiling import SamplingProfiler, profiles, request_profiler
+from src.core.tracing import tracer
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+# the ASGI interface of the middleware is the call
+class TracingMiddleware:  # pylint: disable=too-few-public-methods
+    """ASGI middleware starting the root span of the sampled requests and profiling the requests
+    sent with the `X-Profile` header when profiling is enabled
+
+    The profile of a request covers the event loop thread handling it and the worker threads
+    it's handed to, it's available at `GET /admin/profiles/{profile_id}` once the response is sent
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        traceparent = headers.get(b"traceparent")
+        name = f"{scope['method']} {scope['path']}"
+
+        with tracer.start_trace(
+            name, traceparent.decode("latin-1") if traceparent else None, method=scope["method"]
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if span is not None and message["type"] == "http.response.start":
+                    span.attributes["status"] = message["status"]
+                await send(message)
+
+            if PROFILE_HEADER in headers and tracer.settings.profiling_enabled:
+                await self._profile(scope, receive, send_with_status)
+            else:
+                await self.app(scope, receive, send_with_status)
+
+            if span is not None and scope.get("route") is not None:
+                span.attributes["route"] = scope["route"].path
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [*message.get("headers", []), (PROFILE_ID_HEADER, profile_id.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = SamplingProfiler(
+            interval=tracer.settings.profiling_interval_seconds,
+            thread_ids={threading.get_ident()},
+        )
+        token = request_profiler.set(profiler)
+        try:
+            with profiler:
+                await self.app(scope, receive, send_with_profile_id)
+        finally:
+            request_profiler.reset(token)
+            profiles.put(profile_id, profiler.render())
@@ -0,0 +1,8 @@
+from .cache import CachedModel, CorruptedModelError, ModelsCache
+from .client import (
+    ModelChangedError,
+    ModelExistsError,
+    ModelNotFoundError,
+    ModelRegistryClient,
+    UploadInterruptedError,
+)
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+CONTENT_FILE_NAME = "content"
+METADATA_FILE_NAME = "metadata.json"
+
+
+@dataclass(kw_only=True)
+class CachedModel:
+    """Model stored in the local cache"""
+
+    name: str
+    version: str
+    filename: str
+    etag: str
+    size: int
+    validated_at: float
+    path: Path
+
+    @property
+    def digest(self) -> str:
+        """sha256 digest of the model content"""
+
+        return self.etag.strip('"')
+
+
+class ModelsCache:
+    """Local on-disk cache of the downloaded models
+
+    Every entry is stored in its own directory so the content and the metadata
+    of an entry can be replaced atomically by renaming the directory
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, name: str, version: str) -> CachedModel | None:
+        """Returns the cached model
+
+        :param name: name of the model
+        :param version: version of the model
+        :return: cached model or None if the cache doesn't contain a valid entry
+        """
+
+        entry_dir = self.create_entry_dir(name, version)
+        try:
+            with open(entry_dir / METADATA_FILE_NAME, encoding="utf-8") as file:
+                metadata = json.load(file)
+            cached_model = CachedModel(**metadata, path=entry_dir / CONTENT_FILE_NAME)
+            if cached_model.path.stat().st_size != cached_model.size:
+                return None
+        except (OSError, ValueError, TypeError):
+            return None
+        return cached_model
+
+    def put(
+        self, name: str, version: str, filename: str, etag: str, content_path: Path
+    ) -> CachedModel:
+        """Moves the downloaded model into the cache
+
+        :param name: name of the model
+        :param version: version of the model
+        :param filename: file name of the model returned by the registry
+        :param etag: entity tag of the model returned by the registry
+        :param content_path: path to the downloaded model, the file is moved into the cache
+        :return: cached model
+        :raise CorruptedModelError: when the content doesn't match the entity tag
+        """
+
+        digest = etag.strip('"')
+        actual_digest = calculate_file_digest(content_path)
+        if actual_digest != digest:
+            os.remove(content_path)
+            raise CorruptedModelError(name, version, digest, actual_digest)
+
+        entry_dir = self.create_entry_dir(name, version)
+        staging_dir = Path(f"{entry_dir}.{os.getpid()}.{time.monotonic_ns()}.tmp")
+        staging_dir.mkdir()
+        os.replace(content_path, staging_dir / CONTENT_FILE_NAME)
+        metadata: dict[str, Any] = {
+            "name": name,
+            "version": version,
+            "filename": filename,
+            "etag": etag,
+            "size": (staging_dir / CONTENT_FILE_NAME).stat().st_size,
+            "validated_at": time.time(),
+        }
+        with open(staging_dir / METADATA_FILE_NAME, "w", encoding="utf-8") as file:
+            json.dump(metadata, file)
+
+        self.remove(name, version)
+        try:
+            os.replace(staging_dir, entry_dir)
+        except OSError:
+            # another process has cached the very same model concurrently
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        return CachedModel(**metadata, path=entry_dir / CONTENT_FILE_NAME)
+
+    def touch(self, cached_model: CachedModel) -> None:
+        """Marks the cached model as revalidated with the registry
+
+        :param cached_model: cached model
+        """
+
+        cached_model.validated_at = time.time()
+        metadata = asdict(cached_model)
+        del metadata["path"]
+        metadata_path = cached_model.path.parent / METADATA_FILE_NAME
+        staging_path = metadata_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(staging_path, "w", encoding="utf-8") as file:
+            json.dump(metadata, file)
+        os.replace(staging_path, metadata_path)
+
+    def remove(self, name: str, version: str) -> None:
+        """Removes the model from the cache
+
+        :param name: name of the model
+        :param version: version of the model
+        """
+
+        shutil.rmtree(self.create_entry_dir(name, version), ignore_errors=True)
+
+    def create_entry_dir(self, name: str, version: str) -> Path:
+        """Creates path to the cache entry of the model
+
+        :param name: name of the model
+        :param version: version of the model
+        :return: path to the directory of the cache entry
+        """
+
+        key = hashlib.sha256(f"{name}\0{version}".encode()).hexdigest()
+        return self.directory / key
+
+
+class CorruptedModelError(ValueError):
+    """Raises when the downloaded content doesn't match its digest"""
+
+    def __init__(self, name: str, version: str, expected_digest: str, actual_digest: str) -> None:
+        message = (
+            f"Downloaded model {name}:{version} is corrupted: "
+            f"expected sha256 {expected_digest}, got {actual_digest}"
+        )
+        super().__init__(message)
+
+
+def calculate_file_digest(file_path: str | Path) -> str:
+    """Calculates sha256 digest of the file without reading it into memory at once
+
+    :param file_path: file path
+    :return: hex digest of the file content
+    """
+
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
@@ -0,0 +1,398 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache import CachedModel, ModelsCache, calculate_file_digest
+
+_CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+_FILENAME_PATTERN = re.compile(r"filename=(.+)")
+
+
+class ModelRegistryClient:  # pylint: disable=too-many-instance-attributes
+    """Client of the model registry service
+
+    * HTTP connections are pooled and failed idempotent requests are retried
+    * uploads and downloads are streamed from and to disk
+    * downloaded models are kept in a local cache verified by the content digest
+      and revalidated with the registry through conditional requests
+    * large models are downloaded as several byte ranges in parallel
+    * large models are uploaded as several chunks in parallel and the failed uploads are resumed
+    * published models whose content the registry already holds aren't uploaded again
+    """
+
+    # the options are keyword-only, so they're kept as the attributes of the client
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        base_url: str,
+        *,
+        cache_dir: str | Path | None = None,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        timeout: float = 60.0,
+        chunk_size: int = 8 * 1024 * 1024,
+        max_parallel_downloads: int = 4,
+        max_parallel_uploads: int = 4,
+        revalidate_after: float = 60.0,
+        session: requests.Session | None = None,
+    ) -> None:
+        """
+        :param base_url: URL of the model registry service
+        :param cache_dir: directory of the local cache, caching is disabled when it's None
+        :param pool_size: number of HTTP connections kept open
+        :param max_retries: number of retries of the failed idempotent requests
+        :param timeout: timeout of a single HTTP request in seconds
+        :param chunk_size: size of a downloaded byte range and of an uploaded chunk
+        :param max_parallel_downloads: number of byte ranges downloaded at once
+        :param max_parallel_uploads: number of chunks of a resumable upload sent at once
+        :param revalidate_after: number of seconds a cached model is used
+            without revalidating it with the registry
+        :param session: HTTP session, a new one is created when it's None
+        """
+
+        self.base_url = base_url.rstrip("/")
+        self.cache = ModelsCache(cache_dir) if cache_dir is not None else None
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.max_parallel_downloads = max_parallel_downloads
+        self.max_parallel_uploads = max_parallel_uploads
+        self.revalidate_after = revalidate_after
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            # chunks of the resumable uploads are idempotent, so they are retried as well
+            allowed_methods=frozenset({"GET", "HEAD", "DELETE", "PATCH"}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = session or requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def save_model(self, name: str, version: str, file_path: str | Path) -> None:
+        """Uploads the model file to the registry
+
+        :param name: name of the model
+        :param version: version of the model
+        :param file_path: path to the model file
+        :raise ModelExistsError: when the model with specific version already exist
+        """
+
+        file_path = Path(file_path)
+        size = file_path.stat().st_size
+        with open(file_path, "rb") as file:
+            # the file object is streamed as the raw body, an empty one would be sent chunked
+            response = self.session.put(
+                f"{self.base_url}/models/{quote(name, safe='')}/{quote(version, safe='')}",
+                params={"file_extension": file_path.suffix[1:] or "mlmodel"},
+                data=file if size else b"",
+                headers={"Content-Type": "application/octet-stream", "Content-Length": str(size)},
+                timeout=self.timeout,
+            )
+        if response.status_code == 409:
+            raise ModelExistsError(name, version)
+        response.raise_for_status()
+
+    def publish_model(self, name: str, version: str, file_path: str | Path) -> bool:
+        """Saves the model by reference when the registry already holds identical content,
+        e.g. a republished or promoted model, otherwise uploads the model file
+
+        :param name: name of the model
+        :param version: version of the model
+        :param file_path: path to the model file
+        :return: True if the model file has been uploaded, False if it's been saved by reference
+        :raise ModelExistsError: when the model with specific version already exist
+        """
+
+        file_path = Path(file_path)
+        params: dict[str, str | int] = {
+            "digest": calculate_file_digest(file_path),
+            "size": file_path.stat().st_size,
+            "file_extension": file_path.suffix[1:] or "mlmodel",
+        }
+        response = self.session.post(
+            f"{self.base_url}/models/{quote(name, safe='')}/{quote(version, safe='')}/link",
+            params=params,
+            timeout=self.timeout,
+        )
+        if response.status_code == 409:
+            raise ModelExistsError(name, version)
+        if response.status_code != 404:
+            response.raise_for_status()
+            return False
+
+        self.save_model(name, version, file_path)
+        return True
+
+    def upload_model(
+        self, name: str, version: str, file_path: str | Path, upload_id: str | None = None
+    ) -> None:
+        """Uploads the model file to the registry in chunks through a resumable upload,
+        the chunks are sent in parallel
+
+        :param name: name of the model
+        :param version: version of the model
+        :param file_path: path to the model file
+        :param upload_id: id of the interrupted upload to be resumed, a new upload is started
+            when it's None
+        :raise ModelExistsError: when the model with specific version already exist
+        :raise UploadInterruptedError: when the upload has failed, it can be resumed by its id
+        """
+
+        file_path = Path(file_path)
+        if upload_id is None:
+            upload_id = self._create_upload(name, version, file_path)
+
+        try:
+            self._upload_missing_chunks(upload_id, file_path)
+            response = self.session.post(
+                f"{self.base_url}/uploads/{upload_id}/complete", timeout=self.timeout
+            )
+            if response.status_code == 409:
+                raise ModelExistsError(name, version)
+            response.raise_for_status()
+
+        except (requests.RequestException, OSError) as err:
+            raise UploadInterruptedError(upload_id) from err
+
+    def get_model(self, name: str, version: str, file_path: str | Path | None = None) -> Path:
+        """Downloads the model from the registry
+
+        :param name: name of the model
+        :param version: version of the model
+        :param file_path: path the model is copied to, by default the cached file is returned
+        :return: path to the model file
+        :raise ModelNotFoundError: when the model with specific version doesn't exist
+        """
+
+        cached_model = self.cache.get(name, version) if self.cache is not None else None
+        if cached_model is not None and not self._is_revalidation_required(cached_model):
+            return self._copy_model(cached_model.path, file_path)
+
+        with tempfile.NamedTemporaryFile(
+            dir=self.cache.directory if self.cache is not None else None, delete=False
+        ) as download:
+            download_path = Path(download.name)
+        try:
+            response = self._download_model(name, version, download_path, cached_model)
+            if response.status_code == 304 and cached_model is not None:
+                os.remove(download_path)
+                if self.cache is not None:
+                    self.cache.touch(cached_model)
+                return self._copy_model(cached_model.path, file_path)
+
+            etag = response.headers["ETag"]
+            filename = _FILENAME_PATTERN.findall(response.headers["Content-Disposition"])[0]
+            if self.cache is None:
+                # the file name sent by the server mustn't place the model outside the directory
+                return self._move_model(download_path, file_path or Path(filename).name)
+
+            cached_model = self.cache.put(name, version, filename, etag, download_path)
+            return self._copy_model(cached_model.path, file_path)
+
+        finally:
+            if download_path.exists():
+                os.remove(download_path)
+
+    def delete_model(self, name: str, version: str) -> None:
+        """Deletes the model from the registry and from the local cache
+
+        :param name: name of the model
+        :param version: version of the model
+        :raise ModelNotFoundError: when the model with specific version doesn't exist
+        """
+
+        if self.cache is not None:
+            self.cache.remove(name, version)
+        response = self.session.delete(
+            f"{self.base_url}/", params={"name": name, "version": version}, timeout=self.timeout
+        )
+        if response.status_code == 404:
+            raise ModelNotFoundError(name, version)
+        response.raise_for_status()
+
+    def close(self) -> None:
+        """Closes pooled HTTP connections"""
+
+        self.session.close()
+
+    def __enter__(self) -> "ModelRegistryClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _download_model(
+        self, name: str, version: str, download_path: Path, cached_model: CachedModel | None
+    ) -> requests.Response:
+        """Downloads the first byte range and then the rest of the model in parallel"""
+
+        headers = {"Range": f"bytes=0-{self.chunk_size - 1}"}
+        if cached_model is not None:
+            headers["If-None-Match"] = cached_model.etag
+        response = self._get(name, version, headers)
+        if response.status_code == 304:
+            return response
+
+        with open(download_path, "wb") as file:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                file.write(chunk)
+
+        content_range = response.headers.get("Content-Range")
+        if response.status_code == 206 and content_range is not None:
+            size = int(_CONTENT_RANGE_PATTERN.findall(content_range)[0][2])
+            self._download_ranges(name, version, response.headers["ETag"], download_path, size)
+        return response
+
+    def _download_ranges(
+        self, name: str, version: str, etag: str, download_path: Path, size: int
+    ) -> None:
+        """Downloads the byte ranges following the first one in parallel"""
+
+        byte_ranges = [
+            (start, min(start + self.chunk_size, size) - 1)
+            for start in range(self.chunk_size, size, self.chunk_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_parallel_downloads) as executor:
+            futures = [
+                executor.submit(
+                    self._download_range, name, version, etag, download_path, byte_range
+                )
+                for byte_range in byte_ranges
+            ]
+            for future in futures:
+                future.result()
+
+    def _download_range(
+        self, name: str, version: str, etag: str, download_path: Path, byte_range: tuple[int, int]
+    ) -> None:
+        start, end = byte_range
+        # `If-Range` makes the registry return the whole model if it has been replaced
+        headers = {"Range": f"bytes={start}-{end}", "If-Range": etag}
+        response = self._get(name, version, headers)
+        if response.status_code != 206 or response.headers.get("ETag") != etag:
+            raise ModelChangedError(name, version)
+
+        with open(download_path, "r+b") as file:
+            file.seek(start)
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                file.write(chunk)
+
+    def _create_upload(self, name: str, version: str, file_path: Path) -> str:
+        params: dict[str, str | int] = {
+            "name": name,
+            "version": version,
+            "file_extension": file_path.suffix[1:] or "mlmodel",
+            "size": file_path.stat().st_size,
+        }
+        response = self.session.post(
+            f"{self.base_url}/uploads", params=params, timeout=self.timeout
+        )
+        if response.status_code == 409:
+            raise ModelExistsError(name, version)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def _upload_missing_chunks(self, upload_id: str, file_path: Path) -> None:
+        """Sends the chunks the registry hasn't received yet in parallel"""
+
+        response = self.session.get(f"{self.base_url}/uploads/{upload_id}", timeout=self.timeout)
+        response.raise_for_status()
+        upload = response.json()
+        chunk_size, received_chunks = upload["chunk_size"], set(upload["received_chunks"])
+        chunks_count = max(1, -(-upload["size"] // chunk_size))
+        offsets = [
+            index * chunk_size for index in range(chunks_count) if index not in received_chunks
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_parallel_uploads) as executor:
+            futures = [
+                executor.submit(self._upload_chunk, upload_id, file_path, offset, chunk_size)
+                for offset in offsets
+            ]
+            for future in futures:
+                future.result()
+
+    def _upload_chunk(self, upload_id: str, file_path: Path, offset: int, size: int) -> None:
+        with open(file_path, "rb") as file:
+            chunk = os.pread(file.fileno(), size, offset)
+        response = self.session.patch(
+            f"{self.base_url}/uploads/{upload_id}",
+            params={"offset": offset},
+            data=chunk,
+            headers={"Content-Type": "application/octet-stream"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def _get(self, name: str, version: str, headers: dict) -> requests.Response:
+        response = self.session.get(
+            f"{self.base_url}/",
+            params={"name": name, "version": version},
+            headers=headers,
+            stream=True,
+            timeout=self.timeout,
+        )
+        if response.status_code == 404:
+            raise ModelNotFoundError(name, version)
+        response.raise_for_status()
+        return response
+
+    def _is_revalidation_required(self, cached_model: CachedModel) -> bool:
+        return time.time() - cached_model.validated_at >= self.revalidate_after
+
+    @staticmethod
+    def _copy_model(cached_path: Path, file_path: str | Path | None) -> Path:
+        if file_path is None:
+            return cached_path
+        shutil.copyfile(cached_path, file_path)
+        return Path(file_path)
+
+    @staticmethod
+    def _move_model(download_path: Path, file_path: str | Path) -> Path:
+        shutil.move(download_path, file_path)
+        return Path(file_path)
+
+
+class ModelExistsError(ValueError):
+    """Raises when the model with specific version already exists in the registry"""
+
+    def __init__(self, name: str, version: str) -> None:
+        message = f"Model {name}:{version} exists"
+        super().__init__(message)
+
+
+class ModelNotFoundError(ValueError):
+    """Raises when the model with specific version doesn't exist in the registry"""
+
+    def __init__(self, name: str, version: str) -> None:
+        message = f"No such model: {name}:{version}"
+        super().__init__(message)
+
+
+class ModelChangedError(RuntimeError):
+    """Raises when the model has been replaced in the registry during the download"""
+
+    def __init__(self, name: str, version: str) -> None:
+        message = f"Model {name}:{version} has been changed during the download"
+        super().__init__(message)
+
+
+class UploadInterruptedError(RuntimeError):
+    """Raises when the resumable upload has failed, the upload can be resumed by its id"""
+
+    def __init__(self, upload_id: str) -> None:
+        self.upload_id = upload_id
+        message = f"Upload {upload_id} has been interrupted, resume it by its id"
+        super().__init__(message)
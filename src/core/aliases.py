@@ -0,0 +1,68 @@
+import threading
+import time
+
+from src.core.events import ModelEvent
+from src.core.metrics import cache_requests
+
+
+class AliasesCache:
+    """In-process cache of the resolved aliases
+
+    Entries are invalidated by alias writes and by alias events of other processes,
+    the time to live bounds staleness when the storage doesn't report its changes
+    """
+
+    def __init__(self, ttl: float = 30.0) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[tuple[str, str], tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, alias: str) -> str | None:
+        """Returns the cached version the alias points at
+
+        :param name: name of the model
+        :param alias: alias of the model
+        :return: version or None if the alias isn't cached or has expired
+        """
+
+        with self._lock:
+            entry = self._entries.get((name, alias))
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                cache_requests.inc("aliases", "miss")
+                return None
+            self.hits += 1
+            cache_requests.inc("aliases", "hit")
+            return entry[0]
+
+    def put(self, name: str, alias: str, version: str) -> None:
+        """Caches the version the alias points at
+
+        :param name: name of the model
+        :param alias: alias of the model
+        :param version: version of the model
+        """
+
+        with self._lock:
+            self._entries[(name, alias)] = version, time.monotonic() + self.ttl
+
+    def invalidate(self, name: str, alias: str) -> None:
+        """Removes the alias from the cache
+
+        :param name: name of the model
+        :param alias: alias of the model
+        """
+
+        with self._lock:
+            self._entries.pop((name, alias), None)
+
+    def on_model_event(self, event: ModelEvent) -> None:
+        """Invalidates the alias changed by the event
+
+        :param event: model event
+        """
+
+        if event.alias is not None:
+            self.invalidate(event.name, event.alias)
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+import weakref
+from collections.abc import Callable, Collection
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from src.core.logger import logger
+
+if TYPE_CHECKING:
+    from src.core.models_repositories.base import ModelsRepository
+
+
+class ModelEventType(StrEnum):
+    """Type of the change of a model"""
+
+    SAVED = "saved"
+    DELETED = "deleted"
+    ALIAS_SET = "alias_set"
+    ALIAS_DELETED = "alias_deleted"
+
+
+@dataclass(kw_only=True, frozen=True)
+class ModelEvent:
+    """Change of a model in a storage"""
+
+    type: ModelEventType
+    name: str
+    # None when the storage doesn't report which version has been changed
+    version: str | None
+    alias: str | None = None
+
+    def to_dict(self) -> dict:
+        """Exports an event to a dict
+
+        :return: dictionary representation of the event
+        """
+
+        return asdict(self)
+
+
+class ModelEventsSubscription:
+    """Queue of the events received by one subscriber
+
+    The queue is bounded, the oldest events are dropped when a subscriber falls behind
+    """
+
+    def __init__(
+        self, bus: "ModelEventsBus", names: Collection[str] | None, max_size: int = 1000
+    ) -> None:
+        self.bus = bus
+        self.names = set(names) if names else None
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[ModelEvent] = asyncio.Queue(maxsize=max_size)
+
+    def is_interested(self, event: ModelEvent) -> bool:
+        """Checks if the subscriber waits for the event
+
+        :param event: model event
+        :return: True if the event has to be delivered to the subscriber
+        """
+
+        return self.names is None or event.name in self.names
+
+    def deliver(self, event: ModelEvent) -> None:
+        """Puts the event to the queue, might be called from any thread
+
+        :param event: model event
+        """
+
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    async def get(self, timeout: float | None = None) -> ModelEvent:
+        """Waits for the next event
+
+        :param timeout: number of seconds to wait for, waits forever when it's None
+        :return: model event
+        :raise TimeoutError: when no events received in time
+        """
+
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        """Stops receiving events"""
+
+        self.bus.unsubscribe(self)
+
+    def __enter__(self) -> "ModelEventsSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _put(self, event: ModelEvent) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class ModelEventsBus:
+    """In-process publisher of the model events"""
+
+    def __init__(self) -> None:
+        self._subscriptions: set[ModelEventsSubscription] = set()
+        self._listeners: list[weakref.WeakMethod] = []
+        self._watched_repositories: set[int] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, names: Collection[str] | None = None) -> ModelEventsSubscription:
+        """Subscribes the running event loop to the events
+
+        :param names: names of the models to receive events about, all events when it's None
+        :return: subscription
+        """
+
+        subscription = ModelEventsSubscription(self, names)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ModelEventsSubscription) -> None:
+        """Removes the subscription
+
+        :param subscription: subscription
+        """
+
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def add_listener(self, listener: Callable[[ModelEvent], None]) -> None:
+        """Adds the bound method called synchronously for every published event
+
+        The bus keeps a weak reference, so the listener lives as long as its object
+
+        :param listener: bound method that receives the events
+        """
+
+        with self._lock:
+            self._listeners.append(weakref.WeakMethod(listener))  # type: ignore[arg-type]
+
+    def publish(self, event: ModelEvent) -> None:
+        """Delivers the event to the listeners and the interested subscribers
+
+        :param event: model event
+        """
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self._listeners = [listener for listener in self._listeners if listener() is not None]
+            listeners = [listener() for listener in self._listeners]
+        for listener in listeners:
+            if listener is not None:
+                listener(event)
+        for subscription in subscriptions:
+            if subscription.is_interested(event):
+                subscription.deliver(event)
+
+    def watch(self, models_repo: "ModelsRepository", retry_delay: float = 5.0) -> None:
+        """Publishes the events reported by the storage of the repository in a background thread
+
+        Does nothing when the repository is already watched
+
+        :param models_repo: models repository
+        :param retry_delay: number of seconds to wait before watching again after a failure
+        """
+
+        with self._lock:
+            if id(models_repo) in self._watched_repositories:
+                return
+            self._watched_repositories.add(id(models_repo))
+
+        def publish_storage_events() -> None:
+            while True:
+                try:
+                    for event in models_repo.watch_model_events():
+                        self.publish(event)
+                    return
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    logger.error(f"Failed to watch model events: {err}")
+                    time.sleep(retry_delay)
+
+        thread = threading.Thread(target=publish_storage_events, name="model-events", daemon=True)
+        thread.start()
+
+
+model_events = ModelEventsBus()
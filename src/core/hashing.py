@@ -0,0 +1,70 @@
+import bisect
+import hashlib
+from collections.abc import Iterable
+
+
+def hash_key(key: str) -> int:
+    """Hashes the key to a position on the ring
+
+    :param key: key to hash
+    :return: 64-bit position, stable between processes unlike the builtin `hash`
+    """
+
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing:
+    """Ring of the nodes, every node is placed at several virtual positions
+
+    Adding or removing a node moves only the keys of the arcs that change owners,
+    about `1 / number of nodes` of them
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 128) -> None:
+        self.virtual_nodes = virtual_nodes
+        self._positions: list[int] = []
+        self._owners: list[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> set[str]:
+        """Nodes placed on the ring"""
+
+        return set(self._owners)
+
+    def add_node(self, node: str) -> None:
+        """Places the node on the ring
+
+        :param node: identifier of the node
+        """
+
+        for replica in range(self.virtual_nodes):
+            position = hash_key(f"{node}#{replica}")
+            index = bisect.bisect_left(self._positions, position)
+            self._positions.insert(index, position)
+            self._owners.insert(index, node)
+
+    def remove_node(self, node: str) -> None:
+        """Removes the node from the ring
+
+        :param node: identifier of the node
+        """
+
+        kept = [(p, o) for p, o in zip(self._positions, self._owners) if o != node]
+        self._positions = [position for position, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def get_node(self, key: str) -> str:
+        """Returns the node owning the key
+
+        :param key: key to place
+        :return: identifier of the first node clockwise from the key
+        :raise LookupError: when there are no nodes on the ring
+        """
+
+        if not self._positions:
+            raise LookupError("Hash ring has no nodes")
+
+        index = bisect.bisect_right(self._positions, hash_key(key)) % len(self._positions)
+        return self._owners[index]
@@ -0,0 +1,48 @@
+import fcntl
+from pathlib import Path
+from typing import IO
+
+
+class ProcessLock:
+    """Lock held by a single process of a host at a time, e.g. by the worker that runs
+    the background jobs the other workers of the host skip
+
+    The lock is released by the system once the holder exits
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._file: IO[str] | None = None
+
+    @property
+    def is_held(self) -> bool:
+        """Whether the lock is held by this instance"""
+
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """Takes the lock without waiting for it
+
+        :return: True if the lock has been taken, False if another process holds it
+        """
+
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return False
+        self._file = file
+        return True
+
+    def release(self) -> None:
+        """Releases the lock if it's held"""
+
+        if self._file is None:
+            return
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
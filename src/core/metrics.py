@@ -0,0 +1,360 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Concatenate, ParamSpec, TypeVar
+
+from src.core.tracing import tracer
+
+P = ParamSpec("P")
+S = TypeVar("S")
+T = TypeVar("T")
+M = TypeVar("M", bound="Metric")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 1 KiB .. 4 GiB
+SIZE_BUCKETS = tuple(float(1024 * 4**power) for power in range(12))
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str]) -> str:
+    if not label_names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in label_values
+    )
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(label_names, escaped))
+    return "{" + pairs + "}"
+
+
+# the subclasses add the methods recording their samples
+class Metric(ABC):  # pylint: disable=too-few-public-methods
+    """Base class of the metrics kept in the process memory
+
+    Samples are stored per tuple of the label values, so the labels must have a bounded
+    number of values, e.g. route templates rather than URLs. The samples aren't shared
+    between the processes, so the metrics of the app served by several workers only
+    cover the worker that handles the scrape
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def render(self) -> Iterator[str]:
+        """Renders the metric in the Prometheus text exposition format
+
+        :return: iterator over the lines
+        """
+
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._render_samples()
+
+    @abstractmethod
+    def _render_samples(self) -> Iterator[str]:
+        """Renders the samples of the metric without the comments
+
+        :return: iterator over the lines
+        """
+
+
+class Counter(Metric):
+    """Monotonically increasing value"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        """Increases the value
+
+        :param label_values: values of the labels in the order of their names
+        :param amount: non-negative increment
+        """
+
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, *label_values: str) -> float:
+        """Returns the current value
+
+        :param label_values: values of the labels in the order of their names
+        """
+
+        return self._values.get(label_values, 0.0)
+
+    def _render_samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            labels = _format_labels(self.label_names, label_values)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down"""
+
+    type = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        """Decreases the value
+
+        :param label_values: values of the labels in the order of their names
+        :param amount: decrement
+        """
+
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float) -> None:
+        """Sets the value
+
+        :param label_values: values of the labels in the order of their names
+        :param value: new value
+        """
+
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(Metric):
+    """Distribution of the observed values over the buckets"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # counts by the buckets, the last one is +Inf, followed by the sum of the values
+        self._samples: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Records the value
+
+        :param value: observed value
+        :param label_values: values of the labels in the order of their names
+        """
+
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            samples = self._samples.get(label_values)
+            if samples is None:
+                samples = self._samples[label_values] = [0.0] * (len(self.buckets) + 2)
+            samples[index] += 1
+            samples[-1] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """Records the duration of the block in seconds
+
+        :param label_values: values of the labels in the order of their names
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def get_count(self, *label_values: str) -> int:
+        """Returns the number of the observed values
+
+        :param label_values: values of the labels in the order of their names
+        """
+
+        samples = self._samples.get(label_values)
+        return int(sum(samples[:-1])) if samples else 0
+
+    def _render_samples(self) -> Iterator[str]:
+        with self._lock:
+            samples_by_labels = [
+                (labels, list(values)) for labels, values in self._samples.items()
+            ]
+
+        label_names = (*self.label_names, "le")
+        for label_values, samples in samples_by_labels:
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), samples):
+                cumulative += count
+                labels = _format_labels(label_names, (*label_values, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {_format_value(cumulative)}"
+            labels = _format_labels(self.label_names, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(samples[-1])}"
+            yield f"{self.name}_count{labels} {_format_value(cumulative)}"
+
+
+class MetricsRegistry:
+    """Collection of the metrics exposed by the process"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        """Adds the metric to the registry
+
+        :param metric: metric
+        :return: the metric itself
+        :raise ValueError: when the metric with such name is registered already
+        """
+
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric is registered already: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format"""
+
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_in_flight = registry.register(
+    Gauge("model_registry_http_requests_in_flight", "HTTP requests being handled", ["method"])
+)
+http_request_duration = registry.register(
+    Histogram(
+        "model_registry_http_request_duration_seconds",
+        "Latency of the HTTP requests",
+        ["method", "route", "status"],
+    )
+)
+http_request_size = registry.register(
+    Histogram(
+        "model_registry_http_request_size_bytes",
+        "Size of the HTTP request bodies",
+        ["method", "route"],
+        buckets=SIZE_BUCKETS,
+    )
+)
+http_response_size = registry.register(
+    Histogram(
+        "model_registry_http_response_size_bytes",
+        "Size of the HTTP response bodies",
+        ["method", "route"],
+        buckets=SIZE_BUCKETS,
+    )
+)
+repository_operation_duration = registry.register(
+    Histogram(
+        "model_registry_repository_operation_duration_seconds",
+        "Latency of the models repository operations",
+        ["backend", "operation", "status"],
+    )
+)
+mongo_call_duration = registry.register(
+    Histogram(
+        "model_registry_mongo_call_duration_seconds",
+        "Latency of the Mongo DB calls",
+        ["method"],
+    )
+)
+cache_requests = registry.register(
+    Counter(
+        "model_registry_cache_requests_total",
+        "Lookups of the in-process caches, the hit ratio is hits over all the lookups",
+        ["cache", "result"],
+    )
+)
+admission_in_flight_bytes = registry.register(
+    Gauge(
+        "model_registry_admission_in_flight_bytes",
+        "Bytes of the admitted requests taken from the in-flight budget",
+    )
+)
+admission_rejections = registry.register(
+    Counter(
+        "model_registry_admission_rejections_total",
+        "Requests rejected with 503 after waiting for the admission longer than the timeout",
+        ["route"],
+    )
+)
+
+replication_lag = registry.register(
+    Gauge(
+        "model_registry_replication_lag_seconds",
+        "Age of the oldest operation pending replication to the secondary storage",
+        ["replica"],
+    )
+)
+replication_pending_operations = registry.register(
+    Gauge(
+        "model_registry_replication_pending_operations",
+        "Operations pending replication to the secondary storage",
+        ["replica"],
+    )
+)
+
+retention_deleted_models = registry.register(
+    Counter(
+        "model_registry_retention_deleted_models_total",
+        "Model versions deleted by the retention rules",
+    )
+)
+
+
+def observe_repository_operation(
+    method: Callable[Concatenate[S, P], T],
+) -> Callable[Concatenate[S, P], T]:
+    """Decorates a method of a models repository to record its latency
+    by the backend, the operation and the outcome, and to trace it
+
+    Outcome is `ok` or the name of the raised exception, e.g. `ModelNotFoundError`
+    """
+
+    operation = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self: S, *args: P.args, **kwargs: P.kwargs) -> T:
+        backend = type(self).__name__
+        status = "ok"
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"{backend}.{operation}"):
+                return method(self, *args, **kwargs)
+        except Exception as err:
+            status = type(err).__name__
+            raise
+        finally:
+            repository_operation_duration.observe(
+                time.perf_counter() - start, backend, operation, status
+            )
+
+    return wrapper
+
+
+def observe_mongo_call(method: Callable[P, T]) -> Callable[P, T]:
+    """Decorates a method of the Mongo DB client to record its latency and to trace it"""
+
+    @functools.wraps(method)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        with mongo_call_duration.time(method.__name__), tracer.span(f"mongo.{method.__name__}"):
+            return method(*args, **kwargs)
+
+    return wrapper
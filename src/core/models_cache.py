@@ -0,0 +1,218 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.core.events import ModelEvent, ModelEventType
+from src.core.metrics import cache_requests
+from src.core.models_repositories.base import Model, ModelVersionType
+
+
+@dataclass(kw_only=True, frozen=True)
+class CachedModel(Model):
+    """Model served from the shared cache with the digest of its content"""
+
+    digest: str
+
+
+class SharedModelsCache:
+    """Cache of the model contents shared by the worker processes of a host
+
+    Every model is kept in its own file of a shared memory directory, e.g. `/dev/shm`,
+    which the workers map into their memory, so a model takes the memory once per host
+    and cache hits are served right from the mapping. The modification times of the files
+    order the entries for the LRU eviction, the least recently used ones are evicted
+    once the total size exceeds the budget. The digests of the contents are kept
+    with the entries, so the hits are served without the storage
+    """
+
+    LOCK_FILE_NAME = ".lock"
+    # marks of the pinned entries, the entries themselves are named by the hashes
+    PIN_PREFIX = ".pin."
+    # the header of an entry is prefixed with its length
+    HEADER_LENGTH_SIZE = 4
+    # hits refresh the recency of an entry at most once per this number of seconds
+    TOUCH_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, directory: str | Path, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def get(self, name: str, version: ModelVersionType) -> CachedModel | None:
+        """Returns the cached model, its content is a read-only view of the shared mapping
+
+        :param name: name of the model
+        :param version: version of the model
+        :return: model or None if it isn't cached
+        """
+
+        path = self.create_entry_path(name, version)
+        try:
+            with open(path, "rb") as file:
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            cache_requests.inc("models", "miss")
+            return None
+
+        header_size = int.from_bytes(mapping[: self.HEADER_LENGTH_SIZE], "big")
+        content_offset = self.HEADER_LENGTH_SIZE + header_size
+        header = json.loads(mapping[self.HEADER_LENGTH_SIZE : content_offset])
+        if "digest" not in header:
+            # the entries cached by the previous releases are cached again
+            cache_requests.inc("models", "miss")
+            return None
+        self._touch(path)
+        cache_requests.inc("models", "hit")
+        return CachedModel(
+            name=name,
+            version=version,
+            file_extension=header["file_extension"],
+            content=memoryview(mapping)[content_offset:],
+            digest=header["digest"],
+        )
+
+    def contains(self, name: str, version: ModelVersionType) -> bool:
+        """Checks if the model is cached without mapping it
+
+        :param name: name of the model
+        :param version: version of the model
+        :return: True if the model is cached
+        """
+
+        return self.create_entry_path(name, version).exists()
+
+    def put(self, model: Model, digest: str | None = None) -> None:
+        """Caches the model and evicts the least recently used models over the budget
+
+        :param model: ML model
+        :param digest: sha256 hex digest of the model content, it's calculated when it's None
+        """
+
+        if len(model.content) > self.max_bytes:
+            return
+
+        if digest is None:
+            digest = hashlib.sha256(model.content).hexdigest()
+        header = json.dumps({"file_extension": model.file_extension, "digest": digest}).encode()
+        staging_path = self.directory / f".{uuid.uuid4().hex}.tmp"
+        try:
+            with open(staging_path, "wb") as file:
+                file.write(len(header).to_bytes(self.HEADER_LENGTH_SIZE, "big"))
+                file.write(header)
+                file.write(model.content)
+            # readers see either no entry or the whole one
+            os.replace(staging_path, self.create_entry_path(model.name, model.version))
+        finally:
+            with suppress(FileNotFoundError):
+                os.remove(staging_path)
+        self.evict()
+
+    def invalidate(self, name: str, version: ModelVersionType | None = None) -> None:
+        """Removes the model from the cache, the workers that have mapped it
+        keep serving their mappings until they're released
+
+        :param name: name of the model
+        :param version: version of the model, every version is removed when it's None
+        """
+
+        if version is not None:
+            paths: Iterator[Path] = iter([self.create_entry_path(name, version)])
+        else:
+            paths = self.directory.glob(f"{self._hash(name)}-*")
+        for path in paths:
+            with suppress(FileNotFoundError):
+                os.remove(path)
+
+    def pin(self, name: str, version: ModelVersionType) -> None:
+        """Protects the model from the eviction by every worker, the pinned models still take
+        the budget
+
+        :param name: name of the model
+        :param version: version of the model
+        """
+
+        self._create_pin_path(name, version).touch()
+
+    def unpin(self, name: str, version: ModelVersionType) -> None:
+        """Lets the model be evicted again
+
+        :param name: name of the model
+        :param version: version of the model
+        """
+
+        with suppress(FileNotFoundError):
+            os.remove(self._create_pin_path(name, version))
+
+    def evict(self) -> None:
+        """Removes the least recently used models except the pinned ones
+        until the cached models fit into the budget"""
+
+        with self._locked():
+            entries = []
+            pinned_names = set()
+            total_size = 0
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(self.PIN_PREFIX):
+                    pinned_names.add(entry.name[len(self.PIN_PREFIX) :])
+                if entry.name.startswith("."):
+                    continue
+                with suppress(FileNotFoundError):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path, entry.name))
+                    total_size += stat.st_size
+
+            entries.sort()
+            for _, size, path, entry_name in entries:
+                if total_size <= self.max_bytes:
+                    break
+                if entry_name in pinned_names:
+                    continue
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+                total_size -= size
+
+    def on_model_event(self, event: ModelEvent) -> None:
+        """Invalidates the model deleted or saved again by the event
+
+        :param event: model event
+        """
+
+        if event.type in (ModelEventType.DELETED, ModelEventType.SAVED):
+            self.invalidate(event.name, event.version)
+
+    def create_entry_path(self, name: str, version: ModelVersionType) -> Path:
+        """Creates the path of the cached model, the names and the versions are hashed,
+        so they're safe file names and the versions of a model share the prefix
+
+        :param name: name of the model
+        :param version: version of the model
+        :return: path of the entry
+        """
+
+        return self.directory / f"{self._hash(name)}-{self._hash(version)}"
+
+    def _create_pin_path(self, name: str, version: ModelVersionType) -> Path:
+        return self.directory / f"{self.PIN_PREFIX}{self.create_entry_path(name, version).name}"
+
+    def _touch(self, path: Path) -> None:
+        with suppress(FileNotFoundError):
+            if time.time() - path.stat().st_mtime > self.TOUCH_INTERVAL_SECONDS:
+                os.utime(path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.directory / self.LOCK_FILE_NAME, "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()[:32]
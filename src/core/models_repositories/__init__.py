@@ -1,10 +1,20 @@
 from .base import (
+    AliasNotFoundError,
+    IncompleteUploadError,
+    InvalidChunkError,
     Model,
     ModelExistsError,
     ModelExtensionType,
+    ModelInfo,
     ModelNotFoundError,
     ModelsRepository,
+    ModelsUsage,
     ModelVersionType,
+    QuotaExceededError,
+    UploadNotFoundError,
+    UploadSession,
 )
 from .file_system import FileSystemModelsRepository
+from .mirror import MirroredModelsRepository
 from .mongo import MongoModelsRepository
+from .sharded import ShardedModelsRepository
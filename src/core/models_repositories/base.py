@@ -1,5 +1,12 @@
+import hashlib
+import uuid
 from abc import ABC, abstractmethod
-from dataclasses import asdict, dataclass
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, replace
+
+from src.core.aliases import AliasesCache
+from src.core.events import ModelEvent, model_events
+from src.core.versions import Version, VersionRange
 
 ModelVersionType = str
 ModelExtensionType = str
@@ -9,17 +16,57 @@ ModelExtensionType = str
 class Model:
     """Machine Learning Model"""
 
-    content: bytes
+    # the models served from the shared cache keep a read-only view of the mapping
+    content: bytes | memoryview
     name: str
     version: ModelVersionType
     file_extension: ModelExtensionType
+    # unix time the model has been saved at, kept by the models restored from a snapshot,
+    # the storages save the other models at the current time
+    saved_at: float | None = None
 
     def to_dict(self) -> dict:
-        """Exports a model to a dict
+        """Exports a model to a dict, the content viewed from the cache is copied into bytes
 
         :return: dictionary representation of the model
         """
 
+        return asdict(replace(self, content=bytes(self.content)))
+
+    def to_info(self) -> "ModelInfo":
+        """Describes the model without its content
+
+        :return: metadata of the model
+        """
+
+        return ModelInfo(
+            name=self.name,
+            version=self.version,
+            file_extension=self.file_extension,
+            size=len(self.content),
+        )
+
+    def __str__(self) -> str:
+        return ModelsRepository.create_model_file_name(
+            self.name, self.version, self.file_extension
+        )
+
+
+@dataclass(kw_only=True, frozen=True)
+class ModelInfo:
+    """Metadata of the Machine Learning Model stored in a repository"""
+
+    name: str
+    version: ModelVersionType
+    file_extension: ModelExtensionType
+    size: int
+
+    def to_dict(self) -> dict:
+        """Exports a model metadata to a dict
+
+        :return: dictionary representation of the model metadata
+        """
+
         return asdict(self)
 
     def __str__(self) -> str:
@@ -28,9 +75,151 @@ class Model:
         )
 
 
-class ModelsRepository(ABC):
+@dataclass(kw_only=True, frozen=True)
+class ModelsUsage:
+    """Storage used by the versions of a model or by every model"""
+
+    count: int = 0
+    size: int = 0
+    # the largest version, the name tells the model it belongs to in the usage of every model
+    largest_name: str | None = None
+    largest_version: ModelVersionType | None = None
+    largest_size: int = 0
+
+    @classmethod
+    def combine(cls, usages: Iterable["ModelsUsage"]) -> "ModelsUsage":
+        """Combines the usages of the disjoint sets of the models
+
+        :param usages: usages of the sets of the models
+        :return: usage of every model of the sets
+        """
+
+        usages = list(usages)
+        largest = max(usages, key=lambda usage: usage.largest_size, default=cls())
+        return cls(
+            count=sum(usage.count for usage in usages),
+            size=sum(usage.size for usage in usages),
+            largest_name=largest.largest_name,
+            largest_version=largest.largest_version,
+            largest_size=largest.largest_size,
+        )
+
+    def to_dict(self) -> dict:
+        """Exports the usage to a dict
+
+        :return: dictionary representation of the usage
+        """
+
+        return asdict(self)
+
+
+@dataclass(kw_only=True, frozen=True)
+class UploadSession:
+    """Resumable upload of a model split into the chunks of a fixed size
+
+    Chunks may be written in any order and more than once, the model is committed
+    once every chunk has been received
+    """
+
+    id: str
+    name: str
+    version: ModelVersionType
+    file_extension: ModelExtensionType
+    size: int
+    chunk_size: int
+    received_chunks: tuple[int, ...] = ()
+
+    @property
+    def chunks_count(self) -> int:
+        """Number of the chunks of the model, an empty model has one empty chunk"""
+
+        return max(1, -(-self.size // self.chunk_size))
+
+    @property
+    def committed_offset(self) -> int:
+        """Number of the leading bytes of the model that have been received without gaps"""
+
+        received = set(self.received_chunks)
+        index = 0
+        while index in received:
+            index += 1
+        return min(index * self.chunk_size, self.size)
+
+    @property
+    def is_complete(self) -> bool:
+        """Checks if every chunk has been received"""
+
+        return len(set(self.received_chunks)) == self.chunks_count
+
+    def get_chunk_index(self, offset: int, length: int) -> int:
+        """Returns the index of the chunk written at the offset
+
+        :param offset: offset of the chunk in the model
+        :param length: length of the chunk
+        :return: index of the chunk
+        :raise InvalidChunkError: when the chunk isn't aligned with the chunks of the session
+        """
+
+        index, remainder = divmod(offset, self.chunk_size)
+        expected_length = min(self.chunk_size, self.size - offset)
+        if remainder or index >= self.chunks_count or length != expected_length:
+            raise InvalidChunkError(self, offset, length)
+        return index
+
+    def to_dict(self) -> dict:
+        """Exports the upload session to a dict
+
+        :return: dictionary representation of the upload session
+        """
+
+        session = asdict(self)
+        session["received_chunks"] = sorted(set(self.received_chunks))
+        session["committed_offset"] = self.committed_offset
+        session["is_complete"] = self.is_complete
+        return session
+
+    def to_info(self) -> "ModelInfo":
+        """Describes the model saved by the upload
+
+        :return: metadata of the model
+        """
+
+        return ModelInfo(
+            name=self.name,
+            version=self.version,
+            file_extension=self.file_extension,
+            size=self.size,
+        )
+
+    def to_metadata(self) -> dict:
+        """Exports the fields of the session kept by the storages,
+        the received chunks are tracked by the storages separately
+
+        :return: metadata of the upload session
+        """
+
+        return {
+            "name": self.name,
+            "version": self.version,
+            "file_extension": self.file_extension,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+        }
+
+
+# the repository is the only interface of the storages, it covers the whole lifecycle
+# of the models, their aliases and uploads
+class ModelsRepository(ABC):  # pylint: disable=too-many-public-methods
     """Abstract Models Repository"""
 
+    ALIAS_PREFIX = "@"
+    # chunks of the resumable uploads, the last one may be shorter
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self) -> None:
+        self.aliases_cache = AliasesCache()
+        model_events.add_listener(self.aliases_cache.on_model_event)
+
     @abstractmethod
     def save_model(self, model: Model) -> None:
         """Saves the model to a storage
@@ -39,6 +228,43 @@ class ModelsRepository(ABC):
         :raise ModelExistsError: when the model with specific version already exist
         """
 
+    def save_models(self, models: Iterable[Model]) -> None:
+        """Saves several models to a storage
+
+        Backends that support bulk writes override it to save the models in fewer round trips
+
+        :param models: ML models
+        :raise ModelExistsError: when one of the models with specific version already exist
+        """
+
+        for model in models:
+            self.save_model(model)
+
+    def save_model_by_digest(  # pylint: disable=unused-argument
+        self,
+        name: str,
+        version: ModelVersionType,
+        file_extension: ModelExtensionType,
+        digest: str,
+        size: int,
+    ) -> ModelInfo | None:
+        """Saves the model by reference to the stored content with the same digest,
+        so the content doesn't have to be uploaded again
+
+        Backends that keep an index of the content digests override it,
+        the others never find the content
+
+        :param name: name of the model
+        :param version: version of the model
+        :param file_extension: extension of the model file
+        :param digest: sha256 hex digest of the model content
+        :param size: size of the model in bytes
+        :return: metadata of the saved model or None if there's no such content in a storage
+        :raise ModelExistsError: when the model with specific version already exist
+        """
+
+        return None
+
     @abstractmethod
     def get_model(self, name: str, version: ModelVersionType) -> Model:
         """Returns an ML model
@@ -49,6 +275,50 @@ class ModelsRepository(ABC):
         :raise ModelNotFoundError: when the model with specific version doesn't exist
         """
 
+    @abstractmethod
+    def get_model_info(self, name: str, version: ModelVersionType) -> ModelInfo:
+        """Returns metadata of an ML model without fetching its content
+
+        :param name: name of the model
+        :param version: version of the model
+        :return: metadata of the model
+        :raise ModelNotFoundError: when the model with specific version doesn't exist
+        """
+
+    def get_model_digest(  # pylint: disable=unused-argument
+        self, name: str, version: ModelVersionType
+    ) -> str | None:
+        """Returns the digest of the model content kept by a storage without fetching the content
+
+        Backends that keep the digests override it
+
+        :param name: name of the model
+        :param version: version of the model
+        :return: sha256 hex digest of the model content or None if a storage doesn't keep it
+        :raise ModelNotFoundError: when the model with specific version doesn't exist,
+            the storages that don't keep the digests don't check it
+        """
+
+        return None
+
+    def read_model_range(
+        self, name: str, version: ModelVersionType, offset: int, size: int
+    ) -> bytes:
+        """Reads a part of the model content
+
+        Backends that read a part of the stored content override it,
+        the others fetch the whole model
+
+        :param name: name of the model
+        :param version: version of the model
+        :param offset: position of the first byte of the part
+        :param size: number of bytes of the part
+        :return: part of the model content
+        :raise ModelNotFoundError: when the model with specific version doesn't exist
+        """
+
+        return bytes(self.get_model(name, version).content[offset : offset + size])
+
     @abstractmethod
     def delete_model(self, name: str, version: ModelVersionType) -> None:
         """Deletes the model from a storage
@@ -58,6 +328,309 @@ class ModelsRepository(ABC):
         :raise ModelNotFoundError: when the model with specific version doesn't exist
         """
 
+    def delete_models(self, name: str, version_range: VersionRange | None = None) -> int:
+        """Deletes every version of the model or the release versions that satisfy the range
+
+        Backends that delete several models in one operation override it,
+        the others delete the versions one by one
+
+        :param name: name of the model
+        :param version_range: range of versions, every version is deleted when it's None
+        :return: number of the deleted versions
+        """
+
+        deleted = 0
+        for model_info in list(self.list_models(name)):
+            if not self.is_version_in_range(model_info.version, version_range):
+                continue
+            try:
+                self.delete_model(name, model_info.version)
+            except ModelNotFoundError:
+                # the version has been deleted since it's been listed
+                continue
+            deleted += 1
+        return deleted
+
+    @staticmethod
+    def is_version_in_range(version: ModelVersionType, version_range: VersionRange | None) -> bool:
+        """Checks if the version satisfies the range
+
+        :param version: version of the model
+        :param version_range: range of versions, every version satisfies it when it's None
+        :return: True if the version satisfies the range
+        """
+
+        if version_range is None:
+            return True
+        parsed_version = Version.parse(version)
+        return parsed_version is not None and parsed_version in version_range
+
+    @abstractmethod
+    def list_models(self, name: str | None = None) -> Iterator[ModelInfo]:
+        """Lists the models stored in a storage without fetching their content
+
+        :param name: name of the models to be listed, all the models are listed when it's None
+        :return: iterator over the metadata of the models
+        """
+
+    def search_model_names(
+        self, query: str, is_substring: bool = False, limit: int = 100, after: str | None = None
+    ) -> list[str]:
+        """Finds the names of the stored models that start with the query or contain it
+
+        Backends that maintain an index of the names override it, the others list the models
+
+        :param query: prefix or substring of the names
+        :param is_substring: the names containing the query are found instead of the prefixed ones
+        :param limit: maximum number of the names
+        :param after: the names are returned starting after this one, i.e. the last name
+            of the previous page
+        :return: sorted names
+        """
+
+        names = {
+            model_info.name
+            for model_info in self.list_models()
+            if (query in model_info.name if is_substring else model_info.name.startswith(query))
+            and (after is None or model_info.name > after)
+        }
+        return sorted(names)[:limit]
+
+    def list_saved_times(  # pylint: disable=unused-argument
+        self, name: str
+    ) -> dict[ModelVersionType, float]:
+        """Returns the times the versions of the model have been saved at
+
+        Backends that keep the times override it, the age of the versions is unknown otherwise
+
+        :param name: name of the model
+        :return: unix timestamps by the versions
+        """
+
+        return {}
+
+    def get_usage(self, name: str | None = None) -> ModelsUsage:
+        """Returns the number and the size of the stored versions of the model or of every model
+
+        Backends that maintain the counters on every save and delete override it,
+        the others list the models
+
+        :param name: name of the model, the usage of every model is returned when it's None
+        :return: usage of the storage
+        """
+
+        return ModelsUsage.combine(
+            ModelsUsage(
+                count=1,
+                size=model_info.size,
+                largest_name=model_info.name,
+                largest_version=model_info.version,
+                largest_size=model_info.size,
+            )
+            for model_info in self.list_models(name)
+        )
+
+    def check_quota(self, name: str, size: int, max_bytes: int | None) -> None:
+        """Checks that the model version fits into the quota of the model before it's saved
+
+        :param name: name of the model
+        :param size: size of the version to be saved in bytes
+        :param max_bytes: quota of the model, there's no quota when it's None
+        :raise QuotaExceededError: when the stored versions and the new one exceed the quota
+        """
+
+        if max_bytes is None:
+            return
+        used_bytes = self.get_usage(name).size
+        if used_bytes + size > max_bytes:
+            raise QuotaExceededError(name, used_bytes, size, max_bytes)
+
+    @abstractmethod
+    def find_latest_version(
+        self, name: str, version_range: VersionRange
+    ) -> ModelVersionType | None:
+        """Finds the latest release version of the model that satisfies the range
+
+        :param name: name of the model
+        :param version_range: range of versions
+        :return: the latest version or None if no versions satisfy the range
+        """
+
+    def resolve_version(self, name: str, version: str) -> ModelVersionType:
+        """Resolves `latest`, a range of versions, e.g. `^2.1`, or an alias, e.g. `@production`,
+        to the version of the model
+
+        :param name: name of the model
+        :param version: version, `latest`, a range of versions or an alias prefixed with `@`
+        :return: the version itself if it isn't a range otherwise the latest satisfying version
+        :raise ModelNotFoundError: when no versions satisfy the range
+        :raise AliasNotFoundError: when the alias doesn't exist
+        """
+
+        if version.startswith(self.ALIAS_PREFIX):
+            return self.resolve_alias(name, version[len(self.ALIAS_PREFIX) :])
+
+        version_range = VersionRange.parse(version)
+        if version_range is None:
+            return version
+
+        resolved_version = self.find_latest_version(name, version_range)
+        if resolved_version is None:
+            raise ModelNotFoundError(name, version)
+        return resolved_version
+
+    @abstractmethod
+    def set_alias(self, name: str, alias: str, version: ModelVersionType) -> None:
+        """Creates the alias of the model version or atomically moves it to the version
+
+        :param name: name of the model
+        :param alias: alias of the model, e.g. `production`
+        :param version: version of the model the alias points at
+        :raise ModelNotFoundError: when the model with specific version doesn't exist
+        """
+
+    @abstractmethod
+    def get_alias(self, name: str, alias: str) -> ModelVersionType:
+        """Returns the version the alias points at bypassing the cache
+
+        :param name: name of the model
+        :param alias: alias of the model
+        :return: version of the model
+        :raise AliasNotFoundError: when the alias doesn't exist
+        """
+
+    @abstractmethod
+    def delete_alias(self, name: str, alias: str) -> None:
+        """Deletes the alias, the model version itself is kept
+
+        :param name: name of the model
+        :param alias: alias of the model
+        :raise AliasNotFoundError: when the alias doesn't exist
+        """
+
+    @abstractmethod
+    def list_aliases(self, name: str) -> dict[str, ModelVersionType]:
+        """Lists the aliases of the model
+
+        :param name: name of the model
+        :return: versions by the aliases
+        """
+
+    def resolve_alias(self, name: str, alias: str) -> ModelVersionType:
+        """Returns the version the alias points at using the in-process cache
+
+        :param name: name of the model
+        :param alias: alias of the model
+        :return: version of the model
+        :raise AliasNotFoundError: when the alias doesn't exist
+        """
+
+        version = self.aliases_cache.get(name, alias)
+        if version is None:
+            version = self.get_alias(name, alias)
+            self.aliases_cache.put(name, alias, version)
+        return version
+
+    @abstractmethod
+    def create_upload(
+        self, name: str, version: ModelVersionType, file_extension: ModelExtensionType, size: int
+    ) -> UploadSession:
+        """Starts the resumable upload of the model
+
+        :param name: name of the model
+        :param version: version of the model
+        :param file_extension: extension of the model file
+        :param size: size of the model in bytes
+        :return: upload session
+        :raise ModelExistsError: when the model with specific version already exist
+        """
+
+    def create_upload_session(
+        self, name: str, version: ModelVersionType, file_extension: ModelExtensionType, size: int
+    ) -> UploadSession:
+        """Creates the session of a new resumable upload, the backends stage its chunks
+
+        :param name: name of the model
+        :param version: version of the model
+        :param file_extension: extension of the model file
+        :param size: size of the model in bytes
+        :return: upload session without the received chunks
+        :raise ModelExistsError: when the model with specific version already exist
+        """
+
+        try:
+            self.get_model_info(name, version)
+        except ModelNotFoundError:
+            return UploadSession(
+                id=uuid.uuid4().hex,
+                name=name,
+                version=version,
+                file_extension=file_extension,
+                size=size,
+                chunk_size=self.UPLOAD_CHUNK_SIZE,
+            )
+        raise ModelExistsError(name, version)
+
+    @abstractmethod
+    def get_upload(self, upload_id: str) -> UploadSession:
+        """Returns the upload session with the chunks received so far
+
+        :param upload_id: id of the upload session
+        :return: upload session
+        :raise UploadNotFoundError: when the upload session doesn't exist
+        """
+
+    @abstractmethod
+    def write_upload_chunk(self, upload_id: str, offset: int, data: bytes) -> None:
+        """Stages the chunk of the model, the chunk is overwritten if it has been received
+
+        :param upload_id: id of the upload session
+        :param offset: offset of the chunk in the model
+        :param data: content of the chunk
+        :raise UploadNotFoundError: when the upload session doesn't exist
+        :raise InvalidChunkError: when the chunk isn't aligned with the chunks of the session
+        """
+
+    @abstractmethod
+    def complete_upload(self, upload_id: str) -> ModelInfo:
+        """Atomically commits the staged chunks as the model and removes the upload session
+
+        :param upload_id: id of the upload session
+        :return: metadata of the saved model
+        :raise UploadNotFoundError: when the upload session doesn't exist
+        :raise IncompleteUploadError: when some chunks haven't been received
+        :raise ModelExistsError: when the model has been saved since the upload started
+        """
+
+    @abstractmethod
+    def abort_upload(self, upload_id: str) -> None:
+        """Removes the upload session and its staged chunks
+
+        :param upload_id: id of the upload session
+        :raise UploadNotFoundError: when the upload session doesn't exist
+        """
+
+    def watch_model_events(self) -> Iterator[ModelEvent]:
+        """Watches the changes made to a storage by any process
+
+        Backends that publish their changes to `src.core.events.model_events` themselves
+        don't have to override it
+
+        :return: blocking iterator over the model events
+        """
+
+        return iter(())
+
+    @staticmethod
+    def calculate_digest(content: bytes | memoryview) -> str:
+        """Calculates the digest the content of the models is indexed by
+
+        :param content: content of the model
+        :return: sha256 hex digest of the content
+        """
+
+        return hashlib.sha256(content).hexdigest()
+
     @staticmethod
     def create_model_file_name(
         name: str, version: ModelVersionType, extension: ModelExtensionType
@@ -84,6 +657,17 @@ class ModelExistsError(ValueError):
         super().__init__(message)
 
 
+class QuotaExceededError(ValueError):
+    """Raises when the new version doesn't fit into the quota of the model"""
+
+    def __init__(self, name: str, used_bytes: int, size: int, max_bytes: int) -> None:
+        message = (
+            f"Quota of {name} exceeded: {used_bytes} bytes are used, "
+            f"{size} more bytes don't fit into {max_bytes} bytes"
+        )
+        super().__init__(message)
+
+
 class ModelNotFoundError(ValueError):
     """Raises when the model does not exist in a storage,
     and we're trying to fetch the very same model from the storage"""
@@ -92,3 +676,39 @@ class ModelNotFoundError(ValueError):
         filename = ModelsRepository.create_model_file_name(name, version, "")
         message = f"No such model: {filename}"
         super().__init__(message)
+
+
+class AliasNotFoundError(ValueError):
+    """Raises when the alias of the model does not exist in a storage"""
+
+    def __init__(self, name: str, alias: str) -> None:
+        message = f"No such alias: {name}{ModelsRepository.ALIAS_PREFIX}{alias}"
+        super().__init__(message)
+
+
+class UploadNotFoundError(ValueError):
+    """Raises when the upload session does not exist in a storage"""
+
+    def __init__(self, upload_id: str) -> None:
+        message = f"No such upload: {upload_id}"
+        super().__init__(message)
+
+
+class InvalidChunkError(ValueError):
+    """Raises when the chunk doesn't match the chunks of the upload session"""
+
+    def __init__(self, session: UploadSession, offset: int, length: int) -> None:
+        message = (
+            f"Invalid chunk of {length} bytes at offset {offset}: chunks of the upload "
+            f"{session.id} are {session.chunk_size} bytes long and aligned with it"
+        )
+        super().__init__(message)
+
+
+class IncompleteUploadError(ValueError):
+    """Raises when the upload is committed before every chunk has been received"""
+
+    def __init__(self, session: UploadSession) -> None:
+        missing_chunks = session.chunks_count - len(set(session.received_chunks))
+        message = f"Upload {session.id} misses {missing_chunks} chunks"
+        super().__init__(message)
@@ -1,34 +1,121 @@
+import dataclasses
+import hashlib
+import json
 import os
 import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager, suppress
 from pathlib import Path
+from urllib.parse import quote, unquote
 
+from src.core.events import ModelEvent, ModelEventType, model_events
+from src.core.locks import ProcessLock
+from src.core.logger import logger
+from src.core.metrics import observe_repository_operation
 from src.core.settings import FileSystemModelsRepositorySettings
+from src.core.versions import Version, VersionIndex, VersionRange
 
 from .base import (
+    AliasNotFoundError,
+    IncompleteUploadError,
     Model,
     ModelExistsError,
+    ModelExtensionType,
+    ModelInfo,
     ModelNotFoundError,
     ModelsRepository,
+    ModelsUsage,
     ModelVersionType,
+    UploadNotFoundError,
+    UploadSession,
 )
+from .manifest import Manifest, ManifestEntry
 
 
-class FileSystemModelsRepository(ModelsRepository):
+class FileSystemModelsRepository(ModelsRepository):  # pylint: disable=too-many-public-methods
     """Models repository that uses file system to save models"""
 
+    ALIASES_DIR_NAME = ".aliases"
+    UPLOADS_DIR_NAME = ".uploads"
+    MANIFEST_FILE_NAME = ".manifest"
+    INDEXER_LOCK_FILE_NAME = ".indexer.lock"
+    DIGESTS_BATCH_SIZE = 256
+    UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
     def __init__(self, settings: FileSystemModelsRepositorySettings) -> None:
+        super().__init__()
         self.resources_dir = settings.directory
+        # sorted indexes of versions are built on the first lookup of a model name
+        self._version_indexes: dict[str, VersionIndex] = {}
+        self._version_indexes_lock = threading.Lock()
         # if not os.path.exists(self.resources_dir):
         #     os.mkdir(self.resources_dir)
+        self.manifest = Manifest(Path(self.resources_dir, self.MANIFEST_FILE_NAME))
+        if settings.index_digests:
+            threading.Thread(target=self._run_reconciler, daemon=True).start()
 
+    @observe_repository_operation
     def save_model(self, model: Model) -> None:
         model_path = self.find_model_path(model.name, model.version)
         if model_path is not None:
             raise ModelExistsError(model.name, model.version)
 
-        model_path = self.create_model_path(model)
-        save_binary_data_to_file(model_path, model.content)
+        staging_path = self.create_staging_path()
+        save_binary_data_to_file(staging_path, model.content)
+        try:
+            self.add_model_file(
+                staging_path,
+                model.to_info(),
+                self.calculate_digest(model.content),
+                saved_at_ns=int(model.saved_at * 10**9) if model.saved_at is not None else None,
+            )
+        finally:
+            os.remove(staging_path)
+        self.on_model_saved(model.name, model.version)
+
+    @observe_repository_operation
+    def save_model_by_digest(
+        self,
+        name: str,
+        version: ModelVersionType,
+        file_extension: ModelExtensionType,
+        digest: str,
+        size: int,
+    ) -> ModelInfo | None:
+        if self.find_model_path(name, version) is not None:
+            raise ModelExistsError(name, version)
+
+        self.manifest.refresh()
+        entry = self.manifest.find_by_digest(digest)
+        if entry is None or entry.size != size:
+            return None
+
+        model_info = ModelInfo(
+            name=name, version=version, file_extension=file_extension, size=size
+        )
+        # the staging link pins the recorded file, so it can't be replaced while it's verified
+        staging_path = self.create_staging_path()
+        try:
+            os.link(Path(self.resources_dir, entry.file_name), staging_path)
+        except FileNotFoundError:
+            return None
+        try:
+            if not entry.matches(staging_path.stat()):
+                # the recorded model has been deleted and saved again with another content
+                return None
+            self.add_model_file(staging_path, model_info, digest)
+        finally:
+            os.remove(staging_path)
+
+        self.on_model_saved(name, version)
+        return model_info
 
+    @observe_repository_operation
     def get_model(self, name: str, version) -> Model:
         model_path = self.find_model_path(name, version)
         if model_path is None:
@@ -39,12 +126,485 @@ class FileSystemModelsRepository(ModelsRepository):
         model = Model(content=content, name=name, version=version, file_extension=extension)
         return model
 
-    def delete_model(self, name: str, version: ModelVersionType) -> None:
+    @observe_repository_operation
+    def get_model_info(self, name: str, version: ModelVersionType) -> ModelInfo:
+        model_path = self.find_model_path(name, version)
+        if model_path is None:
+            raise ModelNotFoundError(name, version)
+
+        return ModelInfo(
+            name=name,
+            version=version,
+            file_extension=model_path.suffix[1:],
+            size=model_path.stat().st_size,
+        )
+
+    @observe_repository_operation
+    def get_model_digest(self, name: str, version: ModelVersionType) -> str | None:
+        model_path = self.find_model_path(name, version)
+        if model_path is None:
+            raise ModelNotFoundError(name, version)
+
+        entry = self.manifest.get(model_path.name)
+        # the digests of the files added by hand are calculated by the reconciler later
+        if entry is None or not entry.matches(model_path.stat()):
+            return None
+        return entry.digest
+
+    @observe_repository_operation
+    def read_model_range(
+        self, name: str, version: ModelVersionType, offset: int, size: int
+    ) -> bytes:
         model_path = self.find_model_path(name, version)
         if model_path is None:
             raise ModelNotFoundError(name, version)
 
-        os.remove(model_path)
+        with open(model_path, "rb") as file:
+            return os.pread(file.fileno(), size, offset)
+
+    @observe_repository_operation
+    def delete_model(self, name: str, version: ModelVersionType) -> None:
+        with self.changing_directory():
+            model_path = self.find_model_path(name, version)
+            if model_path is None:
+                raise ModelNotFoundError(name, version)
+
+            os.remove(model_path)
+            self.manifest.delete(model_path.name, os.stat(self.resources_dir).st_mtime_ns)
+        with self._version_indexes_lock:
+            if name in self._version_indexes:
+                self._version_indexes[name].remove(version)
+        model_events.publish(ModelEvent(type=ModelEventType.DELETED, name=name, version=version))
+
+    @observe_repository_operation
+    def delete_models(self, name: str, version_range: VersionRange | None = None) -> int:
+        with self.changing_directory():
+            # the names recorded on save tell the versions of the model apart from the models
+            # which names start with the same prefix, e.g. `my-model-extra`
+            entries = [
+                entry for entry in self.manifest.find(f"{name}-") if entry.name in (name, None)
+            ]
+            models_info = [
+                model_info
+                for entry in entries
+                if (model_info := self.parse_model_file_name(entry.file_name, entry.size, name))
+                and self.is_version_in_range(model_info.version, version_range)
+            ]
+            for model_info in models_info:
+                with suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.resources_dir, str(model_info)))
+            self.manifest.delete_many(
+                [str(model_info) for model_info in models_info],
+                os.stat(self.resources_dir).st_mtime_ns,
+            )
+        with self._version_indexes_lock:
+            self._version_indexes.pop(name, None)
+        for model_info in models_info:
+            model_events.publish(
+                ModelEvent(type=ModelEventType.DELETED, name=name, version=model_info.version)
+            )
+        return len(models_info)
+
+    def list_models(self, name: str | None = None) -> Iterator[ModelInfo]:
+        self.refresh_manifest()
+        for entry in self.manifest.find(f"{name}-" if name is not None else ""):
+            if name is not None and entry.name not in (name, None):
+                continue
+            model_info = self.parse_model_file_name(
+                entry.file_name, entry.size, name or entry.name
+            )
+            if model_info is not None:
+                yield model_info
+
+    @observe_repository_operation
+    def get_usage(self, name: str | None = None) -> ModelsUsage:
+        self.refresh_manifest()
+        count, size, largest_entry = self.manifest.get_usage(name)
+        if largest_entry is None:
+            return ModelsUsage()
+
+        largest = self.parse_model_file_name(
+            largest_entry.file_name, largest_entry.size, largest_entry.name
+        )
+        return ModelsUsage(
+            count=count,
+            size=size,
+            largest_name=largest_entry.name,
+            largest_version=largest.version if largest is not None else None,
+            largest_size=largest_entry.size,
+        )
+
+    @observe_repository_operation
+    def search_model_names(
+        self, query: str, is_substring: bool = False, limit: int = 100, after: str | None = None
+    ) -> list[str]:
+        self.refresh_manifest()
+        return self.manifest.search_names(query, is_substring, limit, after)
+
+    @observe_repository_operation
+    def list_saved_times(self, name: str) -> dict[ModelVersionType, float]:
+        saved_times = {}
+        for model_info in self.list_models(name):
+            entry = self.manifest.get(str(model_info))
+            if entry is not None:
+                # the files added by hand are as old as their content
+                saved_at_ns = (
+                    entry.saved_at_ns if entry.saved_at_ns is not None else entry.mtime_ns
+                )
+                saved_times[model_info.version] = saved_at_ns / 1e9
+        return saved_times
+
+    @observe_repository_operation
+    def find_latest_version(
+        self, name: str, version_range: VersionRange
+    ) -> ModelVersionType | None:
+        with self._version_indexes_lock:
+            version_index = self._version_indexes.get(name)
+            if version_index is None:
+                versions = (model_info.version for model_info in self.list_models(name))
+                version_index = self._version_indexes[name] = VersionIndex(versions)
+            return version_index.find_latest(version_range)
+
+    @observe_repository_operation
+    def set_alias(self, name: str, alias: str, version: ModelVersionType) -> None:
+        if self.find_model_path(name, version) is None:
+            raise ModelNotFoundError(name, version)
+
+        alias_path = self.create_alias_path(name, alias)
+        alias_path.parent.mkdir(parents=True, exist_ok=True)
+        staging_path = alias_path.with_name(f".{alias_path.name}.{os.getpid()}.tmp")
+        save_binary_data_to_file(staging_path, version.encode())
+        os.replace(staging_path, alias_path)
+        self.aliases_cache.invalidate(name, alias)
+        model_events.publish(
+            ModelEvent(type=ModelEventType.ALIAS_SET, name=name, version=version, alias=alias)
+        )
+
+    @observe_repository_operation
+    def get_alias(self, name: str, alias: str) -> ModelVersionType:
+        try:
+            return read_binary_data_from_file(self.create_alias_path(name, alias)).decode()
+        except FileNotFoundError as err:
+            raise AliasNotFoundError(name, alias) from err
+
+    @observe_repository_operation
+    def delete_alias(self, name: str, alias: str) -> None:
+        try:
+            os.remove(self.create_alias_path(name, alias))
+        except FileNotFoundError as err:
+            raise AliasNotFoundError(name, alias) from err
+
+        self.aliases_cache.invalidate(name, alias)
+        model_events.publish(
+            ModelEvent(type=ModelEventType.ALIAS_DELETED, name=name, version=None, alias=alias)
+        )
+
+    @observe_repository_operation
+    def list_aliases(self, name: str) -> dict[str, ModelVersionType]:
+        aliases_dir = self.create_aliases_dir(name)
+        if not aliases_dir.exists():
+            return {}
+
+        aliases = {}
+        for file_name in os.listdir(aliases_dir):
+            if file_name.startswith("."):
+                continue
+            try:
+                aliases[unquote(file_name)] = self.get_alias(name, unquote(file_name))
+            except AliasNotFoundError:
+                continue
+        return aliases
+
+    @observe_repository_operation
+    def create_upload(
+        self, name: str, version: ModelVersionType, file_extension: ModelExtensionType, size: int
+    ) -> UploadSession:
+        session = self.create_upload_session(name, version, file_extension, size)
+        upload_dir = self.create_upload_dir(session.id)
+        os.makedirs(upload_dir / "chunks")
+        session_data = json.dumps(session.to_metadata()).encode()
+        save_binary_data_to_file(upload_dir / "session.json", session_data)
+        # the staged file is sparse until the chunks are written
+        with open(upload_dir / "data.part", "wb") as file:
+            file.truncate(size)
+        return session
+
+    @observe_repository_operation
+    def get_upload(self, upload_id: str) -> UploadSession:
+        session = self.load_upload_session(upload_id)
+        try:
+            chunks = os.listdir(self.create_upload_dir(upload_id) / "chunks")
+        except FileNotFoundError as err:
+            raise UploadNotFoundError(upload_id) from err
+        return dataclasses.replace(session, received_chunks=tuple(int(chunk) for chunk in chunks))
+
+    @observe_repository_operation
+    def write_upload_chunk(self, upload_id: str, offset: int, data: bytes) -> None:
+        # the chunk is validated by the metadata of the session without listing the chunks
+        session = self.load_upload_session(upload_id)
+        index = session.get_chunk_index(offset, len(data))
+        upload_dir = self.create_upload_dir(upload_id)
+        with open(upload_dir / "data.part", "r+b") as file:
+            file.seek(offset)
+            file.write(data)
+            file.flush()
+            # the chunk is marked as received only once it's durable
+            os.fsync(file.fileno())
+        (upload_dir / "chunks" / str(index)).touch()
+
+    @observe_repository_operation
+    def complete_upload(self, upload_id: str) -> ModelInfo:
+        session = self.get_upload(upload_id)
+        if not session.is_complete:
+            raise IncompleteUploadError(session)
+        if self.find_model_path(session.name, session.version) is not None:
+            raise ModelExistsError(session.name, session.version)
+
+        model_info = session.to_info()
+        upload_dir = self.create_upload_dir(upload_id)
+        self.add_model_file(
+            upload_dir / "data.part", model_info, calculate_file_digest(upload_dir / "data.part")
+        )
+        shutil.rmtree(upload_dir)
+        self.on_model_saved(session.name, session.version)
+        return model_info
+
+    @observe_repository_operation
+    def abort_upload(self, upload_id: str) -> None:
+        upload_dir = self.create_upload_dir(upload_id)
+        if not upload_dir.is_dir():
+            raise UploadNotFoundError(upload_id)
+        shutil.rmtree(upload_dir)
+
+    def load_upload_session(self, upload_id: str) -> UploadSession:
+        """Loads the upload session without the received chunks
+
+        :param upload_id: id of the upload session
+        :return: upload session
+        :raise UploadNotFoundError: when the upload session doesn't exist
+        """
+
+        session_path = self.create_upload_dir(upload_id) / "session.json"
+        try:
+            session_data = json.loads(read_binary_data_from_file(session_path))
+        except FileNotFoundError as err:
+            raise UploadNotFoundError(upload_id) from err
+        return UploadSession(id=upload_id, **session_data)
+
+    def _run_reconciler(self) -> None:
+        # the workers sharing the directory skip the files being indexed by the first of them
+        lock = ProcessLock(Path(self.resources_dir, self.INDEXER_LOCK_FILE_NAME))
+        if not lock.acquire():
+            return
+        try:
+            self.reconcile_manifest()
+            indexed = self.index_missing_digests()
+            if indexed:
+                logger.info(f"Calculated the digests of {indexed} models in {self.resources_dir}")
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            logger.error(f"Failed to reconcile the manifest of {self.resources_dir}: {err}")
+        finally:
+            lock.release()
+
+    def on_model_saved(self, name: str, version: ModelVersionType) -> None:
+        """Adds the saved version to the built version index and publishes the event
+
+        :param name: name of the model
+        :param version: version of the model
+        """
+
+        with self._version_indexes_lock:
+            if name in self._version_indexes:
+                self._version_indexes[name].add(version)
+        model_events.publish(ModelEvent(type=ModelEventType.SAVED, name=name, version=version))
+
+    def add_model_file(
+        self,
+        source_path: Path,
+        model_info: ModelInfo,
+        digest: str,
+        saved_at_ns: int | None = None,
+    ) -> None:
+        """Links the file into the directory as the model file and records it in the manifest
+
+        :param source_path: path to the file with the model content on the same file system
+        :param model_info: metadata of the model
+        :param digest: sha256 hex digest of the model content
+        :param saved_at_ns: time the model has been saved at, the current time when it's None
+        :raise ModelExistsError: when the version of the model has already been saved
+        """
+
+        name, version = model_info.name, model_info.version
+        file_name = self.create_model_file_name(name, version, model_info.file_extension)
+        model_path = Path(self.resources_dir, file_name)
+        with self.changing_directory():
+            # the version may've been saved with another extension by the other process
+            if self.find_model_path(name, version) is not None:
+                raise ModelExistsError(name, version)
+            try:
+                # linking never replaces an existing file unlike renaming
+                os.link(source_path, model_path)
+            except FileExistsError as err:
+                raise ModelExistsError(name, version) from err
+            entry = ManifestEntry.from_stat(
+                file_name,
+                model_path.stat(),
+                digest,
+                name,
+                saved_at_ns=saved_at_ns if saved_at_ns is not None else time.time_ns(),
+            )
+            self.manifest.put(entry, os.stat(self.resources_dir).st_mtime_ns)
+
+    def refresh_manifest(self) -> None:
+        """Applies the records of the other processes and records the changes
+        made behind the manifest if the directory has been changed
+        """
+
+        self.manifest.refresh()
+        if not self.manifest.is_synced(os.stat(self.resources_dir).st_mtime_ns):
+            self.reconcile_manifest()
+
+    @contextmanager
+    def changing_directory(self) -> Iterator[None]:
+        """Holds the lock of the manifest while the model files are added or removed,
+        the changes made behind the manifest are recorded before
+        """
+
+        with self.manifest.locked():
+            self.reconcile_manifest()
+            yield
+
+    def reconcile_manifest(self) -> bool:
+        """Records the model files added, changed or removed behind the manifest
+
+        The directory is scanned only if its modification time differs from the recorded one.
+        Only the status of the files is compared, the digests of the new files
+        are calculated later by `index_missing_digests`
+
+        :return: True if the directory has been scanned
+        """
+
+        with self.manifest.locked():
+            self.manifest.refresh()
+            scanned_at_ns = time.time_ns()
+            directory_mtime_ns = os.stat(self.resources_dir).st_mtime_ns
+            if self.manifest.is_synced(directory_mtime_ns):
+                return False
+
+            entries, file_names, ambiguous_file_names = [], set(), []
+            known_names = set(self.manifest.search_names("", limit=sys.maxsize))
+            with os.scandir(self.resources_dir) as dir_entries:
+                for dir_entry in dir_entries:
+                    if dir_entry.name.startswith(".") or not dir_entry.is_file():
+                        continue
+                    file_names.add(dir_entry.name)
+                    stat = dir_entry.stat()
+                    entry = self.manifest.get(dir_entry.name)
+                    if entry is None or not entry.matches(stat):
+                        model_info = self.parse_model_file_name(
+                            dir_entry.name, stat.st_size, known_names=known_names
+                        )
+                        name = model_info.name if model_info is not None else None
+                        if name is None:
+                            ambiguous_file_names.append(dir_entry.name)
+                        entries.append(ManifestEntry.from_stat(dir_entry.name, stat, name=name))
+            removed_file_names = [
+                entry.file_name
+                for entry in self.manifest.find()
+                if entry.file_name not in file_names
+            ]
+            self.manifest.sync(entries, removed_file_names, directory_mtime_ns, scanned_at_ns)
+
+        if ambiguous_file_names:
+            # such files are found by the model name only and aren't counted in the usage
+            logger.warning(
+                f"Couldn't tell the model name from the version of the files added to "
+                f"{self.resources_dir} by hand: {', '.join(sorted(ambiguous_file_names))}"
+            )
+        if entries or removed_file_names:
+            logger.info(
+                f"Reconciled the manifest of {self.resources_dir}: {len(entries)} files "
+                f"added or changed, {len(removed_file_names)} files removed"
+            )
+        return True
+
+    def index_missing_digests(self) -> int:
+        """Calculates the digests of the model files recorded without them
+
+        :return: number of the files indexed
+        """
+
+        indexed = 0
+        digests = {}
+        for entry in self.manifest.find():
+            if entry.digest is not None:
+                continue
+            model_path = Path(self.resources_dir, entry.file_name)
+            try:
+                digest = calculate_file_digest(model_path)
+                if entry.matches(model_path.stat()):
+                    digests[entry] = digest
+            except FileNotFoundError:
+                continue
+
+            # the digests are recorded in batches to hold the lock rarely
+            if len(digests) >= self.DIGESTS_BATCH_SIZE:
+                indexed += self.record_digests(digests)
+                digests = {}
+        return indexed + self.record_digests(digests)
+
+    def record_digests(self, digests: dict[ManifestEntry, str]) -> int:
+        """Records the calculated digests of the model files
+
+        :param digests: digests by the entries they've been calculated for
+        :return: number of the entries that haven't changed since and have been updated
+        """
+
+        if not digests:
+            return 0
+        with self.manifest.locked():
+            return self.manifest.set_digests(digests)
+
+    def create_staging_path(self) -> Path:
+        """Creates full path to a temporary file that's linked into the directory afterwards
+
+        :return: full path to the staging file
+        """
+
+        staging_dir = Path(self.resources_dir, self.UPLOADS_DIR_NAME)
+        staging_dir.mkdir(exist_ok=True)
+        return staging_dir / f"{uuid.uuid4().hex}.tmp"
+
+    def create_upload_dir(self, upload_id: str) -> Path:
+        """Creates full path to the directory of the upload session
+
+        :param upload_id: id of the upload session
+        :return: full path to the directory with the staged chunks
+        :raise UploadNotFoundError: when the id isn't the one created by `create_upload`
+        """
+
+        if not self.UPLOAD_ID_PATTERN.match(upload_id):
+            raise UploadNotFoundError(upload_id)
+        return Path(self.resources_dir, self.UPLOADS_DIR_NAME, upload_id)
+
+    def create_aliases_dir(self, name: str) -> Path:
+        """Creates full path to the directory that keeps the aliases of the model
+
+        :param name: name of the model
+        :return: full path to the aliases directory
+        """
+
+        return Path(self.resources_dir, self.ALIASES_DIR_NAME, quote(name, safe=""))
+
+    def create_alias_path(self, name: str, alias: str) -> Path:
+        """Creates full path to the file that keeps the version the alias points at
+
+        :param name: name of the model
+        :param alias: alias of the model
+        :return: full path to the alias file
+        """
+
+        return self.create_aliases_dir(name) / quote(alias, safe="")
 
     def create_model_path(self, model: Model) -> Path:
         """Creates full path to the model
@@ -57,6 +617,7 @@ class FileSystemModelsRepository(ModelsRepository):
         model_path = Path(self.resources_dir, file_name)
         return model_path
 
+    @observe_repository_operation
     def find_model_path(self, model_name: str, model_version: ModelVersionType) -> Path | None:
         """Finding for the model file by its name and version
 
@@ -65,16 +626,87 @@ class FileSystemModelsRepository(ModelsRepository):
         :return: path to the model binaries if it exists otherwise None
         :raise CompromisedFileStructureError
         """
-        model_pattern = self.create_model_file_name(model_name, model_version, ".*")
-        files = [f for f in os.listdir(self.resources_dir) if re.match(model_pattern, f)]
+        file_name_prefix = self.create_model_file_name(model_name, model_version, "")
+        model_path, is_current = self.lookup_manifest(file_name_prefix)
+        if not is_current:
+            self.reconcile_manifest()
+            model_path, _ = self.lookup_manifest(file_name_prefix)
+        return model_path
+
+    def lookup_manifest(self, file_name_prefix: str) -> tuple[Path | None, bool]:
+        """Looks for the model file in the manifest
+
+        A found file is checked by its status and a missing one
+        by the modification time of the directory
+
+        :param file_name_prefix: name of the model file without the extension
+        :return: path to the model binaries if it's recorded otherwise None
+            and whether the manifest is known to be current
+        :raise CompromisedFileStructureError
+        """
 
-        if len(files) > 1:
-            raise CompromisedFileStructureError(model_pattern, self.resources_dir)
+        self.manifest.refresh()
+        entries = self.manifest.find(file_name_prefix)
+        if len(entries) > 1:
+            raise CompromisedFileStructureError(f"{file_name_prefix}*", self.resources_dir)
 
-        if files:
-            path = Path(os.path.join(self.resources_dir, files[0])).absolute()
-            return path
-        return None
+        if not entries:
+            directory_mtime_ns = os.stat(self.resources_dir).st_mtime_ns
+            return None, self.manifest.is_synced(directory_mtime_ns)
+
+        model_path = Path(self.resources_dir, entries[0].file_name).absolute()
+        try:
+            return model_path, entries[0].matches(model_path.stat())
+        except FileNotFoundError:
+            return None, False
+
+    @staticmethod
+    def parse_model_file_name(
+        file_name: str,
+        size: int,
+        model_name: str | None = None,
+        known_names: Collection[str] = (),
+    ) -> ModelInfo | None:
+        """Parses the model file name created by `create_model_file_name`
+
+        Unless the model name is known in advance, the file name is split at the dash
+        that follows one of the known model names, otherwise at the only dash followed
+        by a semantic version, otherwise at the only dash
+
+        :param file_name: file name of the model
+        :param size: size of the model file in bytes
+        :param model_name: expected model name
+        :param known_names: names of the models saved before
+        :return: metadata of the model or None if the file name doesn't belong to a model
+            or can be split in several ways
+        """
+
+        stem, _, extension = file_name.rpartition(".")
+        if not stem or not extension:
+            return None
+
+        if model_name is None:
+            splits = [
+                (stem[:index], stem[index + 1 :])
+                for index, char in enumerate(stem)
+                if char == "-" and 0 < index < len(stem) - 1
+            ]
+            matched_splits = (
+                [split for split in splits if split[0] in known_names]
+                or [split for split in splits if Version.parse(split[1]) is not None]
+                or splits
+            )
+            if len(matched_splits) != 1:
+                return None
+            name, version = matched_splits[0]
+        elif stem.startswith(f"{model_name}-"):
+            name, version = model_name, stem[len(model_name) + 1 :]
+        else:
+            return None
+
+        if not name or not version:
+            return None
+        return ModelInfo(name=name, version=version, file_extension=extension, size=size)
 
 
 class CompromisedFileStructureError(ValueError):
@@ -88,7 +720,7 @@ class CompromisedFileStructureError(ValueError):
         super().__init__(message)
 
 
-def save_binary_data_to_file(file_path: str | Path, binary_data: bytes) -> None:
+def save_binary_data_to_file(file_path: str | Path, binary_data: bytes | memoryview) -> None:
     """Saves binary data to the file
 
     :param file_path: file path
@@ -108,3 +740,14 @@ def read_binary_data_from_file(file_path: str | Path) -> bytes:
 
     with open(file_path, "rb") as file:
         return file.read()
+
+
+def calculate_file_digest(file_path: str | Path) -> str:
+    """Calculates the digest of the file content without reading it into memory at once
+
+    :param file_path: file path
+    :return: sha256 hex digest of the file content
+    """
+
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
@@ -0,0 +1,469 @@
+import bisect
+import dataclasses
+import fcntl
+import json
+import os
+import threading
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+from src.core.logger import logger
+from src.core.search import NamesIndex
+
+
+class ManifestEntry(NamedTuple):
+    """Model file recorded in the manifest
+
+    The file name keeps the name, the version and the extension of the model.
+    Entries are tuples, so the records of the manifest are loaded quickly
+    """
+
+    file_name: str
+    size: int
+    inode: int
+    mtime_ns: int
+    digest: str | None = None
+    # name of the model, None for the files that don't belong to the models
+    name: str | None = None
+    # time the model has been saved at, None for the files added behind the manifest.
+    # The modification time is shared by the hard links of the versions saved by reference
+    saved_at_ns: int | None = None
+
+    @classmethod
+    def from_stat(
+        cls,
+        file_name: str,
+        stat: os.stat_result,
+        digest: str | None = None,
+        name: str | None = None,
+        saved_at_ns: int | None = None,
+    ) -> "ManifestEntry":
+        """Creates the entry of the file
+
+        :param file_name: name of the model file
+        :param stat: status of the model file
+        :param digest: sha256 hex digest of the file content, None if it isn't calculated yet
+        :param name: name of the model
+        :param saved_at_ns: time the model has been saved at
+        :return: entry of the manifest
+        """
+
+        return cls(
+            file_name, stat.st_size, stat.st_ino, stat.st_mtime_ns, digest, name, saved_at_ns
+        )
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """Checks if the entry still describes the file
+
+        :param stat: status of the model file
+        :return: True if the file hasn't been replaced or changed since it was recorded
+        """
+
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) == (
+            self.inode,
+            self.mtime_ns,
+            self.size,
+        )
+
+
+@dataclasses.dataclass(slots=True)
+class _Usage:
+    count: int = 0
+    size: int = 0
+    largest_entry: ManifestEntry | None = None
+    # the largest entry has been removed, so it's found again on the next read
+    is_largest_stale: bool = False
+
+
+# the in-memory state tracks the position in the log shared with the other processes
+# besides the entries and their indexes
+class Manifest:  # pylint: disable=too-many-instance-attributes
+    """Append-only log of the model files of a directory shared by the processes using it
+
+    Every process keeps the entries in memory and reads the records appended by the others
+    before using them, which costs a single `stat` when nothing has changed. Records of the
+    changes keep the modification time of the directory observed right after them, so the
+    entries are known to be complete while the directory has the same modification time.
+    Once most of the records are superseded the log is compacted into a single snapshot
+    """
+
+    PUT = "put"
+    DELETE = "delete"
+    SYNC = "sync"
+    SNAPSHOT = "snapshot"
+    # a modification time this close to the time it's observed at may not change on the next
+    # change due to the coarse timestamps of the file systems, so it isn't trusted
+    RACY_INTERVAL_NS = 1_000_000_000
+
+    def __init__(self, path: str | Path, min_compaction_records: int = 1024) -> None:
+        """
+        :param path: path to the log, the directory it's in is the one described by it
+        :param min_compaction_records: number of the records appended since the last
+            snapshot the log isn't compacted below
+        """
+
+        self.path = Path(path)
+        self.directory = self.path.parent
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self.min_compaction_records = min_compaction_records
+        self._entries: dict[str, ManifestEntry] = {}
+        # sorted file names of the entries, rebuilt lazily after loading many records
+        self._file_names: list[str] | None = []
+        self._digests: dict[str, set[str]] = {}
+        # usage of the models by their names and of every model by None
+        self._usages: dict[str | None, _Usage] = {}
+        self._names_index = NamesIndex()
+        self._directory_mtime_ns: int | None = None
+        self._records = 0
+        self._offset = 0
+        self._inode: int | None = None
+        self._state_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._lock_depth = 0
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Excludes the changes of the directory made by the other threads and processes,
+        it can be entered again by the holder
+        """
+
+        with self._write_lock:
+            lock_file = None
+            if self._lock_depth == 0:
+                lock_file = open(  # pylint: disable=consider-using-with
+                    self.lock_path, "a", encoding="utf-8"
+                )
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def refresh(self) -> None:
+        """Applies the records appended since the last refresh, the log is read again
+        from the start when it's been compacted
+        """
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        with self._state_lock:
+            if stat.st_ino == self._inode and stat.st_size == self._offset:
+                return
+
+            with open(self.path, "rb") as file:
+                inode = os.fstat(file.fileno()).st_ino
+                if inode != self._inode:
+                    self._reset(inode)
+                file.seek(self._offset)
+                data = file.read()
+
+            # a record being appended is applied once it's complete
+            end = data.rfind(b"\n") + 1
+            lines = data[:end].splitlines()
+            if len(lines) > self.min_compaction_records:
+                self._file_names = None
+            for line in lines:
+                try:
+                    self._apply(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Skipped the malformed record of the manifest {self.path}")
+            self._offset += end
+
+    def is_synced(self, directory_mtime_ns: int) -> bool:
+        """Checks if the entries describe every model file of the directory
+
+        :param directory_mtime_ns: current modification time of the directory
+        :return: True if the directory hasn't been changed since the last recorded change
+        """
+
+        with self._state_lock:
+            return directory_mtime_ns == self._directory_mtime_ns
+
+    def get(self, file_name: str) -> ManifestEntry | None:
+        """Returns the entry of the model file
+
+        :param file_name: name of the model file
+        :return: entry or None if the file isn't recorded
+        """
+
+        with self._state_lock:
+            return self._entries.get(file_name)
+
+    def find(self, prefix: str = "") -> list[ManifestEntry]:
+        """Finds the entries of the model files which names start with the prefix
+
+        :param prefix: prefix of the file names
+        :return: entries sorted by the file names
+        """
+
+        with self._state_lock:
+            if self._file_names is None:
+                self._file_names = sorted(self._entries)
+            entries = []
+            index = bisect.bisect_left(self._file_names, prefix)
+            while index < len(self._file_names) and self._file_names[index].startswith(prefix):
+                entries.append(self._entries[self._file_names[index]])
+                index += 1
+            return entries
+
+    def get_usage(self, name: str | None = None) -> tuple[int, int, ManifestEntry | None]:
+        """Returns the usage of the model files kept up to date by the records
+
+        :param name: name of the model, the usage of every model is returned when it's None
+        :return: number of the files, their total size in bytes and the largest entry
+        """
+
+        with self._state_lock:
+            usage = self._usages.get(name)
+            if usage is None or not usage.count:
+                return 0, 0, None
+            if usage.is_largest_stale:
+                entries = (
+                    entry
+                    for entry in self._entries.values()
+                    if entry.name is not None and (name is None or entry.name == name)
+                )
+                usage.largest_entry = max(entries, key=lambda entry: entry.size)
+                usage.is_largest_stale = False
+            return usage.count, usage.size, usage.largest_entry
+
+    def search_names(
+        self, query: str, is_substring: bool = False, limit: int = 100, after: str | None = None
+    ) -> list[str]:
+        """Finds the names of the models that start with the query or contain it
+
+        :param query: prefix or substring of the names
+        :param is_substring: the names containing the query are found instead of the prefixed ones
+        :param limit: maximum number of the names
+        :param after: the last name of the previous page
+        :return: sorted names
+        """
+
+        with self._state_lock:
+            return self._names_index.search(query, is_substring, limit, after)
+
+    def find_by_digest(self, digest: str) -> ManifestEntry | None:
+        """Finds the entry of a model file with the content digest
+
+        :param digest: sha256 hex digest of the content
+        :return: entry or None if no files with such content are recorded
+        """
+
+        with self._state_lock:
+            file_names = self._digests.get(digest)
+            return self._entries[next(iter(file_names))] if file_names else None
+
+    def put(self, entry: ManifestEntry, directory_mtime_ns: int | None = None) -> None:
+        """Records the model file, the caller holds the lock
+
+        :param entry: entry of the model file
+        :param directory_mtime_ns: modification time of the directory after the file has been
+            added, None if the directory itself hasn't been changed
+        """
+
+        self.append([[self.PUT, entry, directory_mtime_ns]])
+
+    def delete(self, file_name: str, directory_mtime_ns: int) -> None:
+        """Records the removal of the model file, the caller holds the lock
+
+        :param file_name: name of the model file
+        :param directory_mtime_ns: modification time of the directory after the file
+            has been removed
+        """
+
+        self.delete_many([file_name], directory_mtime_ns)
+
+    def delete_many(self, file_names: list[str], directory_mtime_ns: int) -> None:
+        """Records the removal of several model files in one append, the caller holds the lock
+
+        :param file_names: names of the model files
+        :param directory_mtime_ns: modification time of the directory after the files
+            have been removed
+        """
+
+        records: list[list] = [[self.DELETE, file_name, None] for file_name in file_names]
+        if records:
+            records[-1][2] = directory_mtime_ns
+            self.append(records)
+
+    def set_digests(self, digests: dict[ManifestEntry, str]) -> int:
+        """Records the digests of the entries which haven't changed since, the caller holds the lock
+
+        :param digests: digests by the entries they've been calculated for
+        :return: number of the entries updated
+        """
+
+        self.refresh()
+        entries = [
+            entry._replace(digest=digest)
+            for entry, digest in digests.items()
+            if self.get(entry.file_name) == entry
+        ]
+        if entries:
+            self.append([[self.PUT, entry, None] for entry in entries])
+        return len(entries)
+
+    def sync(
+        self,
+        entries: list[ManifestEntry],
+        removed_file_names: list[str],
+        directory_mtime_ns: int,
+        synced_at_ns: int,
+    ) -> None:
+        """Records the differences found by the scan of the directory, the caller holds the lock
+
+        :param entries: entries of the files added or changed behind the manifest
+        :param removed_file_names: names of the files removed behind the manifest
+        :param directory_mtime_ns: modification time of the directory before the scan
+        :param synced_at_ns: time the scan has been started at
+        """
+
+        records: list[list] = [[self.PUT, entry, None] for entry in entries]
+        records += [[self.DELETE, file_name, None] for file_name in removed_file_names]
+        is_trusted = synced_at_ns - directory_mtime_ns > self.RACY_INTERVAL_NS
+        records.append([self.SYNC, directory_mtime_ns if is_trusted else None])
+        self.append(records)
+
+    def append(self, records: list[list]) -> None:
+        """Appends the records to the log and applies them, the caller holds the lock
+
+        :param records: records of the changes
+        """
+
+        data = b"".join(json.dumps(record).encode() + b"\n" for record in records)
+        with open(self.path, "ab") as file:
+            file.write(data)
+        self.refresh()
+        if self._records > max(self.min_compaction_records, len(self._entries) // 2):
+            self.compact()
+
+    def compact(self) -> None:
+        """Replaces the log with the snapshot of the entries, the caller holds the lock"""
+
+        directory_mtime_ns = os.stat(self.directory).st_mtime_ns
+        with self._state_lock:
+            is_synced = directory_mtime_ns == self._directory_mtime_ns
+            entries = list(self._entries.values())
+
+        staging_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        with open(staging_path, "wb") as file:
+            file.write(json.dumps([self.SNAPSHOT, entries]).encode() + b"\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(staging_path, self.path)
+
+        # replacing the log changes the directory itself
+        directory_mtime_ns = os.stat(self.directory).st_mtime_ns
+        with open(self.path, "ab") as file:
+            record = [self.SYNC, directory_mtime_ns if is_synced else None]
+            file.write(json.dumps(record).encode() + b"\n")
+        self.refresh()
+
+    def _reset(self, inode: int) -> None:
+        self._entries.clear()
+        self._file_names = []
+        self._digests.clear()
+        self._usages.clear()
+        self._names_index = NamesIndex()
+        self._directory_mtime_ns = None
+        self._records = 0
+        self._offset = 0
+        self._inode = inode
+
+    def _apply(self, record: list) -> None:
+        record_type = record[0]
+        if record_type == self.SNAPSHOT:
+            # the snapshot starts the compacted log, so it's loaded into the empty state
+            self._entries = {entry[0]: ManifestEntry(*entry) for entry in record[1]}
+            self._file_names = None
+            for entry in self._entries.values():
+                if entry.digest is not None:
+                    self._digests.setdefault(entry.digest, set()).add(entry.file_name)
+                self._add_usage(entry)
+            self._records = 0
+            return
+
+        self._records += 1
+        if record_type == self.PUT:
+            self._add(ManifestEntry(*record[1]))
+            self._set_directory_mtime(record[2])
+        elif record_type == self.DELETE:
+            self._remove(record[1])
+            self._set_directory_mtime(record[2])
+        elif record_type == self.SYNC:
+            self._directory_mtime_ns = record[1]
+
+    def _set_directory_mtime(self, directory_mtime_ns: int | None) -> None:
+        if directory_mtime_ns is not None:
+            self._directory_mtime_ns = directory_mtime_ns
+
+    def _add(self, entry: ManifestEntry) -> None:
+        previous_entry = self._entries.get(entry.file_name)
+        if previous_entry is not None:
+            self._discard_digest(previous_entry)
+            self._remove_usage(previous_entry)
+        elif self._file_names is not None:
+            bisect.insort(self._file_names, entry.file_name)
+
+        self._entries[entry.file_name] = entry
+        if entry.digest is not None:
+            self._digests.setdefault(entry.digest, set()).add(entry.file_name)
+        self._add_usage(entry)
+
+    def _remove(self, file_name: str) -> None:
+        entry = self._entries.pop(file_name, None)
+        if entry is None:
+            return
+
+        self._discard_digest(entry)
+        self._remove_usage(entry)
+        if self._file_names is not None:
+            del self._file_names[bisect.bisect_left(self._file_names, file_name)]
+
+    def _add_usage(self, entry: ManifestEntry) -> None:
+        if entry.name is None:
+            return
+        for name in (entry.name, None):
+            usage = self._usages.get(name)
+            if usage is None:
+                usage = self._usages[name] = _Usage()
+                if name is not None:
+                    self._names_index.add(name)
+            usage.count += 1
+            usage.size += entry.size
+            largest_entry = usage.largest_entry
+            if not usage.is_largest_stale and (
+                largest_entry is None or entry.size > largest_entry.size
+            ):
+                usage.largest_entry = entry
+
+    def _remove_usage(self, entry: ManifestEntry) -> None:
+        if entry.name is None:
+            return
+        for name in (entry.name, None):
+            usage = self._usages[name]
+            usage.count -= 1
+            usage.size -= entry.size
+            if usage.largest_entry is entry:
+                usage.largest_entry = None
+                usage.is_largest_stale = True
+            if not usage.count and name is not None:
+                del self._usages[name]
+                self._names_index.discard(name)
+
+    def _discard_digest(self, entry: ManifestEntry) -> None:
+        if entry.digest is None:
+            return
+        file_names = self._digests[entry.digest]
+        file_names.discard(entry.file_name)
+        if not file_names:
+            del self._digests[entry.digest]
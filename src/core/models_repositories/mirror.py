@@ -0,0 +1,432 @@
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from enum import StrEnum
+
+from src.core.events import ModelEvent
+from src.core.logger import logger
+from src.core.metrics import replication_lag, replication_pending_operations
+from src.core.versions import VersionRange
+
+from .base import (
+    AliasNotFoundError,
+    Model,
+    ModelExistsError,
+    ModelExtensionType,
+    ModelInfo,
+    ModelNotFoundError,
+    ModelsRepository,
+    ModelsUsage,
+    ModelVersionType,
+    UploadSession,
+)
+
+
+class ReplicationOperationType(StrEnum):
+    """Change of the primary storage to be replicated"""
+
+    SAVE_MODEL = "save_model"
+    DELETE_MODEL = "delete_model"
+    # the version of the operation is the range of the deleted versions, None for every version
+    DELETE_MODELS = "delete_models"
+    SET_ALIAS = "set_alias"
+    DELETE_ALIAS = "delete_alias"
+
+
+# the operation is a record of the queue, each field is a column of it
+@dataclass(kw_only=True, frozen=True)
+class ReplicationOperation:  # pylint: disable=too-many-instance-attributes
+    """Pending replication of one change to one secondary storage"""
+
+    id: int
+    replica: int
+    type: ReplicationOperationType
+    name: str
+    version: str | None
+    alias: str | None
+    created_at: float
+    attempts: int
+
+
+@dataclass(kw_only=True, frozen=True)
+class ReplicationStatus:
+    """Replication lag of one secondary storage"""
+
+    replica: int
+    pending_operations: int
+    lag_seconds: float
+
+
+class ReplicationQueue:
+    """Durable queue of the replication operations kept in a sqlite database
+
+    Operations of every replica are applied strictly in order; the head operation
+    is leased to one worker at a time, so several processes can share the queue
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300.0) -> None:
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS operations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, replica INTEGER NOT NULL, "
+            "type TEXT NOT NULL, name TEXT NOT NULL, version TEXT, alias TEXT, "
+            "created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0, leased_until REAL NOT NULL DEFAULT 0)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS operations_by_replica ON operations (replica, id)"
+        )
+
+    def put(
+        self,
+        replicas: Iterable[int],
+        operation_type: ReplicationOperationType,
+        name: str,
+        version: str | None = None,
+        alias: str | None = None,
+    ) -> None:
+        """Enqueues the operation for every replica
+
+        :param replicas: indexes of the secondary storages
+        :param operation_type: type of the operation
+        :param name: name of the model
+        :param version: version of the model
+        :param alias: alias of the model
+        """
+
+        now = time.time()
+        rows = [(replica, operation_type, name, version, alias, now) for replica in replicas]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT INTO operations (replica, type, name, version, alias, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def take(self, replica: int) -> ReplicationOperation | None:
+        """Leases the head operation of the replica if it's due
+
+        :param replica: index of the secondary storage
+        :return: operation or None if there are no due operations
+        """
+
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT id, replica, type, name, version, alias, created_at, attempts, "
+                    "next_attempt_at, leased_until FROM operations "
+                    "WHERE replica = ? ORDER BY id LIMIT 1",
+                    (replica,),
+                ).fetchone()
+                if row is None or row[8] > now or row[9] > now:
+                    self._connection.execute("COMMIT")
+                    return None
+
+                self._connection.execute(
+                    "UPDATE operations SET leased_until = ? WHERE id = ?",
+                    (now + self.lease_seconds, row[0]),
+                )
+                self._connection.execute("COMMIT")
+            except sqlite3.Error:
+                self._connection.execute("ROLLBACK")
+                raise
+
+        return ReplicationOperation(
+            id=row[0],
+            replica=row[1],
+            type=ReplicationOperationType(row[2]),
+            name=row[3],
+            version=row[4],
+            alias=row[5],
+            created_at=row[6],
+            attempts=row[7],
+        )
+
+    def complete(self, operation: ReplicationOperation) -> None:
+        """Removes the applied operation
+
+        :param operation: replication operation
+        """
+
+        with self._lock:
+            self._connection.execute("DELETE FROM operations WHERE id = ?", (operation.id,))
+
+    def postpone(self, operation: ReplicationOperation, delay: float) -> None:
+        """Releases the failed operation to retry it after the delay
+
+        :param operation: replication operation
+        :param delay: number of seconds to wait before the next attempt
+        """
+
+        with self._lock:
+            self._connection.execute(
+                "UPDATE operations SET attempts = attempts + 1, next_attempt_at = ?, "
+                "leased_until = 0 WHERE id = ?",
+                (time.time() + delay, operation.id),
+            )
+
+    def get_status(self, replica: int) -> ReplicationStatus:
+        """Returns the replication lag of the replica
+
+        :param replica: index of the secondary storage
+        :return: number of pending operations and age of the oldest one
+        """
+
+        with self._lock:
+            pending_operations, oldest_created_at = self._connection.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM operations WHERE replica = ?", (replica,)
+            ).fetchone()
+        lag_seconds = time.time() - oldest_created_at if oldest_created_at is not None else 0.0
+        return ReplicationStatus(
+            replica=replica, pending_operations=pending_operations, lag_seconds=lag_seconds
+        )
+
+    def close(self) -> None:
+        """Closes the database"""
+
+        with self._lock:
+            self._connection.close()
+
+
+# the mirror implements the whole repository interface on top of its storages and the state
+# of their replication threads
+# pylint: disable-next=too-many-public-methods,too-many-instance-attributes
+class MirroredModelsRepository(ModelsRepository):
+    """Models repository that acknowledges changes once the primary storage applies them
+    and replicates them to the secondary storages in background threads
+
+    Reads are served by the primary storage. The content of a saved model is read back
+    from the primary storage at the replication time, so the queue keeps only metadata
+    """
+
+    def __init__(
+        self,
+        primary: ModelsRepository,
+        secondaries: list[ModelsRepository],
+        queue_path: str,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ) -> None:
+        super().__init__()
+        self.primary = primary
+        self.secondaries = secondaries
+        self.queue = ReplicationQueue(queue_path)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._wake_ups = [threading.Event() for _ in secondaries]
+        self._stopped = threading.Event()
+        self._workers = [
+            threading.Thread(target=self._replicate, args=(replica,), daemon=True)
+            for replica in range(len(secondaries))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def save_model(self, model: Model) -> None:
+        self.primary.save_model(model)
+        self._enqueue(ReplicationOperationType.SAVE_MODEL, model.name, model.version)
+
+    def save_models(self, models: Iterable[Model]) -> None:
+        models = list(models)
+        self.primary.save_models(models)
+        for model in models:
+            self._enqueue(ReplicationOperationType.SAVE_MODEL, model.name, model.version)
+
+    def save_model_by_digest(
+        self,
+        name: str,
+        version: ModelVersionType,
+        file_extension: ModelExtensionType,
+        digest: str,
+        size: int,
+    ) -> ModelInfo | None:
+        model_info = self.primary.save_model_by_digest(name, version, file_extension, digest, size)
+        if model_info is not None:
+            self._enqueue(ReplicationOperationType.SAVE_MODEL, name, version)
+        return model_info
+
+    def get_model(self, name: str, version: ModelVersionType) -> Model:
+        return self.primary.get_model(name, version)
+
+    def get_model_info(self, name: str, version: ModelVersionType) -> ModelInfo:
+        return self.primary.get_model_info(name, version)
+
+    def get_model_digest(self, name: str, version: ModelVersionType) -> str | None:
+        return self.primary.get_model_digest(name, version)
+
+    def read_model_range(
+        self, name: str, version: ModelVersionType, offset: int, size: int
+    ) -> bytes:
+        return self.primary.read_model_range(name, version, offset, size)
+
+    def delete_model(self, name: str, version: ModelVersionType) -> None:
+        self.primary.delete_model(name, version)
+        self._enqueue(ReplicationOperationType.DELETE_MODEL, name, version)
+
+    def delete_models(self, name: str, version_range: VersionRange | None = None) -> int:
+        deleted = self.primary.delete_models(name, version_range)
+        if deleted:
+            spec = str(version_range) if version_range is not None else None
+            self._enqueue(ReplicationOperationType.DELETE_MODELS, name, spec)
+        return deleted
+
+    def list_models(self, name: str | None = None) -> Iterator[ModelInfo]:
+        return self.primary.list_models(name)
+
+    def get_usage(self, name: str | None = None) -> ModelsUsage:
+        return self.primary.get_usage(name)
+
+    def search_model_names(
+        self, query: str, is_substring: bool = False, limit: int = 100, after: str | None = None
+    ) -> list[str]:
+        return self.primary.search_model_names(query, is_substring, limit, after)
+
+    def list_saved_times(self, name: str) -> dict[ModelVersionType, float]:
+        return self.primary.list_saved_times(name)
+
+    def find_latest_version(
+        self, name: str, version_range: VersionRange
+    ) -> ModelVersionType | None:
+        return self.primary.find_latest_version(name, version_range)
+
+    def set_alias(self, name: str, alias: str, version: ModelVersionType) -> None:
+        self.primary.set_alias(name, alias, version)
+        self.aliases_cache.invalidate(name, alias)
+        self._enqueue(ReplicationOperationType.SET_ALIAS, name, version, alias)
+
+    def get_alias(self, name: str, alias: str) -> ModelVersionType:
+        return self.primary.get_alias(name, alias)
+
+    def delete_alias(self, name: str, alias: str) -> None:
+        self.primary.delete_alias(name, alias)
+        self.aliases_cache.invalidate(name, alias)
+        self._enqueue(ReplicationOperationType.DELETE_ALIAS, name, alias=alias)
+
+    def list_aliases(self, name: str) -> dict[str, ModelVersionType]:
+        return self.primary.list_aliases(name)
+
+    def create_upload(
+        self, name: str, version: ModelVersionType, file_extension: ModelExtensionType, size: int
+    ) -> UploadSession:
+        return self.primary.create_upload(name, version, file_extension, size)
+
+    def get_upload(self, upload_id: str) -> UploadSession:
+        return self.primary.get_upload(upload_id)
+
+    def write_upload_chunk(self, upload_id: str, offset: int, data: bytes) -> None:
+        self.primary.write_upload_chunk(upload_id, offset, data)
+
+    def complete_upload(self, upload_id: str) -> ModelInfo:
+        model_info = self.primary.complete_upload(upload_id)
+        self._enqueue(ReplicationOperationType.SAVE_MODEL, model_info.name, model_info.version)
+        return model_info
+
+    def abort_upload(self, upload_id: str) -> None:
+        self.primary.abort_upload(upload_id)
+
+    def watch_model_events(self) -> Iterator[ModelEvent]:
+        return self.primary.watch_model_events()
+
+    def get_replication_status(self) -> list[ReplicationStatus]:
+        """Returns the replication lag of every secondary storage
+
+        :return: replication lag by the secondary storages
+        """
+
+        return [self.queue.get_status(replica) for replica in range(len(self.secondaries))]
+
+    def close(self) -> None:
+        """Stops the replication, pending operations are kept in the queue"""
+
+        self._stopped.set()
+        for wake_up in self._wake_ups:
+            wake_up.set()
+        for worker in self._workers:
+            worker.join()
+        self.queue.close()
+
+    def _enqueue(
+        self,
+        operation_type: ReplicationOperationType,
+        name: str,
+        version: str | None = None,
+        alias: str | None = None,
+    ) -> None:
+        self.queue.put(range(len(self.secondaries)), operation_type, name, version, alias)
+        for wake_up in self._wake_ups:
+            wake_up.set()
+
+    def _replicate(self, replica: int) -> None:
+        wake_up = self._wake_ups[replica]
+        observed_at = 0.0
+        while not self._stopped.is_set():
+            if time.monotonic() - observed_at >= self.retry_delay:
+                self._observe_replication_status(replica)
+                observed_at = time.monotonic()
+            operation = self.queue.take(replica)
+            if operation is None:
+                # operations enqueued by other processes are picked up by the periodic poll
+                wake_up.wait(timeout=self.retry_delay)
+                wake_up.clear()
+                continue
+
+            try:
+                self._apply(self.secondaries[replica], operation)
+                self.queue.complete(operation)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                delay = min(self.retry_delay * 2**operation.attempts, self.max_retry_delay)
+                logger.warning(
+                    f"Failed to replicate {operation.type} of {operation.name}:{operation.version} "
+                    f"to the replica #{replica}, retrying in {delay:.1f}s: {err}"
+                )
+                self.queue.postpone(operation, delay)
+
+    def _observe_replication_status(self, replica: int) -> None:
+        status = self.queue.get_status(replica)
+        replication_lag.set(str(replica), value=status.lag_seconds)
+        replication_pending_operations.set(str(replica), value=status.pending_operations)
+
+    def _apply(self, secondary: ModelsRepository, operation: ReplicationOperation) -> None:
+        name, version, alias = operation.name, operation.version or "", operation.alias or ""
+
+        if operation.type == ReplicationOperationType.SAVE_MODEL:
+            try:
+                model = self.primary.get_model(name, version)
+            except ModelNotFoundError:
+                # the model has been deleted since, its deletion is replicated next
+                return
+            try:
+                secondary.save_model(model)
+            except ModelExistsError:
+                pass
+
+        elif operation.type == ReplicationOperationType.DELETE_MODEL:
+            try:
+                secondary.delete_model(name, version)
+            except ModelNotFoundError:
+                pass
+
+        elif operation.type == ReplicationOperationType.DELETE_MODELS:
+            version_range = VersionRange.parse(version) if operation.version else None
+            secondary.delete_models(name, version_range)
+
+        elif operation.type == ReplicationOperationType.SET_ALIAS:
+            secondary.set_alias(name, alias, version)
+
+        elif operation.type == ReplicationOperationType.DELETE_ALIAS:
+            try:
+                secondary.delete_alias(name, alias)
+            except AliasNotFoundError:
+                pass
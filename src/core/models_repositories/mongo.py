@@ -1,27 +1,173 @@
+import contextlib
+import dataclasses
+import hashlib
+import re
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from src.core.events import ModelEvent, ModelEventType
+from src.core.logger import logger
+from src.core.metrics import observe_repository_operation
+from src.core.settings import QuotaSettings
+from src.core.versions import Version, VersionRange, create_version_key
 from src.integrations.mongo.client import MongoClient
 
 from .base import (
+    AliasNotFoundError,
+    IncompleteUploadError,
     Model,
     ModelExistsError,
+    ModelExtensionType,
+    ModelInfo,
     ModelNotFoundError,
     ModelsRepository,
+    ModelsUsage,
     ModelVersionType,
+    QuotaExceededError,
+    UploadNotFoundError,
+    UploadSession,
 )
 
 
-class MongoModelsRepository(ModelsRepository):
+class MongoModelsRepository(ModelsRepository):  # pylint: disable=too-many-public-methods
     """Mongo DB implementation of the models repository"""
 
-    def __init__(self, client: MongoClient) -> None:
+    MODEL_INFO_PROJECTION = {
+        "_id": False,
+        "name": True,
+        "version": True,
+        "file_extension": True,
+        # content of the models saved by the resumable uploads is kept in GridFS
+        "size": {"$ifNull": [{"$binarySize": "$content"}, "$size"]},
+    }
+    # collections of the registry itself are prefixed to not clash with the models
+    RESERVED_COLLECTION_PREFIX = "model_registry."
+    ALIASES_COLLECTION_NAME = f"{RESERVED_COLLECTION_PREFIX}aliases"
+    UPLOADS_COLLECTION_NAME = f"{RESERVED_COLLECTION_PREFIX}uploads"
+    # the last saved model of every content digest, models keep the digest of their content
+    DIGESTS_COLLECTION_NAME = f"{RESERVED_COLLECTION_PREFIX}digests"
+    # counters of the stored versions by the model names
+    USAGE_COLLECTION_NAME = f"{RESERVED_COLLECTION_PREFIX}usage"
+    # model names are the collection names, which can't contain `$`
+    ALL_MODELS_USAGE_ID = "$all"
+    COMPLETE_USAGE_FILTER = {"_id": ALL_MODELS_USAGE_ID, "is_complete": True}
+    # the versions claimed by a bulk delete that has died in the middle can be deleted again
+    DELETE_CLAIM_TIMEOUT = timedelta(minutes=10)
+    # the rebuild waits for the writes that keep the counters pending
+    USAGE_REBUILD_ATTEMPTS = 5
+    USAGE_REBUILD_DELAY_SECONDS = 0.2
+    # chunks of the resumable uploads are staged right in the chunks collection of the bucket,
+    # so committing an upload only inserts the file document
+    GRIDFS_BUCKET_NAME = f"{RESERVED_COLLECTION_PREFIX}models"
+    GRIDFS_CHUNKS_COLLECTION_NAME = f"{GRIDFS_BUCKET_NAME}.chunks"
+    GRIDFS_FILES_COLLECTION_NAME = f"{GRIDFS_BUCKET_NAME}.files"
+    CHANGE_STREAM_PIPELINE: list[dict] = [
+        {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete", "drop"]}}},
+        {"$project": {"fullDocument.content": 0, "fullDocumentBeforeChange.content": 0}},
+    ]
+
+    def __init__(self, client: MongoClient, quotas: QuotaSettings | None = None) -> None:
+        super().__init__()
         self.client = client
+        self.quotas = quotas or QuotaSettings()
+        self._indexed_collections: set[str] = set()
+        self._is_usage_complete = False
 
+    @observe_repository_operation
     def save_model(self, model: Model) -> None:
         if self.is_model_exist(model.name, model.version):
             raise ModelExistsError(model.name, model.version)
 
-        data = model.to_dict()
-        self.client.save_one_item(model.name, data)
+        data = self.create_model_document(model)
+        with self.saving_usage(model.to_info()):
+            self.client.save_one_item(model.name, data)
+        self.index_digest(model.name, model.version, data["digest"])
+
+    @observe_repository_operation
+    def save_model_by_digest(
+        self,
+        name: str,
+        version: ModelVersionType,
+        file_extension: ModelExtensionType,
+        digest: str,
+        size: int,
+    ) -> ModelInfo | None:
+        if self.is_model_exist(name, version):
+            raise ModelExistsError(name, version)
+
+        entry = self.client.get_one_item(self.DIGESTS_COLLECTION_NAME, {"_id": digest})
+        if entry is None:
+            return None
+        # the indexed model may have been deleted or saved again with another content since then
+        source_filter = {"version": entry["version"], "digest": digest}
+        projection = {**self.MODEL_INFO_PROJECTION, "gridfs_id": True}
+        source = next(self.client.get_items(entry["name"], source_filter, projection), None)
+        if source is None or source["size"] != size:
+            return None
+
+        model_info = ModelInfo(
+            name=name, version=version, file_extension=file_extension, size=size
+        )
+        document = {**model_info.to_dict(), "digest": digest}
+        self.add_version_key(document)
+        # the content is copied by the server, so it doesn't leave the database
+        with self.saving_usage(model_info):
+            if "gridfs_id" in source:
+                file_name = self.create_model_file_name(name, version, file_extension)
+                document["gridfs_id"] = self.copy_file(source["gridfs_id"], file_name)
+                self.client.save_one_item(name, document)
+            else:
+                del document["size"]
+                self.client.aggregate(
+                    entry["name"],
+                    [
+                        {"$match": source_filter},
+                        {"$project": {"_id": False, "content": True}},
+                        {"$set": {key: {"$literal": value} for key, value in document.items()}},
+                        {"$merge": {"into": name}},
+                    ],
+                )
+        self.index_digest(name, version, digest)
+        return model_info
+
+    @observe_repository_operation
+    def save_models(self, models: Iterable[Model]) -> None:
+        models = list(models)
+        documents_by_name: dict[str, list[dict]] = defaultdict(list)
+        for model in models:
+            documents_by_name[model.name].append(self.create_model_document(model))
+
+        for name, documents in documents_by_name.items():
+            versions = [document["version"] for document in documents]
+            existing_documents = self.client.get_items(
+                name, {"version": {"$in": versions}}, {"_id": False, "version": True}
+            )
+            existing_document = next(existing_documents, None)
+            if existing_document is not None:
+                raise ModelExistsError(name, existing_document["version"])
+
+        # the restored snapshots aren't limited by the quotas
+        with self.changing_usage():
+            for name, documents in documents_by_name.items():
+                self.client.save_many_items(name, documents)
+                self.client.upsert_many_items(
+                    self.DIGESTS_COLLECTION_NAME,
+                    [
+                        (
+                            {"_id": document["digest"]},
+                            {"name": name, "version": document["version"]},
+                        )
+                        for document in documents
+                    ],
+                )
+            self.add_usage([model.to_info() for model in models])
 
+    @observe_repository_operation
     def get_model(self, name: str, version: ModelVersionType) -> Model:
         if not self.is_model_exist(name, version):
             raise ModelNotFoundError(name, version)
@@ -30,17 +176,794 @@ class MongoModelsRepository(ModelsRepository):
         data = self.client.get_one_item(name, filter_)
         if data is None:
             raise ModelNotFoundError(name, version)
-        if "_id" in data:
-            del data["_id"]
-
-        model = Model(**data)
+        if "gridfs_id" in data:
+            content = self.client.read_file(self.GRIDFS_BUCKET_NAME, data["gridfs_id"])
+        else:
+            content = data["content"]
+        model = Model(
+            content=content,
+            name=data["name"],
+            version=data["version"],
+            file_extension=data["file_extension"],
+        )
         return model
 
+    @observe_repository_operation
+    def get_model_info(self, name: str, version: ModelVersionType) -> ModelInfo:
+        filter_ = self.get_mongo_model_filter(version)
+        document = next(self.client.get_items(name, filter_, self.MODEL_INFO_PROJECTION), None)
+        if document is None:
+            raise ModelNotFoundError(name, version)
+
+        return ModelInfo(**document)
+
+    @observe_repository_operation
+    def get_model_digest(self, name: str, version: ModelVersionType) -> str | None:
+        filter_ = self.get_mongo_model_filter(version)
+        projection = {"_id": False, "digest": True}
+        document = next(self.client.get_items(name, filter_, projection), None)
+        if document is None:
+            raise ModelNotFoundError(name, version)
+
+        # the models saved before the digests were introduced don't keep them
+        return document.get("digest")
+
+    @observe_repository_operation
+    def read_model_range(
+        self, name: str, version: ModelVersionType, offset: int, size: int
+    ) -> bytes:
+        filter_ = self.get_mongo_model_filter(version)
+        projection = {"_id": False, "gridfs_id": True, "content": True}
+        document = next(self.client.get_items(name, filter_, projection), None)
+        if document is None:
+            raise ModelNotFoundError(name, version)
+
+        if "gridfs_id" in document:
+            return self.client.read_file_range(
+                self.GRIDFS_BUCKET_NAME, document["gridfs_id"], offset, size
+            )
+        # the content kept in the document is bounded by the size limit of the documents
+        return document["content"][offset : offset + size]
+
+    @observe_repository_operation
     def delete_model(self, name: str, version: ModelVersionType) -> None:
+        with self.changing_usage():
+            # the size is projected so the content isn't loaded just to be deleted
+            document = self.client.delete_one_item_and_return(
+                name,
+                {**self.get_mongo_model_filter(version), **self.create_unclaimed_filter()},
+                {**self.MODEL_INFO_PROJECTION, "gridfs_id": True},
+            )
+            if document is None:
+                raise ModelNotFoundError(name, version)
+            self.remove_usage(name, {version: document["size"]})
+
+        if "gridfs_id" in document:
+            self.client.delete_file(self.GRIDFS_BUCKET_NAME, document["gridfs_id"])
+
+    @observe_repository_operation
+    def delete_models(self, name: str, version_range: VersionRange | None = None) -> int:
+        model_filter = {}
+        if version_range is not None:
+            model_filter["version_key"] = self.create_version_key_filter(version_range)
+        # the versions are claimed by one update first, so neither the versions saved since then
+        # nor the ones deleted by another delete are deleted and subtracted from the usage
+        claim = {"id": uuid.uuid4().hex, "at": datetime.now(timezone.utc)}
+        claimed_filter = {"deleted_by.id": claim["id"]}
+        with self.changing_usage():
+            claimed_count = self.client.update_many_items(
+                name, {**model_filter, **self.create_unclaimed_filter()}, {"deleted_by": claim}
+            )
+            if not claimed_count:
+                return 0
+
+            projection = {**self.MODEL_INFO_PROJECTION, "gridfs_id": True}
+            documents = list(self.client.get_items(name, claimed_filter, projection))
+            self.client.delete_items(name, claimed_filter)
+            self.remove_usage(
+                name, {document["version"]: document["size"] for document in documents}
+            )
+
+        gridfs_ids = [document["gridfs_id"] for document in documents if "gridfs_id" in document]
+        if gridfs_ids:
+            self.client.delete_items(
+                self.GRIDFS_CHUNKS_COLLECTION_NAME, {"files_id": {"$in": gridfs_ids}}
+            )
+            self.client.delete_items(
+                self.GRIDFS_FILES_COLLECTION_NAME, {"_id": {"$in": gridfs_ids}}
+            )
+        return len(documents)
+
+    def create_unclaimed_filter(self) -> dict:
+        """Creates the filter of the versions that aren't claimed by a bulk delete,
+        the claims of the deletes that have died in the middle expire
+
+        :return: filter of the unclaimed versions
+        """
+
+        expired_at = datetime.now(timezone.utc) - self.DELETE_CLAIM_TIMEOUT
+        return {
+            "$or": [{"deleted_by": {"$exists": False}}, {"deleted_by.at": {"$lt": expired_at}}]
+        }
+
+    def list_models(self, name: str | None = None) -> Iterator[ModelInfo]:
+        collection_names = [name] if name is not None else self.get_models_collection_names()
+        for collection_name in collection_names:
+            documents = self.client.get_items(collection_name, {}, self.MODEL_INFO_PROJECTION)
+            for document in documents:
+                yield ModelInfo(**document)
+
+    @observe_repository_operation
+    def list_saved_times(self, name: str) -> dict[ModelVersionType, float]:
+        documents = self.client.get_items(name, {}, {"version": True, "saved_at": True})
+        saved_times = {}
+        for document in documents:
+            if document.get("saved_at") is not None:
+                saved_times[document["version"]] = document["saved_at"]
+            elif isinstance(document["_id"], ObjectId):
+                # ids generated by the driver keep the time the document has been created at
+                saved_times[document["version"]] = document["_id"].generation_time.timestamp()
+        return saved_times
+
+    @observe_repository_operation
+    def get_usage(self, name: str | None = None) -> ModelsUsage:
+        usage_id = name if name is not None else self.ALL_MODELS_USAGE_ID
+        usage_filter = {"_id": {"$in": [usage_id, self.ALL_MODELS_USAGE_ID]}}
+        documents = {
+            document["_id"]: document
+            for document in self.client.get_items(self.USAGE_COLLECTION_NAME, usage_filter)
+        }
+        if documents.get(self.ALL_MODELS_USAGE_ID, {}).get("is_complete"):
+            self._is_usage_complete = True
+        else:
+            documents = self.rebuild_usage()
+
+        document = documents.get(usage_id)
+        if document is None or not document["count"]:
+            return ModelsUsage()
+        largest = document.get("largest") or {}
+        return ModelsUsage(
+            count=document["count"],
+            size=document["size"],
+            largest_name=largest.get("name"),
+            largest_version=largest.get("version"),
+            largest_size=largest.get("size", 0),
+        )
+
+    @observe_repository_operation
+    def search_model_names(
+        self, query: str, is_substring: bool = False, limit: int = 100, after: str | None = None
+    ) -> list[str]:
+        if not self.is_usage_complete():
+            self.rebuild_usage()
+
+        # the usage documents are identified by the model names, so an anchored pattern
+        # is served by the bounds of the `_id` index
+        pattern = re.escape(query) if is_substring else f"^{re.escape(query)}"
+        name_filter = {"$regex": pattern, "$ne": self.ALL_MODELS_USAGE_ID}
+        if after is not None:
+            name_filter["$gt"] = after
+        documents = self.client.get_items(
+            self.USAGE_COLLECTION_NAME,
+            {"_id": name_filter, "count": {"$gt": 0}},
+            {"_id": True},
+            sort=[("_id", 1)],
+            limit=limit,
+        )
+        return [document["_id"] for document in documents]
+
+    def is_usage_complete(self) -> bool:
+        """Checks if the usage counters have been rebuilt, they stay complete since then
+
+        :return: True if the counters are complete, False otherwise
+        """
+
+        if not self._is_usage_complete:
+            self._is_usage_complete = (
+                self.client.get_one_item(self.USAGE_COLLECTION_NAME, self.COMPLETE_USAGE_FILTER)
+                is not None
+            )
+        return self._is_usage_complete
+
+    @contextlib.contextmanager
+    def changing_usage(self) -> Iterator[None]:
+        """Keeps the usage counters pending while the models are written and the counters
+        are updated, so they aren't rebuilt from a listing of the models that misses a write
+        whose counters are updated already or the other way round.
+        The complete counters are never rebuilt, so they aren't kept pending
+        """
+
+        if self.is_usage_complete():
+            yield
+            return
+
+        self.update_pending_usage(1)
+        try:
+            yield
+        finally:
+            self.update_pending_usage(-1)
+
+    def update_pending_usage(self, increment: int) -> None:
+        """Changes the number of the writes that keep the usage counters pending,
+        every change is counted by the revision of the counters
+
+        :param increment: number of the started writes or the negative number of the finished ones
+        """
+
+        update = [
+            {
+                "$set": {
+                    "pending": {"$add": [{"$ifNull": ["$pending", 0]}, increment]},
+                    "revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]},
+                }
+            }
+        ]
+        self.client.update_items(
+            self.USAGE_COLLECTION_NAME, [({"_id": self.ALL_MODELS_USAGE_ID}, update)], upsert=True
+        )
+
+    @contextlib.contextmanager
+    def saving_usage(self, model_info: ModelInfo) -> Iterator[None]:
+        """Adds the version to the usage counters before it's saved, so the concurrent saves
+        can't exceed the quota of the model together, and subtracts it if it isn't saved
+
+        :param model_info: metadata of the version to be saved
+        :raise QuotaExceededError: when the version doesn't fit into the quota of the model
+        """
+
+        max_bytes = self.quotas.find_max_bytes(model_info.name)
+        if max_bytes is not None and not self.is_usage_complete():
+            # the quota is checked by the counters of the model, so they have to be complete
+            self.rebuild_usage()
+
+        with self.changing_usage():
+            if max_bytes is None:
+                self.add_usage([model_info])
+            else:
+                self.add_usage_within_quota(model_info, max_bytes)
+            try:
+                yield
+            except BaseException:
+                self.remove_usage(model_info.name, {model_info.version: model_info.size})
+                raise
+
+    def add_usage_within_quota(self, model_info: ModelInfo, max_bytes: int) -> None:
+        """Adds the version to the usage counters if it fits into the quota of the model,
+        the quota is checked and the counters of the model are incremented by one conditional
+        update, so the concurrent saves can't exceed the quota together
+
+        :param model_info: metadata of the version to be saved
+        :param max_bytes: quota of the model
+        :raise QuotaExceededError: when the version doesn't fit into the quota of the model
+        """
+
+        name, size = model_info.name, model_info.size
+        update = self.create_usage_update([model_info])
+        # the counters of a model without the saved versions are inserted by the upsert,
+        # the insert of the existing counters that don't fit the version fails
+        usage_filter = {"_id": name, "size": {"$lte": max_bytes - size}}
+        if size > max_bytes or not self.client.update_one_item(
+            self.USAGE_COLLECTION_NAME, usage_filter, update, upsert=True
+        ):
+            document = self.client.get_one_item(self.USAGE_COLLECTION_NAME, {"_id": name}) or {}
+            raise QuotaExceededError(name, document.get("size", 0), size, max_bytes)
+
+        self.client.update_items(
+            self.USAGE_COLLECTION_NAME, [({"_id": self.ALL_MODELS_USAGE_ID}, update)], upsert=True
+        )
+
+    def add_usage(self, models_info: list[ModelInfo]) -> None:
+        """Adds the saved versions to the usage counters of their models and of every model
+
+        :param models_info: metadata of the saved versions
+        """
+
+        models_info_by_name: dict[str, list[ModelInfo]] = defaultdict(list)
+        for model_info in models_info:
+            models_info_by_name[model_info.name].append(model_info)
+        updates = [
+            ({"_id": name}, self.create_usage_update(items))
+            for name, items in models_info_by_name.items()
+        ]
+        updates.append(({"_id": self.ALL_MODELS_USAGE_ID}, self.create_usage_update(models_info)))
+        self.client.update_items(self.USAGE_COLLECTION_NAME, updates, upsert=True)
+
+    def remove_usage(self, name: str, sizes: dict[ModelVersionType, int]) -> None:
+        """Subtracts the deleted versions from the usage counters of their model and of every
+        model, the largest version is found again if it's been deleted
+
+        :param name: name of the model
+        :param sizes: sizes of the deleted versions in bytes by the versions
+        """
+
+        count, size = len(sizes), sum(sizes.values())
+        update = [
+            {"$set": {"count": {"$add": ["$count", -count]}, "size": {"$add": ["$size", -size]}}}
+        ]
+        self.client.update_items(
+            self.USAGE_COLLECTION_NAME,
+            [({"_id": name}, update), ({"_id": self.ALL_MODELS_USAGE_ID}, update)],
+        )
+
+        usage_filter = {"largest.name": name, "largest.version": {"$in": list(sizes)}}
+        stale_ids = {
+            document["_id"]
+            for document in self.client.get_items(
+                self.USAGE_COLLECTION_NAME, usage_filter, {"_id": True}
+            )
+        }
+        if name in stale_ids:
+            largest = self.client.aggregate(
+                name,
+                [
+                    {"$project": self.MODEL_INFO_PROJECTION},
+                    {"$sort": {"size": -1}},
+                    {"$limit": 1},
+                ],
+            )
+            self.set_largest_usage(name, largest[0] if largest else None)
+        if self.ALL_MODELS_USAGE_ID in stale_ids:
+            largest = self.client.aggregate(
+                self.USAGE_COLLECTION_NAME,
+                [
+                    {"$match": {"_id": {"$ne": self.ALL_MODELS_USAGE_ID}, "count": {"$gt": 0}}},
+                    {"$sort": {"largest.size": -1}},
+                    {"$limit": 1},
+                ],
+            )
+            self.set_largest_usage(
+                self.ALL_MODELS_USAGE_ID, largest[0].get("largest") if largest else None
+            )
+
+    def set_largest_usage(self, usage_id: str, largest: dict | None) -> None:
+        """Sets the largest version of the usage counters
+
+        :param usage_id: name of the model or the id of the usage of every model
+        :param largest: name, version and size of the largest version or None if there are none
+        """
+
+        if largest is not None:
+            largest = {key: largest[key] for key in ("name", "version", "size")}
+        self.client.update_items(
+            self.USAGE_COLLECTION_NAME, [({"_id": usage_id}, {"$set": {"largest": largest}})]
+        )
+
+    def rebuild_usage(self) -> dict[str, dict]:
+        """Counts the stored versions of every model again,
+        the counters are rebuilt once they're read for the first time
+
+        The counters are completed only if no write has changed them since the models
+        were listed, the rebuild waits for the pending writes and starts over otherwise
+
+        :return: usage counters by the model names and the id of the usage of every model
+        """
+
+        counters: dict[str, dict] = {}
+        for attempt in range(1, self.USAGE_REBUILD_ATTEMPTS + 1):
+            all_models_usage = (
+                self.client.get_one_item(
+                    self.USAGE_COLLECTION_NAME, {"_id": self.ALL_MODELS_USAGE_ID}
+                )
+                or {}
+            )
+            # the writer that has died in the middle of a write leaves its pending write behind,
+            # so the last attempt doesn't wait for it
+            if all_models_usage.get("pending") and attempt < self.USAGE_REBUILD_ATTEMPTS:
+                time.sleep(self.USAGE_REBUILD_DELAY_SECONDS)
+                continue
+
+            counters = self.count_usage()
+            self.client.delete_items(self.USAGE_COLLECTION_NAME, {"_id": {"$nin": list(counters)}})
+            models_counters = [
+                ({"_id": usage_id}, fields)
+                for usage_id, fields in counters.items()
+                if usage_id != self.ALL_MODELS_USAGE_ID
+            ]
+            if models_counters:
+                self.client.upsert_many_items(self.USAGE_COLLECTION_NAME, models_counters)
+            # the counters of every model are written last, they complete the counters
+            # only if their revision hasn't been changed by a write since they've been read
+            revision_filter = {
+                "_id": self.ALL_MODELS_USAGE_ID,
+                "revision": all_models_usage.get("revision"),
+            }
+            all_models_update = {"$set": counters[self.ALL_MODELS_USAGE_ID]}
+            if self.client.update_one_item(
+                self.USAGE_COLLECTION_NAME, revision_filter, all_models_update, upsert=True
+            ):
+                self._is_usage_complete = True
+                return counters
+
+        logger.warning("Usage counters haven't been completed, the models are being changed")
+        return counters
+
+    def count_usage(self) -> dict[str, dict]:
+        """Counts the stored versions of every model
+
+        :return: usage counters by the model names and the id of the usage of every model
+        """
+
+        models_info_by_name: dict[str, list[ModelInfo]] = defaultdict(list)
+        for model_info in self.list_models():
+            models_info_by_name[model_info.name].append(model_info)
+
+        counters = {
+            name: self.create_usage_fields(models_info)
+            for name, models_info in models_info_by_name.items()
+        }
+        all_models_info = [item for items in models_info_by_name.values() for item in items]
+        counters[self.ALL_MODELS_USAGE_ID] = {
+            **self.create_usage_fields(all_models_info),
+            "is_complete": True,
+        }
+        return counters
+
+    @staticmethod
+    def create_usage_fields(models_info: list[ModelInfo]) -> dict:
+        """Creates the usage counters of the versions
+
+        :param models_info: metadata of the versions
+        :return: number of the versions, their total size and the largest version
+        """
+
+        largest = max(models_info, key=lambda model_info: model_info.size, default=None)
+        return {
+            "count": len(models_info),
+            "size": sum(model_info.size for model_info in models_info),
+            "largest": (
+                {"name": largest.name, "version": largest.version, "size": largest.size}
+                if largest is not None
+                else None
+            ),
+        }
+
+    @classmethod
+    def create_usage_update(cls, models_info: list[ModelInfo]) -> list[dict]:
+        """Creates the update pipeline that adds the versions to the usage counters
+
+        :param models_info: metadata of the saved versions
+        :return: update pipeline
+        """
+
+        fields = cls.create_usage_fields(models_info)
+        largest = fields["largest"]
+        return [
+            {
+                "$set": {
+                    "count": {"$add": [{"$ifNull": ["$count", 0]}, fields["count"]]},
+                    "size": {"$add": [{"$ifNull": ["$size", 0]}, fields["size"]]},
+                    "largest": {
+                        "$cond": [
+                            {"$gt": [largest["size"], {"$ifNull": ["$largest.size", -1]}]},
+                            {"$literal": largest},
+                            "$largest",
+                        ]
+                    },
+                }
+            }
+        ]
+
+    @observe_repository_operation
+    def find_latest_version(
+        self, name: str, version_range: VersionRange
+    ) -> ModelVersionType | None:
+        if name not in self._indexed_collections:
+            self.client.create_index(name, "version_key")
+            self._indexed_collections.add(name)
+
+        documents = self.client.get_items(
+            name,
+            {"version_key": self.create_version_key_filter(version_range)},
+            {"_id": False, "version": True},
+            sort=[("version_key", -1)],
+            limit=1,
+        )
+        document = next(documents, None)
+        return document["version"] if document is not None else None
+
+    @staticmethod
+    def create_version_key_filter(version_range: VersionRange) -> dict:
+        """Creates the filter of the `version_key` field that matches the release versions
+        satisfying the range
+
+        :param version_range: range of versions
+        :return: filter of the field
+        """
+
+        key_filter = {}
+        if version_range.lower is not None:
+            operator = "$gte" if version_range.lower_inclusive else "$gt"
+            key_filter[operator] = create_version_key(version_range.lower)
+        if version_range.upper is not None:
+            operator = "$lte" if version_range.upper_inclusive else "$lt"
+            key_filter[operator] = create_version_key(version_range.upper)
+        return key_filter or {"$exists": True}
+
+    def create_model_document(self, model: Model) -> dict:
+        """Creates the document of the model
+
+        Release versions get the sortable `version_key` field,
+        its index is created on the first lookup of the latest version
+
+        :param model: ML model
+        :return: document to be saved
+        """
+
+        document = model.to_dict()
+        if document["saved_at"] is None:
+            del document["saved_at"]
+        document["digest"] = self.calculate_digest(model.content)
+        self.add_version_key(document)
+        return document
+
+    def index_digest(self, name: str, version: ModelVersionType, digest: str) -> None:
+        """Points the entry of the content digest at the model
+
+        :param name: name of the model
+        :param version: version of the model
+        :param digest: sha256 hex digest of the model content
+        """
+
+        self.client.upsert_one_item(
+            self.DIGESTS_COLLECTION_NAME, {"_id": digest}, {"name": name, "version": version}
+        )
+
+    def copy_file(self, file_id: str, file_name: str) -> str:
+        """Copies the GridFS file of the model on the server
+
+        :param file_id: id of the copied file
+        :param file_name: name of the copy
+        :return: id of the copy
+        """
+
+        file_document = self.client.get_one_item(
+            self.GRIDFS_FILES_COLLECTION_NAME, {"_id": file_id}
+        )
+        copy_id = uuid.uuid4().hex
+        self.client.aggregate(
+            self.GRIDFS_CHUNKS_COLLECTION_NAME,
+            [
+                {"$match": {"files_id": file_id}},
+                {"$project": {"_id": False, "n": True, "data": True}},
+                {"$set": {"files_id": copy_id}},
+                {"$merge": {"into": self.GRIDFS_CHUNKS_COLLECTION_NAME}},
+            ],
+        )
+        # the file document is inserted last, so a copy is visible once every chunk is copied
+        self.client.save_one_item(
+            self.GRIDFS_FILES_COLLECTION_NAME,
+            {
+                **(file_document or {}),
+                "_id": copy_id,
+                "uploadDate": datetime.now(timezone.utc),
+                "filename": file_name,
+            },
+        )
+        return copy_id
+
+    @staticmethod
+    def add_version_key(document: dict) -> None:
+        """Adds the sortable `version_key` field to the document of a release version
+
+        :param document: document of the model
+        """
+
+        version = Version.parse(document["version"])
+        if version is not None and not version.is_prerelease:
+            document["version_key"] = create_version_key(version)
+
+    @observe_repository_operation
+    def set_alias(self, name: str, alias: str, version: ModelVersionType) -> None:
         if not self.is_model_exist(name, version):
             raise ModelNotFoundError(name, version)
 
-        self.client.delete_one_item(name, self.get_mongo_model_filter(version))
+        self.client.upsert_one_item(
+            self.ALIASES_COLLECTION_NAME,
+            self.get_mongo_alias_filter(name, alias),
+            {"version": version},
+        )
+        self.aliases_cache.invalidate(name, alias)
+
+    @observe_repository_operation
+    def get_alias(self, name: str, alias: str) -> ModelVersionType:
+        document = self.client.get_one_item(
+            self.ALIASES_COLLECTION_NAME, self.get_mongo_alias_filter(name, alias)
+        )
+        if document is None:
+            raise AliasNotFoundError(name, alias)
+        return document["version"]
+
+    @observe_repository_operation
+    def delete_alias(self, name: str, alias: str) -> None:
+        deleted_count = self.client.delete_one_item(
+            self.ALIASES_COLLECTION_NAME, self.get_mongo_alias_filter(name, alias)
+        )
+        if not deleted_count:
+            raise AliasNotFoundError(name, alias)
+        self.aliases_cache.invalidate(name, alias)
+
+    @observe_repository_operation
+    def list_aliases(self, name: str) -> dict[str, ModelVersionType]:
+        documents = self.client.get_items(self.ALIASES_COLLECTION_NAME, {"_id.name": name})
+        return {document["_id"]["alias"]: document["version"] for document in documents}
+
+    @observe_repository_operation
+    def create_upload(
+        self, name: str, version: ModelVersionType, file_extension: ModelExtensionType, size: int
+    ) -> UploadSession:
+        session = self.create_upload_session(name, version, file_extension, size)
+        if self.GRIDFS_CHUNKS_COLLECTION_NAME not in self._indexed_collections:
+            self.client.create_index(
+                self.GRIDFS_CHUNKS_COLLECTION_NAME, [("files_id", 1), ("n", 1)], unique=True
+            )
+            self._indexed_collections.add(self.GRIDFS_CHUNKS_COLLECTION_NAME)
+
+        document = {
+            "_id": session.id,
+            **session.to_metadata(),
+            "created_at": datetime.now(timezone.utc),
+        }
+        self.client.save_one_item(self.UPLOADS_COLLECTION_NAME, document)
+        return session
+
+    @observe_repository_operation
+    def get_upload(self, upload_id: str) -> UploadSession:
+        session = self.load_upload_session(upload_id)
+        chunks = self.client.get_items(
+            self.GRIDFS_CHUNKS_COLLECTION_NAME, {"files_id": upload_id}, {"_id": False, "n": True}
+        )
+        return dataclasses.replace(session, received_chunks=tuple(chunk["n"] for chunk in chunks))
+
+    @observe_repository_operation
+    def write_upload_chunk(self, upload_id: str, offset: int, data: bytes) -> None:
+        # the chunk is validated by the metadata of the session without listing the chunks
+        session = self.load_upload_session(upload_id)
+        index = session.get_chunk_index(offset, len(data))
+        self.client.upsert_one_item(
+            self.GRIDFS_CHUNKS_COLLECTION_NAME, {"files_id": upload_id, "n": index}, {"data": data}
+        )
+
+    @observe_repository_operation
+    def complete_upload(self, upload_id: str) -> ModelInfo:
+        session = self.get_upload(upload_id)
+        if not session.is_complete:
+            raise IncompleteUploadError(session)
+        if self.is_model_exist(session.name, session.version):
+            raise ModelExistsError(session.name, session.version)
+
+        file_name = self.create_model_file_name(
+            session.name, session.version, session.file_extension
+        )
+        model_info = session.to_info()
+        # the upload that doesn't fit into the quota is kept, so it can be aborted
+        with self.saving_usage(model_info):
+            self.client.save_one_item(
+                self.GRIDFS_FILES_COLLECTION_NAME,
+                {
+                    "_id": upload_id,
+                    "length": session.size,
+                    "chunkSize": session.chunk_size,
+                    "uploadDate": datetime.now(timezone.utc),
+                    "filename": file_name,
+                },
+            )
+            digest = self.calculate_upload_digest(upload_id)
+            document = {**model_info.to_dict(), "gridfs_id": upload_id, "digest": digest}
+            self.add_version_key(document)
+            self.client.save_one_item(session.name, document)
+        self.client.delete_one_item(self.UPLOADS_COLLECTION_NAME, {"_id": upload_id})
+        self.index_digest(session.name, session.version, digest)
+        return model_info
+
+    @observe_repository_operation
+    def abort_upload(self, upload_id: str) -> None:
+        deleted_count = self.client.delete_one_item(
+            self.UPLOADS_COLLECTION_NAME, {"_id": upload_id}
+        )
+        if not deleted_count:
+            raise UploadNotFoundError(upload_id)
+        self.client.delete_items(self.GRIDFS_CHUNKS_COLLECTION_NAME, {"files_id": upload_id})
+
+    def load_upload_session(self, upload_id: str) -> UploadSession:
+        """Loads the upload session without the received chunks
+
+        :param upload_id: id of the upload session
+        :return: upload session
+        :raise UploadNotFoundError: when the upload session doesn't exist
+        """
+
+        document = self.client.get_one_item(self.UPLOADS_COLLECTION_NAME, {"_id": upload_id})
+        if document is None:
+            raise UploadNotFoundError(upload_id)
+
+        return UploadSession(
+            id=upload_id,
+            name=document["name"],
+            version=document["version"],
+            file_extension=document["file_extension"],
+            size=document["size"],
+            chunk_size=document["chunk_size"],
+        )
+
+    def calculate_upload_digest(self, upload_id: str) -> str:
+        """Calculates the digest of the staged chunks reading them one by one in order
+
+        :param upload_id: id of the upload session
+        :return: sha256 hex digest of the uploaded content
+        """
+
+        digest = hashlib.sha256()
+        chunks = self.client.get_items(
+            self.GRIDFS_CHUNKS_COLLECTION_NAME,
+            {"files_id": upload_id},
+            {"_id": False, "data": True},
+            sort=[("n", 1)],
+        )
+        for chunk in chunks:
+            digest.update(chunk["data"])
+        return digest.hexdigest()
+
+    def get_models_collection_names(self) -> list[str]:
+        """Returns names of the collections that keep models
+
+        :return: collection names
+        """
+
+        return [
+            collection_name
+            for collection_name in self.client.get_collection_names()
+            if not collection_name.startswith(self.RESERVED_COLLECTION_PREFIX)
+        ]
+
+    def watch_model_events(self) -> Iterator[ModelEvent]:
+        for change in self.client.watch_changes(self.CHANGE_STREAM_PIPELINE):
+            event = self.create_model_event(change)
+            if event is not None:
+                yield event
+
+    @staticmethod
+    def create_model_event(change: dict) -> ModelEvent | None:
+        """Converts the change stream event to the model event
+
+        The version of a deleted model is known only when
+        the pre-images of the collection are enabled
+
+        :param change: change stream event
+        :return: model event or None if the change isn't related to models
+        """
+
+        name = change["ns"]["coll"]
+        operation_type = change["operationType"]
+        if name == MongoModelsRepository.ALIASES_COLLECTION_NAME:
+            return MongoModelsRepository.create_alias_event(change)
+        if name.startswith(MongoModelsRepository.RESERVED_COLLECTION_PREFIX):
+            return None
+        if operation_type == "insert":
+            version = change["fullDocument"]["version"]
+            return ModelEvent(type=ModelEventType.SAVED, name=name, version=version)
+        if operation_type in ("delete", "drop"):
+            version = (change.get("fullDocumentBeforeChange") or {}).get("version")
+            return ModelEvent(type=ModelEventType.DELETED, name=name, version=version)
+        return None
+
+    @staticmethod
+    def create_alias_event(change: dict) -> ModelEvent | None:
+        """Converts the change stream event of the aliases collection to the model event
+
+        :param change: change stream event
+        :return: model event or None if the change isn't related to aliases
+        """
+
+        alias_id = change.get("documentKey", {}).get("_id")
+        if not isinstance(alias_id, dict):
+            return None
+        name, alias = alias_id["name"], alias_id["alias"]
+        if change["operationType"] == "delete":
+            return ModelEvent(
+                type=ModelEventType.ALIAS_DELETED, name=name, version=None, alias=alias
+            )
+        version = (change.get("fullDocument") or {}).get("version")
+        return ModelEvent(type=ModelEventType.ALIAS_SET, name=name, version=version, alias=alias)
 
     def is_model_exist(self, name: str, version: ModelVersionType) -> bool:
         """Check if model exist in the storage"""
@@ -53,3 +976,9 @@ class MongoModelsRepository(ModelsRepository):
         """Generates a filter that will be used for CRUD operations"""
 
         return {"version": version}
+
+    @staticmethod
+    def get_mongo_alias_filter(name: str, alias: str) -> dict:
+        """Generates a filter of the alias, the pair of the name and the alias is its id"""
+
+        return {"_id": {"name": name, "alias": alias}}
@@ -0,0 +1,396 @@
+import dataclasses
+import hashlib
+import heapq
+import itertools
+import json
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import suppress
+from pathlib import Path
+from typing import TypeVar
+
+from src.core.events import ModelEvent
+from src.core.hashing import ConsistentHashRing
+from src.core.locks import ProcessLock
+from src.core.logger import logger
+from src.core.versions import VersionRange, is_newer_version
+
+from .base import (
+    AliasNotFoundError,
+    Model,
+    ModelExistsError,
+    ModelExtensionType,
+    ModelInfo,
+    ModelNotFoundError,
+    ModelsRepository,
+    ModelsUsage,
+    ModelVersionType,
+    UploadNotFoundError,
+    UploadSession,
+)
+
+T = TypeVar("T")
+
+
+# the sharded repository implements the whole repository interface, besides the rebalancing
+class ShardedModelsRepository(ModelsRepository):  # pylint: disable=too-many-public-methods
+    """Models repository that spreads the models by name across the shards with consistent hashing
+
+    All the versions and aliases of a model live on one shard, so listing, finding the latest
+    version and resolving aliases touch only it. Until the rebalancer has moved the models placed
+    before a shard was added, reads that miss the owner shard fall back to the other shards
+    """
+
+    UPLOAD_ID_SEPARATOR = ":"
+
+    def __init__(
+        self,
+        shards: dict[str, ModelsRepository],
+        virtual_nodes: int = 128,
+        rebalance_interval: float = 0.0,
+        lock_path: str | Path | None = None,
+    ) -> None:
+        """
+        :param shards: models repositories by the shard identifiers
+        :param virtual_nodes: number of positions of every shard on the hash ring
+        :param rebalance_interval: number of seconds between the rebalancing passes,
+            a single pass is made at the start when it's zero
+        :param lock_path: path to the lock of the process that rebalances the shards
+            for the other processes of the host, every process rebalances them when it's None
+        """
+
+        super().__init__()
+        self.shards = shards
+        self.ring = ConsistentHashRing(shards, virtual_nodes=virtual_nodes)
+        self.rebalance_interval = rebalance_interval
+        self._lock = ProcessLock(lock_path) if lock_path is not None else None
+        # the key of the last balanced ring is kept next to the lock, the shards stay balanced
+        # until the ring changes since the models are saved on their owners
+        self._balanced_ring_path = Path(f"{lock_path}.balanced") if lock_path is not None else None
+        self._ring_key = hashlib.sha256(
+            json.dumps([sorted(shards), virtual_nodes]).encode()
+        ).hexdigest()
+        self._balanced = threading.Event()
+        if len(shards) == 1:
+            self._balanced.set()
+        else:
+            threading.Thread(target=self._run_rebalancer, daemon=True).start()
+
+    @property
+    def is_balanced(self) -> bool:
+        """Checks if every model is known to be stored on its owner shard"""
+
+        return self._balanced.is_set()
+
+    def get_shard(self, name: str) -> ModelsRepository:
+        """Returns the shard owning the model
+
+        :param name: name of the model
+        :return: models repository of the shard
+        """
+
+        return self.shards[self.ring.get_node(name)]
+
+    def save_model(self, model: Model) -> None:
+        self._check_not_misplaced(model.name, model.version)
+        self.get_shard(model.name).save_model(model)
+
+    def save_models(self, models: Iterable[Model]) -> None:
+        models_by_shard: dict[str, list[Model]] = {}
+        for model in models:
+            self._check_not_misplaced(model.name, model.version)
+            models_by_shard.setdefault(self.ring.get_node(model.name), []).append(model)
+
+        for shard_id, shard_models in models_by_shard.items():
+            self.shards[shard_id].save_models(shard_models)
+
+    def save_model_by_digest(
+        self,
+        name: str,
+        version: ModelVersionType,
+        file_extension: ModelExtensionType,
+        digest: str,
+        size: int,
+    ) -> ModelInfo | None:
+        # only the content stored on the owner shard is found, the other one is uploaded again
+        self._check_not_misplaced(name, version)
+        return self.get_shard(name).save_model_by_digest(
+            name, version, file_extension, digest, size
+        )
+
+    def get_model(self, name: str, version: ModelVersionType) -> Model:
+        return self._call_shards(name, lambda shard: shard.get_model(name, version))
+
+    def get_model_info(self, name: str, version: ModelVersionType) -> ModelInfo:
+        return self._call_shards(name, lambda shard: shard.get_model_info(name, version))
+
+    def get_model_digest(self, name: str, version: ModelVersionType) -> str | None:
+        return self._call_shards(name, lambda shard: shard.get_model_digest(name, version))
+
+    def read_model_range(
+        self, name: str, version: ModelVersionType, offset: int, size: int
+    ) -> bytes:
+        return self._call_shards(
+            name, lambda shard: shard.read_model_range(name, version, offset, size)
+        )
+
+    def delete_model(self, name: str, version: ModelVersionType) -> None:
+        # copies of the model being moved by the rebalancer are deleted from both shards
+        self._call_every_shard(name, lambda shard: shard.delete_model(name, version))
+
+    def delete_models(self, name: str, version_range: VersionRange | None = None) -> int:
+        # copies of the models being moved by the rebalancer are deleted and counted on both shards
+        return sum(shard.delete_models(name, version_range) for shard in self._iter_shards(name))
+
+    def list_models(self, name: str | None = None) -> Iterator[ModelInfo]:
+        if name is not None and self.is_balanced:
+            yield from self.get_shard(name).list_models(name)
+            return
+
+        # models being moved by the rebalancer may be seen on both shards
+        listed: set[tuple[str, str]] = set()
+        for shard in self.shards.values():
+            for model_info in shard.list_models(name):
+                if (model_info.name, model_info.version) not in listed:
+                    listed.add((model_info.name, model_info.version))
+                    yield model_info
+
+    def get_usage(self, name: str | None = None) -> ModelsUsage:
+        # copies of the models being moved by the rebalancer are counted on both shards
+        shards = self.shards.values() if name is None else self._iter_shards(name)
+        return ModelsUsage.combine(shard.get_usage(name) for shard in shards)
+
+    def search_model_names(
+        self, query: str, is_substring: bool = False, limit: int = 100, after: str | None = None
+    ) -> list[str]:
+        pages = [
+            shard.search_model_names(query, is_substring, limit, after)
+            for shard in self.shards.values()
+        ]
+        # models being moved by the rebalancer may be found on both shards
+        names = (name for name, _ in itertools.groupby(heapq.merge(*pages)))
+        return list(itertools.islice(names, limit))
+
+    def list_saved_times(self, name: str) -> dict[ModelVersionType, float]:
+        saved_times: dict[ModelVersionType, float] = {}
+        # the owner shard goes last, so its times take precedence over the stale copies
+        for shard in reversed(list(self._iter_shards(name))):
+            saved_times.update(shard.list_saved_times(name))
+        return saved_times
+
+    def find_latest_version(
+        self, name: str, version_range: VersionRange
+    ) -> ModelVersionType | None:
+        latest = None
+        for shard in self._iter_shards(name):
+            version = shard.find_latest_version(name, version_range)
+            if version is not None and (latest is None or is_newer_version(version, latest)):
+                latest = version
+        return latest
+
+    def set_alias(self, name: str, alias: str, version: ModelVersionType) -> None:
+        # the alias is set on the shard storing the version until the rebalancer moves both
+        self._call_shards(name, lambda shard: shard.set_alias(name, alias, version))
+        self.aliases_cache.invalidate(name, alias)
+
+    def get_alias(self, name: str, alias: str) -> ModelVersionType:
+        return self._call_shards(name, lambda shard: shard.get_alias(name, alias))
+
+    def delete_alias(self, name: str, alias: str) -> None:
+        self._call_every_shard(name, lambda shard: shard.delete_alias(name, alias))
+        self.aliases_cache.invalidate(name, alias)
+
+    def list_aliases(self, name: str) -> dict[str, ModelVersionType]:
+        aliases: dict[str, ModelVersionType] = {}
+        # the owner shard goes last, so its aliases take precedence over the stale copies
+        for shard in reversed(list(self._iter_shards(name))):
+            aliases.update(shard.list_aliases(name))
+        return aliases
+
+    def create_upload(
+        self, name: str, version: ModelVersionType, file_extension: ModelExtensionType, size: int
+    ) -> UploadSession:
+        self._check_not_misplaced(name, version)
+        shard_id = self.ring.get_node(name)
+        session = self.shards[shard_id].create_upload(name, version, file_extension, size)
+        return dataclasses.replace(session, id=f"{shard_id}{self.UPLOAD_ID_SEPARATOR}{session.id}")
+
+    def get_upload(self, upload_id: str) -> UploadSession:
+        shard, shard_upload_id = self._get_upload_shard(upload_id)
+        return dataclasses.replace(shard.get_upload(shard_upload_id), id=upload_id)
+
+    def write_upload_chunk(self, upload_id: str, offset: int, data: bytes) -> None:
+        shard, shard_upload_id = self._get_upload_shard(upload_id)
+        shard.write_upload_chunk(shard_upload_id, offset, data)
+
+    def complete_upload(self, upload_id: str) -> ModelInfo:
+        shard, shard_upload_id = self._get_upload_shard(upload_id)
+        return shard.complete_upload(shard_upload_id)
+
+    def abort_upload(self, upload_id: str) -> None:
+        shard, shard_upload_id = self._get_upload_shard(upload_id)
+        shard.abort_upload(shard_upload_id)
+
+    def watch_model_events(self) -> Iterator[ModelEvent]:
+        events: queue.Queue[ModelEvent] = queue.Queue()
+
+        def forward(shard: ModelsRepository) -> None:
+            for event in shard.watch_model_events():
+                events.put(event)
+
+        for shard in self.shards.values():
+            threading.Thread(target=forward, args=(shard,), daemon=True).start()
+
+        while True:
+            yield events.get()
+
+    def rebalance(self) -> int:
+        """Moves the models stored on the shards other than their owners
+
+        Versions of a model are copied to the owner shard before its aliases,
+        then both are deleted from the source shard
+
+        :return: number of the moved models
+        """
+
+        moved = 0
+        for shard_id, shard in self.shards.items():
+            misplaced_names = {
+                model_info.name
+                for model_info in shard.list_models()
+                if self.ring.get_node(model_info.name) != shard_id
+            }
+            for name in misplaced_names:
+                moved += self._move_model(name, source=shard, target=self.get_shard(name))
+        return moved
+
+    def _move_model(self, name: str, source: ModelsRepository, target: ModelsRepository) -> int:
+        versions = [model_info.version for model_info in source.list_models(name)]
+        for version in versions:
+            try:
+                target.save_model(source.get_model(name, version))
+            except ModelExistsError:
+                pass
+
+        aliases = source.list_aliases(name)
+        for alias, version in aliases.items():
+            target.set_alias(name, alias, version)
+        # the model may've been deleted from both shards while it's been moved
+        for alias in aliases:
+            with suppress(AliasNotFoundError):
+                source.delete_alias(name, alias)
+        for version in versions:
+            with suppress(ModelNotFoundError):
+                source.delete_model(name, version)
+
+        logger.info(f"Moved {len(versions)} versions of {name} to the owner shard")
+        return len(versions)
+
+    def _run_rebalancer(self) -> None:
+        while True:
+            if self._lock is None or self._lock.acquire():
+                self._rebalance_once()
+                if self.rebalance_interval <= 0 and self.is_balanced:
+                    if self._lock is not None:
+                        self._lock.release()
+                    return
+            elif self._is_ring_balanced():
+                # another process of the host has rebalanced the shards, the lock is taken over
+                # if it stops making the periodic passes
+                self._balanced.set()
+                if self.rebalance_interval <= 0:
+                    return
+            # a failed single pass is retried after a second
+            time.sleep(self.rebalance_interval or 1.0)
+
+    def _rebalance_once(self) -> None:
+        if not self.is_balanced and self._is_ring_balanced():
+            # the shards have been rebalanced for the same ring by another process
+            # or before the restart
+            self._balanced.set()
+            return
+        try:
+            moved = self.rebalance()
+            self._balanced.set()
+            if self._balanced_ring_path is not None:
+                self._balanced_ring_path.write_text(self._ring_key, encoding="utf-8")
+            if moved:
+                logger.info(f"Rebalanced {moved} models across the shards")
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            logger.error(f"Failed to rebalance the shards: {err}")
+
+    def _is_ring_balanced(self) -> bool:
+        if self._balanced_ring_path is None:
+            return False
+        try:
+            return self._balanced_ring_path.read_text(encoding="utf-8") == self._ring_key
+        except FileNotFoundError:
+            return False
+
+    def _get_upload_shard(self, upload_id: str) -> tuple[ModelsRepository, str]:
+        # ids of the upload sessions are prefixed with the shard that stages the chunks
+        shard_id, _, shard_upload_id = upload_id.rpartition(self.UPLOAD_ID_SEPARATOR)
+        if shard_id not in self.shards:
+            raise UploadNotFoundError(upload_id)
+        return self.shards[shard_id], shard_upload_id
+
+    def _iter_shards(self, name: str) -> Iterator[ModelsRepository]:
+        owner = self.get_shard(name)
+        yield owner
+        if self.is_balanced:
+            return
+        for shard in self.shards.values():
+            if shard is not owner:
+                yield shard
+
+    def _call_shards(self, name: str, call: Callable[[ModelsRepository], T]) -> T:
+        """Calls the owner shard, then the other shards until the rebalancing is over
+
+        :raise ModelNotFoundError: when no shard stores the model
+        :raise AliasNotFoundError: when no shard stores the alias
+        """
+
+        errors: list[ModelNotFoundError | AliasNotFoundError] = []
+        for shard in self._iter_shards(name):
+            try:
+                return call(shard)
+            except (ModelNotFoundError, AliasNotFoundError) as err:
+                errors.append(err)
+        # the owner shard is always called, so there's an error once every shard has missed
+        raise errors[0]
+
+    def _call_every_shard(self, name: str, call: Callable[[ModelsRepository], None]) -> None:
+        """Calls the owner shard and the other shards until the rebalancing is over,
+        e.g. to delete both copies of a model being moved
+
+        :raise ModelNotFoundError: when no shard stores the model
+        :raise AliasNotFoundError: when no shard stores the alias
+        """
+
+        errors: list[ModelNotFoundError | AliasNotFoundError] = []
+        shards = list(self._iter_shards(name))
+        for shard in shards:
+            try:
+                call(shard)
+            except (ModelNotFoundError, AliasNotFoundError) as err:
+                errors.append(err)
+        if len(errors) == len(shards):
+            raise errors[0]
+
+    def _check_not_misplaced(self, name: str, version: ModelVersionType) -> None:
+        if self.is_balanced:
+            return
+        owner = self.get_shard(name)
+        for shard in self.shards.values():
+            if shard is not owner and _contains_model(shard, name, version):
+                raise ModelExistsError(name, version)
+
+
+def _contains_model(shard: ModelsRepository, name: str, version: ModelVersionType) -> bool:
+    try:
+        shard.get_model_info(name, version)
+        return True
+    except ModelNotFoundError:
+        return False
@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.events import ModelEvent, ModelEventType
+from src.core.logger import logger
+from src.core.models_cache import SharedModelsCache
+from src.core.models_repositories.base import (
+    AliasNotFoundError,
+    ModelNotFoundError,
+    ModelsRepository,
+    ModelVersionType,
+)
+from src.core.settings import CacheSettings, PinnedModelSettings
+from src.core.versions import VersionRange
+
+
+class PinnedModelsPreloader:
+    """Preloads the pinned models into the shared cache and keeps them pinned there
+
+    Aliases, `latest` and ranges of the pinned models are resolved again on the model events,
+    so the pins follow them, and periodically, as the events of the other processes
+    aren't delivered by every storage
+    """
+
+    def __init__(
+        self,
+        models_repo: ModelsRepository,
+        models_cache: SharedModelsCache,
+        settings: CacheSettings,
+    ) -> None:
+        self.models_repo = models_repo
+        self.models_cache = models_cache
+        self.settings = settings
+        # versions the pinned models are resolved to by their name and version specs
+        self._versions: dict[tuple[str, str], ModelVersionType] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def preload(self) -> int:
+        """Loads the pinned models into the cache concurrently
+
+        :return: number of the loaded models
+        """
+
+        with ThreadPoolExecutor(
+            max_workers=self.settings.preload_workers, thread_name_prefix="preload"
+        ) as executor:
+            return sum(executor.map(self.refresh, self.settings.pinned))
+
+    def refresh(self, pinned_model: PinnedModelSettings) -> bool:
+        """Resolves the version of the pinned model, caches and pins it
+        and unpins the version it's been resolved to before
+
+        :param pinned_model: pinned model
+        :return: True if the model is cached
+        """
+
+        name = pinned_model.name
+        try:
+            version = self.models_repo.resolve_version(name, pinned_model.version)
+            # the pin goes first, so the model isn't evicted by the other workers once it's cached
+            self.models_cache.pin(name, version)
+            if not self.models_cache.contains(name, version):
+                model = self.models_repo.get_model(name, version)
+                self.models_cache.put(model, self.models_repo.get_model_digest(name, version))
+        except (ModelNotFoundError, AliasNotFoundError) as err:
+            logger.error(
+                f"Failed to preload the pinned model {name}:{pinned_model.version}: {err}"
+            )
+            return False
+
+        key = (name, pinned_model.version)
+        with self._lock:
+            previous_version = self._versions.get(key)
+            self._versions[key] = version
+            is_still_pinned = (name, previous_version) in {
+                (pinned_name, pinned_version)
+                for (pinned_name, _), pinned_version in self._versions.items()
+            }
+        if previous_version is not None and not is_still_pinned:
+            self.models_cache.unpin(name, previous_version)
+            logger.info(f"Pinned model {name}:{pinned_model.version} moved to {version}")
+        return True
+
+    def on_model_event(self, event: ModelEvent) -> None:
+        """Refreshes the pinned models the event may change in background
+
+        :param event: model event
+        """
+
+        for pinned_model in self.settings.pinned:
+            if pinned_model.name == event.name and self.is_changed_by(pinned_model, event):
+                threading.Thread(target=self.refresh, args=(pinned_model,), daemon=True).start()
+
+    @staticmethod
+    def is_changed_by(pinned_model: PinnedModelSettings, event: ModelEvent) -> bool:
+        """Checks if the event may change the version the pinned model is resolved to
+
+        :param pinned_model: pinned model
+        :param event: model event of the same model
+        :return: True if the pinned model has to be refreshed
+        """
+
+        if pinned_model.version.startswith(ModelsRepository.ALIAS_PREFIX):
+            return event.alias == pinned_model.version[len(ModelsRepository.ALIAS_PREFIX) :]
+        if VersionRange.parse(pinned_model.version) is not None:
+            return event.type in (ModelEventType.SAVED, ModelEventType.DELETED)
+        # the pinned version is saved after the startup or saved again after its deletion
+        return event.type == ModelEventType.SAVED and event.version == pinned_model.version
+
+    def start(self) -> None:
+        """Starts the periodic refreshes in a daemon thread"""
+
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stops the periodic refreshes"""
+
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.settings.refresh_interval_seconds):
+            for pinned_model in self.settings.pinned:
+                try:
+                    self.refresh(pinned_model)
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    logger.error(f"Failed to refresh the pinned model {pinned_model.name}: {err}")
@@ -0,0 +1,182 @@
+import functools
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import FrameType
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class SamplingProfiler:
+    """Samples the call stacks of the threads at a fixed interval from a background thread
+
+    Stacks are aggregated in the folded format, one `frame;frame;frame count` line per stack,
+    that flame graph tools such as `flamegraph.pl` or speedscope render
+    """
+
+    def __init__(self, interval: float = 0.005, thread_ids: set[int] | None = None) -> None:
+        """
+        :param interval: number of seconds between the samples
+        :param thread_ids: threads to be sampled, every thread is sampled when it's None
+        """
+
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def render(self) -> str:
+        """Renders the sampled stacks in the folded format"""
+
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    @contextmanager
+    def sampling_current_thread(self) -> Iterator[None]:
+        """Samples the current thread, e.g. the worker thread serving the profiled request,
+        within the block"""
+
+        thread_id = threading.get_ident()
+        if self.thread_ids is None or thread_id in self.thread_ids:
+            yield
+            return
+
+        self.thread_ids.add(thread_id)
+        try:
+            yield
+        finally:
+            self.thread_ids.discard(thread_id)
+
+    def run_sampled(self, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """Calls the function sampling the current thread"""
+
+        with self.sampling_current_thread():
+            return func(*args, **kwargs)
+
+    def _sample(self) -> None:
+        own_thread_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for thread_id, frame in frames.items():
+                if thread_id == own_thread_id:
+                    continue
+                if self.thread_ids is None or thread_id in self.thread_ids:
+                    self.stacks[format_stack(frame)] += 1
+
+
+# profiler of the request handled in the current context, the worker threads
+# the request is handed to are sampled by it as well
+request_profiler: ContextVar[SamplingProfiler | None] = ContextVar(
+    "request_profiler", default=None
+)
+
+
+def profiled(func: Callable[P, T]) -> Callable[P, T]:
+    """Decorates the function run in a worker thread with the context of the request,
+    e.g. a sync handler, so the thread is sampled by the profiler of the request
+
+    :param func: function
+    :return: decorated function
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        profiler = request_profiler.get()
+        if profiler is None:
+            return func(*args, **kwargs)
+        return profiler.run_sampled(func, *args, **kwargs)
+
+    return wrapper
+
+
+def iter_profiled(iterator: Iterator[T]) -> Iterator[T]:
+    """Iterates over the iterator consumed by the worker threads, e.g. the body
+    of a streaming response, sampling them by the profiler of the request
+
+    :param iterator: iterator
+    :return: iterator over the same items
+    """
+
+    next_item = profiled(next)
+    while True:
+        try:
+            item = next_item(iterator)
+        except StopIteration:
+            return
+        yield item
+
+
+class ProfiledThreadPoolExecutor(ThreadPoolExecutor):
+    """Default executor of the event loop that samples the workers by the profiler
+    of the request the work has been submitted by, e.g. with `asyncio.to_thread`"""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        # the work runs in the copy of the request context that only the work itself sees
+        profiler = request_profiler.get()
+        if profiler is not None:
+            return super().submit(profiler.run_sampled, fn, *args, **kwargs)
+        return super().submit(fn, *args, **kwargs)
+
+
+def format_stack(frame: FrameType | None) -> str:
+    """Formats the call stack from the outermost frame to the innermost one
+
+    :param frame: innermost frame
+    :return: frames joined by `;`, e.g. `run.py:get_model;file_system.py:find_model_path`
+    """
+
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class ProfilesStore:
+    """Keeps the latest request profiles in memory"""
+
+    def __init__(self, max_size: int = 32) -> None:
+        self.max_size = max_size
+        self._profiles: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, profile_id: str, profile: str) -> None:
+        """Stores the profile evicting the oldest one when the store is full
+
+        :param profile_id: identifier of the profile
+        :param profile: stacks in the folded format
+        """
+
+        with self._lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> str | None:
+        """Returns the profile
+
+        :param profile_id: identifier of the profile
+        :return: stacks in the folded format or None if the profile doesn't exist
+        """
+
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+profiles = ProfilesStore()
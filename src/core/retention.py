@@ -0,0 +1,172 @@
+import fnmatch
+import threading
+import time
+from collections import defaultdict
+
+from src.core.locks import ProcessLock
+from src.core.logger import logger
+from src.core.metrics import retention_deleted_models
+from src.core.models_repositories.base import (
+    ModelInfo,
+    ModelNotFoundError,
+    ModelsRepository,
+)
+from src.core.settings import RetentionRuleSettings, RetentionSettings
+from src.core.versions import Version
+
+
+def find_rule(name: str, rules: list[RetentionRuleSettings]) -> RetentionRuleSettings | None:
+    """Finds the first retention rule which pattern matches the model name
+
+    :param name: name of the model
+    :param rules: retention rules
+    :return: the matching rule or None if the versions of the model are kept forever
+    """
+
+    for rule in rules:
+        if fnmatch.fnmatchcase(name, rule.name_pattern):
+            return rule
+    return None
+
+
+def find_expired_versions(
+    models_repo: ModelsRepository,
+    rule: RetentionRuleSettings,
+    models: list[ModelInfo],
+    now: float,
+) -> list[ModelInfo]:
+    """Finds the versions of the model that aren't kept by the rule
+
+    A version is kept if it's one of the latest `keep_last` versions, if it's been saved less
+    than `ttl_seconds` ago or if an alias points at it. Versions that don't follow the semantic
+    versioning are older than the ones that do and are ordered by the saved times,
+    versions of an unknown age are never expired by the time
+
+    :param models_repo: models repository
+    :param rule: retention rule of the model
+    :param models: metadata of the versions of the model
+    :param now: current unix timestamp
+    :return: metadata of the versions to be deleted
+    """
+
+    name = models[0].name
+    saved_times = models_repo.list_saved_times(name)
+    aliased_versions = set(models_repo.list_aliases(name).values())
+
+    def get_precedence(model_info: ModelInfo) -> tuple:
+        version = Version.parse(model_info.version)
+        if version is None:
+            return False, saved_times.get(model_info.version, now), model_info.version
+        return True, version
+
+    models = sorted(models, key=get_precedence, reverse=True)
+    expired_models = []
+    for index, model_info in enumerate(models):
+        if rule.keep_last is not None and index < rule.keep_last:
+            continue
+        saved_time = saved_times.get(model_info.version)
+        if rule.ttl_seconds is not None and (
+            saved_time is None or now - saved_time < rule.ttl_seconds
+        ):
+            continue
+        if model_info.version in aliased_versions:
+            continue
+        expired_models.append(model_info)
+    return expired_models
+
+
+def plan_retention(
+    models_repo: ModelsRepository, rules: list[RetentionRuleSettings], now: float | None = None
+) -> list[ModelInfo]:
+    """Finds the versions of every model that aren't kept by the retention rules
+
+    :param models_repo: models repository
+    :param rules: retention rules, the first matching rule is applied to a model
+    :param now: current unix timestamp, the current time is used when it's None
+    :return: metadata of the versions to be deleted
+    """
+
+    now = time.time() if now is None else now
+    models_by_name: dict[str, list[ModelInfo]] = defaultdict(list)
+    for model_info in models_repo.list_models():
+        models_by_name[model_info.name].append(model_info)
+
+    expired_models = []
+    for name, models in models_by_name.items():
+        rule = find_rule(name, rules)
+        if rule is not None:
+            expired_models.extend(find_expired_versions(models_repo, rule, models, now))
+    return expired_models
+
+
+def apply_retention(models_repo: ModelsRepository, settings: RetentionSettings) -> list[ModelInfo]:
+    """Deletes the versions of the models that aren't kept by the retention rules
+    in batches separated by the pauses
+
+    :param models_repo: models repository
+    :param settings: settings of the retention
+    :return: metadata of the deleted versions or of the ones to be deleted on a dry run
+    """
+
+    expired_models = plan_retention(models_repo, settings.rules)
+    if settings.dry_run:
+        for model_info in expired_models:
+            logger.info(f"Model {model_info} would be deleted by the retention")
+        return expired_models
+
+    deleted_models = []
+    for index, model_info in enumerate(expired_models):
+        if index and index % settings.batch_size == 0:
+            time.sleep(settings.batch_interval_seconds)
+        try:
+            models_repo.delete_model(model_info.name, model_info.version)
+        except ModelNotFoundError:
+            # the version has been deleted since it's been planned
+            continue
+        retention_deleted_models.inc()
+        deleted_models.append(model_info)
+    return deleted_models
+
+
+class RetentionScheduler:
+    """Applies the retention rules to the models repository in background
+
+    A single worker of a host applies them, the one that takes the lock of the retention
+    """
+
+    def __init__(self, models_repo: ModelsRepository, settings: RetentionSettings) -> None:
+        self.models_repo = models_repo
+        self.settings = settings
+        self._lock = ProcessLock(settings.lock_path)
+        self._stopped = threading.Event()
+
+    def start(self) -> bool:
+        """Starts the pruning passes in a daemon thread unless another worker applies them
+
+        :return: True if the pruning passes have been started
+        """
+
+        if not self._lock.acquire():
+            logger.info("Retention is applied by another worker of the host")
+            return False
+        threading.Thread(target=self._run, daemon=True).start()
+        return True
+
+    def stop(self) -> None:
+        """Stops the pruning passes after the current one"""
+
+        self._stopped.set()
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                try:
+                    models = apply_retention(self.models_repo, self.settings)
+                    if models and not self.settings.dry_run:
+                        logger.info(f"Deleted {len(models)} models by the retention")
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    logger.error(f"Failed to apply the retention: {err}")
+
+                self._stopped.wait(self.settings.interval_seconds)
+        finally:
+            self._lock.release()
@@ -0,0 +1,109 @@
+import bisect
+import heapq
+
+
+class NamesIndex:
+    """Index of the model names that serves the prefix and the substring searches
+
+    Names are kept sorted, so a prefix search is a binary search followed by a scan of the
+    matching names. A substring search intersects the sets of the names that contain
+    every trigram of the query. Both structures are built on the first search,
+    so the names are loaded quickly, and are kept up to date afterwards
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self) -> None:
+        self._names: set[str] = set()
+        self._sorted_names: list[str] | None = None
+        self._grams: dict[str, set[str]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str) -> None:
+        """Adds the name to the index
+
+        :param name: name of the model
+        """
+
+        if name in self._names:
+            return
+        self._names.add(name)
+        if self._sorted_names is not None:
+            bisect.insort(self._sorted_names, name)
+        if self._grams is not None:
+            for gram in self._create_grams(name):
+                self._grams.setdefault(gram, set()).add(name)
+
+    def discard(self, name: str) -> None:
+        """Removes the name from the index if it's there
+
+        :param name: name of the model
+        """
+
+        if name not in self._names:
+            return
+        self._names.discard(name)
+        if self._sorted_names is not None:
+            del self._sorted_names[bisect.bisect_left(self._sorted_names, name)]
+        if self._grams is not None:
+            for gram in self._create_grams(name):
+                names = self._grams[gram]
+                names.discard(name)
+                if not names:
+                    del self._grams[gram]
+
+    def search(
+        self, query: str, is_substring: bool = False, limit: int = 100, after: str | None = None
+    ) -> list[str]:
+        """Finds the names that start with the query or contain it
+
+        :param query: prefix or substring of the names
+        :param is_substring: the names containing the query are found instead of the prefixed ones
+        :param limit: maximum number of the names
+        :param after: the names are returned starting after this one, i.e. the last name
+            of the previous page
+        :return: sorted names
+        """
+
+        if is_substring:
+            return self._search_substring(query, limit, after)
+        return self._search_prefix(query, limit, after)
+
+    def _search_prefix(self, prefix: str, limit: int, after: str | None) -> list[str]:
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._names)
+        names = self._sorted_names
+        index = bisect.bisect_left(names, prefix)
+        if after is not None:
+            index = max(index, bisect.bisect_right(names, after))
+        found: list[str] = []
+        while index < len(names) and len(found) < limit and names[index].startswith(prefix):
+            found.append(names[index])
+            index += 1
+        return found
+
+    def _search_substring(self, substring: str, limit: int, after: str | None) -> list[str]:
+        if len(substring) < self.GRAM_SIZE:
+            # short queries match too many names for the postings to help
+            candidates: set[str] = self._names
+        else:
+            if self._grams is None:
+                self._grams = {}
+                for name in self._names:
+                    for gram in self._create_grams(name):
+                        self._grams.setdefault(gram, set()).add(name)
+            postings = sorted(
+                (self._grams.get(gram, set()) for gram in self._create_grams(substring)), key=len
+            )
+            candidates = set.intersection(*postings)
+        matches = (
+            name for name in candidates if substring in name and (after is None or name > after)
+        )
+        return heapq.nsmallest(limit, matches)
+
+    def _create_grams(self, text: str) -> set[str]:
+        return {
+            text[index : index + self.GRAM_SIZE] for index in range(len(text) - self.GRAM_SIZE + 1)
+        }
@@ -1,15 +1,52 @@
+import fnmatch
+import importlib.util
+import tempfile
 from pathlib import Path
 from typing import Annotated, Literal, Union
 
-from pydantic import BaseModel, Field, PositiveInt
+from pydantic import (
+    BaseModel,
+    Field,
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveFloat,
+    PositiveInt,
+    model_validator,
+)
 from pydantic_settings import BaseSettings
 
+MongoCompressor = Literal["zstd", "snappy", "zlib"]
+# packages providing the compressors, they're installed by the extras of the same names
+MONGO_COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy"}
+MongoReadPreference = Literal[
+    "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+]
+
 
 class FileSystemModelsRepositorySettings(BaseModel):
     """Settings of the local file models repository"""
 
     source: Literal["fs"]
     directory: str
+    # the digests of the files added by hand are calculated in background by one of the workers
+    index_digests: bool = False
+
+
+class MongoWriteConcernSettings(BaseModel):
+    """Write concern used by the Mongo DB client, the server default is used for the options
+    that aren't set
+    """
+
+    w: NonNegativeInt | Literal["majority"] | None = None
+    journal: bool | None = None
+    timeout_ms: PositiveInt | None = None
+
+    @property
+    def options(self) -> dict:
+        """Keyword arguments of the `pymongo.write_concern.WriteConcern`"""
+
+        options = {"w": self.w, "j": self.journal, "wtimeout": self.timeout_ms}
+        return {name: value for name, value in options.items() if value is not None}
 
 
 class MongoModelsRepositorySettings(BaseModel):
@@ -22,22 +59,249 @@ class MongoModelsRepositorySettings(BaseModel):
     password: str
     database_name: str
 
+    # connection pool
+    max_pool_size: PositiveInt = 100
+    min_pool_size: NonNegativeInt = 0
+    max_idle_time_ms: PositiveInt | None = None
+    wait_queue_timeout_ms: PositiveInt | None = None
+
+    # timeouts
+    connect_timeout_ms: PositiveInt = 20_000
+    socket_timeout_ms: PositiveInt | None = None
+    server_selection_timeout_ms: PositiveInt = 30_000
+
+    # wire compression
+    compressors: list[MongoCompressor] = []
+    zlib_compression_level: Annotated[int, Field(ge=-1, le=9)] | None = None
+
+    # reads and writes
+    read_preference: MongoReadPreference = "primary"
+    max_staleness_seconds: PositiveInt | None = None
+    write_concern: MongoWriteConcernSettings = MongoWriteConcernSettings()
+    bulk_write_concern: MongoWriteConcernSettings | None = None
+
+    @model_validator(mode="after")
+    def check_pool_boundaries(self) -> "MongoModelsRepositorySettings":
+        """Validates that the connection pool boundaries are consistent"""
+
+        if self.min_pool_size > self.max_pool_size:
+            raise ValueError(
+                f"min_pool_size ({self.min_pool_size}) "
+                f"must not exceed max_pool_size ({self.max_pool_size})"
+            )
+        if self.max_staleness_seconds is not None and self.read_preference == "primary":
+            raise ValueError(
+                "max_staleness_seconds can't be used with the primary read preference"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_compressors(self) -> "MongoModelsRepositorySettings":
+        """Validates that the packages of the compressors are installed"""
+
+        for compressor in self.compressors:
+            package = MONGO_COMPRESSOR_PACKAGES.get(compressor)
+            if package is not None and importlib.util.find_spec(package) is None:
+                raise ValueError(
+                    f"{compressor} compressor requires the {package} package, "
+                    f"install the {compressor} extra"
+                )
+        return self
+
     @property
     def connection(self):
         """Mongo DB connection string"""
 
         return f"mongodb://{self.username}:{self.password}@{self.host}:{self.port}"
 
+    @property
+    def client_options(self) -> dict:
+        """Keyword arguments of the `pymongo.MongoClient`"""
+
+        options: dict = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "readPreference": self.read_preference,
+        }
+        optional_options = {
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "zlibCompressionLevel": self.zlib_compression_level,
+            "maxStalenessSeconds": self.max_staleness_seconds,
+        }
+        options.update(
+            {name: value for name, value in optional_options.items() if value is not None}
+        )
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+        return options
+
+
+StorageModelsRepository = Annotated[
+    Union[
+        FileSystemModelsRepositorySettings,
+        MongoModelsRepositorySettings,
+    ],
+    Field(discriminator="source"),
+]
+
+
+class MirroredModelsRepositorySettings(BaseModel):
+    """Settings of the models repository that replicates changes of the primary storage
+    to the secondary ones asynchronously"""
+
+    source: Literal["mirror"]
+    primary: StorageModelsRepository
+    secondaries: list[StorageModelsRepository]
+    # sqlite database of the pending replication operations
+    queue_path: str
+    retry_delay_seconds: PositiveFloat = 1.0
+    max_retry_delay_seconds: PositiveFloat = 60.0
+
+
+class ShardedModelsRepositorySettings(BaseModel):
+    """Settings of the models repository that spreads models by name across the shards"""
+
+    source: Literal["sharded"]
+    # shard identifiers place the shards on the hash ring, keep them when adding new shards
+    shards: dict[str, StorageModelsRepository] = Field(min_length=1)
+    virtual_nodes: PositiveInt = 128
+    # seconds between the rebalancing passes, a single pass at the start when it's zero
+    rebalance_interval_seconds: NonNegativeFloat = 0.0
+    # the process holding the lock rebalances the shards for the other processes of the host
+    rebalance_lock_path: str = str(Path(tempfile.gettempdir(), "model-registry-rebalance.lock"))
+
 
 ModelsRepository = Annotated[
     Union[
         FileSystemModelsRepositorySettings,
         MongoModelsRepositorySettings,
+        MirroredModelsRepositorySettings,
+        ShardedModelsRepositorySettings,
     ],
     Field(discriminator="source"),
 ]
 
 
+class TracingSettings(BaseModel):
+    """Settings of the tracing spans and the request profiling, both are opt-in"""
+
+    enabled: bool = False
+    exporter: Literal["file", "otlp"] = "file"
+    file_path: str = "spans.jsonl"
+    # OTLP/HTTP traces endpoint of an OpenTelemetry collector
+    otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    service_name: str = "model-registry"
+    sample_ratio: float = Field(default=1.0, ge=0, le=1)
+    export_interval_seconds: PositiveFloat = 1.0
+    export_batch_size: PositiveInt = 512
+    # allows profiling requests sent with the `X-Profile` header and the profiling endpoint
+    profiling_enabled: bool = False
+    profiling_interval_seconds: PositiveFloat = 0.005
+
+
+class AdmissionSettings(BaseModel):
+    """Settings of the admission control of the requests"""
+
+    enabled: bool = False
+    # bytes of the request bodies handled at once, a request takes its content length
+    max_in_flight_bytes: PositiveInt = 1024**3
+    # bytes taken by the requests without a body or a smaller one
+    min_request_bytes: NonNegativeInt = 64 * 1024
+    # bytes taken by the uploads without the content length
+    unknown_request_bytes: PositiveInt = 64 * 1024**2
+    # maximum number of the requests handled at once by `METHOD path template`,
+    # e.g. `{"POST /": 8, "PUT /models/{name}/{version}": 4}`
+    route_limits: dict[str, PositiveInt] = {}
+    # requests over the limits wait for this number of seconds before being rejected with 503
+    queue_timeout_seconds: PositiveFloat = 10.0
+    retry_after_seconds: PositiveInt = 5
+    exempt_paths: list[str] = ["/health_check", "/metrics"]
+
+
+class RetentionRuleSettings(BaseModel):
+    """Versions of the models kept by the retention, the other versions are deleted"""
+
+    # shell-style pattern of the model names, e.g. `fraud-*`, the first matching rule is applied
+    name_pattern: str = "*"
+    # number of the latest versions kept
+    keep_last: PositiveInt | None = None
+    # versions saved less than this number of seconds ago are kept
+    ttl_seconds: PositiveFloat | None = None
+
+    @model_validator(mode="after")
+    def check_kept_versions(self) -> "RetentionRuleSettings":
+        """Validates that the rule keeps some versions"""
+
+        if self.keep_last is None and self.ttl_seconds is None:
+            raise ValueError("keep_last or ttl_seconds must be set")
+        return self
+
+
+class RetentionSettings(BaseModel):
+    """Settings of the background pruning of the old model versions"""
+
+    enabled: bool = False
+    rules: list[RetentionRuleSettings] = []
+    # seconds between the pruning passes
+    interval_seconds: PositiveFloat = 3600.0
+    # versions deleted at once and seconds between the batches to limit the load of a storage
+    batch_size: PositiveInt = 100
+    batch_interval_seconds: NonNegativeFloat = 1.0
+    # the pruning passes only log the versions that would be deleted
+    dry_run: bool = False
+    # lock file taken by the only worker of a host that applies the retention
+    lock_path: str = str(Path(tempfile.gettempdir(), "model-registry-retention.lock"))
+
+
+class QuotaSettings(BaseModel):
+    """Limits of the bytes stored by the models"""
+
+    # limits by shell-style patterns of the model names, e.g. `{"fraud-*": 1073741824}`,
+    # the first matching pattern is applied
+    max_bytes: dict[str, PositiveInt] = {}
+
+    def find_max_bytes(self, name: str) -> int | None:
+        """Finds the limit of the model
+
+        :param name: name of the model
+        :return: the limit in bytes or None if the model isn't limited
+        """
+
+        for name_pattern, max_bytes in self.max_bytes.items():
+            if fnmatch.fnmatchcase(name, name_pattern):
+                return max_bytes
+        return None
+
+
+class PinnedModelSettings(BaseModel):
+    """Model preloaded into the cache at startup and never evicted"""
+
+    name: str
+    # version, `latest`, a range of versions or an alias prefixed with `@`,
+    # the pinned version follows the alias or the range
+    version: str
+
+
+class CacheSettings(BaseModel):
+    """Settings of the cache of the model contents shared by the workers of a host"""
+
+    enabled: bool = False
+    # directory of a shared memory file system, so the cached models aren't written to a disk
+    directory: str = "/dev/shm/model-registry-cache"
+    max_bytes: PositiveInt = 1024**3
+
+    pinned: list[PinnedModelSettings] = []
+    # pinned models loaded at once
+    preload_workers: PositiveInt = 4
+    # seconds between the resolutions of the pinned aliases and ranges, the events of the changes
+    # made by the other processes aren't delivered by every storage
+    refresh_interval_seconds: PositiveFloat = 60.0
+
+
 class Settings(BaseSettings):
     """Settings of the app"""
 
@@ -47,3 +311,8 @@ class Settings(BaseSettings):
     version: str
     environment: str
     models_repository: ModelsRepository
+    tracing: TracingSettings = TracingSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+    retention: RetentionSettings = RetentionSettings()
+    quotas: QuotaSettings = QuotaSettings()
+    cache: CacheSettings = CacheSettings()
@@ -0,0 +1,208 @@
+import gzip
+import io
+import json
+import tarfile
+from collections.abc import Iterator
+from typing import IO, Literal
+
+from src.core.models_repositories.base import Model, ModelsRepository
+
+SnapshotCompression = Literal["none", "gz", "zst"]
+
+# pax headers keep the metadata of a model, so the member name is only informational
+NAME_HEADER = "MODEL_REGISTRY.name"
+VERSION_HEADER = "MODEL_REGISTRY.version"
+FILE_EXTENSION_HEADER = "MODEL_REGISTRY.file_extension"
+SAVED_AT_HEADER = "MODEL_REGISTRY.saved_at"
+# members with the aliases of a model follow its versions
+ALIASES_OF_HEADER = "MODEL_REGISTRY.aliases_of"
+
+
+class _ChunksWriter(io.RawIOBase):
+    """Write-only file object that accumulates the written bytes until they're taken"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        """Returns the bytes written since the previous call"""
+
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_snapshot(
+    models_repo: ModelsRepository, compression: SnapshotCompression = "none"
+) -> Iterator[bytes]:
+    """Streams every model of the repository with its saved time and aliases as a tar archive
+
+    Only one model at a time is kept in memory and nothing is staged on disk. The members
+    are timestamped with the saved times, so the snapshots of the same models are identical
+
+    :param models_repo: models repository
+    :param compression: compression of the archive
+    :return: iterator over the chunks of the archive
+    """
+
+    writer = _ChunksWriter()
+    compressor = _create_compressor(writer, compression)
+    stream = compressor if compressor is not None else writer
+    names: list[str] = []
+    saved_times: dict[str, float] = {}
+    with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as archive:
+        for model_info in models_repo.list_models():
+            if not names or names[-1] != model_info.name:
+                names.append(model_info.name)
+                saved_times = models_repo.list_saved_times(model_info.name)
+            model = models_repo.get_model(model_info.name, model_info.version)
+            saved_at = saved_times.get(model.version)
+            pax_headers = _create_model_headers(model, saved_at)
+            _add_member(archive, str(model), model.content, pax_headers, saved_at)
+            if compressor is not None:
+                compressor.flush()
+            yield writer.take()
+
+        for name in dict.fromkeys(names):
+            aliases = models_repo.list_aliases(name)
+            if aliases:
+                content = json.dumps(aliases, sort_keys=True).encode()
+                _add_member(archive, f"{name}.aliases.json", content, {ALIASES_OF_HEADER: name})
+
+    if compressor is not None:
+        compressor.close()
+    yield writer.take()
+
+
+def _create_compressor(writer: _ChunksWriter, compression: SnapshotCompression):
+    if compression == "zst":
+        zstandard = _import_zstandard()
+        return zstandard.ZstdCompressor().stream_writer(writer, closefd=False)
+    if compression == "gz":
+        # the gzip header written by the tar module keeps the current time
+        return gzip.GzipFile(fileobj=writer, mode="wb", mtime=0)
+    return None
+
+
+def _create_model_headers(model: Model, saved_at: float | None) -> dict[str, str]:
+    pax_headers = {
+        NAME_HEADER: model.name,
+        VERSION_HEADER: model.version,
+        FILE_EXTENSION_HEADER: model.file_extension,
+    }
+    if saved_at is not None:
+        pax_headers[SAVED_AT_HEADER] = repr(saved_at)
+    return pax_headers
+
+
+def _add_member(
+    archive: tarfile.TarFile,
+    name: str,
+    content: bytes | memoryview,
+    pax_headers: dict[str, str],
+    mtime: float | None = None,
+) -> None:
+    tar_info = tarfile.TarInfo(name=name)
+    tar_info.size = len(content)
+    tar_info.mtime = int(mtime) if mtime is not None else 0
+    tar_info.pax_headers = pax_headers
+    archive.addfile(tar_info, io.BytesIO(content))
+
+
+def restore_snapshot(
+    models_repo: ModelsRepository,
+    stream: IO[bytes],
+    compression: SnapshotCompression = "none",
+    batch_size: int = 100,
+    batch_bytes: int = 64 * 1024**2,
+) -> int:
+    """Restores the models with their saved times and aliases from the tar archive
+    created by `iter_snapshot`
+
+    The archive is read sequentially and the models are saved in batches
+
+    :param models_repo: models repository
+    :param stream: file object of the archive
+    :param compression: compression of the archive
+    :param batch_size: maximum number of models saved at once
+    :param batch_bytes: maximum total size of the models saved at once,
+        a larger model is saved alone
+    :return: number of restored models
+    :raise ModelExistsError: when the repository already contains one of the models
+    :raise ValueError: when the archive contains a member that isn't a model
+    """
+
+    restored = 0
+    batch: list[Model] = []
+    batch_size_bytes = 0
+    with _open_archive(stream, compression) as archive:
+        for tar_info in archive:
+            if not tar_info.isfile():
+                continue
+
+            content = archive.extractfile(tar_info).read()  # type: ignore[union-attr]
+            if ALIASES_OF_HEADER in tar_info.pax_headers:
+                # the aliases point at the versions saved before
+                models_repo.save_models(batch)
+                restored, batch, batch_size_bytes = restored + len(batch), [], 0
+                _restore_aliases(models_repo, tar_info, content)
+                continue
+
+            model = _read_model(tar_info, content)
+            if batch and batch_size_bytes + len(content) > batch_bytes:
+                models_repo.save_models(batch)
+                restored, batch, batch_size_bytes = restored + len(batch), [], 0
+            batch.append(model)
+            batch_size_bytes += len(content)
+            if len(batch) >= batch_size:
+                models_repo.save_models(batch)
+                restored, batch, batch_size_bytes = restored + len(batch), [], 0
+
+    models_repo.save_models(batch)
+    return restored + len(batch)
+
+
+def _open_archive(stream: IO[bytes], compression: SnapshotCompression) -> tarfile.TarFile:
+    if compression == "zst":
+        zstandard = _import_zstandard()
+        stream = zstandard.ZstdDecompressor().stream_reader(stream)
+    mode: Literal["r|gz", "r|"] = "r|gz" if compression == "gz" else "r|"
+    return tarfile.open(fileobj=stream, mode=mode)
+
+
+def _restore_aliases(
+    models_repo: ModelsRepository, tar_info: tarfile.TarInfo, content: bytes
+) -> None:
+    name = tar_info.pax_headers[ALIASES_OF_HEADER]
+    for alias, version in json.loads(content).items():
+        models_repo.set_alias(name, alias, version)
+
+
+def _read_model(tar_info: tarfile.TarInfo, content: bytes) -> Model:
+    try:
+        saved_at = tar_info.pax_headers.get(SAVED_AT_HEADER)
+        return Model(
+            name=tar_info.pax_headers[NAME_HEADER],
+            version=tar_info.pax_headers[VERSION_HEADER],
+            file_extension=tar_info.pax_headers[FILE_EXTENSION_HEADER],
+            content=content,
+            saved_at=float(saved_at) if saved_at is not None else None,
+        )
+    except KeyError as err:
+        raise ValueError(f"Archive member {tar_info.name} isn't a model") from err
+
+
+def _import_zstandard():
+    try:
+        import zstandard  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ValueError("zst compression requires the zstd extra") from err
+    return zstandard
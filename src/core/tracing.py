@@ -0,0 +1,299 @@
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from src.core.logger import logger
+from src.core.settings import TracingSettings
+
+SCOPE_NAME = "model-registry"
+
+
+# the span is a record of the exported fields
+@dataclass(kw_only=True)
+class Span:  # pylint: disable=too-many-instance-attributes
+    """Timed operation of a trace"""
+
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, str | int | float | bool] = field(default_factory=dict)
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        """Exports the span to a dict
+
+        :return: dictionary representation of the span
+        """
+
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> dict:
+        """Converts the span to the OTLP/JSON representation"""
+
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                _to_otlp_attribute(key, value) for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _to_otlp_attribute(key: str, value: str | int | float | bool) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# the exporters only implement the export of the finished spans
+class SpanExporter(ABC):  # pylint: disable=too-few-public-methods
+    """Base class of the destinations of the finished spans"""
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """Sends the finished spans to the destination
+
+        :param spans: finished spans
+        """
+
+
+class FileSpanExporter(SpanExporter):  # pylint: disable=too-few-public-methods
+    """Appends the spans to a file as JSON lines"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict()) + "\n" for span in spans)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+class OtlpHttpSpanExporter(SpanExporter):  # pylint: disable=too-few-public-methods
+    """Posts the spans to an OpenTelemetry collector with OTLP/HTTP JSON encoding"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 10.0) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans: list[Span]) -> None:
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_to_otlp_attribute("service.name", self.service_name)]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": SCOPE_NAME},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """Records the spans of the sampled requests and exports them in batches from a background
+    thread, so the request path only appends to an in-memory queue
+
+    Tracing is disabled until configured, spans are then no-ops costing a context variable lookup
+    """
+
+    def __init__(self) -> None:
+        self.settings = TracingSettings()
+        self.exporter: SpanExporter | None = None
+        self._current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+            "current_span", default=None
+        )
+        self._spans: queue.Queue[Span] = queue.Queue(maxsize=10000)
+        self._exporting_thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def configure(self, settings: TracingSettings) -> None:
+        """Applies the settings, the call is no-op if they haven't changed
+
+        :param settings: tracing settings
+        """
+
+        if settings == self.settings:
+            return
+
+        with self._lock:
+            self.settings = settings
+            self.exporter = create_span_exporter(settings) if settings.enabled else None
+            if self.exporter is not None and self._exporting_thread is None:
+                self._exporting_thread = threading.Thread(target=self._export, daemon=True)
+                self._exporting_thread.start()
+
+    @property
+    def current_span(self) -> Span | None:
+        """Span of the current context"""
+
+        return self._current_span.get()
+
+    @contextmanager
+    def start_trace(
+        self, name: str, traceparent: str | None = None, **attributes
+    ) -> Iterator[Span | None]:
+        """Starts the root span of a request if the request is sampled
+
+        :param name: name of the span
+        :param traceparent: W3C `traceparent` header joining the trace of the caller
+        :param attributes: attributes of the span
+        :return: the span or None if the request isn't sampled
+        """
+
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if self.exporter is None or (
+            parent is None and random.random() >= self.settings.sample_ratio
+        ):
+            yield None
+            return
+
+        trace_id, parent_id = parent or (os.urandom(16).hex(), None)
+        with self._record(name, trace_id, parent_id, attributes) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span | None]:
+        """Records the child span of the current span of the sampled request
+
+        :param name: name of the span
+        :param attributes: attributes of the span
+        :return: the span or None if the request isn't sampled
+        """
+
+        parent = self._current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        with self._record(name, parent.trace_id, parent.span_id, attributes) as span:
+            yield span
+
+    @contextmanager
+    def _record(
+        self, name: str, trace_id: str, parent_id: str | None, attributes: dict
+    ) -> Iterator[Span]:
+        span = Span(
+            trace_id=trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_id=parent_id,
+            name=name,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        token = self._current_span.set(span)
+        try:
+            yield span
+        except BaseException as err:
+            span.error = f"{type(err).__name__}: {err}"
+            raise
+        finally:
+            self._current_span.reset(token)
+            span.end_ns = time.time_ns()
+            try:
+                self._spans.put_nowait(span)
+            except queue.Full:
+                pass
+
+    def flush(self) -> list[Span]:
+        """Takes the finished spans waiting for the export
+
+        :return: finished spans
+        """
+
+        spans: list[Span] = []
+        while len(spans) < self.settings.export_batch_size:
+            try:
+                spans.append(self._spans.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def _export(self) -> None:
+        while True:
+            time.sleep(self.settings.export_interval_seconds)
+            while spans := self.flush():
+                try:
+                    if self.exporter is not None:
+                        self.exporter.export(spans)
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    logger.warning(f"Failed to export {len(spans)} spans: {err}")
+
+
+def create_span_exporter(settings: TracingSettings) -> SpanExporter:
+    """Creates the exporter of the spans
+
+    :param settings: tracing settings
+    :return: span exporter
+    :raise ValueError: when received unknown exporter
+    """
+
+    if settings.exporter == "file":
+        return FileSpanExporter(settings.file_path)
+
+    if settings.exporter == "otlp":
+        return OtlpHttpSpanExporter(settings.otlp_endpoint, settings.service_name)
+
+    raise ValueError(f"Received unknown exporter: {settings.exporter}")
+
+
+def parse_traceparent(traceparent: str) -> tuple[str, str] | None:
+    """Parses the W3C `traceparent` header
+
+    :param traceparent: header value, e.g. `00-<trace id>-<parent span id>-01`
+    :return: trace id and parent span id or None if the header is malformed
+    """
+
+    parts = traceparent.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+tracer = Tracer()
@@ -0,0 +1,283 @@
+import bisect
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import total_ordering
+
+_VERSION_PATTERN = re.compile(
+    r"^v?(?P<major>\d+)(?:\.(?P<minor>\d+))?(?:\.(?P<patch>\d+))?"
+    r"(?:-(?P<prerelease>[0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$"
+)
+
+
+@total_ordering
+@dataclass(frozen=True)
+class Version:
+    """Semantic version of a model
+
+    Missing minor and patch components are treated as zeros, build metadata is ignored
+    """
+
+    major: int
+    minor: int = 0
+    patch: int = 0
+    prerelease: str = ""
+
+    @classmethod
+    def parse(cls, version: str) -> "Version | None":
+        """Parses the version of a model
+
+        :param version: version of a model, e.g. `1.2.3`, `v2.0` or `1.0.0-rc.1`
+        :return: parsed version or None if the version doesn't follow semantic versioning
+        """
+
+        match = _VERSION_PATTERN.match(version)
+        if match is None:
+            return None
+        return cls(
+            major=int(match["major"]),
+            minor=int(match["minor"] or 0),
+            patch=int(match["patch"] or 0),
+            prerelease=match["prerelease"] or "",
+        )
+
+    @property
+    def is_prerelease(self) -> bool:
+        """Checks if the version is a pre-release one, e.g. `1.0.0-rc.1`"""
+
+        return bool(self.prerelease)
+
+    def __lt__(self, other: "Version") -> bool:
+        return self._precedence() < other._precedence()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._precedence() == other._precedence()
+
+    def __hash__(self) -> int:
+        return hash(self._precedence())
+
+    def __str__(self) -> str:
+        version = f"{self.major}.{self.minor}.{self.patch}"
+        return f"{version}-{self.prerelease}" if self.prerelease else version
+
+    def _precedence(self) -> tuple:
+        # a pre-release precedes the release, numeric identifiers precede alphanumeric ones
+        identifiers = tuple(
+            (0, int(identifier), "") if identifier.isdigit() else (1, 0, identifier)
+            for identifier in self.prerelease.split(".")
+            if self.prerelease
+        )
+        return self.major, self.minor, self.patch, not self.prerelease, identifiers
+
+
+def is_newer_version(candidate: str, version: str) -> bool:
+    """Checks if the candidate version is newer than the version
+
+    :param candidate: version to be compared
+    :param version: version to be compared with
+    :return: True if both versions follow semantic versioning and the candidate is newer
+    """
+
+    parsed_candidate, parsed_version = Version.parse(candidate), Version.parse(version)
+    if parsed_candidate is None or parsed_version is None:
+        return False
+    return parsed_candidate > parsed_version
+
+
+@dataclass(frozen=True)
+class VersionRange:
+    """Range of the release versions of a model
+
+    Pre-release versions never satisfy a range, they can be requested only explicitly
+    """
+
+    lower: Version | None = None
+    upper: Version | None = None
+    lower_inclusive: bool = True
+    upper_inclusive: bool = False
+
+    @classmethod
+    def parse(cls, spec: str) -> "VersionRange | None":
+        """Parses the range of versions
+
+        Supported specs are `latest`, `*`, caret `^1.2`, tilde `~1.2`, wildcards `2.x`, `2.1.*`
+        and space separated comparators `>=1.2 <2`, `>1.0`, `<=1.5`, `=1.2.3`
+
+        :param spec: range spec
+        :return: parsed range or None if the spec is a plain version
+        """
+
+        spec = spec.strip()
+        if spec in ("latest", "*", "x"):
+            return cls()
+        if spec.startswith("^"):
+            return cls._parse_caret(spec[1:])
+        if spec.startswith("~"):
+            return cls._parse_tilde(spec[1:])
+        if spec[:1] in ("<", ">", "="):
+            return cls._parse_comparators(spec)
+        return cls._parse_wildcard(spec)
+
+    def __contains__(self, version: Version) -> bool:
+        if version.is_prerelease:
+            return False
+        if self.lower is not None:
+            if version < self.lower or (version == self.lower and not self.lower_inclusive):
+                return False
+        if self.upper is not None:
+            if version > self.upper or (version == self.upper and not self.upper_inclusive):
+                return False
+        return True
+
+    def __str__(self) -> str:
+        comparators = []
+        if self.lower is not None:
+            comparators.append(f"{'>=' if self.lower_inclusive else '>'}{self.lower}")
+        if self.upper is not None:
+            comparators.append(f"{'<=' if self.upper_inclusive else '<'}{self.upper}")
+        return " ".join(comparators) or "*"
+
+    @classmethod
+    def _parse_caret(cls, version: str) -> "VersionRange | None":
+        lower = Version.parse(version)
+        if lower is None or lower.is_prerelease:
+            return None
+        if lower.major or version.count(".") == 0:
+            upper = Version(lower.major + 1)
+        elif lower.minor or version.count(".") < 2:
+            upper = Version(0, lower.minor + 1)
+        else:
+            upper = Version(0, 0, lower.patch + 1)
+        return cls(lower=lower, upper=upper)
+
+    @classmethod
+    def _parse_tilde(cls, version: str) -> "VersionRange | None":
+        lower = Version.parse(version)
+        if lower is None or lower.is_prerelease:
+            return None
+        if version.count(".") == 0:
+            return cls(lower=lower, upper=Version(lower.major + 1))
+        return cls(lower=lower, upper=Version(lower.major, lower.minor + 1))
+
+    @classmethod
+    def _parse_wildcard(cls, spec: str) -> "VersionRange | None":
+        components = spec.removeprefix("v").split(".")
+        if components[-1] not in ("x", "*") or len(components) > 3:
+            return None
+        fixed = components[:-1]
+        if not all(component.isdigit() for component in fixed):
+            return None
+
+        numbers = [int(component) for component in fixed]
+        if len(numbers) == 1:
+            return cls(lower=Version(numbers[0]), upper=Version(numbers[0] + 1))
+        return cls(
+            lower=Version(numbers[0], numbers[1]), upper=Version(numbers[0], numbers[1] + 1)
+        )
+
+    @classmethod
+    def _parse_comparators(cls, spec: str) -> "VersionRange | None":
+        version_range = cls()
+        for comparator in spec.split():
+            operator = comparator.rstrip("0123456789.v")
+            version = Version.parse(comparator[len(operator) :])
+            if version is None or version.is_prerelease:
+                return None
+
+            if operator in (">", ">="):
+                version_range = cls(
+                    version, version_range.upper, operator == ">=", version_range.upper_inclusive
+                )
+            elif operator in ("<", "<="):
+                version_range = cls(
+                    version_range.lower, version, version_range.lower_inclusive, operator == "<="
+                )
+            elif operator == "=":
+                version_range = cls(version, version, True, True)
+            else:
+                return None
+        return version_range
+
+
+def create_version_key(version: Version) -> str:
+    """Creates the key that sorts the release versions as strings in the order of their precedence
+
+    :param version: release version
+    :return: sortable key of the version
+    """
+
+    return f"{version.major:010d}.{version.minor:010d}.{version.patch:010d}"
+
+
+class VersionIndex:
+    """Sorted index of the release versions of one model
+
+    Lookups and updates take a binary search over the sorted keys
+    """
+
+    def __init__(self, versions: Iterable[str] = ()) -> None:
+        self._entries: list[tuple[str, str]] = []
+        for version in versions:
+            self.add(version)
+
+    def add(self, version: str) -> None:
+        """Adds the version to the index, pre-release and non semantic versions are ignored
+
+        :param version: version of the model
+        """
+
+        entry = self._create_entry(version)
+        if entry is None:
+            return
+        position = bisect.bisect_left(self._entries, entry)
+        if position == len(self._entries) or self._entries[position] != entry:
+            self._entries.insert(position, entry)
+
+    def remove(self, version: str) -> None:
+        """Removes the version from the index
+
+        :param version: version of the model
+        """
+
+        entry = self._create_entry(version)
+        if entry is None:
+            return
+        position = bisect.bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def find_latest(self, version_range: VersionRange) -> str | None:
+        """Finds the latest version that satisfies the range
+
+        :param version_range: range of versions
+        :return: the latest version or None if no versions satisfy the range
+        """
+
+        position = len(self._entries)
+        if version_range.upper is not None:
+            upper_key = create_version_key(version_range.upper)
+            if version_range.upper_inclusive:
+                position = bisect.bisect_right(self._entries, (upper_key, chr(0x10FFFF)))
+            else:
+                position = bisect.bisect_left(self._entries, (upper_key,))
+
+        if position == 0:
+            return None
+        _, version = self._entries[position - 1]
+        parsed_version = Version.parse(version)
+        # only the release versions are indexed, so the entries are always parsed
+        if parsed_version is None or parsed_version not in version_range:
+            return None
+        return version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _create_entry(version: str) -> tuple[str, str] | None:
+        parsed_version = Version.parse(version)
+        if parsed_version is None or parsed_version.is_prerelease:
+            return None
+        return create_version_key(parsed_version), version
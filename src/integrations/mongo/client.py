@@ -1,15 +1,31 @@
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from gridfs import GridFSBucket
 from pymongo import MongoClient as _MongoClient
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.write_concern import WriteConcern
 
-from src.core.settings import MongoModelsRepositorySettings
+from src.core.metrics import observe_mongo_call
+from src.core.settings import MongoModelsRepositorySettings, MongoWriteConcernSettings
 
 
 class MongoClient:
     """Mongo DB client"""
 
     def __init__(self, settings: MongoModelsRepositorySettings) -> None:
-        client: _MongoClient = _MongoClient(settings.connection)
-        self.database = client[settings.database_name]
+        client: _MongoClient = _MongoClient(settings.connection, **settings.client_options)
+        self.database = client.get_database(
+            settings.database_name, write_concern=create_write_concern(settings.write_concern)
+        )
+
+        bulk_write_concern = settings.bulk_write_concern or settings.write_concern
+        self.bulk_database = client.get_database(
+            settings.database_name, write_concern=create_write_concern(bulk_write_concern)
+        )
 
+    @observe_mongo_call
     def save_one_item(self, collection_name: str, document: dict) -> str:
         """Saves one item to the collection
 
@@ -22,6 +38,115 @@ class MongoClient:
         response = collection.insert_one(document)
         return response.inserted_id
 
+    @observe_mongo_call
+    def save_many_items(self, collection_name: str, documents: list[dict]) -> list:
+        """Saves several items to the collection in one round trip
+        using the bulk write concern
+
+        :param collection_name: collection name
+        :param documents: documents
+        :return: ids of the saved documents
+        """
+
+        collection = self.bulk_database[collection_name]
+        response = collection.insert_many(documents, ordered=False)
+        return response.inserted_ids
+
+    @observe_mongo_call
+    def upsert_one_item(self, collection_name: str, collection_filter: dict, fields: dict) -> None:
+        """Atomically updates the fields of the item or inserts it if it doesn't exist
+
+        :param collection_name: collection name
+        :param collection_filter: filter of the item
+        :param fields: fields to be set
+        """
+
+        collection = self.database[collection_name]
+        collection.update_one(collection_filter, {"$set": fields}, upsert=True)
+
+    @observe_mongo_call
+    def upsert_many_items(self, collection_name: str, items: list[tuple[dict, dict]]) -> None:
+        """Updates the fields of several items or inserts them in one round trip
+        using the bulk write concern
+
+        :param collection_name: collection name
+        :param items: filters of the items and the fields to be set
+        """
+
+        collection = self.bulk_database[collection_name]
+        requests = [
+            UpdateOne(collection_filter, {"$set": fields}, upsert=True)
+            for collection_filter, fields in items
+        ]
+        collection.bulk_write(requests, ordered=False)
+
+    @observe_mongo_call
+    def update_items(
+        self,
+        collection_name: str,
+        items: Sequence[tuple[dict, dict | Sequence[dict]]],
+        upsert: bool = False,
+    ) -> None:
+        """Applies the updates, e.g. the update pipelines, to several items in one round trip
+
+        :param collection_name: collection name
+        :param items: filters of the items and their updates
+        :param upsert: inserts the items that don't exist
+        """
+
+        collection = self.database[collection_name]
+        requests = [
+            UpdateOne(collection_filter, update, upsert=upsert)
+            for collection_filter, update in items
+        ]
+        collection.bulk_write(requests, ordered=False)
+
+    @observe_mongo_call
+    def update_many_items(
+        self, collection_name: str, collection_filter: dict, fields: dict
+    ) -> int:
+        """Sets the fields of every item satisfied to the filter
+
+        :param collection_name: collection name
+        :param collection_filter: filter of the items
+        :param fields: fields to be set
+        :return: number of updated items
+        """
+
+        collection = self.database[collection_name]
+        response = collection.update_many(collection_filter, {"$set": fields})
+        return response.modified_count
+
+    @observe_mongo_call
+    def update_one_item(
+        self,
+        collection_name: str,
+        collection_filter: dict,
+        update: dict | Sequence[dict],
+        upsert: bool = False,
+    ) -> bool:
+        """Applies the update, e.g. the update pipeline, to the item satisfied to the filter
+
+        With `upsert` the item is inserted when it doesn't exist, the item that exists
+        but isn't satisfied to the filter is left as is, so the filter is the condition
+        of the update
+
+        :param collection_name: collection name
+        :param collection_filter: filter of the item, it has to contain the id of the item
+        :param update: update of the item
+        :param upsert: inserts the item that doesn't exist
+        :return: True if the item has been updated or inserted, False otherwise
+        """
+
+        collection = self.database[collection_name]
+        try:
+            response = collection.update_one(collection_filter, update, upsert=upsert)
+        except DuplicateKeyError:
+            # the insert of the item with the same id means the item exists but isn't satisfied
+            return False
+        return bool(response.matched_count) or response.upserted_id is not None
+
+    @observe_mongo_call
     def get_one_item(self, collection_name: str, collection_filter: dict) -> dict | None:
         """Fetches one item from the collection
 
@@ -34,6 +159,80 @@ class MongoClient:
         document = collection.find_one(collection_filter)
         return document
 
+    def get_items(
+        self,
+        collection_name: str,
+        collection_filter: dict,
+        projection: dict | None = None,
+        sort: list[tuple[str, int]] | None = None,
+        limit: int = 0,
+    ) -> Iterator[dict]:
+        """Fetches the items satisfied to the filter from the collection
+
+        :param collection_name: collection name
+        :param collection_filter: collection filter
+        :param projection: fields to be returned, all the fields are returned when it's None
+        :param sort: fields and directions the documents are sorted by
+        :param limit: maximum number of the documents, no limit when it's 0
+        :return: iterator over the documents
+        """
+
+        collection = self.database[collection_name]
+        yield from collection.find(collection_filter, projection, sort=sort, limit=limit)
+
+    @observe_mongo_call
+    def aggregate(self, collection_name: str, pipeline: list[dict]) -> list[dict]:
+        """Runs the aggregation pipeline on the server, e.g. to copy the documents with `$merge`
+
+        :param collection_name: collection name
+        :param pipeline: aggregation pipeline
+        :return: documents returned by the pipeline
+        """
+
+        collection = self.database[collection_name]
+        return list(collection.aggregate(pipeline))
+
+    @observe_mongo_call
+    def create_index(
+        self, collection_name: str, keys: str | list[tuple[str, int]], unique: bool = False
+    ) -> str:
+        """Creates the index of the fields if it doesn't exist
+
+        :param collection_name: collection name
+        :param keys: ascending indexed field or the fields with their directions
+        :param unique: whether the index rejects duplicate values
+        :return: name of the index
+        """
+
+        collection = self.database[collection_name]
+        if unique:
+            return collection.create_index(keys, unique=True)
+        return collection.create_index(keys)
+
+    @observe_mongo_call
+    def get_collection_names(self) -> list[str]:
+        """Returns names of the collections of the database
+
+        :return: collection names
+        """
+
+        return self.database.list_collection_names()
+
+    def watch_changes(self, pipeline: list[dict]) -> Iterator[dict]:
+        """Watches the changes of every collection of the database
+
+        Requires the database to be a replica set member
+
+        :param pipeline: aggregation pipeline applied to the change events
+        :return: blocking iterator over the change events
+        """
+
+        with self.database.watch(
+            pipeline, full_document="updateLookup", full_document_before_change="whenAvailable"
+        ) as stream:
+            yield from stream
+
+    @observe_mongo_call
     def delete_one_item(self, collection_name: str, collection_filter: dict) -> int:
         """Deletes one item from the collection
 
@@ -45,3 +244,82 @@ class MongoClient:
         collection = self.database[collection_name]
         response = collection.delete_one(collection_filter)
         return response.deleted_count
+
+    @observe_mongo_call
+    def delete_one_item_and_return(
+        self, collection_name: str, collection_filter: dict, projection: dict | None = None
+    ) -> dict | None:
+        """Deletes one item from the collection returning it in the same round trip
+
+        :param collection_name: collection name
+        :param collection_filter: filter to be used to delete an item
+        :param projection: fields to be returned, all the fields are returned when it's None
+        :return: deleted document or None if there's no documents satisfied to the filter
+        """
+
+        collection = self.database[collection_name]
+        return collection.find_one_and_delete(collection_filter, projection)
+
+    @observe_mongo_call
+    def delete_items(self, collection_name: str, collection_filter: dict) -> int:
+        """Deletes every item satisfied to the filter from the collection
+
+        :param collection_name: collection name
+        :param collection_filter: filter to be used to delete the items
+        :return: number of deleted items
+        """
+
+        collection = self.database[collection_name]
+        response = collection.delete_many(collection_filter)
+        return response.deleted_count
+
+    @observe_mongo_call
+    def read_file(self, bucket_name: str, file_id: Any) -> bytes:
+        """Reads the file stored in the GridFS bucket
+
+        :param bucket_name: name of the GridFS bucket
+        :param file_id: id of the file
+        :return: content of the file
+        """
+
+        bucket = GridFSBucket(self.database, bucket_name)
+        with bucket.open_download_stream(file_id) as stream:
+            return stream.read()
+
+    @observe_mongo_call
+    def read_file_range(self, bucket_name: str, file_id: Any, offset: int, size: int) -> bytes:
+        """Reads a part of the file stored in the GridFS bucket, only the chunks
+        that contain the part are fetched
+
+        :param bucket_name: name of the GridFS bucket
+        :param file_id: id of the file
+        :param offset: position of the first byte of the part
+        :param size: number of bytes of the part
+        :return: part of the file content
+        """
+
+        bucket = GridFSBucket(self.database, bucket_name)
+        with bucket.open_download_stream(file_id) as stream:
+            stream.seek(offset)
+            return stream.read(size)
+
+    @observe_mongo_call
+    def delete_file(self, bucket_name: str, file_id: Any) -> None:
+        """Deletes the file and its chunks from the GridFS bucket
+
+        :param bucket_name: name of the GridFS bucket
+        :param file_id: id of the file
+        """
+
+        GridFSBucket(self.database, bucket_name).delete(file_id)
+
+
+def create_write_concern(settings: MongoWriteConcernSettings) -> WriteConcern | None:
+    """Creates the write concern of the options set by the operator
+
+    :param settings: settings of the write concern
+    :return: write concern or None if the one of the client, the server default, is used
+    """
+
+    options = settings.options
+    return WriteConcern(**options) if options else None
@@ -0,0 +1,303 @@
+"""Copies, verifies or exports every model between two models repositories
+
+Usage:
+    python -m src.tools.migrate copy --source source.env --target target.env
+    python -m src.tools.migrate verify --source source.env --target target.env
+    python -m src.tools.migrate export --source source.env --directory ./models
+
+Every repository is configured by its own .env file with the same variables as the service.
+Processed models are appended to the checkpoint file, so an interrupted run can be resumed
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.api.deps import _create_models_repository
+from src.core.logger import logger
+from src.core.models_repositories import (
+    FileSystemModelsRepository,
+    ModelExistsError,
+    ModelInfo,
+    ModelNotFoundError,
+    ModelsRepository,
+)
+from src.core.settings import FileSystemModelsRepositorySettings, Settings
+
+# parts of the models without the digest hashed at once
+READ_CHUNK_SIZE = 8 * 1024**2
+
+
+@dataclass
+class MigrationReport:
+    """Summary of the migration"""
+
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    transferred_bytes: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Transferred megabytes per second"""
+
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.transferred_bytes / self.elapsed_seconds / 1024 / 1024
+
+    def __str__(self) -> str:
+        return (
+            f"processed={self.processed} skipped={self.skipped} failed={self.failed} "
+            f"transferred={self.transferred_bytes / 1024 / 1024:.1f}MB "
+            f"throughput={self.throughput:.1f}MB/s elapsed={self.elapsed_seconds:.1f}s"
+        )
+
+
+class Checkpoint:
+    """Append-only file of the models that have been processed already"""
+
+    def __init__(self, path: str | Path | None) -> None:
+        self.path = Path(path) if path is not None else None
+        self.processed: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.processed.add((record["name"], record["version"]))
+
+    def __contains__(self, model_info: ModelInfo) -> bool:
+        return (model_info.name, model_info.version) in self.processed
+
+    def mark(self, model_info: ModelInfo) -> None:
+        """Records the model as processed
+
+        :param model_info: metadata of the processed model
+        """
+
+        with self._lock:
+            self.processed.add((model_info.name, model_info.version))
+            if self.path is not None:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(
+                        json.dumps({"name": model_info.name, "version": model_info.version})
+                    )
+                    file.write("\n")
+
+
+def copy_model(source: ModelsRepository, target: ModelsRepository, model_info: ModelInfo) -> int:
+    """Copies the model to the target repository
+
+    The content is streamed through an upload session chunk by chunk, so the models
+    aren't kept in memory. The model that already exists in the target repository
+    is accepted only when it has the very same content
+
+    :param source: repository the model is copied from
+    :param target: repository the model is copied to
+    :param model_info: metadata of the model
+    :return: number of transferred bytes
+    :raise ModelMismatchError: when the target contains another content of the model
+    """
+
+    name, version = model_info.name, model_info.version
+    try:
+        session = target.create_upload(name, version, model_info.file_extension, model_info.size)
+    except ModelExistsError:
+        verify_model(source, target, model_info)
+        return 0
+
+    try:
+        for index in range(session.chunks_count):
+            offset = index * session.chunk_size
+            data = source.read_model_range(name, version, offset, session.chunk_size)
+            target.write_upload_chunk(session.id, offset, data)
+        target.complete_upload(session.id)
+    except ModelExistsError:
+        # the model has been saved to the target since the upload started
+        verify_model(source, target, model_info)
+        return 0
+    except BaseException:
+        target.abort_upload(session.id)
+        raise
+    return model_info.size
+
+
+def verify_model(source: ModelsRepository, target: ModelsRepository, model_info: ModelInfo) -> int:
+    """Verifies that the target repository contains the very same model
+
+    The digests kept by the repositories are compared, the contents are hashed
+    only for the models saved without them
+
+    :param source: repository that contains the original model
+    :param target: repository that contains the copy of the model
+    :param model_info: metadata of the model
+    :return: number of compared bytes
+    :raise ModelMismatchError: when the model is missing in the target or differs from the source
+    """
+
+    try:
+        target_model_info = target.get_model_info(model_info.name, model_info.version)
+    except ModelNotFoundError as err:
+        raise ModelMismatchError(model_info, "missing in the target") from err
+
+    if target_model_info.file_extension != model_info.file_extension:
+        raise ModelMismatchError(model_info, "file extensions differ")
+    if target_model_info.size != model_info.size:
+        raise ModelMismatchError(model_info, "sizes differ")
+    if get_model_digest(target, model_info) != get_model_digest(source, model_info):
+        raise ModelMismatchError(model_info, "contents differ")
+    return model_info.size
+
+
+def get_model_digest(models_repo: ModelsRepository, model_info: ModelInfo) -> str:
+    """Returns the digest of the model content, the content of the models saved
+    without the digest is hashed chunk by chunk
+
+    :param models_repo: models repository
+    :param model_info: metadata of the model
+    :return: sha256 hex digest of the model content
+    """
+
+    digest = models_repo.get_model_digest(model_info.name, model_info.version)
+    if digest is not None:
+        return digest
+
+    sha256 = hashlib.sha256()
+    for offset in range(0, model_info.size, READ_CHUNK_SIZE):
+        sha256.update(
+            models_repo.read_model_range(
+                model_info.name, model_info.version, offset, READ_CHUNK_SIZE
+            )
+        )
+    return sha256.hexdigest()
+
+
+# the options of the migration mirror the options of the command
+def migrate(  # pylint: disable=too-many-arguments
+    source: ModelsRepository,
+    target: ModelsRepository,
+    action: Callable[[ModelsRepository, ModelsRepository, ModelInfo], int],
+    *,
+    workers: int = 8,
+    checkpoint: Checkpoint | None = None,
+    progress_interval: float = 10.0,
+    name: str | None = None,
+) -> MigrationReport:
+    """Applies the action to every model of the source repository using a pool of workers
+
+    Models are listed lazily and at most two models per worker are in flight,
+    so the memory footprint doesn't depend on the size of the repository
+
+    :param source: repository the models are taken from
+    :param target: repository the models are copied to or compared with
+    :param action: action applied to every model, returns number of transferred bytes
+    :param workers: number of models processed at once
+    :param checkpoint: checkpoint of the processed models
+    :param progress_interval: number of seconds between the progress reports
+    :param name: name of the models to be processed, all the models are processed when it's None
+    :return: summary of the migration
+    """
+
+    checkpoint = checkpoint or Checkpoint(None)
+    report = MigrationReport()
+    started_at = last_reported_at = time.monotonic()
+    in_flight: dict[Future, ModelInfo] = {}
+
+    def collect(futures) -> None:
+        for future in futures:
+            model_info = in_flight.pop(future)
+            try:
+                report.transferred_bytes += future.result()
+                report.processed += 1
+                checkpoint.mark(model_info)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                # a model that can't be processed doesn't stop the migration of the others
+                report.failed += 1
+                logger.error(f"Failed to process {model_info}: {err}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for model_info in source.list_models(name):
+            if model_info in checkpoint:
+                report.skipped += 1
+                continue
+
+            if len(in_flight) >= 2 * workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight[executor.submit(action, source, target, model_info)] = model_info
+
+            if time.monotonic() - last_reported_at >= progress_interval:
+                last_reported_at = time.monotonic()
+                report.elapsed_seconds = last_reported_at - started_at
+                logger.info(f"Migration progress: {report}")
+
+        collect(list(in_flight))
+
+    report.elapsed_seconds = time.monotonic() - started_at
+    return report
+
+
+class ModelMismatchError(ValueError):
+    """Raises when the model in the target repository doesn't match the source one"""
+
+    def __init__(self, model_info: ModelInfo, reason: str) -> None:
+        message = f"Model {model_info.name}:{model_info.version} mismatch: {reason}"
+        super().__init__(message)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of the migration tool
+
+    :param argv: command line arguments
+    :return: exit code
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=("copy", "verify", "export"))
+    parser.add_argument("--source", required=True, help=".env file of the source repository")
+    parser.add_argument("--target", help=".env file of the target repository")
+    parser.add_argument("--directory", help="directory the models are exported to")
+    parser.add_argument("--name", help="process only the models with this name")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--checkpoint", help="file to record processed models to resume from")
+    parser.add_argument("--progress-interval", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    # the repositories of the tool aren't shared with the app, so they're created directly
+    source = _create_models_repository(Settings(env_file=args.source).models_repository)
+    if args.action == "export":
+        if args.directory is None:
+            parser.error("--directory is required to export models")
+        Path(args.directory).mkdir(parents=True, exist_ok=True)
+        target: ModelsRepository = FileSystemModelsRepository(
+            FileSystemModelsRepositorySettings(source="fs", directory=args.directory)
+        )
+    else:
+        if args.target is None:
+            parser.error(f"--target is required to {args.action} models")
+        target = _create_models_repository(Settings(env_file=args.target).models_repository)
+
+    report = migrate(
+        source,
+        target,
+        verify_model if args.action == "verify" else copy_model,
+        workers=args.workers,
+        checkpoint=Checkpoint(args.checkpoint),
+        progress_interval=args.progress_interval,
+        name=args.name,
+    )
+    logger.info(f"Migration finished: {report}")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Exports every model of a repository to a tar archive or restores them from it
+
+Usage:
+    python -m src.tools.snapshot export --env service.env --output backup.tar.zst --compression zst
+    python -m src.tools.snapshot import --env service.env --input backup.tar.zst --compression zst
+
+`-` stands for the standard output or input, so a snapshot can be piped between environments
+"""
+
+import argparse
+import sys
+from typing import get_args
+
+from src.api.deps import _create_models_repository
+from src.core.logger import logger
+from src.core.settings import Settings
+from src.core.snapshots import SnapshotCompression, iter_snapshot, restore_snapshot
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of the snapshot tool
+
+    :param argv: command line arguments
+    :return: exit code
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("--env", required=True, help=".env file of the repository")
+    parser.add_argument("--output", default="-", help="archive to export the models to")
+    parser.add_argument("--input", default="-", help="archive to import the models from")
+    parser.add_argument("--compression", choices=get_args(SnapshotCompression), default="none")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--batch-bytes", type=int, default=64 * 1024**2)
+    args = parser.parse_args(argv)
+
+    # the repository of the tool isn't shared with the app, so it's created directly
+    models_repo = _create_models_repository(Settings(env_file=args.env).models_repository)
+    if args.action == "export":
+        with _open(args.output, "wb") as file:
+            for chunk in iter_snapshot(models_repo, args.compression):
+                file.write(chunk)
+        logger.info(f"Snapshot exported to {args.output}")
+        return 0
+
+    with _open(args.input, "rb") as file:
+        restored = restore_snapshot(
+            models_repo, file, args.compression, args.batch_size, args.batch_bytes
+        )
+    logger.info(f"{restored} models restored from {args.input}")
+    return 0
+
+
+def _open(path: str, mode: str):
+    if path == "-":
+        stream = sys.stdout.buffer if "w" in mode else sys.stdin.buffer
+        return open(stream.fileno(), mode, closefd=False)  # pylint: disable=consider-using-with
+    return open(path, mode)  # pylint: disable=consider-using-with
+
+
+if __name__ == "__main__":
+    sys.exit(main())
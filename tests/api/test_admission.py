@@ -0,0 +1,164 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.api.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionTimeoutError,
+    ByteBudget,
+)
+from src.core.settings import AdmissionSettings
+
+
+def create_app(controller: AdmissionController, released: asyncio.Event):
+    async def app(scope, receive, send):
+        if scope["path"] == "/slow":
+            await released.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return AdmissionMiddleware(app, controller)
+
+
+def create_controller(**settings) -> AdmissionController:
+    controller = AdmissionController()
+    controller.configure(AdmissionSettings(enabled=True, **settings))
+    return controller
+
+
+def test_byte_budget_when_large_request_waits_and_expects_later_small_request_queued_behind():
+    # Given
+    budget = ByteBudget(capacity=100)
+
+    async def run():
+        await budget.acquire(60, timeout=1)
+        large = asyncio.create_task(budget.acquire(80, timeout=1))
+        small = asyncio.create_task(budget.acquire(10, timeout=1))
+        await asyncio.sleep(0.01)
+        queued = not large.done() and not small.done()
+        budget.release(60)
+        return queued, await large, await small, budget.used
+
+    # When
+    queued, large_cost, small_cost, used = asyncio.run(run())
+
+    # Then
+    assert queued
+    assert (large_cost, small_cost, used) == (80, 10, 90)
+
+
+def test_byte_budget_when_request_is_larger_than_budget_and_expects_whole_budget_taken():
+    # Given
+    budget = ByteBudget(capacity=100)
+
+    # When
+    cost = asyncio.run(budget.acquire(1000, timeout=1))
+
+    # Then
+    assert cost == 100
+
+
+def test_byte_budget_when_bytes_are_not_released_in_time_and_expects_timeout_error():
+    # Given
+    budget = ByteBudget(capacity=100)
+
+    async def run():
+        await budget.acquire(100, timeout=1)
+        with pytest.raises(AdmissionTimeoutError):
+            await budget.acquire(1, timeout=0.01)
+        return len(budget._waiters)
+
+    # When
+    waiters = asyncio.run(run())
+
+    # Then
+    assert waiters == 0
+
+
+def test_admission_middleware_when_route_limit_is_reached_and_expects_service_unavailable():
+    # Given
+    controller = create_controller(
+        route_limits={"GET /slow": 1}, queue_timeout_seconds=0.05, retry_after_seconds=3
+    )
+
+    async def run():
+        released = asyncio.Event()
+        transport = httpx.ASGITransport(app=create_app(controller, released))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.01)
+            rejected = await client.get("/slow")
+            exempt = await client.get("/health_check")
+            released.set()
+            return await first, rejected, exempt
+
+    # When
+    first, rejected, exempt = asyncio.run(run())
+
+    # Then
+    assert first.status_code == 200
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "3"
+    assert exempt.status_code == 200
+
+
+def test_admission_middleware_when_upload_exceeds_free_budget_and_expects_it_queued_until_released():
+    # Given
+    controller = create_controller(max_in_flight_bytes=1000, min_request_bytes=0)
+
+    async def run():
+        released = asyncio.Event()
+        transport = httpx.ASGITransport(app=create_app(controller, released))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/slow", content=b"0" * 800))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(client.post("/", content=b"0" * 800))
+            await asyncio.sleep(0.01)
+            queued = not second.done()
+            released.set()
+            return queued, await first, await second
+
+    # When
+    queued, first, second = asyncio.run(run())
+
+    # Then
+    assert queued
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert controller.budget.used == 0
+
+
+def test_admission_middleware_when_route_limit_set_by_template_and_expects_all_paths_limited():
+    # Given
+    controller = create_controller(
+        route_limits={"PUT /models/{name}/{version}": 1}, queue_timeout_seconds=0.05
+    )
+    released = asyncio.Event()
+
+    async def save_model(request):
+        await released.wait()
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/models/{name}/{version}", save_model, methods=["PUT"])])
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.put("/models/my-model/1.0.0"))
+            await asyncio.sleep(0.01)
+            rejected = await client.put("/models/another-model/2.0.0")
+            released.set()
+            return await first, rejected
+
+    # When
+    first, rejected = asyncio.run(run())
+
+    # Then
+    assert first.status_code == 200
+    assert rejected.status_code == 503
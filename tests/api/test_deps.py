@@ -49,3 +49,16 @@ def test_create_models_repository_when_source_is_mongo_db_and_expects_an_instanc
     assert isinstance(models_repository, ModelsRepository)
     assert isinstance(models_repository, MongoModelsRepository)
     assert isinstance(settings.models_repository, MongoModelsRepositorySettings)
+
+
+@given_env_vars_via_shell_variables(fs_is_models_repo_env_vars_sample)
+def test_create_models_repository_when_called_several_times_and_expects_the_same_instance():
+    # Given
+    settings = create_settings()
+
+    # When
+    first_models_repository = create_models_repository(settings)
+    second_models_repository = create_models_repository(create_settings())
+
+    # Then
+    assert first_models_repository is second_models_repository
@@ -0,0 +1,252 @@
+import asyncio
+import gc
+import tracemalloc
+from pathlib import Path
+
+import bson
+import pytest
+from pymongo.database import Collection
+
+from src.api.run import (
+    app,
+    create_models_cache,
+    create_models_repository,
+    create_quota_settings,
+)
+from src.core.models_repositories import (
+    FileSystemModelsRepository,
+    MongoModelsRepository,
+)
+from src.core.settings import FileSystemModelsRepositorySettings, QuotaSettings
+
+MiB = 1024 * 1024
+PAYLOAD_SIZES = (1 * MiB, 8 * MiB, 32 * MiB)
+# peak memory allowed while handling a request, in multiples of the payload size
+UPLOAD_PEAK_MEMORY_MULTIPLE = 3.0
+DOWNLOAD_PEAK_MEMORY_MULTIPLE = 2.5
+# the raw body is buffered by the chunks of the upload session only
+PUT_PEAK_MEMORY_MULTIPLE = 1.0
+# the multipart parser keeps up to 1 MiB of a file in memory before spilling it to disk
+TRACED_SLACK = 2 * MiB
+# RSS also grows by the allocator arenas and the lazily imported modules, how much depends on
+# the fragmentation of the heap left by the preceding tests
+RSS_SLACK = 32 * MiB
+# request bodies are delivered to the app in chunks of this size
+CHUNK_SIZE = 64 * 1024
+BOUNDARY = "memory-test-boundary"
+
+
+def create_multipart_body(content: bytes) -> bytes:
+    return (
+        (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="my-model-0.0.7.cbm"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        + content
+        + f"\r\n--{BOUNDARY}--\r\n".encode()
+    )
+
+
+def read_rss_peak() -> int | None:
+    """Returns the peak resident set size of the process in bytes, None if it's unavailable"""
+
+    status = Path("/proc/self/status")
+    if not status.exists():
+        return None
+    for line in status.read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def reset_rss_peak() -> bool:
+    """Resets the peak resident set size of the process, supported by Linux only"""
+
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def call_app(
+    method: str, query: str, body: bytes = b"", headers: list | None = None, path: str = "/"
+) -> int:
+    """Calls the app without the test client, so neither the request body nor the response body
+    are copied outside of the app, the response body is only counted
+
+    :return: status of the response
+    """
+
+    status = 0
+    chunks = [body[start : start + CHUNK_SIZE] for start in range(0, len(body), CHUNK_SIZE)]
+    del body
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": headers or [],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def receive() -> dict:
+        if chunks:
+            return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    asyncio.run(app(scope, receive, send))
+    return status
+
+
+def measure_peak_memory(function) -> tuple[int, int | None]:
+    """Returns the peak traced memory and the growth of the peak RSS while calling the function"""
+
+    gc.collect()
+    rss_reset = reset_rss_peak()
+    rss_before = read_rss_peak()
+    tracemalloc.start()
+    try:
+        function()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss_after = read_rss_peak()
+    rss_growth = rss_after - rss_before if rss_reset and rss_before and rss_after else None
+    return traced_peak, rss_growth
+
+
+@pytest.fixture(params=["fs", "mongo"])
+def models_repo(request, tmp_path, mongo_client, mocker):
+    if request.param == "fs":
+        settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+        repo = FileSystemModelsRepository(settings)
+    else:
+        # the driver encodes the documents to BSON and decodes the fetched ones
+        documents = {}
+
+        def insert_one(document: dict):
+            documents["encoded"] = bson.encode(document)
+            return mocker.Mock(inserted_id=document["version"])
+
+        mocker.patch.object(Collection, "insert_one", side_effect=insert_one)
+        mocker.patch.object(Collection, "update_one")
+        mocker.patch.object(Collection, "bulk_write")
+
+        def find(_, projection: dict | None = None, **__):
+            if "encoded" not in documents:
+                return iter([])
+            document = bson.decode(documents["encoded"])
+            if projection is not None:
+                document = {
+                    key: document[key]
+                    for key, value in projection.items()
+                    if value is True and key in document
+                } | ({"size": len(document["content"])} if "size" in projection else {})
+            return iter([document])
+
+        mocker.patch.object(
+            Collection,
+            "find_one",
+            side_effect=lambda *_, **__: (
+                bson.decode(documents["encoded"]) if "encoded" in documents else None
+            ),
+        )
+        mocker.patch.object(Collection, "find", side_effect=find)
+        repo = MongoModelsRepository(mongo_client)
+
+    app.dependency_overrides[create_models_repository] = lambda: repo
+    app.dependency_overrides[create_quota_settings] = QuotaSettings
+    app.dependency_overrides[create_models_cache] = lambda: None
+    yield repo
+    app.dependency_overrides.pop(create_models_repository, None)
+    app.dependency_overrides.pop(create_quota_settings, None)
+    app.dependency_overrides.pop(create_models_cache, None)
+
+
+@pytest.mark.parametrize("payload_size", PAYLOAD_SIZES, ids=lambda size: f"{size // MiB}MiB")
+def test_save_model_when_payload_is_large_and_expects_peak_memory_bounded(
+    models_repo, payload_size
+):
+    # Given
+    body = create_multipart_body(b"0" * payload_size)
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    query = "name=my-model&version=0.0.7"
+    limit = UPLOAD_PEAK_MEMORY_MULTIPLE * payload_size + TRACED_SLACK
+
+    # When
+    statuses = []
+    traced_peak, rss_growth = measure_peak_memory(
+        lambda: statuses.append(call_app("POST", query, body, headers))
+    )
+
+    # Then
+    assert statuses == [200]
+    assert traced_peak <= limit, f"traced peak {traced_peak / MiB:.1f} MiB"
+    if rss_growth is not None:
+        assert rss_growth <= limit + RSS_SLACK, f"RSS peak growth {rss_growth / MiB:.1f} MiB"
+
+
+@pytest.mark.parametrize("models_repo", ["fs"], indirect=True)
+@pytest.mark.parametrize("payload_size", PAYLOAD_SIZES, ids=lambda size: f"{size // MiB}MiB")
+def test_put_model_when_payload_is_large_and_expects_peak_memory_bounded_by_chunks(
+    models_repo, payload_size
+):
+    # Given
+    body = b"0" * payload_size
+    headers = [(b"content-length", str(payload_size).encode())]
+    # the body delivered to the app is counted as well
+    limit = (
+        PUT_PEAK_MEMORY_MULTIPLE * payload_size + 2 * models_repo.UPLOAD_CHUNK_SIZE + TRACED_SLACK
+    )
+
+    # When
+    statuses = []
+    traced_peak, rss_growth = measure_peak_memory(
+        lambda: statuses.append(
+            call_app("PUT", "file_extension=cbm", body, headers, "/models/my-model/0.0.7")
+        )
+    )
+
+    # Then
+    assert statuses == [200]
+    assert traced_peak <= limit, f"traced peak {traced_peak / MiB:.1f} MiB"
+    if rss_growth is not None:
+        assert rss_growth <= limit + RSS_SLACK, f"RSS peak growth {rss_growth / MiB:.1f} MiB"
+
+
+@pytest.mark.parametrize("payload_size", PAYLOAD_SIZES, ids=lambda size: f"{size // MiB}MiB")
+def test_get_model_when_payload_is_large_and_expects_peak_memory_bounded(
+    models_repo, payload_size, model
+):
+    # Given
+    models_repo.save_model(
+        type(model)(
+            name="my-model", version="0.0.7", content=b"0" * payload_size, file_extension="cbm"
+        )
+    )
+    query = "name=my-model&version=0.0.7"
+    limit = DOWNLOAD_PEAK_MEMORY_MULTIPLE * payload_size + TRACED_SLACK
+
+    # When
+    statuses = []
+    traced_peak, rss_growth = measure_peak_memory(lambda: statuses.append(call_app("GET", query)))
+
+    # Then
+    assert statuses == [200]
+    assert traced_peak <= limit, f"traced peak {traced_peak / MiB:.1f} MiB"
+    if rss_growth is not None:
+        assert rss_growth <= limit + RSS_SLACK, f"RSS peak growth {rss_growth / MiB:.1f} MiB"
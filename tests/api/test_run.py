@@ -1,13 +1,31 @@
 import dataclasses
+import hashlib
 import re
+import threading
+import time
 from io import BytesIO
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api.run import app, create_models_repository
-from src.core.models_repositories import FileSystemModelsRepository, Model
-from src.core.settings import FileSystemModelsRepositorySettings
+from src.api.admission import admission_controller
+from src.api.run import (
+    app,
+    create_models_cache,
+    create_models_repository,
+    create_quota_settings,
+    create_settings,
+)
+from src.core.models_cache import SharedModelsCache
+from src.core.models_repositories import FileSystemModelsRepository, Model, ModelsUsage
+from src.core.retention import RetentionScheduler
+from src.core.settings import (
+    FileSystemModelsRepositorySettings,
+    QuotaSettings,
+    Settings,
+    TracingSettings,
+)
+from src.core.tracing import tracer
 
 
 @pytest.fixture()
@@ -16,6 +34,8 @@ def client(tmp_path) -> TestClient:
     app.dependency_overrides[create_models_repository] = lambda: FileSystemModelsRepository(
         settings
     )
+    app.dependency_overrides[create_quota_settings] = QuotaSettings
+    app.dependency_overrides[create_models_cache] = lambda: None
     return TestClient(app)
 
 
@@ -94,6 +114,111 @@ def test_save_model_when_model_filename_does_not_have_any_file_extension_and_exp
     assert actual_filename == expected_file_name
 
 
+# put model
+def test_put_model_when_body_is_raw_model_and_expects_model_saved(client, model):
+    # Given
+    url = f"/models/{model.name}/{model.version}"
+
+    # When
+    response = client.put(url, content=model.content, headers={"X-File-Extension": "cbm"})
+
+    # Then
+    assert response.status_code == 200
+    response = client.get("/", params=create_crud_params(model))
+    assert response.content == model.content
+    assert str(model) in response.headers["Content-Disposition"]
+
+
+def test_put_model_when_file_extension_is_not_sent_and_expects_mlmodel_as_a_file_extension(
+    client, model
+):
+    # When
+    client.put(f"/models/{model.name}/{model.version}", content=model.content)
+
+    # Then
+    response = client.get("/", params=create_crud_params(model))
+    assert "my-model-0.0.7.mlmodel" in response.headers["Content-Disposition"]
+
+
+def test_put_model_when_model_exists_and_expects_model_exists_error(client, model):
+    # Given
+    url = f"/models/{model.name}/{model.version}"
+    client.put(url, params={"file_extension": "cbm"}, content=model.content)
+
+    # When
+    response = client.put(url, params={"file_extension": "cbm"}, content=model.content)
+
+    # Then
+    assert response.status_code == 409
+
+
+def test_put_model_when_content_length_is_not_sent_and_expects_length_required(client, model):
+    # Given
+    def iter_body():
+        yield model.content
+
+    # When
+    response = client.put(f"/models/{model.name}/{model.version}", content=iter_body())
+
+    # Then
+    assert response.status_code == 411
+
+
+def test_put_model_when_body_is_shorter_than_content_length_and_expects_bad_request_and_no_upload(
+    client, model, tmp_path
+):
+    # Given
+    headers = {"Content-Length": str(len(model.content) + 1)}
+
+    # When
+    response = client.put(
+        f"/models/{model.name}/{model.version}", content=model.content, headers=headers
+    )
+
+    # Then
+    assert response.status_code == 400
+    assert client.get("/", params=create_crud_params(model)).status_code == 404
+    assert not any((tmp_path / ".uploads").iterdir())
+
+
+# link model by digest
+def test_link_model_when_content_is_stored_and_expects_model_saved_without_upload(client, model):
+    # Given
+    client.post("/", params=create_crud_params(model), files=create_files(model))
+    digest = hashlib.sha256(model.content).hexdigest()
+    params = {"digest": digest, "size": len(model.content), "file_extension": "cbm"}
+
+    # When
+    response = client.post(f"/models/{model.name}/1.0.0/link", params=params)
+
+    # Then
+    assert response.status_code == 200
+    assert response.json()["version"] == "1.0.0"
+    response = client.get("/", params={"name": model.name, "version": "1.0.0"})
+    assert response.content == model.content
+
+
+def test_link_model_when_content_is_unknown_and_expects_not_found(client, model):
+    # Given
+    params = {"digest": hashlib.sha256(model.content).hexdigest(), "size": len(model.content)}
+
+    # When
+    response = client.post(f"/models/{model.name}/{model.version}/link", params=params)
+
+    # Then
+    assert response.status_code == 404
+
+
+def test_link_model_when_digest_is_malformed_and_expects_validation_error(client, model):
+    # When
+    response = client.post(
+        f"/models/{model.name}/{model.version}/link", params={"digest": "../..", "size": 1}
+    )
+
+    # Then
+    assert response.status_code == 422
+
+
 # get model
 def test_get_model_when_model_is_not_found_and_expects_not_found_item_error_returned(
     client, model
@@ -280,3 +405,723 @@ def test_case_when_several_storage_contains_models_with_the_same_version_but_dif
 
     # models are different and not point to the same space in memory
     assert another_model != model.content
+
+
+# conditional and partial downloads
+def test_get_model_when_if_none_match_header_contains_etag_of_the_model_and_expects_not_modified(
+    client, model
+):
+    # Given
+    params = create_crud_params(model)
+    response = client.post("/", params=params, files=create_files(model))
+    assert response.status_code == 200
+    response = client.get("/", params=params)
+    etag = response.headers["etag"]
+
+    # When
+    response = client.get("/", params=params, headers={"If-None-Match": etag})
+
+    # Then
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.parametrize(
+    argnames="range_header, expected_content_range, expected_content",
+    ids=("first bytes", "open range", "suffix range", "range beyond the end"),
+    argvalues=(
+        ("bytes=0-5", "bytes 0-5/22", b"binary"),
+        ("bytes=17-", "bytes 17-21/22", b"model"),
+        ("bytes=-5", "bytes 17-21/22", b"model"),
+        ("bytes=17-1000", "bytes 17-21/22", b"model"),
+    ),
+)
+def test_get_model_when_range_header_is_sent_and_expects_partial_content(
+    client, model, range_header, expected_content_range, expected_content
+):
+    # Given
+    params = create_crud_params(model)
+    response = client.post("/", params=params, files=create_files(model))
+    assert response.status_code == 200
+
+    # When
+    response = client.get("/", params=params, headers={"Range": range_header})
+
+    # Then
+    assert response.status_code == 206
+    assert response.headers["content-range"] == expected_content_range
+    assert response.content == expected_content
+
+
+@pytest.mark.parametrize(
+    argnames="range_header",
+    ids=("beyond the end", "malformed"),
+    argvalues=("bytes=22-", "lines=1"),
+)
+def test_get_model_when_range_header_can_not_be_satisfied_and_expects_range_not_satisfiable(
+    client, model, range_header
+):
+    # Given
+    params = create_crud_params(model)
+    response = client.post("/", params=params, files=create_files(model))
+    assert response.status_code == 200
+
+    # When
+    response = client.get("/", params=params, headers={"Range": range_header})
+
+    # Then
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */22"
+
+
+def test_get_model_when_if_range_header_does_not_match_etag_and_expects_the_whole_model(
+    client, model
+):
+    # Given
+    params = create_crud_params(model)
+    response = client.post("/", params=params, files=create_files(model))
+    assert response.status_code == 200
+
+    # When
+    response = client.get(
+        "/", params=params, headers={"Range": "bytes=0-5", "If-Range": '"outdated"'}
+    )
+
+    # Then
+    assert response.status_code == 200
+    assert response.content == model.content
+
+
+def test_get_model_when_range_header_is_sent_and_expects_only_range_read_from_storage(
+    tmp_path, model, mocker
+):
+    # Given
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+    models_repo = FileSystemModelsRepository(settings)
+    models_repo.save_model(model)
+    app.dependency_overrides[create_models_repository] = lambda: models_repo
+    app.dependency_overrides[create_models_cache] = lambda: None
+    get_model = mocker.spy(models_repo, "get_model")
+    read_model_range = mocker.spy(models_repo, "read_model_range")
+
+    # When
+    response = TestClient(app).get(
+        "/", params=create_crud_params(model), headers={"Range": "bytes=17-"}
+    )
+
+    # Then
+    assert response.status_code == 206
+    assert response.content == b"model"
+    assert response.headers["etag"] == f'"{hashlib.sha256(model.content).hexdigest()}"'
+    read_model_range.assert_called_once_with(model.name, model.version, 17, 5)
+    get_model.assert_not_called()
+
+
+# snapshots
+def test_export_snapshot_and_import_snapshot_when_storage_is_empty_and_expects_models_restored(
+    client, model, tmp_path
+):
+    # Given
+    params = create_crud_params(model)
+    response = client.post("/", params=params, files=create_files(model))
+    assert response.status_code == 200
+    response = client.get("/admin/snapshot", params={"compression": "gz"})
+    assert response.status_code == 200
+    archive = response.content
+
+    response = client.delete("/", params=params)
+    assert response.status_code == 200
+
+    # When
+    response = client.post("/admin/snapshot", params={"compression": "gz"}, content=archive)
+
+    # Then
+    assert response.status_code == 200
+    assert "1 models" in response.text
+    response = client.get("/", params=params)
+    assert response.content == model.content
+
+    # importing the same snapshot twice conflicts with the restored models
+    response = client.post("/admin/snapshot", params={"compression": "gz"}, content=archive)
+    assert response.status_code == 409
+
+
+def test_import_snapshot_when_body_is_not_an_archive_and_expects_bad_request(client):
+    # When
+    response = client.post("/admin/snapshot", content=b"definitely not a tar archive" * 100)
+
+    # Then
+    assert response.status_code == 400
+
+
+# wait for model
+def test_wait_for_model_when_model_exists_and_expects_metadata_immediately(client, model):
+    # Given
+    params = create_crud_params(model)
+    response = client.post("/", params=params, files=create_files(model))
+    assert response.status_code == 200
+
+    # When
+    response = client.get("/wait", params={**params, "timeout": 5})
+
+    # Then
+    assert response.status_code == 200
+    assert response.json() == {
+        "name": model.name,
+        "version": model.version,
+        "file_extension": model.file_extension,
+        "size": len(model.content),
+    }
+
+
+def test_wait_for_model_when_newer_version_exists_and_expects_metadata_of_the_newest_one(
+    client, model
+):
+    # Given
+    for version in ("0.0.8", "0.1.0", "0.0.9-rc.1"):
+        newer_model = dataclasses.replace(model, version=version)
+        params = create_crud_params(newer_model)
+        response = client.post("/", params=params, files=create_files(newer_model))
+        assert response.status_code == 200
+
+    # When
+    response = client.get("/wait", params={**create_crud_params(model), "timeout": 5})
+
+    # Then
+    assert response.status_code == 200
+    assert response.json()["version"] == "0.1.0"
+
+
+def test_wait_for_model_when_model_saved_while_waiting_and_expects_metadata(client, model):
+    # Given
+    responses = []
+    waiter = threading.Thread(
+        target=lambda: responses.append(
+            client.get("/wait", params={**create_crud_params(model), "timeout": 10})
+        )
+    )
+    waiter.start()
+    time.sleep(0.2)
+
+    # When
+    response = client.post("/", params=create_crud_params(model), files=create_files(model))
+    assert response.status_code == 200
+    waiter.join()
+
+    # Then
+    assert responses[0].status_code == 200
+    assert responses[0].json()["version"] == model.version
+
+
+def test_wait_for_model_when_model_is_not_saved_in_time_and_expects_not_found(client, model):
+    # When
+    response = client.get("/wait", params={**create_crud_params(model), "timeout": 0.1})
+
+    # Then
+    assert response.status_code == 404
+    assert "no such model" in response.text.lower()
+
+
+# version resolution
+@pytest.mark.parametrize(
+    argnames="version, expected_version",
+    argvalues=(("latest", "2.0.0"), ("^1.1", "1.2.0"), ("1.x", "1.2.0"), ("~1.1", "1.1.0")),
+)
+def test_get_model_when_version_is_a_range_and_expects_the_latest_satisfying_version(
+    client, model, version, expected_version
+):
+    # Given
+    for saved_version in ("1.1.0", "1.2.0", "2.0.0", "2.1.0-rc.1"):
+        saved_model = dataclasses.replace(
+            model, version=saved_version, content=saved_version.encode()
+        )
+        response = client.post(
+            "/", params=create_crud_params(saved_model), files=create_files(saved_model)
+        )
+        assert response.status_code == 200
+
+    # When
+    response = client.get("/", params={"name": model.name, "version": version})
+
+    # Then
+    assert response.status_code == 200
+    assert response.content == expected_version.encode()
+    assert response.headers["x-model-version"] == expected_version
+
+
+def test_get_model_when_no_versions_satisfy_range_and_expects_not_found(client, model):
+    # When
+    response = client.get("/", params={"name": model.name, "version": "^3"})
+
+    # Then
+    assert response.status_code == 404
+
+
+# aliases
+def test_set_alias_and_get_model_by_alias_when_alias_moved_and_expects_new_version(client, model):
+    # Given
+    newer_model = dataclasses.replace(model, version="0.1.0", content=b"newer content")
+    for saved_model in (model, newer_model):
+        response = client.post(
+            "/", params=create_crud_params(saved_model), files=create_files(saved_model)
+        )
+        assert response.status_code == 200
+    alias_params = {"name": model.name, "alias": "production"}
+    response = client.put("/aliases", params={**alias_params, "version": model.version})
+    assert response.status_code == 200
+
+    # When
+    response = client.put("/aliases", params={**alias_params, "version": "latest"})
+
+    # Then
+    assert response.status_code == 200
+    response = client.get("/", params={"name": model.name, "version": "@production"})
+    assert response.status_code == 200
+    assert response.content == newer_model.content
+    response = client.get("/aliases", params={"name": model.name})
+    assert response.json() == {"production": newer_model.version}
+
+
+def test_delete_alias_when_alias_exists_and_expects_not_found_afterwards(client, model):
+    # Given
+    response = client.post("/", params=create_crud_params(model), files=create_files(model))
+    assert response.status_code == 200
+    alias_params = {"name": model.name, "alias": "canary"}
+    response = client.put("/aliases", params={**alias_params, "version": model.version})
+    assert response.status_code == 200
+
+    # When
+    response = client.delete("/aliases", params=alias_params)
+
+    # Then
+    assert response.status_code == 200
+    response = client.get("/", params={"name": model.name, "version": "@canary"})
+    assert response.status_code == 404
+    assert "no such alias" in response.text.lower()
+    response = client.delete("/aliases", params=alias_params)
+    assert response.status_code == 404
+
+
+def test_set_alias_when_model_does_not_exist_and_expects_not_found(client, model):
+    # When
+    response = client.put(
+        "/aliases", params={"name": model.name, "alias": "production", "version": "1.0.0"}
+    )
+
+    # Then
+    assert response.status_code == 404
+
+
+# metrics
+def test_get_metrics_when_model_saved_and_fetched_and_expects_route_and_backend_histograms(
+    client, model
+):
+    # Given
+    params = create_crud_params(model)
+    client.post("/", params=params, files=create_files(model))
+    client.get("/", params=params)
+
+    # When
+    response = client.get("/metrics")
+
+    # Then
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'model_registry_http_request_duration_seconds_count{method="GET",route="/",status="200"}'
+        in response.text
+    )
+    assert 'model_registry_http_response_size_bytes_bucket{method="GET",route="/",le="1024"}' in (
+        response.text
+    )
+    assert (
+        'backend="FileSystemModelsRepository",operation="save_model",status="ok"' in response.text
+    )
+
+
+# profiling
+def test_get_model_when_profile_header_sent_and_expects_profile_available(client, model):
+    # Given
+    settings = TracingSettings(profiling_enabled=True, profiling_interval_seconds=0.001)
+    tracer.configure(settings)
+    params = create_crud_params(model)
+    client.post("/", params=params, files=create_files(model))
+
+    try:
+        # When
+        response = client.get("/", params=params, headers={"X-Profile": "1"})
+    finally:
+        tracer.configure(TracingSettings())
+
+    # Then
+    assert response.status_code == 200
+    profile_response = client.get(f"/admin/profiles/{response.headers['X-Profile-Id']}")
+    assert profile_response.status_code == 200
+    assert client.get("/admin/profiles/unknown").status_code == 404
+
+
+# retention
+def test_get_retention_report_when_versions_expired_and_expects_them_listed_but_kept(
+    client, model
+):
+    # Given
+    for version in ("1.0.0", "1.1.0"):
+        client.post(
+            "/", params={"name": model.name, "version": version}, files=create_files(model)
+        )
+    settings = Settings(
+        version="4.0.4",
+        environment="test",
+        models_repository={"source": "fs", "directory": "resources"},
+        retention={"rules": [{"keep_last": 1}]},
+    )
+    app.dependency_overrides[create_settings] = lambda: settings
+
+    try:
+        # When
+        response = client.get("/admin/retention")
+    finally:
+        del app.dependency_overrides[create_settings]
+
+    # Then
+    assert response.status_code == 200
+    assert [model_info["version"] for model_info in response.json()] == ["1.0.0"]
+    response = client.get("/", params={"name": model.name, "version": "1.0.0"})
+    assert response.status_code == 200
+
+
+# resumable uploads
+@pytest.fixture()
+def upload_client(tmp_path) -> TestClient:
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+    models_repo = FileSystemModelsRepository(settings)
+    models_repo.UPLOAD_CHUNK_SIZE = 8
+    app.dependency_overrides[create_models_repository] = lambda: models_repo
+    app.dependency_overrides[create_quota_settings] = QuotaSettings
+    app.dependency_overrides[create_models_cache] = lambda: None
+    return TestClient(app)
+
+
+def test_upload_when_chunks_sent_in_several_requests_and_expects_model_saved(upload_client, model):
+    # Given
+    params = {**create_crud_params(model), "file_extension": "cbm", "size": len(model.content)}
+    response = upload_client.post("/uploads", params=params)
+    assert response.status_code == 201
+    upload_id = response.json()["id"]
+
+    # When
+    response = upload_client.patch(
+        f"/uploads/{upload_id}", params={"offset": 0}, content=model.content[:16]
+    )
+    assert response.json()["committed_offset"] == 16
+    response = upload_client.patch(
+        f"/uploads/{upload_id}", params={"offset": 16}, content=model.content[16:]
+    )
+    assert response.json()["is_complete"]
+    response = upload_client.post(f"/uploads/{upload_id}/complete")
+
+    # Then
+    assert response.status_code == 200
+    response = upload_client.get("/", params=create_crud_params(model))
+    assert response.content == model.content
+    assert upload_client.get(f"/uploads/{upload_id}").status_code == 404
+
+
+def test_upload_when_chunk_is_not_aligned_and_expects_bad_request(upload_client, model):
+    # Given
+    params = {**create_crud_params(model), "file_extension": "cbm", "size": len(model.content)}
+    upload_id = upload_client.post("/uploads", params=params).json()["id"]
+
+    # When
+    response = upload_client.patch(
+        f"/uploads/{upload_id}", params={"offset": 3}, content=model.content[3:11]
+    )
+
+    # Then
+    assert response.status_code == 400
+
+
+def test_complete_upload_when_chunks_are_missing_and_expects_bad_request(upload_client, model):
+    # Given
+    params = {**create_crud_params(model), "file_extension": "cbm", "size": len(model.content)}
+    upload_id = upload_client.post("/uploads", params=params).json()["id"]
+    upload_client.patch(f"/uploads/{upload_id}", params={"offset": 0}, content=model.content[:8])
+
+    # When
+    response = upload_client.post(f"/uploads/{upload_id}/complete")
+
+    # Then
+    assert response.status_code == 400
+    assert upload_client.get(f"/uploads/{upload_id}").json()["committed_offset"] == 8
+
+
+# usage and quotas
+def test_get_usage_when_models_saved_and_expects_counters_of_the_model_and_of_every_model(
+    client, model
+):
+    # Given
+    for name in (model.name, "another-model"):
+        client.post(
+            "/", params={"name": name, "version": model.version}, files=create_files(model)
+        )
+
+    # When
+    response = client.get("/usage", params={"name": model.name})
+    all_models_response = client.get("/usage")
+
+    # Then
+    assert response.status_code == 200
+    assert response.json()["count"] == 1
+    assert response.json()["size"] == len(model.content)
+    assert all_models_response.json()["count"] == 2
+    assert all_models_response.json()["size"] == 2 * len(model.content)
+
+
+def test_save_model_when_quota_is_exceeded_and_expects_payload_too_large_before_upload(
+    client, model
+):
+    # Given
+    quotas = QuotaSettings(max_bytes={model.name: len(model.content) + 1})
+    app.dependency_overrides[create_quota_settings] = lambda: quotas
+    client.post("/", params=create_crud_params(model), files=create_files(model))
+
+    # When
+    params = {"name": model.name, "version": "1.0.0"}
+    response = client.post("/", params=params, files=create_files(model))
+    put_response = client.put(f"/models/{model.name}/1.0.0", content=model.content)
+    upload_response = client.post(
+        "/uploads", params={**params, "file_extension": "cbm", "size": len(model.content)}
+    )
+    another_model_response = client.post(
+        "/", params={"name": "another-model", "version": "1.0.0"}, files=create_files(model)
+    )
+
+    # Then
+    assert response.status_code == 413
+    assert put_response.status_code == 413
+    assert upload_response.status_code == 413
+    assert another_model_response.status_code == 200
+    assert client.get("/", params=params).status_code == 404
+
+
+def test_complete_upload_when_quota_is_taken_since_upload_created_and_expects_payload_too_large(
+    upload_client, model
+):
+    # Given
+    quotas = QuotaSettings(max_bytes={model.name: len(model.content) + 1})
+    app.dependency_overrides[create_quota_settings] = lambda: quotas
+    params = {**create_crud_params(model), "file_extension": "cbm", "size": len(model.content)}
+    upload_id = upload_client.post("/uploads", params=params).json()["id"]
+    upload_client.patch(f"/uploads/{upload_id}", params={"offset": 0}, content=model.content)
+    upload_client.put(f"/models/{model.name}/1.0.0", content=model.content)
+
+    # When
+    response = upload_client.post(f"/uploads/{upload_id}/complete")
+
+    # Then
+    assert response.status_code == 413
+    assert upload_client.get("/", params=create_crud_params(model)).status_code == 404
+
+
+# bulk delete
+def test_delete_models_when_version_range_is_sent_and_expects_satisfying_versions_deleted(
+    client, model
+):
+    # Given
+    for version in ("1.0.0", "1.1.0", "2.0.0"):
+        client.post(
+            "/", params={"name": model.name, "version": version}, files=create_files(model)
+        )
+
+    # When
+    response = client.delete(f"/models/{model.name}", params={"version": "<2"})
+    all_versions_response = client.delete(f"/models/{model.name}")
+
+    # Then
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 2}
+    assert all_versions_response.json() == {"deleted": 1}
+    assert client.get("/", params={"name": model.name, "version": "2.0.0"}).status_code == 404
+
+
+def test_delete_models_when_version_is_not_a_range_and_expects_bad_request(client, model):
+    # When
+    response = client.delete(f"/models/{model.name}", params={"version": "1.0.0"})
+
+    # Then
+    assert response.status_code == 400
+
+
+# search
+def test_search_models_when_names_match_and_expects_paginated_names(client, model):
+    # Given
+    for name in ("ranking-ads", "ranking-feed", "ranking-search", "fraud-ranking"):
+        client.post(
+            "/", params={"name": name, "version": model.version}, files=create_files(model)
+        )
+
+    # When
+    response = client.get("/search", params={"query": "ranking-", "limit": 2})
+    next_response = client.get(
+        "/search", params={"query": "ranking-", "limit": 2, "after": response.json()["next"]}
+    )
+    substring_response = client.get("/search", params={"query": "-rank", "mode": "substring"})
+
+    # Then
+    assert response.json() == {"names": ["ranking-ads", "ranking-feed"], "next": "ranking-feed"}
+    assert next_response.json() == {"names": ["ranking-search"], "next": None}
+    assert substring_response.json() == {"names": ["fraud-ranking"], "next": None}
+
+
+# shared cache
+def test_get_model_when_model_is_cached_and_expects_no_storage_reads_until_deleted(
+    tmp_path, model, mocker
+):
+    # Given
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+    models_repo = FileSystemModelsRepository(settings)
+    models_cache = SharedModelsCache(tmp_path / "cache", max_bytes=1024)
+    app.dependency_overrides[create_models_repository] = lambda: models_repo
+    app.dependency_overrides[create_models_cache] = lambda: models_cache
+    client = TestClient(app)
+    client.post("/", params=create_crud_params(model), files=create_files(model))
+    get_model = mocker.spy(models_repo, "get_model")
+    get_model_digest = mocker.spy(models_repo, "get_model_digest")
+    calculate_digest = mocker.spy(models_repo, "calculate_digest")
+
+    try:
+        # When
+        responses = [client.get("/", params=create_crud_params(model)) for _ in range(3)]
+        storage_reads = [get_model.call_count, get_model_digest.call_count]
+        client.delete("/", params=create_crud_params(model))
+        deleted_response = client.get("/", params=create_crud_params(model))
+    finally:
+        app.dependency_overrides[create_models_cache] = lambda: None
+
+    # Then
+    assert [response.content for response in responses] == [model.content] * 3
+    assert storage_reads == [1, 1]
+    assert calculate_digest.call_count == 0
+    assert len({response.headers["ETag"] for response in responses}) == 1
+    assert deleted_response.status_code == 404
+
+
+def test_lifespan_when_models_pinned_and_expects_models_cached_before_app_started(
+    tmp_path, monkeypatch, model
+):
+    # Given
+    models_directory = tmp_path / "models"
+    models_directory.mkdir()
+    repo = FileSystemModelsRepository(
+        FileSystemModelsRepositorySettings(source="fs", directory=str(models_directory))
+    )
+    repo.save_model(model)
+    repo.set_alias(model.name, "production", model.version)
+    env_vars = {
+        "VERSION": "4.0.4",
+        "ENVIRONMENT": "test",
+        "MODELS_REPOSITORY__SOURCE": "fs",
+        "MODELS_REPOSITORY__DIRECTORY": str(models_directory),
+        "CACHE__ENABLED": "true",
+        "CACHE__DIRECTORY": str(tmp_path / "cache"),
+        "CACHE__PINNED": f'[{{"name": "{model.name}", "version": "@production"}}]',
+    }
+    for name, value in env_vars.items():
+        monkeypatch.setenv(name, value)
+
+    # When
+    with TestClient(app):
+        models_cache = app.state.preloader.models_cache
+
+        # Then
+        assert models_cache.contains(model.name, model.version)
+        assert models_cache._create_pin_path(model.name, model.version).exists()
+
+
+def test_lifespan_when_retention_enabled_and_expects_scheduler_started_once(
+    tmp_path, monkeypatch, mocker
+):
+    # Given
+    env_vars = {
+        "VERSION": "4.0.4",
+        "ENVIRONMENT": "test",
+        "MODELS_REPOSITORY__SOURCE": "fs",
+        "MODELS_REPOSITORY__DIRECTORY": str(tmp_path),
+        "RETENTION__ENABLED": "true",
+        "RETENTION__RULES": '[{"keep_last": 1}]',
+        "RETENTION__LOCK_PATH": str(tmp_path / "retention.lock"),
+    }
+    for name, value in env_vars.items():
+        monkeypatch.setenv(name, value)
+    start = mocker.patch.object(RetentionScheduler, "start")
+    stop = mocker.patch.object(RetentionScheduler, "stop")
+
+    # When
+    with TestClient(app) as client:
+        client.get("/health_check")
+        create_models_repository(create_settings())
+
+    # Then
+    start.assert_called_once_with()
+    stop.assert_called_once_with()
+
+
+def test_lifespan_when_requests_served_and_expects_middlewares_configured_once(
+    tmp_path, monkeypatch, mocker
+):
+    # Given
+    env_vars = {
+        "VERSION": "4.0.4",
+        "ENVIRONMENT": "test",
+        "MODELS_REPOSITORY__SOURCE": "fs",
+        "MODELS_REPOSITORY__DIRECTORY": str(tmp_path),
+    }
+    for name, value in env_vars.items():
+        monkeypatch.setenv(name, value)
+    configure_admission = mocker.patch.object(admission_controller, "configure")
+    configure_tracing = mocker.patch.object(tracer, "configure")
+
+    # When
+    with TestClient(app) as client:
+        for _ in range(3):
+            client.get("/", params={"name": "my-model", "version": "0.0.7"})
+
+    # Then
+    configure_admission.assert_called_once()
+    configure_tracing.assert_called_once()
+
+
+def test_get_usage_when_profile_header_sent_and_expects_worker_thread_profiled(
+    tmp_path, monkeypatch, mocker
+):
+    # Given
+    env_vars = {
+        "VERSION": "4.0.4",
+        "ENVIRONMENT": "test",
+        "MODELS_REPOSITORY__SOURCE": "fs",
+        "MODELS_REPOSITORY__DIRECTORY": str(tmp_path),
+        "TRACING__PROFILING_ENABLED": "true",
+        "TRACING__PROFILING_INTERVAL_SECONDS": "0.001",
+    }
+    for name, value in env_vars.items():
+        monkeypatch.setenv(name, value)
+
+    def get_usage_slowly(self, name=None):
+        deadline = time.monotonic() + 0.1
+        while time.monotonic() < deadline:
+            pass
+        return ModelsUsage()
+
+    mocker.patch.object(FileSystemModelsRepository, "get_usage", get_usage_slowly)
+
+    try:
+        # When
+        with TestClient(app) as client:
+            response = client.get("/usage", headers={"X-Profile": "1"})
+            profile_response = client.get(f"/admin/profiles/{response.headers['X-Profile-Id']}")
+    finally:
+        tracer.configure(TracingSettings())
+
+    # Then
+    assert response.status_code == 200
+    assert "test_run.py:get_usage_slowly" in profile_response.text
@@ -0,0 +1,81 @@
+import asyncio
+import io
+import tarfile
+
+from src.api.streams import (
+    SyncStreamReader,
+    format_server_sent_event,
+    iter_server_sent_events,
+)
+from src.core.events import ModelEvent, ModelEventsBus, ModelEventType
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: int) -> None:
+        self.checks_left = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.checks_left -= 1
+        return self.checks_left < 0
+
+
+def test_format_server_sent_event():
+    # Given
+    event = ModelEvent(type=ModelEventType.DELETED, name="my-model", version="0.0.7")
+
+    # When
+    text = format_server_sent_event(event)
+
+    # Then
+    assert text == (
+        "event: deleted\n"
+        'data: {"type": "deleted", "name": "my-model", "version": "0.0.7", "alias": null}'
+        "\n\n"
+    )
+
+
+def test_iter_server_sent_events_when_event_published_and_expects_event_then_heartbeat():
+    # Given
+    bus = ModelEventsBus()
+    event = ModelEvent(type=ModelEventType.SAVED, name="my-model", version="0.0.7")
+
+    async def run():
+        subscription = bus.subscribe(["my-model"])
+        bus.publish(event)
+        stream = iter_server_sent_events(FakeRequest(2), subscription, heartbeat_interval=0.01)
+        return [message async for message in stream]
+
+    # When
+    messages = asyncio.run(run())
+
+    # Then
+    assert messages == [": subscribed\n\n", format_server_sent_event(event), ": heartbeat\n\n"]
+
+
+def test_sync_stream_reader_when_archive_is_split_into_chunks_and_expects_it_readable():
+    # Given
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        tar_info = tarfile.TarInfo("model")
+        tar_info.size = 5
+        archive.addfile(tar_info, io.BytesIO(b"model"))
+    data = buffer.getvalue()
+
+    async def chunks():
+        for start in range(0, len(data), 1000):
+            yield data[start : start + 1000]
+
+    async def run():
+        reader = SyncStreamReader(chunks(), asyncio.get_running_loop())
+
+        def read_archive():
+            with tarfile.open(fileobj=reader, mode="r|") as archive:
+                return [archive.extractfile(member).read() for member in archive]
+
+        return await asyncio.to_thread(read_archive)
+
+    # When
+    contents = asyncio.run(run())
+
+    # Then
+    assert contents == [b"model"]
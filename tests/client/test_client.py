@@ -0,0 +1,295 @@
+import os
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.api.run import (
+    app,
+    create_models_cache,
+    create_models_repository,
+    create_quota_settings,
+)
+from src.client import (
+    CorruptedModelError,
+    ModelExistsError,
+    ModelNotFoundError,
+    ModelRegistryClient,
+    UploadInterruptedError,
+)
+from src.core.models_repositories import FileSystemModelsRepository
+from src.core.settings import FileSystemModelsRepositorySettings, QuotaSettings
+
+
+class ASGIAdapter(BaseAdapter):
+    """Transport adapter that sends requests to the app without a network"""
+
+    def __init__(self, test_client: TestClient) -> None:
+        super().__init__()
+        self.test_client = test_client
+        self.sent_requests: list[requests.PreparedRequest] = []
+
+    def send(self, request, **kwargs):
+        self.sent_requests.append(request)
+        body = request.body
+        if body is not None and not isinstance(body, (bytes, str)):
+            body = b"".join(body)
+        test_response = self.test_client.request(
+            request.method, request.url, headers=dict(request.headers), content=body
+        )
+
+        response = requests.Response()
+        response.status_code = test_response.status_code
+        response.headers = CaseInsensitiveDict(test_response.headers)
+        response.raw = BytesIO(test_response.content)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture()
+def adapter(tmp_path) -> ASGIAdapter:
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+    app.dependency_overrides[create_models_repository] = lambda: FileSystemModelsRepository(
+        settings
+    )
+    app.dependency_overrides[create_quota_settings] = QuotaSettings
+    app.dependency_overrides[create_models_cache] = lambda: None
+    return ASGIAdapter(TestClient(app))
+
+
+@pytest.fixture()
+def registry_client(tmp_path_factory, adapter) -> ModelRegistryClient:
+    registry_client = ModelRegistryClient(
+        "http://testserver", cache_dir=tmp_path_factory.mktemp("cache"), chunk_size=4
+    )
+    registry_client.session.mount("http://", adapter)
+    return registry_client
+
+
+@pytest.fixture()
+def model_path(tmp_path_factory, model):
+    path = tmp_path_factory.mktemp("models") / str(model)
+    path.write_bytes(model.content)
+    return path
+
+
+def test_save_model_and_get_model_when_model_is_bigger_than_chunk_and_expects_parallel_ranges(
+    registry_client, adapter, model, model_path
+):
+    # When
+    registry_client.save_model(model.name, model.version, model_path)
+    path = registry_client.get_model(model.name, model.version)
+
+    # Then
+    assert path.read_bytes() == model.content
+    ranges = [request.headers["Range"] for request in adapter.sent_requests[1:]]
+    assert len(ranges) == 6  # 22 bytes split into the ranges of 4 bytes
+    assert "bytes=20-21" in ranges
+
+
+def test_save_model_and_get_model_when_model_is_empty_and_expects_empty_file(
+    tmp_path_factory, registry_client, adapter, model
+):
+    # Given
+    model_path = tmp_path_factory.mktemp("models") / str(model)
+    model_path.write_bytes(b"")
+
+    # When
+    registry_client.save_model(model.name, model.version, model_path)
+    path = registry_client.get_model(model.name, model.version)
+
+    # Then
+    assert path.read_bytes() == b""
+    put_request = adapter.sent_requests[0]
+    assert put_request.headers["Content-Length"] == "0"
+    assert "Transfer-Encoding" not in put_request.headers
+
+
+def test_save_model_when_model_exists_and_expects_model_exists_error(
+    registry_client, model, model_path
+):
+    # Given
+    registry_client.save_model(model.name, model.version, model_path)
+
+    # Then
+    with pytest.raises(ModelExistsError):
+        registry_client.save_model(model.name, model.version, model_path)
+
+
+def test_get_model_when_model_is_cached_and_expects_no_requests_until_revalidation(
+    registry_client, adapter, model, model_path, tmp_path
+):
+    # Given
+    registry_client.save_model(model.name, model.version, model_path)
+    registry_client.get_model(model.name, model.version)
+    sent_requests = len(adapter.sent_requests)
+
+    # When
+    path = registry_client.get_model(model.name, model.version, tmp_path / "copy")
+
+    # Then
+    assert len(adapter.sent_requests) == sent_requests
+    assert path.read_bytes() == model.content
+
+
+def test_get_model_when_cached_model_has_to_be_revalidated_and_expects_not_modified(
+    registry_client, adapter, model, model_path
+):
+    # Given
+    registry_client.revalidate_after = 0
+    registry_client.save_model(model.name, model.version, model_path)
+    registry_client.get_model(model.name, model.version)
+    sent_requests = len(adapter.sent_requests)
+
+    # When
+    path = registry_client.get_model(model.name, model.version)
+
+    # Then
+    assert len(adapter.sent_requests) == sent_requests + 1
+    assert "If-None-Match" in adapter.sent_requests[-1].headers
+    assert path.read_bytes() == model.content
+
+
+def test_get_model_when_model_does_not_exist_and_expects_model_not_found_error(
+    registry_client, model
+):
+    with pytest.raises(ModelNotFoundError):
+        registry_client.get_model(model.name, model.version)
+
+
+def test_get_model_when_content_does_not_match_etag_and_expects_corrupted_model_error(
+    registry_client, model, model_path, mocker
+):
+    # Given
+    registry_client.save_model(model.name, model.version, model_path)
+    mocker.patch("src.client.cache.calculate_file_digest", return_value="unexpected")
+
+    # Then
+    with pytest.raises(CorruptedModelError):
+        registry_client.get_model(model.name, model.version)
+    assert not os.listdir(registry_client.cache.directory)
+
+
+def test_get_model_when_cache_is_disabled_and_file_name_has_directories_and_expects_name_only(
+    tmp_path, monkeypatch, adapter, model, model_path
+):
+    # Given
+    registry_client = ModelRegistryClient("http://testserver", chunk_size=4)
+    registry_client.session.mount("http://", adapter)
+    registry_client.save_model(model.name, model.version, model_path)
+    send = adapter.send
+
+    def send_with_traversing_file_name(request, **kwargs):
+        response = send(request, **kwargs)
+        if "Content-Disposition" in response.headers:
+            response.headers["Content-Disposition"] = "attachment; filename=../escaped.cbm"
+        return response
+
+    monkeypatch.setattr(adapter, "send", send_with_traversing_file_name)
+    working_dir = tmp_path / "working-dir"
+    working_dir.mkdir()
+    monkeypatch.chdir(working_dir)
+
+    # When
+    path = registry_client.get_model(model.name, model.version)
+
+    # Then
+    assert path == Path("escaped.cbm")
+    assert (working_dir / "escaped.cbm").read_bytes() == model.content
+    assert not (tmp_path / "escaped.cbm").exists()
+
+
+def test_delete_model_when_model_is_cached_and_expects_cache_entry_removed(
+    registry_client, model, model_path
+):
+    # Given
+    registry_client.save_model(model.name, model.version, model_path)
+    registry_client.get_model(model.name, model.version)
+
+    # When
+    registry_client.delete_model(model.name, model.version)
+
+    # Then
+    assert registry_client.cache.get(model.name, model.version) is None
+    with pytest.raises(ModelNotFoundError):
+        registry_client.delete_model(model.name, model.version)
+
+
+def test_upload_model_when_model_is_bigger_than_chunk_and_expects_chunks_sent_separately(
+    monkeypatch, registry_client, adapter, model, model_path
+):
+    # Given
+    monkeypatch.setattr(FileSystemModelsRepository, "UPLOAD_CHUNK_SIZE", 8)
+
+    # When
+    registry_client.upload_model(model.name, model.version, model_path)
+
+    # Then
+    assert registry_client.get_model(model.name, model.version).read_bytes() == model.content
+    patches = [request for request in adapter.sent_requests if request.method == "PATCH"]
+    assert len(patches) == 3  # 22 bytes split into the chunks of 8 bytes
+
+
+def test_upload_model_when_upload_was_interrupted_and_expects_only_missing_chunks_sent(
+    monkeypatch, mocker, registry_client, adapter, model, model_path
+):
+    # Given
+    monkeypatch.setattr(FileSystemModelsRepository, "UPLOAD_CHUNK_SIZE", 8)
+    upload_chunk = registry_client._upload_chunk
+
+    def upload_first_chunk_only(upload_id, file_path, offset, size):
+        if offset > 0:
+            raise requests.ConnectionError("connection reset")
+        upload_chunk(upload_id, file_path, offset, size)
+
+    mocker.patch.object(registry_client, "_upload_chunk", side_effect=upload_first_chunk_only)
+    with pytest.raises(UploadInterruptedError) as exc_info:
+        registry_client.upload_model(model.name, model.version, model_path)
+    mocker.stopall()
+    adapter.sent_requests.clear()
+
+    # When
+    registry_client.upload_model(
+        model.name, model.version, model_path, upload_id=exc_info.value.upload_id
+    )
+
+    # Then
+    assert registry_client.get_model(model.name, model.version).read_bytes() == model.content
+    urls = [request.url for request in adapter.sent_requests if request.method == "PATCH"]
+    assert len(urls) == 2
+    assert not any("offset=0" in url for url in urls)
+
+
+def test_publish_model_when_content_is_in_registry_and_expects_no_upload(
+    registry_client, adapter, model, model_path
+):
+    # Given
+    registry_client.save_model(model.name, model.version, model_path)
+    adapter.sent_requests.clear()
+
+    # When
+    uploaded = registry_client.publish_model(model.name, "1.0.0", model_path)
+
+    # Then
+    assert not uploaded
+    assert [request.method for request in adapter.sent_requests] == ["POST"]
+    assert registry_client.get_model(model.name, "1.0.0").read_bytes() == model.content
+
+
+def test_publish_model_when_content_is_not_in_registry_and_expects_upload(
+    registry_client, model, model_path
+):
+    # When
+    uploaded = registry_client.publish_model(model.name, model.version, model_path)
+
+    # Then
+    assert uploaded
+    assert registry_client.get_model(model.name, model.version).read_bytes() == model.content
@@ -1,6 +1,13 @@
+import dataclasses
+
 import pytest
 
-from src.core.models_repositories.base import ModelsRepository
+from src.core.models_repositories.base import (
+    InvalidChunkError,
+    ModelInfo,
+    ModelsRepository,
+    UploadSession,
+)
 
 
 @pytest.mark.parametrize(
@@ -21,3 +28,82 @@ def test_create_model_file_name(
 
     # Then
     assert actual_model_name == expected_model_name
+
+
+def create_upload_session(**kwargs) -> UploadSession:
+    fields = dict(
+        id="upload", name="my-model", version="0.0.7", file_extension="cbm", size=10, chunk_size=4
+    )
+    return UploadSession(**(fields | kwargs))
+
+
+def test_model_to_info_when_content_is_viewed_from_cache_and_expects_its_size(model):
+    # Given
+    cached_model = dataclasses.replace(model, content=memoryview(model.content))
+
+    # When
+    model_info = cached_model.to_info()
+
+    # Then
+    assert model_info == ModelInfo(
+        name=model.name,
+        version=model.version,
+        file_extension=model.file_extension,
+        size=len(model.content),
+    )
+
+
+def test_upload_session_to_info_when_chunks_are_received_and_expects_the_declared_size():
+    # Given
+    session = create_upload_session(received_chunks=[0])
+
+    # When
+    model_info = session.to_info()
+
+    # Then
+    assert model_info == ModelInfo(name="my-model", version="0.0.7", file_extension="cbm", size=10)
+
+
+@pytest.mark.parametrize(
+    argnames="received_chunks, expected_committed_offset, expected_is_complete",
+    ids=("nothing received", "gap after the first chunk", "every chunk received"),
+    argvalues=(
+        ((), 0, False),
+        ((0, 2), 4, False),
+        ((2, 0, 1), 10, True),
+    ),
+)
+def test_upload_session_committed_offset(
+    received_chunks, expected_committed_offset, expected_is_complete
+):
+    # Given
+    session = create_upload_session(received_chunks=received_chunks)
+
+    # Then
+    assert session.chunks_count == 3
+    assert session.committed_offset == expected_committed_offset
+    assert session.is_complete == expected_is_complete
+
+
+@pytest.mark.parametrize(
+    argnames="offset, length",
+    ids=("not aligned", "short chunk", "beyond the end", "long last chunk"),
+    argvalues=((1, 4), (4, 3), (12, 4), (8, 4)),
+)
+def test_upload_session_get_chunk_index_when_chunk_is_misaligned_and_expects_invalid_chunk_error(
+    offset, length
+):
+    # Given
+    session = create_upload_session()
+
+    # When & Then
+    with pytest.raises(InvalidChunkError):
+        session.get_chunk_index(offset, length)
+
+
+def test_upload_session_get_chunk_index_when_chunk_is_last_and_expects_its_index():
+    # Given
+    session = create_upload_session()
+
+    # When & Then
+    assert session.get_chunk_index(8, 2) == 2
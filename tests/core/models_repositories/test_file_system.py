@@ -1,17 +1,27 @@
+import asyncio
 import dataclasses
 import os
+import time
 from pathlib import Path
 
 import pytest
 
+from src.core.events import ModelEventType, model_events
+from src.core.locks import ProcessLock
+from src.core.models_repositories import InvalidChunkError
 from src.core.models_repositories.file_system import (
+    AliasNotFoundError,
     CompromisedFileStructureError,
     FileSystemModelsRepository,
+    IncompleteUploadError,
     ModelExistsError,
     ModelNotFoundError,
+    ModelsUsage,
+    UploadNotFoundError,
     save_binary_data_to_file,
 )
 from src.core.settings import FileSystemModelsRepositorySettings
+from src.core.versions import VersionRange
 
 
 class FakeModelContextManager:
@@ -248,3 +258,586 @@ def test_save_model_when_model_names_match_but_versions_are_different(repo, mode
 
     model_path_of_given_model = repo.create_model_path(given_model)
     assert os.path.exists(model_path_of_given_model)
+
+
+# list models
+def test_list_models_when_directory_contains_models_and_foreign_files(repo, model):
+    # Given
+    repo.save_model(model)
+    repo.save_model(dataclasses.replace(model, name="your-model", version="1.0"))
+    save_binary_data_to_file(os.path.join(repo.resources_dir, ".hidden"), b"")
+    save_binary_data_to_file(os.path.join(repo.resources_dir, "README"), b"")
+
+    # When
+    model_infos = sorted(repo.list_models(), key=str)
+
+    # Then
+    assert [str(info) for info in model_infos] == ["my-model-0.0.7.cbm", "your-model-1.0.cbm"]
+    assert model_infos[0].size == len(model.content)
+
+
+def test_list_models_when_name_is_given_and_version_contains_dash(repo, model):
+    # Given
+    repo.save_model(dataclasses.replace(model, version="1.0.0-rc-1"))
+    repo.save_model(dataclasses.replace(model, name="my"))
+
+    # When
+    model_infos = list(repo.list_models(model.name))
+
+    # Then
+    assert len(model_infos) == 1
+    assert model_infos[0].name == model.name
+    assert model_infos[0].version == "1.0.0-rc-1"
+
+
+# model events
+def test_save_model_and_delete_model_when_subscribed_to_model_events_and_expects_both_events(
+    repo, model
+):
+    async def run():
+        with model_events.subscribe([model.name]) as subscription:
+            repo.save_model(model)
+            repo.delete_model(model.name, model.version)
+            return [await subscription.get(timeout=1), await subscription.get(timeout=1)]
+
+    # When
+    events = asyncio.run(run())
+
+    # Then
+    assert [event.type for event in events] == [ModelEventType.SAVED, ModelEventType.DELETED]
+    assert all(event.version == model.version for event in events)
+
+
+# get model info
+def test_get_model_info_when_model_exists(repo, model):
+    # Given
+    repo.save_model(model)
+
+    # When
+    model_info = repo.get_model_info(model.name, model.version)
+
+    # Then
+    assert str(model_info) == str(model)
+    assert model_info.size == len(model.content)
+
+
+def test_get_model_info_when_model_does_not_exist_and_expects_model_not_found_error(repo, model):
+    with pytest.raises(ModelNotFoundError):
+        repo.get_model_info(model.name, model.version)
+
+
+# get model digest and read model range
+def test_get_model_digest_when_model_saved_and_expects_recorded_digest(repo, model):
+    # Given
+    repo.save_model(model)
+
+    # When
+    digest = repo.get_model_digest(model.name, model.version)
+
+    # Then
+    assert digest == repo.calculate_digest(model.content)
+
+
+def test_get_model_digest_when_file_changed_since_recorded_and_expects_none(repo, model):
+    # Given
+    repo.save_model(model)
+    model_path = repo.find_model_path(model.name, model.version)
+    model_path.write_bytes(b"another content")
+
+    # When
+    digest = repo.get_model_digest(model.name, model.version)
+
+    # Then
+    assert digest is None
+
+
+def test_read_model_range_when_model_exists_and_expects_only_range_read(repo, model):
+    # Given
+    repo.save_model(model)
+
+    # When
+    content = repo.read_model_range(model.name, model.version, 7, 4)
+
+    # Then
+    assert content == model.content[7:11]
+    with pytest.raises(ModelNotFoundError):
+        repo.read_model_range(model.name, "1.0.0", 0, 4)
+
+
+# find latest version
+def test_find_latest_version_when_versions_saved_and_deleted_and_expects_index_kept_current(
+    repo, model
+):
+    # Given
+    for version in ("1.0.0", "2.1.0", "2.2.0-rc.1"):
+        repo.save_model(dataclasses.replace(model, version=version))
+    assert repo.find_latest_version(model.name, VersionRange.parse("^2")) == "2.1.0"
+
+    # When
+    repo.save_model(dataclasses.replace(model, version="2.3.0"))
+    repo.delete_model(model.name, "2.1.0")
+
+    # Then
+    assert repo.find_latest_version(model.name, VersionRange.parse("^2")) == "2.3.0"
+    assert repo.find_latest_version(model.name, VersionRange.parse("~2.1")) is None
+    assert repo.find_latest_version("your-model", VersionRange.parse("latest")) is None
+
+
+# aliases
+def test_set_alias_when_alias_is_moved_and_expects_new_version_resolved(repo, model):
+    # Given
+    newer_model = dataclasses.replace(model, version="1.0.0")
+    repo.save_model(model)
+    repo.save_model(newer_model)
+    repo.set_alias(model.name, "production", model.version)
+    assert repo.resolve_version(model.name, "@production") == model.version
+
+    # When
+    repo.set_alias(model.name, "production", newer_model.version)
+
+    # Then
+    assert repo.resolve_version(model.name, "@production") == newer_model.version
+    assert repo.list_aliases(model.name) == {"production": newer_model.version}
+    assert repo.list_aliases("your-model") == {}
+
+
+def test_set_alias_when_model_does_not_exist_and_expects_model_not_found_error(repo, model):
+    with pytest.raises(ModelNotFoundError):
+        repo.set_alias(model.name, "production", model.version)
+
+
+def test_delete_alias_when_alias_exists_and_expects_alias_not_resolvable(repo, model):
+    # Given
+    repo.save_model(model)
+    repo.set_alias(model.name, "prod/eu", model.version)
+    assert repo.resolve_alias(model.name, "prod/eu") == model.version
+
+    # When
+    repo.delete_alias(model.name, "prod/eu")
+
+    # Then
+    with pytest.raises(AliasNotFoundError):
+        repo.resolve_alias(model.name, "prod/eu")
+    with pytest.raises(AliasNotFoundError):
+        repo.delete_alias(model.name, "prod/eu")
+    assert [str(info) for info in repo.list_models()] == [str(model)]
+
+
+# resumable uploads
+@pytest.fixture()
+def upload_repo(repo) -> FileSystemModelsRepository:
+    repo.UPLOAD_CHUNK_SIZE = 8
+    return repo
+
+
+def test_complete_upload_when_chunks_written_out_of_order_and_expects_model_saved(
+    upload_repo, model
+):
+    # Given
+    content = model.content
+    session = upload_repo.create_upload(model.name, model.version, "cbm", len(content))
+
+    # When
+    for offset in reversed(range(0, len(content), 8)):
+        upload_repo.write_upload_chunk(session.id, offset, content[offset : offset + 8])
+    committed_offset = upload_repo.get_upload(session.id).committed_offset
+    model_info = upload_repo.complete_upload(session.id)
+
+    # Then
+    assert committed_offset == len(content)
+    assert model_info.size == len(content)
+    assert upload_repo.get_model(model.name, model.version) == model
+    assert [str(info) for info in upload_repo.list_models()] == [str(model)]
+    with pytest.raises(UploadNotFoundError):
+        upload_repo.get_upload(session.id)
+
+
+def test_write_upload_chunk_when_chunks_received_and_expects_them_not_listed(
+    upload_repo, model, mocker
+):
+    # Given
+    session = upload_repo.create_upload(model.name, model.version, "cbm", len(model.content))
+    upload_repo.write_upload_chunk(session.id, 0, model.content[:8])
+    listdir = mocker.spy(os, "listdir")
+
+    # When
+    upload_repo.write_upload_chunk(session.id, 8, model.content[8:16])
+
+    # Then
+    listdir.assert_not_called()
+    assert sorted(upload_repo.get_upload(session.id).received_chunks) == [0, 1]
+    with pytest.raises(InvalidChunkError):
+        upload_repo.write_upload_chunk(session.id, 4, model.content[4:12])
+
+
+def test_complete_upload_when_chunk_is_missing_and_expects_incomplete_upload_error(
+    upload_repo, model
+):
+    # Given
+    session = upload_repo.create_upload(model.name, model.version, "cbm", len(model.content))
+    upload_repo.write_upload_chunk(session.id, 0, model.content[:8])
+
+    # When & Then
+    with pytest.raises(IncompleteUploadError):
+        upload_repo.complete_upload(session.id)
+    assert upload_repo.get_upload(session.id).committed_offset == 8
+
+
+def test_complete_upload_when_model_saved_meanwhile_and_expects_model_exists_error(
+    upload_repo, model
+):
+    # Given
+    session = upload_repo.create_upload(model.name, model.version, "cbm", len(model.content))
+    for offset in range(0, len(model.content), 8):
+        upload_repo.write_upload_chunk(session.id, offset, model.content[offset : offset + 8])
+    upload_repo.save_model(model)
+
+    # When & Then
+    with pytest.raises(ModelExistsError):
+        upload_repo.complete_upload(session.id)
+
+
+def test_abort_upload_when_upload_exists_and_expects_staged_chunks_removed(upload_repo, model):
+    # Given
+    session = upload_repo.create_upload(model.name, model.version, "cbm", len(model.content))
+
+    # When
+    upload_repo.abort_upload(session.id)
+
+    # Then
+    with pytest.raises(UploadNotFoundError):
+        upload_repo.write_upload_chunk(session.id, 0, model.content[:8])
+    with pytest.raises(UploadNotFoundError):
+        upload_repo.abort_upload("../../etc")
+    assert list(upload_repo.list_models()) == []
+
+
+# save model by digest
+def test_save_model_by_digest_when_content_is_stored_and_expects_model_linked_to_it(repo, model):
+    # Given
+    repo.save_model(model)
+    digest = repo.calculate_digest(model.content)
+
+    # When
+    model_info = repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, len(model.content))
+
+    # Then
+    assert model_info.version == "1.0.0"
+    assert repo.get_model(model.name, "1.0.0").content == model.content
+    source_path = repo.find_model_path(model.name, model.version)
+    assert repo.find_model_path(model.name, "1.0.0").stat().st_ino == source_path.stat().st_ino
+
+
+def test_list_saved_times_when_model_saved_by_digest_of_old_model_and_expects_time_of_link(
+    repo, model
+):
+    # Given
+    repo.save_model(model)
+    # the model file is recorded again as an old file added by hand
+    ten_days_ago = time.time() - 10 * 24 * 3600
+    os.utime(repo.find_model_path(model.name, model.version), (ten_days_ago, ten_days_ago))
+    os.utime(repo.resources_dir)
+    repo.reconcile_manifest()
+    repo.index_missing_digests()
+    digest = repo.calculate_digest(model.content)
+
+    # When
+    repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, len(model.content))
+    saved_times = repo.list_saved_times(model.name)
+
+    # Then
+    assert saved_times[model.version] == pytest.approx(ten_days_ago)
+    assert time.time() - saved_times["1.0.0"] < 60
+
+
+def test_save_model_by_digest_when_content_is_uploaded_and_expects_model_linked_to_it(
+    upload_repo, model
+):
+    # Given
+    session = upload_repo.create_upload(model.name, model.version, "cbm", len(model.content))
+    for offset in range(0, len(model.content), 8):
+        upload_repo.write_upload_chunk(session.id, offset, model.content[offset : offset + 8])
+    upload_repo.complete_upload(session.id)
+    digest = upload_repo.calculate_digest(model.content)
+
+    # When
+    model_info = upload_repo.save_model_by_digest(
+        "promoted-model", "1.0.0", "cbm", digest, len(model.content)
+    )
+
+    # Then
+    assert model_info is not None
+    assert upload_repo.get_model("promoted-model", "1.0.0").content == model.content
+
+
+def test_save_model_by_digest_when_content_is_unknown_and_expects_none(repo, model):
+    # Given
+    repo.save_model(model)
+    digest = repo.calculate_digest(b"another content")
+
+    # When
+    model_info = repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, 15)
+
+    # Then
+    assert model_info is None
+    assert repo.find_model_path(model.name, "1.0.0") is None
+
+
+def test_save_model_by_digest_when_indexed_model_saved_again_with_another_content_and_expects_none(
+    repo, model
+):
+    # Given
+    repo.save_model(model)
+    digest = repo.calculate_digest(model.content)
+    repo.delete_model(model.name, model.version)
+    repo.save_model(dataclasses.replace(model, content=b"binary repr of another"))
+
+    # When
+    model_info = repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, len(model.content))
+
+    # Then
+    assert model_info is None
+    assert repo.find_model_path(model.name, "1.0.0") is None
+    # the staging link of the verified file is removed
+    staging_dir = Path(repo.resources_dir, repo.UPLOADS_DIR_NAME)
+    assert not [file_name for file_name in os.listdir(staging_dir) if file_name.endswith(".tmp")]
+
+
+def test_save_model_by_digest_when_model_exists_and_expects_model_exists_error(repo, model):
+    # Given
+    repo.save_model(model)
+    digest = repo.calculate_digest(model.content)
+
+    # When & Then
+    with pytest.raises(ModelExistsError):
+        repo.save_model_by_digest(model.name, model.version, "cbm", digest, len(model.content))
+
+
+# manifest
+def test_find_model_path_when_repository_is_reopened_and_expects_no_directory_scans(
+    tmp_path, model, mocker
+):
+    # Given
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+    FileSystemModelsRepository(settings).save_model(model)
+    scandir = mocker.spy(os, "scandir")
+    reopened_repo = FileSystemModelsRepository(settings)
+
+    # When
+    model_path = reopened_repo.find_model_path(model.name, model.version)
+    missing_model_path = reopened_repo.find_model_path(model.name, "1.0.0")
+    models = list(reopened_repo.list_models(model.name))
+
+    # Then
+    assert model_path == reopened_repo.create_model_path(model).absolute()
+    assert missing_model_path is None
+    assert [model_info.version for model_info in models] == [model.version]
+    assert scandir.call_count == 0
+
+
+def test_reconcile_manifest_when_model_added_behind_manifest_and_expects_model_indexed(
+    repo, model
+):
+    # Given
+    repo.save_model(dataclasses.replace(model, version="1.0.0"))
+    save_binary_data_to_file(repo.create_model_path(model), model.content)
+
+    # When
+    is_scanned = repo.reconcile_manifest()
+    indexed = repo.index_missing_digests()
+
+    # Then
+    assert is_scanned
+    assert indexed == 1
+    entry = repo.manifest.get(repo.create_model_path(model).name)
+    assert entry.size == len(model.content)
+    assert entry.digest == repo.calculate_digest(model.content)
+
+
+def test_reconcile_manifest_when_model_removed_behind_manifest_and_expects_model_not_found(
+    repo, model
+):
+    # Given
+    repo.save_model(model)
+    os.remove(repo.create_model_path(model))
+
+    # When
+    model_path = repo.find_model_path(model.name, model.version)
+
+    # Then
+    assert model_path is None
+    assert repo.manifest.get(repo.create_model_path(model).name) is None
+    with pytest.raises(ModelNotFoundError):
+        repo.get_model(model.name, model.version)
+
+
+def test_reconcile_manifest_when_directory_is_unchanged_and_expects_no_scan(repo, model):
+    # Given
+    repo.save_model(model)
+
+    # When
+    is_scanned = repo.reconcile_manifest()
+
+    # Then
+    assert not is_scanned
+
+
+def test_get_usage_when_models_saved_and_deleted_and_expects_counters_updated(repo, model):
+    # Given
+    large_model = dataclasses.replace(model, version="1.0.0", content=b"0" * 100)
+    another_model = dataclasses.replace(model, name="another-model", content=b"0" * 50)
+    repo.save_models([model, large_model, another_model])
+
+    # When
+    repo.delete_model(large_model.name, large_model.version)
+    usage = repo.get_usage()
+    model_usage = repo.get_usage(model.name)
+
+    # Then
+    assert usage == ModelsUsage(
+        count=2,
+        size=len(model.content) + 50,
+        largest_name=another_model.name,
+        largest_version=another_model.version,
+        largest_size=50,
+    )
+    assert (model_usage.count, model_usage.size) == (1, len(model.content))
+    assert model_usage.largest_version == model.version
+    assert repo.get_usage("unknown-model") == ModelsUsage()
+
+
+def test_delete_models_when_version_range_is_sent_and_expects_only_satisfying_versions_deleted(
+    repo, model
+):
+    # Given
+    versions = ("1.0.0", "1.2.0", "2.0.0", "2.1.0-rc.1")
+    repo.save_models(dataclasses.replace(model, version=version) for version in versions)
+    repo.save_model(dataclasses.replace(model, name="my-model-extra", version="1.0.0"))
+    repo.find_latest_version(model.name, VersionRange())
+
+    # When
+    deleted = repo.delete_models(model.name, VersionRange.parse("<2"))
+
+    # Then
+    assert deleted == 2
+    for version in ("1.0.0", "1.2.0"):
+        assert repo.find_model_path(model.name, version) is None
+    for version in ("2.0.0", "2.1.0-rc.1"):
+        assert repo.find_model_path(model.name, version) is not None
+    assert repo.find_latest_version(model.name, VersionRange.parse("^1.0")) is None
+    assert repo.get_model_info("my-model-extra", "1.0.0").size == len(model.content)
+    assert repo.get_usage(model.name).count == 2
+
+
+def test_delete_models_when_no_version_range_is_sent_and_expects_every_version_deleted_at_once(
+    repo, model, mocker
+):
+    # Given
+    repo.save_models(dataclasses.replace(model, version=f"1.0.{patch}") for patch in range(5))
+    delete_model = mocker.spy(repo, "delete_model")
+
+    # When
+    deleted = repo.delete_models(model.name)
+
+    # Then
+    assert deleted == 5
+    assert list(repo.list_models(model.name)) == []
+    assert repo.delete_models(model.name) == 0
+    delete_model.assert_not_called()
+    assert not any(name.endswith(".cbm") for name in os.listdir(repo.resources_dir))
+
+
+def test_search_model_names_when_models_saved_and_deleted_and_expects_stored_names_found(
+    repo, model
+):
+    # Given
+    for name in ("ranking-ads", "ranking-feed", "fraud-ranking"):
+        repo.save_model(dataclasses.replace(model, name=name))
+    repo.delete_model("ranking-feed", model.version)
+
+    # When
+    prefixed_names = repo.search_model_names("ranking-")
+    names = repo.search_model_names("ranking", is_substring=True, after="fraud-ranking")
+
+    # Then
+    assert prefixed_names == ["ranking-ads"]
+    assert names == ["ranking-ads"]
+
+
+@pytest.mark.parametrize(
+    "file_name, known_names, expected_name, expected_version",
+    [
+        ("my-model-1.0.0-rc.1.cbm", (), "my-model", "1.0.0-rc.1"),
+        ("my-model-latest.cbm", ("my-model",), "my-model", "latest"),
+        ("model-v2-1.0.0.cbm", ("model-v2",), "model-v2", "1.0.0"),
+        ("model-v2-1.0.0.cbm", (), None, None),
+    ],
+)
+def test_parse_model_file_name_when_model_name_unknown_and_expects_ambiguous_names_skipped(
+    file_name, known_names, expected_name, expected_version
+):
+    # When
+    model_info = FileSystemModelsRepository.parse_model_file_name(
+        file_name, 0, known_names=known_names
+    )
+
+    # Then
+    assert getattr(model_info, "name", None) == expected_name
+    assert getattr(model_info, "version", None) == expected_version
+
+
+def test_reconcile_manifest_when_models_with_prerelease_added_by_hand_and_expects_names_kept(
+    repo, model
+):
+    # Given
+    repo.save_model(model)
+    prerelease_model = dataclasses.replace(model, version="1.0.0-rc.1")
+    save_binary_data_to_file(repo.create_model_path(prerelease_model), model.content)
+    ambiguous_model = dataclasses.replace(model, name="model-v2", version="1.0.0")
+    save_binary_data_to_file(repo.create_model_path(ambiguous_model), model.content)
+
+    # When
+    repo.reconcile_manifest()
+
+    # Then
+    assert repo.manifest.get(repo.create_model_path(prerelease_model).name).name == model.name
+    assert repo.manifest.get(repo.create_model_path(ambiguous_model).name).name is None
+    assert {model_info.version for model_info in repo.list_models(model.name)} == {
+        model.version,
+        prerelease_model.version,
+    }
+    assert repo.get_usage().count == 2
+
+
+def test_init_when_digests_indexing_disabled_and_expects_no_indexer_started(tmp_path, mocker):
+    # Given
+    thread = mocker.patch("src.core.models_repositories.file_system.threading.Thread")
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+
+    # When
+    FileSystemModelsRepository(settings)
+    FileSystemModelsRepository(settings.model_copy(update={"index_digests": True}))
+
+    # Then
+    assert thread.call_count == 1
+
+
+def test_run_reconciler_when_another_worker_indexes_digests_and_expects_files_skipped(
+    repo, model, mocker
+):
+    # Given
+    save_binary_data_to_file(repo.create_model_path(model), model.content)
+    another_worker_lock = ProcessLock(Path(repo.resources_dir, repo.INDEXER_LOCK_FILE_NAME))
+    another_worker_lock.acquire()
+    index_missing_digests = mocker.spy(repo, "index_missing_digests")
+
+    try:
+        # When
+        repo._run_reconciler()
+    finally:
+        another_worker_lock.release()
+    repo._run_reconciler()
+
+    # Then
+    assert index_missing_digests.call_count == 1
+    assert repo.get_model_digest(model.name, model.version) == repo.calculate_digest(model.content)
@@ -0,0 +1,134 @@
+import os
+
+import pytest
+
+from src.core.models_repositories.manifest import Manifest, ManifestEntry
+
+
+@pytest.fixture()
+def manifest_path(tmp_path):
+    return tmp_path / ".manifest"
+
+
+def create_entry(file_name: str, digest: str | None = None) -> ManifestEntry:
+    return ManifestEntry(file_name=file_name, size=10, inode=1, mtime_ns=2, digest=digest)
+
+
+def test_refresh_when_records_appended_by_another_manifest_and_expects_entries_loaded(
+    manifest_path,
+):
+    # Given
+    manifest = Manifest(manifest_path)
+    another_manifest = Manifest(manifest_path)
+    with manifest.locked():
+        manifest.put(create_entry("my-model-1.0.0.cbm", "a" * 64), 100)
+        manifest.put(create_entry("my-model-1.1.0.cbm"), 200)
+        manifest.put(create_entry("another-model-1.0.0.cbm"), 300)
+        manifest.delete("my-model-1.1.0.cbm", 400)
+
+    # When
+    another_manifest.refresh()
+
+    # Then
+    entries = another_manifest.find("my-model-")
+    assert [entry.file_name for entry in entries] == ["my-model-1.0.0.cbm"]
+    assert another_manifest.find_by_digest("a" * 64) == create_entry(
+        "my-model-1.0.0.cbm", "a" * 64
+    )
+    assert another_manifest.is_synced(400)
+
+
+def test_refresh_when_last_record_is_incomplete_and_expects_it_applied_once_complete(
+    manifest_path,
+):
+    # Given
+    manifest = Manifest(manifest_path)
+    with manifest.locked():
+        manifest.put(create_entry("my-model-1.0.0.cbm"), 100)
+    with open(manifest_path, "ab") as file:
+        file.write(b'["delete", "my-model-')
+
+    # When
+    manifest.refresh()
+    is_applied_before = manifest.get("my-model-1.0.0.cbm") is None
+    with open(manifest_path, "ab") as file:
+        file.write(b'1.0.0.cbm", 200]\n')
+    manifest.refresh()
+
+    # Then
+    assert not is_applied_before
+    assert manifest.get("my-model-1.0.0.cbm") is None
+    assert manifest.is_synced(200)
+
+
+def test_refresh_when_record_is_malformed_and_expects_it_skipped(manifest_path):
+    # Given
+    manifest_path.write_bytes(b'["put", ["my-model-1.0.0.cbm", 10\n["sync", 100]\n')
+    manifest = Manifest(manifest_path)
+
+    # When
+    manifest.refresh()
+
+    # Then
+    assert manifest.find() == []
+    assert manifest.is_synced(100)
+
+
+def test_append_when_records_exceed_compaction_limit_and_expects_snapshot(manifest_path):
+    # Given
+    manifest = Manifest(manifest_path, min_compaction_records=4)
+    another_manifest = Manifest(manifest_path)
+    another_manifest.refresh()
+
+    # When
+    with manifest.locked():
+        for version in range(3):
+            manifest.put(create_entry(f"my-model-{version}.cbm"))
+        directory_mtime_ns = os.stat(manifest_path.parent).st_mtime_ns
+        manifest.sync([], ["my-model-0.cbm"], directory_mtime_ns, directory_mtime_ns + 10**10)
+        manifest.put(create_entry("my-model-1.cbm", "a" * 64))
+    another_manifest.refresh()
+
+    # Then
+    assert len(manifest_path.read_bytes().splitlines()) == 3
+    entries = another_manifest.find()
+    assert [entry.file_name for entry in entries] == ["my-model-1.cbm", "my-model-2.cbm"]
+    assert another_manifest.find_by_digest("a" * 64).file_name == "my-model-1.cbm"
+    # the directory is changed by the compaction, but it's been synced before it
+    assert another_manifest.is_synced(os.stat(manifest_path.parent).st_mtime_ns)
+
+
+def test_sync_when_directory_changed_right_before_scan_and_expects_not_synced(manifest_path):
+    # Given
+    manifest = Manifest(manifest_path)
+
+    # When
+    with manifest.locked():
+        manifest.sync([create_entry("my-model-1.0.0.cbm")], [], 100, 100 + 10**6)
+
+    # Then
+    assert manifest.get("my-model-1.0.0.cbm") is not None
+    assert not manifest.is_synced(100)
+
+
+def test_get_usage_when_largest_entry_deleted_and_expects_counters_and_next_largest_entry(
+    manifest_path,
+):
+    # Given
+    manifest = Manifest(manifest_path)
+    with manifest.locked():
+        manifest.put(ManifestEntry("my-model-1.0.0.cbm", 10, 1, 2, name="my-model"))
+        manifest.put(ManifestEntry("my-model-1.1.0.cbm", 30, 2, 2, name="my-model"))
+        manifest.put(ManifestEntry("another-model-1.0.0.cbm", 20, 3, 2, name="another-model"))
+        manifest.delete("my-model-1.1.0.cbm", None)
+
+    # When
+    model_usage = manifest.get_usage("my-model")
+    reloaded_manifest = Manifest(manifest_path)
+    reloaded_manifest.refresh()
+
+    # Then
+    assert model_usage == (1, 10, ManifestEntry("my-model-1.0.0.cbm", 10, 1, 2, name="my-model"))
+    count, size, largest_entry = reloaded_manifest.get_usage()
+    assert (count, size, largest_entry.file_name) == (2, 30, "another-model-1.0.0.cbm")
+    assert manifest.get_usage("unknown-model") == (0, 0, None)
@@ -0,0 +1,208 @@
+import dataclasses
+import time
+
+import pytest
+
+from src.core.metrics import replication_lag, replication_pending_operations
+from src.core.models_repositories import (
+    FileSystemModelsRepository,
+    MirroredModelsRepository,
+    ModelNotFoundError,
+)
+from src.core.models_repositories.mirror import (
+    ReplicationOperationType,
+    ReplicationQueue,
+)
+from src.core.settings import FileSystemModelsRepositorySettings
+from src.core.versions import VersionRange
+
+
+def create_fs_repo(directory) -> FileSystemModelsRepository:
+    directory.mkdir(exist_ok=True)
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(directory))
+    return FileSystemModelsRepository(settings)
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition has not been met in time"
+        time.sleep(0.01)
+
+
+@pytest.fixture()
+def primary(tmp_path) -> FileSystemModelsRepository:
+    return create_fs_repo(tmp_path / "primary")
+
+
+@pytest.fixture()
+def secondary(tmp_path) -> FileSystemModelsRepository:
+    return create_fs_repo(tmp_path / "secondary")
+
+
+@pytest.fixture()
+def repo(tmp_path, primary, secondary):
+    repo = MirroredModelsRepository(
+        primary, [secondary], queue_path=str(tmp_path / "queue" / "replication.sqlite3")
+    )
+    yield repo
+    repo.close()
+
+
+def is_replicated(repo: MirroredModelsRepository) -> bool:
+    return all(status.pending_operations == 0 for status in repo.get_replication_status())
+
+
+def test_save_model_when_secondary_is_available_and_expects_model_replicated(
+    repo, secondary, model
+):
+    # When
+    repo.save_model(model)
+    repo.set_alias(model.name, "stable", model.version)
+
+    # Then
+    assert repo.get_model(model.name, model.version) == model
+    wait_until(lambda: is_replicated(repo))
+    assert secondary.get_model(model.name, model.version) == model
+    assert secondary.get_alias(model.name, "stable") == model.version
+
+
+def test_delete_model_when_model_is_replicated_and_expects_model_deleted_from_secondary(
+    repo, secondary, model
+):
+    # Given
+    repo.save_model(model)
+
+    # When
+    repo.delete_model(model.name, model.version)
+
+    # Then
+    wait_until(lambda: is_replicated(repo))
+    with pytest.raises(ModelNotFoundError):
+        secondary.get_model(model.name, model.version)
+
+
+def test_delete_models_when_version_range_is_sent_and_expects_range_deleted_from_secondary(
+    repo, secondary, model
+):
+    # Given
+    for version in ("1.0.0", "1.1.0", "2.0.0"):
+        repo.save_model(dataclasses.replace(model, version=version))
+
+    # When
+    deleted = repo.delete_models(model.name, VersionRange.parse("^1.0"))
+
+    # Then
+    assert deleted == 2
+    wait_until(lambda: is_replicated(repo))
+    assert [model_info.version for model_info in secondary.list_models(model.name)] == ["2.0.0"]
+
+
+def test_save_model_when_secondary_fails_and_expects_replication_retried_in_order(
+    tmp_path, primary, secondary, model, mocker
+):
+    # Given
+    save_model = mocker.patch.object(
+        secondary, "save_model", side_effect=[OSError("disk is full"), None]
+    )
+    delete_model = mocker.patch.object(secondary, "delete_model")
+    repo = MirroredModelsRepository(
+        primary,
+        [secondary],
+        queue_path=str(tmp_path / "replication.sqlite3"),
+        retry_delay=0.01,
+    )
+
+    try:
+        # When
+        repo.save_model(model)
+        repo.delete_model(model.name, model.version)
+
+        # Then
+        wait_until(lambda: is_replicated(repo))
+    finally:
+        repo.close()
+
+    # the model was deleted from the primary before the retry, so it isn't copied again
+    assert save_model.call_count == 1
+    delete_model.assert_called_once_with(model.name, model.version)
+
+
+def test_replication_queue_when_reopened_and_expects_pending_operations_kept(tmp_path):
+    # Given
+    path = str(tmp_path / "replication.sqlite3")
+    queue = ReplicationQueue(path)
+    queue.put([0, 1], ReplicationOperationType.SAVE_MODEL, "my-model", "0.0.7")
+    queue.put([0], ReplicationOperationType.DELETE_MODEL, "my-model", "0.0.7")
+    queue.close()
+
+    # When
+    queue = ReplicationQueue(path)
+    first_operation = queue.take(0)
+    leased_operation = queue.take(0)
+    queue.complete(first_operation)
+    second_operation = queue.take(0)
+
+    # Then
+    assert first_operation.type == ReplicationOperationType.SAVE_MODEL
+    assert leased_operation is None
+    assert second_operation.type == ReplicationOperationType.DELETE_MODEL
+    assert queue.get_status(0).pending_operations == 1
+    assert queue.get_status(1).pending_operations == 1
+    queue.close()
+
+
+def test_replication_queue_when_operation_postponed_and_expects_it_not_taken_before_delay(
+    tmp_path,
+):
+    # Given
+    queue = ReplicationQueue(str(tmp_path / "replication.sqlite3"))
+    queue.put([0], ReplicationOperationType.SAVE_MODEL, "my-model", "0.0.7")
+    operation = queue.take(0)
+
+    # When
+    queue.postpone(operation, delay=60)
+
+    # Then
+    assert queue.take(0) is None
+    assert queue.get_status(0).lag_seconds >= 0
+    queue.close()
+
+
+def test_save_model_by_digest_when_primary_holds_content_and_expects_model_replicated(
+    repo, secondary, model
+):
+    # Given
+    repo.save_model(model)
+    digest = repo.calculate_digest(model.content)
+
+    # When
+    model_info = repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, len(model.content))
+
+    # Then
+    assert model_info is not None
+    wait_until(lambda: is_replicated(repo))
+    assert secondary.get_model(model.name, "1.0.0").content == model.content
+
+
+def test_replicate_when_secondary_fails_and_expects_replication_lag_exported(
+    tmp_path, primary, secondary, model, mocker
+):
+    # Given
+    mocker.patch.object(secondary, "save_model", side_effect=OSError("disk is full"))
+    repo = MirroredModelsRepository(
+        primary,
+        [secondary],
+        queue_path=str(tmp_path / "replication.sqlite3"),
+        retry_delay=0.01,
+    )
+
+    try:
+        # When
+        repo.save_model(model)
+
+        # Then
+        wait_until(lambda: replication_lag.get("0") > 0)
+        assert replication_pending_operations.get("0") == 1
+    finally:
+        repo.close()
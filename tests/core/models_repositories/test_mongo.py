@@ -1,17 +1,32 @@
+import dataclasses
+from datetime import datetime, timezone
+
 import pytest
-from pymongo.database import Collection
+from bson import ObjectId
+from pymongo.database import Collection, Database
+from pymongo.errors import DuplicateKeyError
 from pytest import fixture
 
+from src.core.events import ModelEvent, ModelEventType
 from src.core.models_repositories.mongo import (
+    AliasNotFoundError,
+    IncompleteUploadError,
     ModelExistsError,
     ModelNotFoundError,
+    ModelsUsage,
     MongoModelsRepository,
+    QuotaExceededError,
 )
+from src.core.settings import QuotaSettings
+from src.core.versions import VersionRange
+from src.integrations.mongo.client import MongoClient
 
 
 @fixture()
-def repo(mongo_client) -> MongoModelsRepository:
+def repo(mongo_client, mocker) -> MongoModelsRepository:
     repo = MongoModelsRepository(mongo_client)
+    # the usage counters are rebuilt already, so the writes don't keep them pending
+    mocker.patch.object(repo, "is_usage_complete", return_value=True)
     return repo
 
 
@@ -71,8 +86,17 @@ def test_save_model_when_model_does_not_exist_and_expects_no_problem(
     # When
     mocker.patch.object(Collection, "find_one", return_value=empty_collection_document)
     mocker.patch.object(Collection, "_insert_one", return_value="")
+    update_one = mocker.patch.object(Collection, "update_one")
+    mocker.patch.object(Collection, "bulk_write")
     repo.save_model(model)
 
+    # Then
+    update_one.assert_called_once_with(
+        {"_id": repo.calculate_digest(model.content)},
+        {"$set": {"name": model.name, "version": model.version}},
+        upsert=True,
+    )
+
 
 def test_get_model_when_model_does_not_exist_and_expects_model_not_found_error(
     mocker, repo, model, empty_collection_document
@@ -95,15 +119,895 @@ def test_delete_model_when_model_does_not_exist_and_expects_model_not_found_erro
     mocker, repo, model, empty_collection_document
 ):
     # When
-    mocker.patch.object(Collection, "find_one", return_value=empty_collection_document)
+    mocker.patch.object(Collection, "find_one_and_delete", return_value=empty_collection_document)
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
     with pytest.raises(ModelNotFoundError):
         repo.delete_model(model.name, model.version)
 
+    # Then
+    bulk_write.assert_not_called()
+
 
 def test_delete_model_when_model_exist_and_expects_no_problem(
     mocker, repo, model, collection_document
 ):
+    # Given
+    document = {"name": model.name, "version": model.version, "file_extension": "cbm", "size": 3}
+    find_one_and_delete = mocker.patch.object(
+        Collection, "find_one_and_delete", return_value=document
+    )
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+    mocker.patch.object(Collection, "find", return_value=iter([]))
+
+    # When
+    repo.delete_model(model.name, model.version)
+
+    # Then
+    model_filter, projection = find_one_and_delete.call_args.args
+    assert model_filter["version"] == model.version
+    assert model_filter["$or"][0] == {"deleted_by": {"$exists": False}}
+    assert projection == {**MongoModelsRepository.MODEL_INFO_PROJECTION, "gridfs_id": True}
+    decrement_requests = bulk_write.call_args.args[0]
+    assert decrement_requests[0]._doc == [
+        {"$set": {"count": {"$add": ["$count", -1]}, "size": {"$add": ["$size", -3]}}}
+    ]
+
+
+def test_list_models_when_collections_contain_models(mocker, repo, model):
+    # Given
+    document = {"name": model.name, "version": model.version, "file_extension": "cbm", "size": 3}
+    mocker.patch.object(Database, "list_collection_names", return_value=[model.name])
+    find = mocker.patch.object(Collection, "find", return_value=iter([document]))
+
+    # When
+    model_infos = list(repo.list_models())
+
+    # Then
+    assert len(model_infos) == 1
+    assert model_infos[0].size == 3
+    assert find.call_args.args[1] == MongoModelsRepository.MODEL_INFO_PROJECTION
+
+
+def test_list_saved_times_when_documents_have_object_ids_and_expects_their_creation_times(
+    mocker, repo, model
+):
+    # Given
+    saved_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    documents = [
+        {"_id": ObjectId.from_datetime(saved_at), "version": model.version},
+        {"_id": "custom-id", "version": "1.0.0"},
+    ]
+    mocker.patch.object(Collection, "find", return_value=iter(documents))
+
+    # When
+    saved_times = repo.list_saved_times(model.name)
+
+    # Then
+    assert saved_times == {model.version: saved_at.timestamp()}
+
+
+def test_list_saved_times_when_model_restored_with_saved_time_and_expects_it_preferred(
+    mocker, repo, model
+):
+    # Given
+    documents = [{"_id": ObjectId(), "version": model.version, "saved_at": 1714521600.5}]
+    mocker.patch.object(Collection, "find", return_value=iter(documents))
+
+    # When
+    saved_times = repo.list_saved_times(model.name)
+
+    # Then
+    assert saved_times == {model.version: 1714521600.5}
+
+
+def test_save_models_when_models_do_not_exist_and_expects_one_bulk_insert_per_name(
+    mocker, repo, model
+):
+    # Given
+    models = [model, dataclasses.replace(model, version="1.0.0")]
+    mocker.patch.object(Collection, "find", return_value=iter([]))
+    insert_many = mocker.patch.object(Collection, "insert_many")
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    repo.save_models(models)
+
+    # Then
+    insert_many.assert_called_once()
+    assert len(insert_many.call_args.args[0]) == 2
+    digests_requests, usage_requests = [call.args[0] for call in bulk_write.call_args_list]
+    assert len(digests_requests) == 2
+    assert len(usage_requests) == 2
+
+
+def test_save_models_when_one_model_exists_and_expects_model_exists_error(mocker, repo, model):
+    # Given
+    mocker.patch.object(Collection, "find", return_value=iter([{"version": model.version}]))
+    insert_many = mocker.patch.object(Collection, "insert_many")
+
+    # Then
+    with pytest.raises(ModelExistsError):
+        repo.save_models([model])
+    insert_many.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    argnames="change, expected_event",
+    ids=("insert", "delete with pre-image", "delete without pre-image", "drop", "update"),
+    argvalues=(
+        (
+            {
+                "operationType": "insert",
+                "ns": {"coll": "my-model"},
+                "fullDocument": {"version": "1"},
+            },
+            ModelEvent(type=ModelEventType.SAVED, name="my-model", version="1"),
+        ),
+        (
+            {
+                "operationType": "delete",
+                "ns": {"coll": "my-model"},
+                "fullDocumentBeforeChange": {"version": "1"},
+            },
+            ModelEvent(type=ModelEventType.DELETED, name="my-model", version="1"),
+        ),
+        (
+            {"operationType": "delete", "ns": {"coll": "my-model"}},
+            ModelEvent(type=ModelEventType.DELETED, name="my-model", version=None),
+        ),
+        (
+            {"operationType": "drop", "ns": {"coll": "my-model"}},
+            ModelEvent(type=ModelEventType.DELETED, name="my-model", version=None),
+        ),
+        ({"operationType": "update", "ns": {"coll": "my-model"}}, None),
+    ),
+)
+def test_create_model_event(change, expected_event):
+    # When
+    actual_event = MongoModelsRepository.create_model_event(change)
+
+    # Then
+    assert actual_event == expected_event
+
+
+def test_watch_model_events_when_database_reports_changes_and_expects_model_events(mocker, repo):
+    # Given
+    changes = [
+        {"operationType": "insert", "ns": {"coll": "my-model"}, "fullDocument": {"version": "1"}},
+        {"operationType": "update", "ns": {"coll": "my-model"}},
+    ]
+    mocker.patch.object(repo.client, "watch_changes", return_value=iter(changes))
+
+    # When
+    events = list(repo.watch_model_events())
+
+    # Then
+    assert events == [ModelEvent(type=ModelEventType.SAVED, name="my-model", version="1")]
+
+
+def test_get_model_info_when_model_exists(mocker, repo, model):
+    # Given
+    document = {"name": model.name, "version": model.version, "file_extension": "cbm", "size": 3}
+    mocker.patch.object(Collection, "find", return_value=iter([document]))
+
+    # When
+    model_info = repo.get_model_info(model.name, model.version)
+
+    # Then
+    assert model_info.size == 3
+
+
+def test_get_model_info_when_model_does_not_exist_and_expects_model_not_found_error(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Collection, "find", return_value=iter([]))
+
+    # Then
+    with pytest.raises(ModelNotFoundError):
+        repo.get_model_info(model.name, model.version)
+
+
+# get model digest and read model range
+def test_get_model_digest_when_model_saved_before_digests_and_expects_none(mocker, repo, model):
+    # Given
+    mocker.patch.object(Collection, "find", return_value=iter([{}]))
+
+    # When
+    digest = repo.get_model_digest(model.name, model.version)
+
+    # Then
+    assert digest is None
+
+
+def test_read_model_range_when_content_is_in_gridfs_and_expects_only_range_read(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Collection, "find", return_value=iter([{"gridfs_id": "file-id"}]))
+    read_file_range = mocker.patch.object(repo.client, "read_file_range", return_value=b"repr")
+
+    # When
+    content = repo.read_model_range(model.name, model.version, 7, 4)
+
+    # Then
+    assert content == b"repr"
+    read_file_range.assert_called_once_with(repo.GRIDFS_BUCKET_NAME, "file-id", 7, 4)
+
+
+def test_read_model_range_when_content_is_in_document_and_expects_content_sliced(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Collection, "find", return_value=iter([{"content": model.content}]))
+
+    # When
+    content = repo.read_model_range(model.name, model.version, 7, 4)
+
+    # Then
+    assert content == model.content[7:11]
+
+
+# find latest version
+def test_find_latest_version_when_range_is_bounded_and_expects_one_index_lookup(
+    mocker, repo, model
+):
+    # Given
+    create_index = mocker.patch.object(Collection, "create_index")
+    find = mocker.patch.object(Collection, "find", return_value=iter([{"version": "2.5.0"}]))
+
+    # When
+    version = repo.find_latest_version(model.name, VersionRange.parse("^2.1"))
+
+    # Then
+    assert version == "2.5.0"
+    create_index.assert_called_once_with("version_key")
+    collection_filter = find.call_args.args[0]
+    assert collection_filter == {
+        "version_key": {
+            "$gte": "0000000002.0000000001.0000000000",
+            "$lt": "0000000003.0000000000.0000000000",
+        }
+    }
+    assert find.call_args.kwargs == {"sort": [("version_key", -1)], "limit": 1}
+
+
+def test_find_latest_version_when_no_versions_satisfy_range_and_expects_none(mocker, repo, model):
+    # Given
+    mocker.patch.object(Collection, "create_index")
+    mocker.patch.object(Collection, "find", return_value=iter([]))
+
     # When
+    version = repo.find_latest_version(model.name, VersionRange.parse("latest"))
+
+    # Then
+    assert version is None
+
+
+@pytest.mark.parametrize(
+    argnames="version, expected_version_key",
+    argvalues=(
+        ("1.2.3", "0000000001.0000000002.0000000003"),
+        ("1.0.0-rc.1", None),
+        ("i.o.x", None),
+    ),
+)
+def test_create_model_document(repo, model, version, expected_version_key):
+    # When
+    document = repo.create_model_document(dataclasses.replace(model, version=version))
+
+    # Then
+    assert document.get("version_key") == expected_version_key
+    assert document["content"] == model.content
+
+
+# aliases
+def test_set_alias_when_model_exists_and_expects_alias_upserted(mocker, repo, model):
+    # Given
     mocker.patch.object(Collection, "find_one", return_value=model.to_dict())
-    mocker.patch.object(Collection, "_delete_retryable", return_value={"n": 1})
+    update_one = mocker.patch.object(Collection, "update_one")
+
+    # When
+    repo.set_alias(model.name, "production", model.version)
+
+    # Then
+    update_one.assert_called_once_with(
+        {"_id": {"name": model.name, "alias": "production"}},
+        {"$set": {"version": model.version}},
+        upsert=True,
+    )
+
+
+def test_set_alias_when_model_does_not_exist_and_expects_model_not_found_error(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Collection, "find_one", return_value=None)
+
+    # Then
+    with pytest.raises(ModelNotFoundError):
+        repo.set_alias(model.name, "production", model.version)
+
+
+def test_resolve_alias_when_called_twice_and_expects_one_round_trip(mocker, repo, model):
+    # Given
+    find_one = mocker.patch.object(Collection, "find_one", return_value={"version": "1.0.0"})
+
+    # When
+    versions = [repo.resolve_alias(model.name, "production") for _ in range(2)]
+
+    # Then
+    assert versions == ["1.0.0", "1.0.0"]
+    find_one.assert_called_once()
+
+
+def test_get_alias_when_alias_does_not_exist_and_expects_alias_not_found_error(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Collection, "find_one", return_value=None)
+
+    # Then
+    with pytest.raises(AliasNotFoundError):
+        repo.get_alias(model.name, "production")
+
+
+def test_delete_alias_when_alias_does_not_exist_and_expects_alias_not_found_error(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Collection, "_delete_retryable", return_value={"n": 0})
+
+    # Then
+    with pytest.raises(AliasNotFoundError):
+        repo.delete_alias(model.name, "production")
+
+
+def test_list_aliases(mocker, repo, model):
+    # Given
+    documents = [{"_id": {"name": model.name, "alias": "production"}, "version": "1.0.0"}]
+    mocker.patch.object(Collection, "find", return_value=iter(documents))
+
+    # When
+    aliases = repo.list_aliases(model.name)
+
+    # Then
+    assert aliases == {"production": "1.0.0"}
+
+
+def test_list_models_when_database_contains_reserved_collections_and_expects_them_skipped(
+    mocker, repo
+):
+    # Given
+    collection_names = ["my-model", MongoModelsRepository.ALIASES_COLLECTION_NAME]
+    mocker.patch.object(Database, "list_collection_names", return_value=collection_names)
+
+    # When
+    collection_names = repo.get_models_collection_names()
+
+    # Then
+    assert collection_names == ["my-model"]
+
+
+@pytest.mark.parametrize(
+    argnames="operation_type, full_document, expected_event",
+    argvalues=(
+        (
+            "update",
+            {"version": "1.0.0"},
+            ModelEvent(
+                type=ModelEventType.ALIAS_SET, name="my-model", version="1.0.0", alias="prod"
+            ),
+        ),
+        (
+            "delete",
+            None,
+            ModelEvent(
+                type=ModelEventType.ALIAS_DELETED, name="my-model", version=None, alias="prod"
+            ),
+        ),
+    ),
+)
+def test_create_model_event_when_alias_changed(operation_type, full_document, expected_event):
+    # Given
+    change = {
+        "operationType": operation_type,
+        "ns": {"coll": MongoModelsRepository.ALIASES_COLLECTION_NAME},
+        "documentKey": {"_id": {"name": "my-model", "alias": "prod"}},
+        "fullDocument": full_document,
+    }
+
+    # When
+    actual_event = MongoModelsRepository.create_model_event(change)
+
+    # Then
+    assert actual_event == expected_event
+
+
+# resumable uploads
+def test_write_upload_chunk_when_chunk_is_aligned_and_expects_gridfs_chunk_upserted(
+    mocker, repo, model
+):
+    # Given
+    session = {"name": model.name, "version": model.version, "file_extension": "cbm"}
+    session.update(size=10, chunk_size=repo.UPLOAD_CHUNK_SIZE)
+    mocker.patch.object(Collection, "find_one", return_value=session)
+    find = mocker.patch.object(Collection, "find", return_value=iter([]))
+    update_one = mocker.patch.object(Collection, "update_one")
+
+    # When
+    repo.write_upload_chunk("upload", 0, b"0123456789")
+
+    # Then
+    find.assert_not_called()
+    update_one.assert_called_once_with(
+        {"files_id": "upload", "n": 0}, {"$set": {"data": b"0123456789"}}, upsert=True
+    )
+
+
+def test_complete_upload_when_every_chunk_received_and_expects_gridfs_file_and_model_saved(
+    mocker, repo, model
+):
+    # Given
+    session = {"name": model.name, "version": model.version, "file_extension": "cbm"}
+    session.update(size=10, chunk_size=repo.UPLOAD_CHUNK_SIZE)
+    mocker.patch.object(Collection, "find_one", side_effect=[session, None])
+    mocker.patch.object(
+        Collection, "find", side_effect=[iter([{"n": 0}]), iter([{"data": b"0123456789"}])]
+    )
+    insert_one = mocker.patch.object(Collection, "insert_one")
+    delete_one = mocker.patch.object(Collection, "delete_one")
+    mocker.patch.object(Collection, "update_one")
+    mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    model_info = repo.complete_upload("upload")
+
+    # Then
+    file_document, model_document = [call.args[0] for call in insert_one.call_args_list]
+    assert file_document["_id"] == "upload"
+    assert file_document["length"] == 10
+    assert model_document["gridfs_id"] == "upload"
+    assert model_document["digest"] == repo.calculate_digest(b"0123456789")
+    assert "content" not in model_document
+    assert model_info.size == 10
+    delete_one.assert_called_once_with({"_id": "upload"})
+
+
+def test_complete_upload_when_chunk_is_missing_and_expects_incomplete_upload_error(
+    mocker, repo, model
+):
+    # Given
+    session = {"name": model.name, "version": model.version, "file_extension": "cbm"}
+    session.update(size=repo.UPLOAD_CHUNK_SIZE + 1, chunk_size=repo.UPLOAD_CHUNK_SIZE)
+    mocker.patch.object(Collection, "find_one", return_value=session)
+    mocker.patch.object(Collection, "find", return_value=iter([{"n": 1}]))
+
+    # When & Then
+    with pytest.raises(IncompleteUploadError):
+        repo.complete_upload("upload")
+
+
+def test_get_model_when_model_is_stored_in_gridfs_and_expects_content_read_from_gridfs(
+    mocker, repo, model
+):
+    # Given
+    document = {"name": model.name, "version": model.version, "file_extension": "cbm"}
+    document.update(size=len(model.content), gridfs_id="upload")
+    mocker.patch.object(Collection, "find_one", return_value=document)
+    read_file = mocker.patch.object(MongoClient, "read_file", return_value=model.content)
+
+    # When
+    fetched_model = repo.get_model(model.name, model.version)
+
+    # Then
+    assert fetched_model == model
+    read_file.assert_called_once_with(MongoModelsRepository.GRIDFS_BUCKET_NAME, "upload")
+
+
+# save model by digest
+def test_save_model_by_digest_when_content_is_stored_in_document_and_expects_server_side_copy(
+    mocker, repo, model
+):
+    # Given
+    digest = repo.calculate_digest(model.content)
+    entry = {"_id": digest, "name": model.name, "version": model.version}
+    mocker.patch.object(Collection, "find_one", side_effect=[None, entry])
+    source = {"name": model.name, "version": model.version, "size": len(model.content)}
+    mocker.patch.object(Collection, "find", return_value=iter([source]))
+    aggregate = mocker.patch.object(Collection, "aggregate", return_value=iter([]))
+    update_one = mocker.patch.object(Collection, "update_one")
+    mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    model_info = repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, len(model.content))
+
+    # Then
+    assert model_info.size == len(model.content)
+    match, project, set_, merge = aggregate.call_args.args[0]
+    assert match == {"$match": {"version": model.version, "digest": digest}}
+    assert project == {"$project": {"_id": False, "content": True}}
+    assert set_["$set"]["version"] == {"$literal": "1.0.0"}
+    assert "version_key" in set_["$set"]
+    assert merge == {"$merge": {"into": model.name}}
+    update_one.assert_called_once_with(
+        {"_id": digest}, {"$set": {"name": model.name, "version": "1.0.0"}}, upsert=True
+    )
+
+
+def test_save_model_by_digest_when_content_is_stored_in_gridfs_and_expects_gridfs_file_copied(
+    mocker, repo, model
+):
+    # Given
+    digest = repo.calculate_digest(model.content)
+    entry = {"_id": digest, "name": model.name, "version": model.version}
+    file_document = {"_id": "upload", "length": 22, "chunkSize": 8, "filename": str(model)}
+    mocker.patch.object(Collection, "find_one", side_effect=[None, entry, file_document])
+    source = {"name": model.name, "version": model.version, "size": 22, "gridfs_id": "upload"}
+    mocker.patch.object(Collection, "find", return_value=iter([source]))
+    aggregate = mocker.patch.object(Collection, "aggregate", return_value=iter([]))
+    insert_one = mocker.patch.object(Collection, "insert_one")
+    mocker.patch.object(Collection, "update_one")
+    mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    repo.save_model_by_digest("promoted-model", "1.0.0", "cbm", digest, 22)
+
+    # Then
+    copied_file_document, model_document = [call.args[0] for call in insert_one.call_args_list]
+    match, _, set_, merge = aggregate.call_args.args[0]
+    assert match == {"$match": {"files_id": "upload"}}
+    assert set_ == {"$set": {"files_id": copied_file_document["_id"]}}
+    assert merge == {"$merge": {"into": MongoModelsRepository.GRIDFS_CHUNKS_COLLECTION_NAME}}
+    assert copied_file_document["_id"] != "upload"
+    assert copied_file_document["chunkSize"] == 8
+    assert copied_file_document["filename"] == "promoted-model-1.0.0.cbm"
+    assert model_document["gridfs_id"] == copied_file_document["_id"]
+    assert model_document["digest"] == digest
+
+
+def test_save_model_by_digest_when_content_is_unknown_and_expects_none(mocker, repo, model):
+    # Given
+    mocker.patch.object(Collection, "find_one", side_effect=[None, None])
+    aggregate = mocker.patch.object(Collection, "aggregate")
+
+    # When
+    model_info = repo.save_model_by_digest(model.name, "1.0.0", "cbm", "0" * 64, 22)
+
+    # Then
+    assert model_info is None
+    aggregate.assert_not_called()
+
+
+def test_save_model_by_digest_when_indexed_model_is_gone_and_expects_none(mocker, repo, model):
+    # Given
+    digest = repo.calculate_digest(model.content)
+    entry = {"_id": digest, "name": model.name, "version": model.version}
+    mocker.patch.object(Collection, "find_one", side_effect=[None, entry])
+    mocker.patch.object(Collection, "find", return_value=iter([]))
+    aggregate = mocker.patch.object(Collection, "aggregate")
+
+    # When
+    model_info = repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, 22)
+
+    # Then
+    assert model_info is None
+    aggregate.assert_not_called()
+
+
+# usage
+def test_get_usage_when_counters_are_complete_and_expects_one_round_trip(mocker, repo, model):
+    # Given
+    largest = {"name": model.name, "version": model.version, "size": 22}
+    documents = [
+        {"_id": model.name, "count": 2, "size": 30, "largest": largest},
+        {"_id": repo.ALL_MODELS_USAGE_ID, "count": 3, "size": 40, "is_complete": True},
+    ]
+    find = mocker.patch.object(Collection, "find", return_value=iter(documents))
+
+    # When
+    usage = repo.get_usage(model.name)
+
+    # Then
+    assert usage == ModelsUsage(
+        count=2,
+        size=30,
+        largest_name=model.name,
+        largest_version=model.version,
+        largest_size=22,
+    )
+    find.assert_called_once()
+
+
+def test_get_usage_when_counters_are_missing_and_expects_them_rebuilt_from_models(
+    mocker, repo, model
+):
+    # Given
+    documents = [
+        {"name": model.name, "version": model.version, "file_extension": "cbm", "size": 3},
+        {"name": model.name, "version": "1.0.0", "file_extension": "cbm", "size": 5},
+    ]
+    mocker.patch.object(Database, "list_collection_names", return_value=[model.name])
+    mocker.patch.object(Collection, "find", side_effect=[iter([]), iter(documents)])
+    mocker.patch.object(
+        Collection, "find_one", return_value={"_id": repo.ALL_MODELS_USAGE_ID, "revision": 4}
+    )
+    delete_many = mocker.patch.object(Collection, "delete_many")
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+    update_one = mocker.patch.object(
+        Collection, "update_one", return_value=mocker.Mock(matched_count=1)
+    )
+
+    # When
+    usage = repo.get_usage()
+
+    # Then
+    assert usage == ModelsUsage(
+        count=2, size=8, largest_name=model.name, largest_version="1.0.0", largest_size=5
+    )
+    delete_many.assert_called_once_with({"_id": {"$nin": [model.name, repo.ALL_MODELS_USAGE_ID]}})
+    (model_request,) = bulk_write.call_args.args[0]
+    assert model_request._filter == {"_id": model.name}
+    all_models_filter, all_models_update = update_one.call_args.args
+    assert all_models_filter == {"_id": repo.ALL_MODELS_USAGE_ID, "revision": 4}
+    assert all_models_update["$set"]["is_complete"]
+
+
+def test_get_usage_when_write_is_pending_and_expects_rebuild_to_wait_for_it(mocker, repo, model):
+    # Given
+    mocker.patch.object(repo, "USAGE_REBUILD_DELAY_SECONDS", 0)
+    mocker.patch.object(Database, "list_collection_names", return_value=[])
+    mocker.patch.object(Collection, "find", side_effect=[iter([]), iter([])])
+    find_one = mocker.patch.object(
+        Collection,
+        "find_one",
+        side_effect=[
+            {"_id": repo.ALL_MODELS_USAGE_ID, "pending": 1, "revision": 4},
+            {"_id": repo.ALL_MODELS_USAGE_ID, "pending": 0, "revision": 5},
+        ],
+    )
+    mocker.patch.object(Collection, "delete_many")
+    update_one = mocker.patch.object(
+        Collection, "update_one", return_value=mocker.Mock(matched_count=1)
+    )
+
+    # When
+    usage = repo.get_usage()
+
+    # Then
+    assert usage == ModelsUsage()
+    assert find_one.call_count == 2
+    all_models_filter, _ = update_one.call_args.args
+    assert all_models_filter == {"_id": repo.ALL_MODELS_USAGE_ID, "revision": 5}
+
+
+def test_get_usage_when_counters_are_changed_during_rebuild_and_expects_rebuild_started_over(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Database, "list_collection_names", return_value=[])
+    mocker.patch.object(Collection, "find", side_effect=[iter([]), iter([]), iter([])])
+    mocker.patch.object(
+        Collection,
+        "find_one",
+        side_effect=[
+            {"_id": repo.ALL_MODELS_USAGE_ID, "revision": 4},
+            {"_id": repo.ALL_MODELS_USAGE_ID, "revision": 6},
+        ],
+    )
+    mocker.patch.object(Collection, "delete_many")
+    update_one = mocker.patch.object(
+        Collection,
+        "update_one",
+        side_effect=[DuplicateKeyError("E11000"), mocker.Mock(matched_count=1)],
+    )
+
+    # When
+    repo.get_usage()
+
+    # Then
+    assert [call.args[0]["revision"] for call in update_one.call_args_list] == [4, 6]
+
+
+def test_save_model_when_usage_is_not_complete_and_expects_write_kept_pending(
+    mocker, mongo_client, model
+):
+    # Given
+    repo = MongoModelsRepository(mongo_client)
+    mocker.patch.object(Collection, "find_one", return_value=None)
+    mocker.patch.object(Collection, "_insert_one", return_value="")
+    mocker.patch.object(Collection, "update_one")
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    repo.save_model(model)
+
+    # Then
+    pending_requests = [
+        call.args[0][0]._doc[0]["$set"]["pending"]
+        for call in bulk_write.call_args_list
+        if "pending" in call.args[0][0]._doc[0]["$set"]
+    ]
+    assert pending_requests == [
+        {"$add": [{"$ifNull": ["$pending", 0]}, 1]},
+        {"$add": [{"$ifNull": ["$pending", 0]}, -1]},
+    ]
+
+
+# quotas
+def test_save_model_when_model_fits_into_quota_and_expects_one_conditional_update(
+    mocker, mongo_client, model
+):
+    # Given
+    quotas = QuotaSettings(max_bytes={model.name: 100})
+    repo = MongoModelsRepository(mongo_client, quotas)
+    mocker.patch.object(repo, "is_usage_complete", return_value=True)
+    mocker.patch.object(Collection, "find_one", return_value=None)
+    mocker.patch.object(Collection, "_insert_one", return_value="")
+    update_one = mocker.patch.object(
+        Collection, "update_one", return_value=mocker.Mock(matched_count=1)
+    )
+    mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    repo.save_model(model)
+
+    # Then
+    usage_filter, _ = update_one.call_args_list[0].args
+    assert usage_filter == {"_id": model.name, "size": {"$lte": 100 - len(model.content)}}
+    assert update_one.call_args_list[0].kwargs == {"upsert": True}
+
+
+def test_save_model_when_quota_is_exceeded_and_expects_quota_exceeded_error_before_insert(
+    mocker, mongo_client, model
+):
+    # Given
+    quotas = QuotaSettings(max_bytes={model.name: 30})
+    repo = MongoModelsRepository(mongo_client, quotas)
+    mocker.patch.object(repo, "is_usage_complete", return_value=True)
+    mocker.patch.object(
+        Collection, "find_one", side_effect=[None, {"_id": model.name, "size": 20}]
+    )
+    insert_one = mocker.patch.object(Collection, "_insert_one")
+    mocker.patch.object(Collection, "update_one", side_effect=DuplicateKeyError("E11000"))
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+
+    # When & Then
+    with pytest.raises(QuotaExceededError, match="20 bytes are used"):
+        repo.save_model(model)
+    insert_one.assert_not_called()
+    bulk_write.assert_not_called()
+
+
+def test_save_model_when_insert_fails_and_expects_usage_subtracted(mocker, repo, model):
+    # Given
+    mocker.patch.object(Collection, "find_one", return_value=None)
+    mocker.patch.object(Collection, "_insert_one", side_effect=RuntimeError("insert failed"))
+    mocker.patch.object(Collection, "find", return_value=iter([]))
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+
+    # When & Then
+    with pytest.raises(RuntimeError):
+        repo.save_model(model)
+    _, decrement_requests = [call.args[0] for call in bulk_write.call_args_list]
+    size = len(model.content)
+    assert decrement_requests[0]._doc == [
+        {"$set": {"count": {"$add": ["$count", -1]}, "size": {"$add": ["$size", -size]}}}
+    ]
+
+
+def test_delete_model_when_largest_version_deleted_and_expects_largest_version_found_again(
+    mocker, repo, model
+):
+    # Given
+    document = {"name": model.name, "version": model.version, "file_extension": "cbm", "size": 3}
+    mocker.patch.object(Collection, "find_one_and_delete", return_value=document)
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+    mocker.patch.object(Collection, "find", return_value=iter([{"_id": model.name}]))
+    next_largest = {"name": model.name, "version": "1.0.0", "size": 5, "file_extension": "cbm"}
+    mocker.patch.object(Collection, "aggregate", return_value=iter([next_largest]))
+
+    # When
     repo.delete_model(model.name, model.version)
+
+    # Then
+    decrement_requests, largest_requests = [call.args[0] for call in bulk_write.call_args_list]
+    assert len(decrement_requests) == 2
+    assert largest_requests[0]._doc == {
+        "$set": {"largest": {"name": model.name, "version": "1.0.0", "size": 5}}
+    }
+
+
+# bulk delete
+def test_delete_models_when_no_version_range_is_sent_and_expects_claimed_versions_deleted(
+    mocker, repo, model
+):
+    # Given
+    documents = [
+        {"name": model.name, "version": model.version, "file_extension": "cbm", "size": 3},
+        {"name": model.name, "version": "1.0.0", "size": 5, "gridfs_id": "upload"},
+    ]
+    update_many = mocker.patch.object(
+        Collection, "update_many", return_value=mocker.Mock(modified_count=2)
+    )
+    find = mocker.patch.object(Collection, "find", side_effect=[iter(documents), iter([])])
+    delete_many = mocker.patch.object(Collection, "delete_many")
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    deleted = repo.delete_models(model.name)
+
+    # Then
+    assert deleted == 2
+    claim_filter, claim_update = update_many.call_args.args
+    assert "version_key" not in claim_filter
+    claim_id = claim_update["$set"]["deleted_by"]["id"]
+    assert find.call_args_list[0].args[0] == {"deleted_by.id": claim_id}
+    assert [call.args[0] for call in delete_many.call_args_list] == [
+        {"deleted_by.id": claim_id},
+        {"files_id": {"$in": ["upload"]}},
+        {"_id": {"$in": ["upload"]}},
+    ]
+    decrement_requests = bulk_write.call_args.args[0]
+    assert decrement_requests[0]._doc == [
+        {"$set": {"count": {"$add": ["$count", -2]}, "size": {"$add": ["$size", -8]}}}
+    ]
+
+
+def test_delete_models_when_version_range_is_sent_and_expects_versions_claimed_by_version_key(
+    mocker, repo, model
+):
+    # Given
+    documents = [{"name": model.name, "version": "1.0.0", "file_extension": "cbm", "size": 3}]
+    update_many = mocker.patch.object(
+        Collection, "update_many", return_value=mocker.Mock(modified_count=1)
+    )
+    mocker.patch.object(Collection, "find", side_effect=[iter(documents), iter([])])
+    mocker.patch.object(Collection, "delete_many")
+    mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    deleted = repo.delete_models(model.name, VersionRange.parse("^1.0"))
+
+    # Then
+    assert deleted == 1
+    claim_filter, _ = update_many.call_args.args
+    assert set(claim_filter["version_key"]) == {"$gte", "$lt"}
+    assert claim_filter["$or"][0] == {"deleted_by": {"$exists": False}}
+
+
+def test_delete_models_when_versions_are_claimed_by_another_delete_and_expects_nothing_deleted(
+    mocker, repo, model
+):
+    # Given
+    mocker.patch.object(Collection, "update_many", return_value=mocker.Mock(modified_count=0))
+    delete_many = mocker.patch.object(Collection, "delete_many")
+    bulk_write = mocker.patch.object(Collection, "bulk_write")
+
+    # When
+    deleted = repo.delete_models(model.name)
+
+    # Then
+    assert deleted == 0
+    delete_many.assert_not_called()
+    bulk_write.assert_not_called()
+
+
+# search
+def test_search_model_names_when_query_is_prefix_and_expects_anchored_pattern_over_usage_ids(
+    mocker, repo
+):
+    # Given
+    mocker.patch.object(Collection, "find_one", return_value=repo.COMPLETE_USAGE_FILTER)
+    find = mocker.patch.object(Collection, "find", return_value=iter([{"_id": "ranking.ads"}]))
+
+    # When
+    names = repo.search_model_names("ranking.", limit=10, after="ranking")
+
+    # Then
+    assert names == ["ranking.ads"]
+    assert find.call_args.args[0] == {
+        "_id": {"$regex": r"^ranking\.", "$ne": repo.ALL_MODELS_USAGE_ID, "$gt": "ranking"},
+        "count": {"$gt": 0},
+    }
+    assert find.call_args.kwargs == {"sort": [("_id", 1)], "limit": 10}
@@ -0,0 +1,222 @@
+import dataclasses
+import threading
+import time
+
+import pytest
+
+from src.core.locks import ProcessLock
+from src.core.models_repositories import (
+    AliasNotFoundError,
+    FileSystemModelsRepository,
+    ModelExistsError,
+    ModelNotFoundError,
+    ShardedModelsRepository,
+    UploadNotFoundError,
+)
+from src.core.settings import FileSystemModelsRepositorySettings
+from src.core.versions import VersionRange
+from tests.core.models_repositories.test_mirror import wait_until
+
+
+def create_shards(tmp_path, shard_ids) -> dict[str, FileSystemModelsRepository]:
+    shards = {}
+    for shard_id in shard_ids:
+        (tmp_path / shard_id).mkdir(exist_ok=True)
+        settings = FileSystemModelsRepositorySettings(
+            source="fs", directory=str(tmp_path / shard_id)
+        )
+        shards[shard_id] = FileSystemModelsRepository(settings)
+    return shards
+
+
+def create_models(model, count: int):
+    return [dataclasses.replace(model, name=f"model-{index}") for index in range(count)]
+
+
+def test_save_model_when_there_are_several_shards_and_expects_model_stored_on_owner_shard(
+    tmp_path, model
+):
+    # Given
+    shards = create_shards(tmp_path, ["a", "b", "c"])
+    repo = ShardedModelsRepository(shards)
+    models = create_models(model, 30)
+    wait_until(lambda: repo.is_balanced)
+
+    # When
+    repo.save_models(models)
+
+    # Then
+    for item in models:
+        owner = repo.ring.get_node(item.name)
+        assert shards[owner].get_model(item.name, item.version) == item
+        assert repo.get_model(item.name, item.version) == item
+    assert all(len(list(shard.list_models())) > 0 for shard in shards.values())
+    assert len(list(repo.list_models())) == 30
+
+
+def test_rebalance_when_shard_added_and_expects_only_models_of_new_shard_moved(tmp_path, model):
+    # Given
+    models = create_models(model, 30)
+    repo = ShardedModelsRepository(create_shards(tmp_path, ["a", "b"]))
+    wait_until(lambda: repo.is_balanced)
+    repo.save_models(models)
+    repo.set_alias(models[0].name, "stable", models[0].version)
+
+    # When
+    repo = ShardedModelsRepository(create_shards(tmp_path, ["a", "b", "c"]))
+    wait_until(lambda: repo.is_balanced)
+
+    # Then
+    shard_c_names = {model_info.name for model_info in repo.shards["c"].list_models()}
+    assert shard_c_names == {item.name for item in models if repo.ring.get_node(item.name) == "c"}
+    assert 0 < len(shard_c_names) < 30
+    assert len(list(repo.list_models())) == 30
+    assert repo.get_alias(models[0].name, "stable") == models[0].version
+
+
+def test_get_model_when_model_is_not_moved_yet_and_expects_fallback_to_other_shards(
+    tmp_path, model, mocker
+):
+    # Given
+    shards = create_shards(tmp_path, ["a", "b"])
+    rebalancing_allowed = threading.Event()
+    mocker.patch.object(ShardedModelsRepository, "rebalance", side_effect=rebalancing_allowed.wait)
+    repo = ShardedModelsRepository(shards)
+    non_owner = next(shard_id for shard_id in shards if shard_id != repo.ring.get_node(model.name))
+    shards[non_owner].save_model(model)
+
+    # When
+    fetched_model = repo.get_model(model.name, model.version)
+
+    # Then
+    assert fetched_model == model
+    assert repo.find_latest_version(model.name, VersionRange.parse("latest")) == model.version
+    with pytest.raises(ModelExistsError):
+        repo.save_model(model)
+    repo.delete_model(model.name, model.version)
+    with pytest.raises(ModelNotFoundError):
+        repo.get_model(model.name, model.version)
+    rebalancing_allowed.set()
+
+
+@pytest.fixture()
+def rebalancing_allowed(mocker):
+    rebalancing_allowed = threading.Event()
+    mocker.patch.object(ShardedModelsRepository, "rebalance", side_effect=rebalancing_allowed.wait)
+    yield rebalancing_allowed
+    rebalancing_allowed.set()
+
+
+def test_read_operations_when_models_are_not_moved_yet_and_expects_both_shards_merged(
+    tmp_path, model, rebalancing_allowed
+):
+    # Given
+    shards = create_shards(tmp_path, ["a", "b"])
+    repo = ShardedModelsRepository(shards)
+    owner_id = repo.ring.get_node(model.name)
+    non_owner_id = next(shard_id for shard_id in shards if shard_id != owner_id)
+    shards[non_owner_id].save_model(model)
+    shards[non_owner_id].set_alias(model.name, "stable", model.version)
+    newer_model = dataclasses.replace(model, version="1.0.0")
+    shards[owner_id].save_model(newer_model)
+
+    # When
+    latest_version = repo.find_latest_version(model.name, VersionRange.parse("latest"))
+    versions = sorted(model_info.version for model_info in repo.list_models(model.name))
+    usage = repo.get_usage(model.name)
+    names = repo.search_model_names(model.name[:3])
+
+    # Then
+    assert not repo.is_balanced
+    assert latest_version == newer_model.version
+    assert versions == [model.version, newer_model.version]
+    assert usage.count == 2
+    assert names == [model.name]
+    assert set(repo.list_saved_times(model.name)) == {model.version, newer_model.version}
+    assert repo.list_aliases(model.name) == {"stable": model.version}
+    assert repo.resolve_version(model.name, "@stable") == model.version
+    repo.delete_alias(model.name, "stable")
+    with pytest.raises(AliasNotFoundError):
+        repo.get_alias(model.name, "stable")
+    assert repo.delete_models(model.name) == 2
+
+
+def test_run_rebalancer_when_rebalance_fails_and_expects_pass_retried(tmp_path, mocker):
+    # Given
+    rebalance = mocker.patch.object(
+        ShardedModelsRepository, "rebalance", side_effect=[RuntimeError("shard is down"), 0]
+    )
+
+    # When
+    repo = ShardedModelsRepository(create_shards(tmp_path, ["a", "b"]))
+    wait_until(lambda: repo.is_balanced)
+
+    # Then
+    assert rebalance.call_count == 2
+
+
+def test_upload_when_models_are_sharded_and_expects_chunks_staged_on_owner_shard(tmp_path, model):
+    # Given
+    shards = create_shards(tmp_path, ["a", "b"])
+    repo = ShardedModelsRepository(shards)
+    wait_until(lambda: repo.is_balanced)
+
+    # When
+    session = repo.create_upload(model.name, model.version, model.file_extension, 4)
+    repo.write_upload_chunk(session.id, 0, b"data")
+    model_info = repo.complete_upload(session.id)
+
+    # Then
+    assert session.id.startswith(f"{repo.ring.get_node(model.name)}:")
+    assert model_info.size == 4
+    owner = shards[repo.ring.get_node(model.name)]
+    assert owner.get_model(model.name, model.version).content == b"data"
+    with pytest.raises(UploadNotFoundError):
+        repo.get_upload(f"unknown:{session.id}")
+
+
+def test_delete_model_when_model_copied_to_owner_but_not_deleted_yet_and_expects_both_deleted(
+    tmp_path, model, rebalancing_allowed
+):
+    # Given
+    shards = create_shards(tmp_path, ["a", "b"])
+    repo = ShardedModelsRepository(shards)
+    for shard in shards.values():
+        shard.save_model(model)
+
+    # When
+    repo.delete_model(model.name, model.version)
+
+    # Then
+    for shard in shards.values():
+        with pytest.raises(ModelNotFoundError):
+            shard.get_model(model.name, model.version)
+    with pytest.raises(ModelNotFoundError):
+        repo.delete_model(model.name, model.version)
+
+
+def test_run_rebalancer_when_another_process_rebalances_and_expects_no_scan(tmp_path, mocker):
+    # Given
+    lock_path = tmp_path / "rebalance.lock"
+    leader = ShardedModelsRepository(create_shards(tmp_path, ["a", "b"]), lock_path=lock_path)
+    wait_until(lambda: leader.is_balanced)
+    leader_lock = ProcessLock(lock_path)
+    leader_lock.acquire()
+    rebalance = mocker.patch.object(ShardedModelsRepository, "rebalance", return_value=0)
+
+    try:
+        # When
+        follower = ShardedModelsRepository(
+            create_shards(tmp_path, ["a", "b"]), lock_path=lock_path
+        )
+        wait_until(lambda: follower.is_balanced)
+        resharded = ShardedModelsRepository(
+            create_shards(tmp_path, ["a", "b", "c"]), lock_path=lock_path
+        )
+        time.sleep(0.05)
+    finally:
+        leader_lock.release()
+
+    # Then
+    rebalance.assert_not_called()
+    assert not resharded.is_balanced
@@ -0,0 +1,49 @@
+from src.core.aliases import AliasesCache
+from src.core.events import ModelEvent, ModelEventsBus, ModelEventType
+
+
+def test_get_when_alias_is_cached_and_expects_hit():
+    # Given
+    cache = AliasesCache()
+    cache.put("my-model", "production", "1.0.0")
+
+    # When
+    version = cache.get("my-model", "production")
+
+    # Then
+    assert version == "1.0.0"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_get_when_alias_has_expired_and_expects_miss():
+    # Given
+    cache = AliasesCache(ttl=0)
+    cache.put("my-model", "production", "1.0.0")
+
+    # When
+    version = cache.get("my-model", "production")
+
+    # Then
+    assert version is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_on_model_event_when_alias_event_published_and_expects_alias_invalidated():
+    # Given
+    bus = ModelEventsBus()
+    cache = AliasesCache()
+    bus.add_listener(cache.on_model_event)
+    cache.put("my-model", "production", "1.0.0")
+    cache.put("my-model", "canary", "1.1.0")
+
+    # When
+    bus.publish(ModelEvent(type=ModelEventType.SAVED, name="my-model", version="1.2.0"))
+    bus.publish(
+        ModelEvent(
+            type=ModelEventType.ALIAS_SET, name="my-model", version="1.1.0", alias="production"
+        )
+    )
+
+    # Then
+    assert cache.get("my-model", "production") is None
+    assert cache.get("my-model", "canary") == "1.1.0"
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.core.events import ModelEvent, ModelEventsBus, ModelEventType
+
+
+@pytest.fixture()
+def bus() -> ModelEventsBus:
+    return ModelEventsBus()
+
+
+def create_event(name: str, version: str = "1.0.0") -> ModelEvent:
+    return ModelEvent(type=ModelEventType.SAVED, name=name, version=version)
+
+
+def test_publish_when_subscriber_filters_by_name_and_expects_only_its_events(bus):
+    async def run():
+        with bus.subscribe(["my-model"]) as subscription:
+            bus.publish(create_event("your-model"))
+            bus.publish(create_event("my-model"))
+            return await subscription.get(timeout=1)
+
+    # When
+    event = asyncio.run(run())
+
+    # Then
+    assert event == create_event("my-model")
+
+
+def test_publish_when_event_published_from_another_thread_and_expects_event_delivered(bus):
+    async def run():
+        with bus.subscribe() as subscription:
+            thread = threading.Thread(target=bus.publish, args=(create_event("my-model"),))
+            thread.start()
+            thread.join()
+            return await subscription.get(timeout=1)
+
+    # When
+    event = asyncio.run(run())
+
+    # Then
+    assert event.name == "my-model"
+
+
+def test_publish_when_subscription_is_closed_and_expects_no_events_delivered(bus):
+    async def run():
+        subscription = bus.subscribe()
+        subscription.close()
+        bus.publish(create_event("my-model"))
+        with pytest.raises(TimeoutError):
+            await subscription.get(timeout=0.01)
+
+    asyncio.run(run())
+
+
+def test_watch_when_repository_reports_events_and_expects_them_published(bus, mocker):
+    # Given
+    models_repo = mocker.Mock()
+    models_repo.watch_model_events.return_value = iter([create_event("my-model")])
+
+    async def run():
+        with bus.subscribe() as subscription:
+            bus.watch(models_repo)
+            bus.watch(models_repo)
+            return await subscription.get(timeout=1)
+
+    # When
+    event = asyncio.run(run())
+
+    # Then
+    assert event.name == "my-model"
+    models_repo.watch_model_events.assert_called_once()
@@ -0,0 +1,43 @@
+from src.core.hashing import ConsistentHashRing
+
+keys = [f"model-{index}" for index in range(1000)]
+
+
+def test_get_node_when_ring_has_several_nodes_and_expects_keys_spread_across_them():
+    # Given
+    ring = ConsistentHashRing(["a", "b", "c"])
+
+    # When
+    owners = [ring.get_node(key) for key in keys]
+
+    # Then
+    for node in ("a", "b", "c"):
+        assert 200 < owners.count(node) < 480
+
+
+def test_add_node_when_node_added_and_expects_only_keys_of_new_node_moved():
+    # Given
+    ring = ConsistentHashRing(["a", "b", "c"])
+    owners_before = {key: ring.get_node(key) for key in keys}
+
+    # When
+    ring.add_node("d")
+
+    # Then
+    moved = [key for key in keys if ring.get_node(key) != owners_before[key]]
+    assert all(ring.get_node(key) == "d" for key in moved)
+    assert 150 < len(moved) < 350
+
+
+def test_remove_node_when_node_removed_and_expects_previous_owners_restored():
+    # Given
+    ring = ConsistentHashRing(["a", "b", "c"])
+    owners_before = {key: ring.get_node(key) for key in keys}
+    ring.add_node("d")
+
+    # When
+    ring.remove_node("d")
+
+    # Then
+    assert {key: ring.get_node(key) for key in keys} == owners_before
+    assert ring.nodes == {"a", "b", "c"}
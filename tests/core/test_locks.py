@@ -0,0 +1,32 @@
+from src.core.locks import ProcessLock
+
+
+def test_acquire_when_lock_is_held_by_another_holder_and_expects_false(tmp_path):
+    # Given
+    lock_path = tmp_path / "jobs.lock"
+    holder = ProcessLock(lock_path)
+    holder.acquire()
+
+    # When
+    is_acquired = ProcessLock(lock_path).acquire()
+
+    # Then
+    assert not is_acquired
+    assert holder.is_held
+
+
+def test_acquire_when_lock_is_released_and_expects_true(tmp_path):
+    # Given
+    lock_path = tmp_path / "jobs.lock"
+    holder = ProcessLock(lock_path)
+    holder.acquire()
+    holder.release()
+    another_holder = ProcessLock(lock_path)
+
+    # When
+    is_acquired = another_holder.acquire()
+
+    # Then
+    assert is_acquired
+    assert not holder.is_held
+    another_holder.release()
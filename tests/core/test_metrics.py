@@ -0,0 +1,80 @@
+import pytest
+
+from src.core.metrics import (
+    Counter,
+    Histogram,
+    Metric,
+    MetricsRegistry,
+    observe_repository_operation,
+    repository_operation_duration,
+)
+from src.core.models_repositories import ModelNotFoundError
+
+
+def test_histogram_render_when_values_observed_and_expects_cumulative_buckets():
+    # Given
+    histogram = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1))
+
+    # When
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, "/")
+
+    # Then
+    assert list(histogram.render()) == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/",le="0.1"} 2',
+        'latency_seconds_bucket{route="/",le="1"} 3',
+        'latency_seconds_bucket{route="/",le="+Inf"} 4',
+        'latency_seconds_sum{route="/"} 3.65',
+        'latency_seconds_count{route="/"} 4',
+    ]
+
+
+def test_counter_render_when_label_value_has_quotes_and_expects_them_escaped():
+    # Given
+    counter = Counter("requests_total", "Requests", ["route"])
+
+    # When
+    counter.inc('/"quoted"', amount=2)
+
+    # Then
+    assert list(counter.render())[-1] == 'requests_total{route="/\\"quoted\\""} 2'
+
+
+def test_register_when_metric_with_such_name_registered_and_expects_value_error():
+    # Given
+    registry = MetricsRegistry()
+    registry.register(Counter("requests_total", "Requests"))
+
+    # When & Then
+    with pytest.raises(ValueError):
+        registry.register(Counter("requests_total", "Requests"))
+
+
+def test_observe_repository_operation_when_operation_fails_and_expects_error_recorded():
+    # Given
+    class FakeModelsRepository:
+        @observe_repository_operation
+        def get_model(self, name, version):
+            raise ModelNotFoundError(name, version)
+
+    labels = ("FakeModelsRepository", "get_model", "ModelNotFoundError")
+    count_before = repository_operation_duration.get_count(*labels)
+
+    # When
+    with pytest.raises(ModelNotFoundError):
+        FakeModelsRepository().get_model("my-model", "0.0.7")
+
+    # Then
+    assert repository_operation_duration.get_count(*labels) == count_before + 1
+
+
+def test_metric_when_samples_rendering_not_implemented_and_expects_type_error():
+    # Given
+    class UnrenderedMetric(Metric):
+        type = "untyped"
+
+    # When & Then
+    with pytest.raises(TypeError):
+        UnrenderedMetric("model_registry_unrendered", "Metric without the samples")
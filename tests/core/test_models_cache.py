@@ -0,0 +1,136 @@
+import dataclasses
+import hashlib
+import os
+
+import pytest
+
+from src.core.events import ModelEvent, ModelEventType
+from src.core.models_cache import SharedModelsCache
+
+
+@pytest.fixture()
+def models_cache(tmp_path) -> SharedModelsCache:
+    return SharedModelsCache(tmp_path / "cache", max_bytes=1024)
+
+
+def set_last_used_time(models_cache: SharedModelsCache, model, seconds: int) -> None:
+    os.utime(models_cache.create_entry_path(model.name, model.version), (seconds, seconds))
+
+
+def test_get_when_model_cached_by_another_worker_and_expects_content_served_from_mapping(
+    tmp_path, models_cache, model
+):
+    # Given
+    models_cache.put(model)
+    another_worker_cache = SharedModelsCache(tmp_path / "cache", max_bytes=1024)
+
+    # When
+    cached_model = another_worker_cache.get(model.name, model.version)
+
+    # Then
+    assert isinstance(cached_model.content, memoryview)
+    assert bytes(cached_model.content) == model.content
+    assert cached_model.file_extension == model.file_extension
+    assert another_worker_cache.get(model.name, "1.0.0") is None
+
+
+def test_get_when_model_cached_and_expects_content_exported_as_bytes(models_cache, model):
+    # Given
+    models_cache.put(model)
+    cached_model = models_cache.get(model.name, model.version)
+
+    # When
+    model_dict = cached_model.to_dict()
+
+    # Then
+    assert model_dict["content"] == model.content
+    assert isinstance(model_dict["content"], bytes)
+    assert model_dict == {**model.to_dict(), "digest": cached_model.digest}
+
+
+def test_get_when_model_cached_with_digest_and_expects_digest_served_from_header(
+    tmp_path, models_cache, model
+):
+    # Given
+    models_cache.put(model, "0" * 64)
+    another_worker_cache = SharedModelsCache(tmp_path / "cache", max_bytes=1024)
+
+    # When
+    cached_model = another_worker_cache.get(model.name, model.version)
+
+    # Then
+    assert cached_model.digest == "0" * 64
+
+
+def test_get_when_model_cached_without_digest_and_expects_digest_calculated(models_cache, model):
+    # Given
+    models_cache.put(model)
+
+    # When
+    cached_model = models_cache.get(model.name, model.version)
+
+    # Then
+    assert cached_model.digest == hashlib.sha256(model.content).hexdigest()
+
+
+def test_put_when_budget_exceeded_and_expects_least_recently_used_model_evicted(
+    models_cache, model
+):
+    # Given
+    models = [
+        dataclasses.replace(model, version=f"1.0.{patch}", content=b"0" * 400)
+        for patch in range(3)
+    ]
+    models_cache.put(models[0])
+    models_cache.put(models[1])
+    set_last_used_time(models_cache, models[0], 100)
+    set_last_used_time(models_cache, models[1], 200)
+    assert models_cache.get(models[0].name, models[0].version) is not None
+
+    # When
+    models_cache.put(models[2])
+
+    # Then
+    assert models_cache.get(models[0].name, models[0].version) is not None
+    assert models_cache.get(models[1].name, models[1].version) is None
+    assert models_cache.get(models[2].name, models[2].version) is not None
+
+
+def test_put_when_model_is_larger_than_budget_and_expects_model_not_cached(models_cache, model):
+    # When
+    models_cache.put(dataclasses.replace(model, content=b"0" * 2048))
+
+    # Then
+    assert models_cache.get(model.name, model.version) is None
+
+
+def test_on_model_event_when_models_deleted_and_expects_their_versions_invalidated(
+    models_cache, model
+):
+    # Given
+    another_model = dataclasses.replace(model, name="another-model")
+    for cached_model in (model, dataclasses.replace(model, version="1.0.0"), another_model):
+        models_cache.put(cached_model)
+
+    # When
+    models_cache.on_model_event(
+        ModelEvent(type=ModelEventType.DELETED, name=model.name, version=None)
+    )
+
+    # Then
+    assert models_cache.get(model.name, model.version) is None
+    assert models_cache.get(model.name, "1.0.0") is None
+    assert models_cache.get(another_model.name, another_model.version) is not None
+
+
+def test_on_model_event_when_model_saved_and_expects_its_version_invalidated(models_cache, model):
+    # Given
+    models_cache.put(model)
+
+    # When
+    models_cache.on_model_event(
+        ModelEvent(type=ModelEventType.SAVED, name=model.name, version=model.version)
+    )
+
+    # Then
+    assert models_cache.get(model.name, model.version) is None
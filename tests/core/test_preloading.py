@@ -0,0 +1,147 @@
+import dataclasses
+import os
+
+import pytest
+
+from src.core.events import ModelEvent, ModelEventType
+from src.core.models_cache import SharedModelsCache
+from src.core.models_repositories import FileSystemModelsRepository
+from src.core.preloading import PinnedModelsPreloader
+from src.core.settings import (
+    CacheSettings,
+    FileSystemModelsRepositorySettings,
+    PinnedModelSettings,
+)
+
+
+@pytest.fixture()
+def repo(tmp_path):
+    (tmp_path / "models").mkdir()
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path / "models"))
+    return FileSystemModelsRepository(settings)
+
+
+@pytest.fixture()
+def models_cache(tmp_path) -> SharedModelsCache:
+    return SharedModelsCache(tmp_path / "cache", max_bytes=1024)
+
+
+def create_preloader(repo, models_cache, *pinned: tuple[str, str]) -> PinnedModelsPreloader:
+    settings = CacheSettings(
+        enabled=True,
+        pinned=[PinnedModelSettings(name=name, version=version) for name, version in pinned],
+    )
+    return PinnedModelsPreloader(repo, models_cache, settings)
+
+
+def test_preload_when_models_pinned_and_expects_models_cached_and_not_evicted(
+    repo, models_cache, model
+):
+    # Given
+    repo.save_model(dataclasses.replace(model, content=b"0" * 400))
+    preloader = create_preloader(repo, models_cache, (model.name, model.version))
+
+    # When
+    loaded = preloader.preload()
+    os.utime(models_cache.create_entry_path(model.name, model.version), (100, 100))
+    models_cache.put(dataclasses.replace(model, version="0.0.8", content=b"1" * 400))
+    os.utime(models_cache.create_entry_path(model.name, "0.0.8"), (200, 200))
+    models_cache.put(dataclasses.replace(model, version="0.0.9", content=b"2" * 400))
+
+    # Then
+    assert loaded == 1
+    assert bytes(models_cache.get(model.name, model.version).content) == b"0" * 400
+    assert not models_cache.contains(model.name, "0.0.8")
+    assert models_cache.contains(model.name, "0.0.9")
+
+
+def test_preload_when_pinned_model_not_found_and_expects_it_skipped(repo, models_cache, model):
+    # Given
+    repo.save_model(model)
+    preloader = create_preloader(
+        repo,
+        models_cache,
+        (model.name, "latest"),
+        ("missing-model", "latest"),
+        (model.name, "@prod"),
+    )
+
+    # When
+    loaded = preloader.preload()
+
+    # Then
+    assert loaded == 1
+    assert models_cache.contains(model.name, model.version)
+
+
+def test_refresh_when_alias_moved_and_expects_new_version_pinned_and_old_one_unpinned(
+    repo, models_cache, model
+):
+    # Given
+    new_model = dataclasses.replace(model, version="0.0.8", content=b"0" * 600)
+    repo.save_model(dataclasses.replace(model, content=b"1" * 600))
+    repo.save_model(new_model)
+    repo.set_alias(model.name, "prod", model.version)
+    preloader = create_preloader(repo, models_cache, (model.name, "@prod"))
+    preloader.preload()
+
+    # When
+    repo.set_alias(model.name, "prod", new_model.version)
+    preloader.refresh(preloader.settings.pinned[0])
+    models_cache.evict()
+
+    # Then
+    assert models_cache.contains(new_model.name, new_model.version)
+    assert not models_cache.contains(model.name, model.version)
+
+
+def test_refresh_when_other_spec_still_resolves_to_version_and_expects_version_kept_pinned(
+    repo, models_cache, model
+):
+    # Given
+    repo.save_model(model)
+    preloader = create_preloader(repo, models_cache, (model.name, "@prod"), (model.name, "latest"))
+    repo.set_alias(model.name, "prod", model.version)
+    preloader.preload()
+    repo.save_model(dataclasses.replace(model, version="0.0.8"))
+
+    # When
+    preloader.refresh(preloader.settings.pinned[1])
+
+    # Then
+    assert models_cache._create_pin_path(model.name, model.version).exists()
+    assert models_cache._create_pin_path(model.name, "0.0.8").exists()
+
+
+@pytest.mark.parametrize(
+    "pinned_version, event, expected",
+    [
+        (
+            "@prod",
+            ModelEvent(
+                type=ModelEventType.ALIAS_SET, name="my-model", version="0.0.8", alias="prod"
+            ),
+            True,
+        ),
+        (
+            "@prod",
+            ModelEvent(
+                type=ModelEventType.ALIAS_SET, name="my-model", version="0.0.8", alias="dev"
+            ),
+            False,
+        ),
+        ("@prod", ModelEvent(type=ModelEventType.SAVED, name="my-model", version="0.0.8"), False),
+        ("latest", ModelEvent(type=ModelEventType.SAVED, name="my-model", version="0.0.8"), True),
+        ("^0.0", ModelEvent(type=ModelEventType.DELETED, name="my-model", version="0.0.8"), True),
+        ("0.0.7", ModelEvent(type=ModelEventType.SAVED, name="my-model", version="0.0.7"), True),
+        ("0.0.7", ModelEvent(type=ModelEventType.SAVED, name="my-model", version="0.0.8"), False),
+    ],
+)
+def test_is_changed_by_when_event_published_and_expects_affected_pins_refreshed(
+    pinned_version, event, expected
+):
+    # Given
+    pinned_model = PinnedModelSettings(name="my-model", version=pinned_version)
+
+    # When & Then
+    assert PinnedModelsPreloader.is_changed_by(pinned_model, event) is expected
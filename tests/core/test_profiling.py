@@ -0,0 +1,89 @@
+import threading
+import time
+
+from src.core.profiling import (
+    ProfiledThreadPoolExecutor,
+    ProfilesStore,
+    SamplingProfiler,
+    iter_profiled,
+    request_profiler,
+)
+
+
+def busy_function(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_sampling_profiler_when_thread_is_busy_and_expects_function_in_folded_stacks():
+    # Given
+    profiler = SamplingProfiler(interval=0.001, thread_ids={threading.get_ident()})
+
+    # When
+    with profiler:
+        busy_function(0.1)
+
+    # Then
+    lines = profiler.render().splitlines()
+    assert lines
+    assert any("test_profiling.py:busy_function" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profiles_store_when_full_and_expects_oldest_profile_evicted():
+    # Given
+    store = ProfilesStore(max_size=2)
+
+    # When
+    for profile_id in ("a", "b", "c"):
+        store.put(profile_id, f"stack {profile_id}")
+
+    # Then
+    assert store.get("a") is None
+    assert store.get("c") == "stack c"
+
+
+def test_profiled_thread_pool_executor_when_request_profiled_and_expects_worker_sampled():
+    # Given
+    profiler = SamplingProfiler(interval=0.001, thread_ids=set())
+    executor = ProfiledThreadPoolExecutor()
+    token = request_profiler.set(profiler)
+
+    # When
+    try:
+        with profiler:
+            executor.submit(busy_function, 0.1).result()
+    finally:
+        request_profiler.reset(token)
+        executor.shutdown()
+
+    # Then
+    assert "test_profiling.py:busy_function" in profiler.render()
+    assert profiler.thread_ids == set()
+
+
+def test_iter_profiled_when_consumed_by_worker_thread_and_expects_worker_sampled():
+    # Given
+    profiler = SamplingProfiler(interval=0.001, thread_ids=set())
+
+    def iter_busy_items():
+        for item in range(2):
+            busy_function(0.05)
+            yield item
+
+    def consume():
+        token = request_profiler.set(profiler)
+        try:
+            return list(iter_profiled(iter_busy_items()))
+        finally:
+            request_profiler.reset(token)
+
+    # When
+    with profiler:
+        worker = threading.Thread(target=consume)
+        worker.start()
+        worker.join()
+
+    # Then
+    assert "test_profiling.py:busy_function" in profiler.render()
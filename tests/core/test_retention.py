@@ -0,0 +1,202 @@
+import dataclasses
+import os
+import time
+
+import pytest
+
+from src.core.models_repositories import FileSystemModelsRepository
+from src.core.retention import (
+    RetentionScheduler,
+    apply_retention,
+    find_rule,
+    plan_retention,
+)
+from src.core.settings import (
+    FileSystemModelsRepositorySettings,
+    RetentionRuleSettings,
+    RetentionSettings,
+)
+
+
+@pytest.fixture()
+def repo(tmp_path):
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(tmp_path))
+    return FileSystemModelsRepository(settings)
+
+
+def save_versions(repo, model, *versions):
+    for version in versions:
+        repo.save_model(dataclasses.replace(model, version=version))
+
+
+def list_versions(models) -> list[str]:
+    return sorted(model_info.version for model_info in models)
+
+
+def test_find_rule_when_several_rules_match_and_expects_first_one():
+    # Given
+    rules = [
+        RetentionRuleSettings(name_pattern="fraud-*", keep_last=1),
+        RetentionRuleSettings(keep_last=10),
+    ]
+
+    # When & Then
+    assert find_rule("fraud-detector", rules) is rules[0]
+    assert find_rule("churn", rules) is rules[1]
+    assert find_rule("churn", rules[:1]) is None
+
+
+def test_plan_retention_when_keep_last_is_set_and_expects_older_versions_planned(repo, model):
+    # Given
+    save_versions(repo, model, "1.9.0", "1.10.0", "1.2.0", "2.0.0")
+    rules = [RetentionRuleSettings(keep_last=2)]
+
+    # When
+    expired_models = plan_retention(repo, rules)
+
+    # Then
+    assert list_versions(expired_models) == ["1.2.0", "1.9.0"]
+
+
+def test_plan_retention_when_version_has_alias_and_expects_it_kept(repo, model):
+    # Given
+    save_versions(repo, model, "1.0.0", "1.1.0", "1.2.0")
+    repo.set_alias(model.name, "production", "1.0.0")
+    rules = [RetentionRuleSettings(keep_last=1)]
+
+    # When
+    expired_models = plan_retention(repo, rules)
+
+    # Then
+    assert list_versions(expired_models) == ["1.1.0"]
+
+
+def test_plan_retention_when_ttl_is_set_and_expects_only_old_versions_planned(repo, model, mocker):
+    # Given
+    save_versions(repo, model, "1.0.0", "1.1.0", "1.2.0")
+    now = time.time()
+    saved_times = {"1.0.0": now - 300, "1.1.0": now - 30}
+    mocker.patch.object(repo, "list_saved_times", return_value=saved_times)
+    rules = [RetentionRuleSettings(ttl_seconds=60)]
+
+    # When
+    expired_models = plan_retention(repo, rules, now)
+
+    # Then
+    # versions of an unknown age are kept
+    assert list_versions(expired_models) == ["1.0.0"]
+
+
+def test_plan_retention_when_keep_last_and_ttl_are_set_and_expects_versions_kept_by_either(
+    repo, model
+):
+    # Given
+    save_versions(repo, model, "1.0.0", "1.1.0", "1.2.0")
+    repo.save_model(dataclasses.replace(model, name="another-model", version="1.0.0"))
+    rules = [
+        RetentionRuleSettings(name_pattern=model.name, keep_last=1, ttl_seconds=60),
+    ]
+
+    # When
+    recent_models = plan_retention(repo, rules)
+    expired_models = plan_retention(repo, rules, time.time() + 120)
+
+    # Then
+    assert recent_models == []
+    assert list_versions(expired_models) == ["1.0.0", "1.1.0"]
+    assert {model_info.name for model_info in expired_models} == {model.name}
+
+
+def test_apply_retention_when_versions_expired_and_expects_them_deleted_in_batches(
+    repo, model, mocker
+):
+    # Given
+    save_versions(repo, model, *(f"1.{minor}.0" for minor in range(6)))
+    sleep = mocker.patch("src.core.retention.time.sleep")
+    settings = RetentionSettings(
+        rules=[RetentionRuleSettings(keep_last=1)], batch_size=2, batch_interval_seconds=0.5
+    )
+
+    # When
+    deleted_models = apply_retention(repo, settings)
+
+    # Then
+    assert len(deleted_models) == 5
+    assert [model_info.version for model_info in repo.list_models(model.name)] == ["1.5.0"]
+    assert sleep.call_args_list == [mocker.call(0.5), mocker.call(0.5)]
+
+
+def test_apply_retention_when_dry_run_and_expects_nothing_deleted(repo, model):
+    # Given
+    save_versions(repo, model, "1.0.0", "1.1.0")
+    settings = RetentionSettings(rules=[RetentionRuleSettings(keep_last=1)], dry_run=True)
+
+    # When
+    expired_models = apply_retention(repo, settings)
+
+    # Then
+    assert list_versions(expired_models) == ["1.0.0"]
+    assert list_versions(repo.list_models(model.name)) == ["1.0.0", "1.1.0"]
+
+
+def test_plan_retention_when_version_linked_to_old_content_and_expects_it_kept(repo, model):
+    # Given
+    repo.save_model(model)
+    # the model file is recorded again as an old file added by hand
+    ten_days_ago = time.time() - 10 * 24 * 3600
+    os.utime(repo.find_model_path(model.name, model.version), (ten_days_ago, ten_days_ago))
+    os.utime(repo.resources_dir)
+    repo.reconcile_manifest()
+    repo.index_missing_digests()
+    digest = repo.calculate_digest(model.content)
+    repo.save_model_by_digest(model.name, "1.0.0", "cbm", digest, len(model.content))
+    rules = [RetentionRuleSettings(ttl_seconds=24 * 3600)]
+
+    # When
+    expired_models = plan_retention(repo, rules)
+
+    # Then
+    assert list_versions(expired_models) == [model.version]
+
+
+def test_retention_scheduler_when_started_and_expects_expired_versions_deleted(
+    tmp_path, repo, model
+):
+    # Given
+    save_versions(repo, model, "1.0.0", "1.1.0")
+    settings = RetentionSettings(
+        rules=[RetentionRuleSettings(keep_last=1)],
+        interval_seconds=60,
+        lock_path=str(tmp_path / "retention.lock"),
+    )
+    scheduler = RetentionScheduler(repo, settings)
+
+    # When
+    scheduler.start()
+    deadline = time.monotonic() + 5
+    while len(list(repo.list_models(model.name))) > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.stop()
+
+    # Then
+    assert list_versions(repo.list_models(model.name)) == ["1.1.0"]
+
+
+def test_retention_scheduler_when_another_worker_applies_retention_and_expects_not_started(
+    tmp_path, repo
+):
+    # Given
+    settings = RetentionSettings(
+        rules=[RetentionRuleSettings(keep_last=1)], lock_path=str(tmp_path / "retention.lock")
+    )
+    first_scheduler = RetentionScheduler(repo, settings)
+    second_scheduler = RetentionScheduler(repo, settings)
+
+    # When
+    is_first_started = first_scheduler.start()
+    is_second_started = second_scheduler.start()
+    first_scheduler.stop()
+
+    # Then
+    assert is_first_started
+    assert not is_second_started
@@ -0,0 +1,55 @@
+import pytest
+
+from src.core.search import NamesIndex
+
+
+@pytest.fixture()
+def names_index() -> NamesIndex:
+    names_index = NamesIndex()
+    for name in ("ranking-ads", "ranking-feed", "ranking-search", "fraud-ranking", "fraud"):
+        names_index.add(name)
+    return names_index
+
+
+def test_search_when_query_is_prefix_and_expects_sorted_pages(names_index):
+    # When
+    first_page = names_index.search("ranking-", limit=2)
+    second_page = names_index.search("ranking-", limit=2, after=first_page[-1])
+
+    # Then
+    assert first_page == ["ranking-ads", "ranking-feed"]
+    assert second_page == ["ranking-search"]
+
+
+@pytest.mark.parametrize(
+    argnames="query, expected_names",
+    ids=("trigrams", "short query", "no matches"),
+    argvalues=(
+        ("rank", ["fraud-ranking", "ranking-ads", "ranking-feed", "ranking-search"]),
+        ("d", ["fraud", "fraud-ranking", "ranking-ads", "ranking-feed"]),
+        ("ranks", []),
+    ),
+)
+def test_search_when_query_is_substring_and_expects_names_containing_it(
+    names_index, query, expected_names
+):
+    assert names_index.search(query, is_substring=True) == expected_names
+
+
+def test_search_when_names_added_and_discarded_after_search_and_expects_index_kept_up_to_date(
+    names_index,
+):
+    # Given
+    names_index.search("ranking-")
+    names_index.search("ranking", is_substring=True)
+
+    # When
+    names_index.add("ranking-video")
+    names_index.discard("ranking-ads")
+    names_index.discard("unknown")
+
+    # Then
+    assert names_index.search("ranking-") == ["ranking-feed", "ranking-search", "ranking-video"]
+    assert names_index.search("video", is_substring=True) == ["ranking-video"]
+    assert names_index.search("-ads", is_substring=True) == []
+    assert len(names_index) == 5
@@ -1,10 +1,12 @@
+import importlib.util
 import os
 from typing import Final
+from unittest import mock
 
 import pytest
 from pydantic import ValidationError
 
-from src.core.settings import Settings
+from src.core.settings import QuotaSettings, Settings
 
 common_env_vars: Final[dict[str, str]] = {"version": "4.0.4", "environment": "test"}
 
@@ -141,3 +143,150 @@ def test_settings_when_source_is_unknown_and_variables_set_up_via_shell_variable
         Settings()
 
         assert "models_repository" in err_msg
+
+
+# Mongo DB client options
+@given_env_vars_via_shell_variables(mongo_is_models_repo_env_vars_sample)
+def test_settings_when_source_is_mongo_db_and_no_client_options_set_up_and_expects_defaults():
+    # When
+    settings = Settings()
+
+    # Then
+    client_options = settings.models_repository.client_options
+    assert client_options["maxPoolSize"] == 100
+    assert client_options["minPoolSize"] == 0
+    assert client_options["readPreference"] == "primary"
+    assert "compressors" not in client_options
+    assert "socketTimeoutMS" not in client_options
+    assert settings.models_repository.write_concern.options == {}
+    assert settings.models_repository.bulk_write_concern is None
+
+
+@given_env_vars_via_shell_variables(
+    mongo_is_models_repo_env_vars_sample,
+    {
+        "models_repository__max_pool_size": "200",
+        "models_repository__min_pool_size": "10",
+        "models_repository__socket_timeout_ms": "60000",
+        "models_repository__compressors": '["zstd", "zlib"]',
+        "models_repository__read_preference": "secondaryPreferred",
+        "models_repository__max_staleness_seconds": "120",
+        "models_repository__write_concern__w": "majority",
+        "models_repository__write_concern__journal": "true",
+        "models_repository__bulk_write_concern__w": "1",
+        "models_repository__bulk_write_concern__journal": "false",
+    },
+)
+def test_settings_when_source_is_mongo_db_and_client_options_set_up_via_shell_variables():
+    # When
+    settings = Settings()
+
+    # Then
+    client_options = settings.models_repository.client_options
+    assert client_options["maxPoolSize"] == 200
+    assert client_options["minPoolSize"] == 10
+    assert client_options["socketTimeoutMS"] == 60000
+    assert client_options["compressors"] == "zstd,zlib"
+    assert client_options["readPreference"] == "secondaryPreferred"
+    assert client_options["maxStalenessSeconds"] == 120
+    assert settings.models_repository.write_concern.options == {"w": "majority", "j": True}
+    assert settings.models_repository.bulk_write_concern.options == {"w": 1, "j": False}
+
+
+@pytest.mark.parametrize(
+    argnames="env_vars",
+    ids=("min pool size exceeds max pool size", "unknown compressor", "staleness with primary"),
+    argvalues=(
+        {"models_repository__max_pool_size": "5", "models_repository__min_pool_size": "10"},
+        {"models_repository__compressors": '["lz4"]'},
+        {"models_repository__max_staleness_seconds": "120"},
+    ),
+)
+def test_settings_when_source_is_mongo_db_and_client_options_are_invalid_and_expects_validation_error(
+    env_vars,
+):
+    @given_env_vars_via_shell_variables(mongo_is_models_repo_env_vars_sample, env_vars)
+    def create_settings():
+        with pytest.raises(ValidationError):
+            Settings()
+
+    create_settings()
+
+
+@given_env_vars_via_shell_variables(
+    mongo_is_models_repo_env_vars_sample, {"models_repository__compressors": '["snappy"]'}
+)
+def test_settings_when_compressor_package_is_not_installed_and_expects_validation_error():
+    # Given
+    find_spec = importlib.util.find_spec
+
+    def find_spec_without_snappy(name, *args):
+        return None if name == "snappy" else find_spec(name, *args)
+
+    # When & Then
+    with mock.patch("importlib.util.find_spec", find_spec_without_snappy):
+        with pytest.raises(ValidationError, match="snappy extra"):
+            Settings()
+
+
+@given_env_vars_via_shell_variables(
+    common_env_vars,
+    {
+        "models_repository__source": "mirror",
+        "models_repository__primary__source": "fs",
+        "models_repository__primary__directory": "resources",
+        "models_repository__secondaries": '[{"source": "fs", "directory": "replica"}]',
+        "models_repository__queue_path": "replication.sqlite3",
+    },
+)
+def test_settings_when_source_is_mirror_and_expects_primary_and_secondaries_parsed():
+    # When
+    settings = Settings()
+
+    # Then
+    assert settings.models_repository.source == "mirror"
+    assert settings.models_repository.primary.directory == "resources"
+    assert [item.directory for item in settings.models_repository.secondaries] == ["replica"]
+    assert settings.models_repository.retry_delay_seconds == 1.0
+
+
+@given_env_vars_via_shell_variables(
+    fs_is_models_repo_env_vars_sample,
+    {
+        "retention__enabled": "true",
+        "retention__rules": '[{"name_pattern": "fraud-*", "keep_last": 3}, {"ttl_seconds": 86400}]',
+    },
+)
+def test_settings_when_retention_rules_set_up_via_shell_variables_and_expects_rules_parsed():
+    # When
+    settings = Settings()
+
+    # Then
+    assert settings.retention.enabled
+    assert [rule.name_pattern for rule in settings.retention.rules] == ["fraud-*", "*"]
+    assert settings.retention.rules[0].keep_last == 3
+    assert settings.retention.rules[1].ttl_seconds == 86400
+    assert not settings.retention.dry_run
+
+
+@given_env_vars_via_shell_variables(
+    fs_is_models_repo_env_vars_sample, {"retention__rules": '[{"name_pattern": "fraud-*"}]'}
+)
+def test_settings_when_retention_rule_keeps_nothing_and_expects_validation_error():
+    # When & Then
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+@given_env_vars_via_shell_variables(
+    fs_is_models_repo_env_vars_sample,
+    {"quotas__max_bytes": '{"fraud-*": 1024, "*": 1048576}'},
+)
+def test_settings_when_quotas_set_up_via_shell_variables_and_expects_first_matching_limit():
+    # When
+    settings = Settings()
+
+    # Then
+    assert settings.quotas.find_max_bytes("fraud-detector") == 1024
+    assert settings.quotas.find_max_bytes("my-model") == 1048576
+    assert QuotaSettings().find_max_bytes("my-model") is None
@@ -0,0 +1,126 @@
+import dataclasses
+import io
+import sys
+import tarfile
+import time
+
+import pytest
+
+from src.core.models_repositories import FileSystemModelsRepository, ModelExistsError
+from src.core.settings import FileSystemModelsRepositorySettings
+from src.core.snapshots import iter_snapshot, restore_snapshot
+
+
+def create_repo(directory) -> FileSystemModelsRepository:
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(directory))
+    return FileSystemModelsRepository(settings)
+
+
+@pytest.fixture()
+def source(tmp_path_factory, model) -> FileSystemModelsRepository:
+    repo = create_repo(tmp_path_factory.mktemp("source"))
+    repo.save_model(model)
+    repo.save_model(dataclasses.replace(model, version="1.0.0-rc-1", content=b"rc"))
+    repo.save_model(dataclasses.replace(model, name="your-model", file_extension="pkl"))
+    repo.set_alias(model.name, "stable", model.version)
+    return repo
+
+
+@pytest.fixture()
+def target(tmp_path_factory) -> FileSystemModelsRepository:
+    return create_repo(tmp_path_factory.mktemp("target"))
+
+
+@pytest.mark.parametrize(argnames="compression", argvalues=("none", "gz", "zst"))
+def test_restore_snapshot_when_snapshot_created_by_iter_snapshot_and_expects_the_same_models(
+    source, target, compression
+):
+    # Given
+    archive = b"".join(iter_snapshot(source, compression))
+
+    # When
+    restored = restore_snapshot(target, io.BytesIO(archive), compression, batch_size=2)
+
+    # Then
+    assert restored == 3
+    for model_info in source.list_models():
+        expected_model = source.get_model(model_info.name, model_info.version)
+        assert target.get_model(model_info.name, model_info.version) == expected_model
+    for name in ("my-model", "your-model"):
+        assert target.list_saved_times(name) == pytest.approx(source.list_saved_times(name))
+        assert target.list_aliases(name) == source.list_aliases(name)
+
+
+@pytest.mark.parametrize(argnames="compression", argvalues=("none", "gz", "zst"))
+def test_iter_snapshot_when_called_twice_and_expects_identical_archives(source, compression):
+    # When
+    archives = [b"".join(iter_snapshot(source, compression)) for _ in range(2)]
+    time.sleep(1)
+    archives.append(b"".join(iter_snapshot(source, compression)))
+
+    # Then
+    assert archives[0] == archives[1] == archives[2]
+
+
+def test_restore_snapshot_when_models_exceed_batch_bytes_and_expects_smaller_batches(
+    source, target, model, mocker
+):
+    # Given
+    archive = b"".join(iter_snapshot(source))
+    save_models = mocker.spy(target, "save_models")
+
+    # When
+    restored = restore_snapshot(
+        target, io.BytesIO(archive), batch_size=100, batch_bytes=len(model.content) + 2
+    )
+
+    # Then
+    assert restored == 3
+    batch_sizes = [len(call.args[0]) for call in save_models.call_args_list]
+    assert batch_sizes == [2, 1, 0]
+
+
+def test_iter_snapshot_when_zstandard_not_installed_and_expects_value_error(source, mocker):
+    # Given
+    mocker.patch.dict(sys.modules, {"zstandard": None})
+
+    # Then
+    with pytest.raises(ValueError, match="zstd extra"):
+        list(iter_snapshot(source, "zst"))
+
+
+def test_iter_snapshot_when_repository_contains_models_and_expects_one_chunk_per_model(source):
+    # When
+    chunks = list(iter_snapshot(source))
+
+    # Then
+    assert len(chunks) == 4
+    with tarfile.open(fileobj=io.BytesIO(b"".join(chunks))) as archive:
+        names = sorted(archive.getnames())
+    assert names == [
+        "my-model-0.0.7.cbm",
+        "my-model-1.0.0-rc-1.cbm",
+        "my-model.aliases.json",
+        "your-model-0.0.7.pkl",
+    ]
+
+
+def test_restore_snapshot_when_model_exists_and_expects_model_exists_error(source, model):
+    # Given
+    archive = b"".join(iter_snapshot(source))
+
+    # Then
+    with pytest.raises(ModelExistsError):
+        restore_snapshot(source, io.BytesIO(archive))
+
+
+def test_restore_snapshot_when_archive_contains_foreign_file_and_expects_value_error(target):
+    # Given
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        tar_info = tarfile.TarInfo("README")
+        archive.addfile(tar_info, io.BytesIO(b""))
+
+    # Then
+    with pytest.raises(ValueError):
+        restore_snapshot(target, io.BytesIO(buffer.getvalue()))
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from src.core.settings import TracingSettings
+from src.core.tracing import FileSpanExporter, Tracer, parse_traceparent
+
+
+@pytest.fixture()
+def tracer(tmp_path) -> Tracer:
+    tracer = Tracer()
+    tracer.configure(
+        TracingSettings(enabled=True, file_path=str(tmp_path / "spans.jsonl"), sample_ratio=1)
+    )
+    return tracer
+
+
+def test_span_when_nested_in_trace_and_expects_parent_linked(tracer):
+    # When
+    with tracer.start_trace("GET /") as root:
+        with tracer.span("get_model", backend="fs") as child:
+            pass
+
+    # Then
+    spans = tracer.flush()
+    assert [span.name for span in spans] == ["get_model", "GET /"]
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert child.attributes == {"backend": "fs"}
+    assert root.end_ns >= child.end_ns >= child.start_ns >= root.start_ns
+
+
+def test_span_when_there_is_no_trace_and_expects_nothing_recorded(tracer):
+    # When
+    with tracer.span("get_model") as span:
+        pass
+
+    # Then
+    assert span is None
+    assert tracer.flush() == []
+
+
+def test_start_trace_when_tracing_is_disabled_and_expects_nothing_recorded():
+    # Given
+    tracer = Tracer()
+
+    # When
+    with tracer.start_trace("GET /") as root, tracer.span("get_model") as child:
+        pass
+
+    # Then
+    assert root is None and child is None
+    assert tracer.flush() == []
+
+
+def test_start_trace_when_traceparent_passed_and_expects_caller_trace_joined(tracer):
+    # Given
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    # When
+    with tracer.start_trace("GET /", traceparent) as root:
+        pass
+
+    # Then
+    assert root.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert root.parent_id == "b7ad6b7169203331"
+    assert parse_traceparent("malformed") is None
+
+
+def test_span_when_error_raised_and_expects_error_recorded(tracer):
+    # When
+    with pytest.raises(ValueError):
+        with tracer.start_trace("GET /"):
+            raise ValueError("boom")
+
+    # Then
+    (span,) = tracer.flush()
+    assert span.error == "ValueError: boom"
+    assert span.to_otlp()["status"] == {"code": 2, "message": "ValueError: boom"}
+
+
+def test_file_span_exporter_when_spans_exported_and_expects_json_lines(tracer, tmp_path):
+    # Given
+    with tracer.start_trace("GET /"):
+        pass
+    exporter = FileSpanExporter(str(tmp_path / "spans.jsonl"))
+
+    # When
+    exporter.export(tracer.flush())
+
+    # Then
+    lines = (tmp_path / "spans.jsonl").read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["GET /"]
@@ -0,0 +1,128 @@
+import pytest
+
+from src.core.versions import Version, VersionIndex, VersionRange, is_newer_version
+
+
+@pytest.mark.parametrize(
+    argnames="version, expected_version",
+    ids=("full", "with v prefix", "major only", "pre-release", "build metadata", "not semver"),
+    argvalues=(
+        ("1.2.3", Version(1, 2, 3)),
+        ("v2.0", Version(2, 0, 0)),
+        ("3", Version(3, 0, 0)),
+        ("1.0.0-rc.1", Version(1, 0, 0, "rc.1")),
+        ("1.0.0+build.7", Version(1, 0, 0)),
+        ("i.o.x", None),
+    ),
+)
+def test_parse(version, expected_version):
+    # When
+    actual_version = Version.parse(version)
+
+    # Then
+    assert actual_version == expected_version
+
+
+def test_version_ordering_follows_semantic_versioning_precedence():
+    # Given
+    ordered_versions = [
+        "1.0.0-alpha",
+        "1.0.0-alpha.1",
+        "1.0.0-alpha.beta",
+        "1.0.0-beta.2",
+        "1.0.0-beta.11",
+        "1.0.0-rc.1",
+        "1.0.0",
+        "1.0.1",
+        "1.10.0",
+        "2.0.0",
+    ]
+
+    # When
+    actual_versions = sorted(ordered_versions[::-1], key=Version.parse)
+
+    # Then
+    assert actual_versions == ordered_versions
+
+
+@pytest.mark.parametrize(
+    argnames="candidate, version, expected",
+    argvalues=(
+        ("1.0.1", "1.0.0", True),
+        ("1.0.0", "1.0.0", False),
+        ("1.0.0-rc.1", "1.0.0", False),
+        ("1.0.0", "i.o.x", False),
+    ),
+)
+def test_is_newer_version(candidate, version, expected):
+    assert is_newer_version(candidate, version) is expected
+
+
+@pytest.mark.parametrize(
+    argnames="spec, expected_range",
+    ids=("latest", "caret", "caret zero major", "tilde", "wildcard", "comparators", "exact"),
+    argvalues=(
+        ("latest", VersionRange()),
+        ("^2.1", VersionRange(Version(2, 1), Version(3))),
+        ("^0.2.3", VersionRange(Version(0, 2, 3), Version(0, 3))),
+        ("~1.2", VersionRange(Version(1, 2), Version(1, 3))),
+        ("2.x", VersionRange(Version(2), Version(3))),
+        (">1.0 <=1.5", VersionRange(Version(1), Version(1, 5), False, True)),
+        ("=1.2.3", VersionRange(Version(1, 2, 3), Version(1, 2, 3), True, True)),
+    ),
+)
+def test_version_range_parse(spec, expected_range):
+    assert VersionRange.parse(spec) == expected_range
+
+
+@pytest.mark.parametrize(
+    argnames="spec", argvalues=("latest", "^2.1", "~1.2", ">1.0 <=1.5", "=1.2.3")
+)
+def test_version_range_str_when_parsed_again_and_expects_the_same_range(spec):
+    version_range = VersionRange.parse(spec)
+    assert VersionRange.parse(str(version_range)) == version_range
+
+
+@pytest.mark.parametrize(argnames="spec", argvalues=("1.2.3", "i.o.x", "^i.o", ">=one"))
+def test_version_range_parse_when_spec_is_not_a_range_and_expects_none(spec):
+    assert VersionRange.parse(spec) is None
+
+
+@pytest.mark.parametrize(
+    argnames="spec, expected_version",
+    argvalues=(
+        ("latest", "3.0.0"),
+        ("^2.1", "2.5.1"),
+        ("~2.1", "2.1.0"),
+        ("<2", "1.0.0"),
+        ("<=2.5.1", "2.5.1"),
+        (">3", None),
+        ("^4", None),
+    ),
+)
+def test_version_index_find_latest(spec, expected_version):
+    # Given
+    versions = ["1.0.0", "2.1.0", "2.5.1", "3.0.0-rc.1", "3.0.0", "i.o.x", "2.5.2-beta"]
+    version_index = VersionIndex(versions)
+
+    # When
+    actual_version = version_index.find_latest(VersionRange.parse(spec))
+
+    # Then
+    assert actual_version == expected_version
+
+
+def test_version_index_when_versions_added_and_removed_and_expects_index_kept_sorted():
+    # Given
+    version_index = VersionIndex(["1.0.0"])
+
+    # When
+    version_index.add("10.0.0")
+    version_index.add("2.0.0")
+    version_index.add("2.0.0")
+    version_index.remove("10.0.0")
+    version_index.remove("7.0.0")
+
+    # Then
+    assert len(version_index) == 2
+    assert version_index.find_latest(VersionRange()) == "2.0.0"
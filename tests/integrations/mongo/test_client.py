@@ -1,5 +1,9 @@
 import pytest
 from pymongo.database import Collection
+from pymongo.errors import DuplicateKeyError
+
+from src.core.settings import MongoModelsRepositorySettings
+from src.integrations.mongo.client import MongoClient
 
 
 @pytest.fixture()
@@ -99,3 +103,117 @@ def get_mocked_cursor(*items):
             return items
 
     return MockedCursor()
+
+
+# client options
+def test_client_when_write_concerns_set_up_and_expects_bulk_database_to_use_bulk_write_concern():
+    # Given
+    settings = MongoModelsRepositorySettings(
+        source="mongo",
+        host="localhost",
+        port=12345,
+        username="testusername",
+        password="testpassword",
+        database_name="model-registry",
+        max_pool_size=7,
+        read_preference="secondaryPreferred",
+        write_concern={"w": "majority", "journal": True},
+        bulk_write_concern={"w": 1, "journal": False},
+    )
+
+    # When
+    client = MongoClient(settings)
+
+    # Then
+    assert client.database.client.options.pool_options.max_pool_size == 7
+    assert client.database.read_preference.mongos_mode == "secondaryPreferred"
+    assert client.database.write_concern.document == {"w": "majority", "j": True}
+    assert client.bulk_database.write_concern.document == {"w": 1, "j": False}
+
+
+def test_client_when_write_concern_not_set_up_and_expects_server_default_write_concern():
+    # Given
+    settings = MongoModelsRepositorySettings(
+        source="mongo",
+        host="localhost",
+        port=12345,
+        username="testusername",
+        password="testpassword",
+        database_name="model-registry",
+    )
+
+    # When
+    client = MongoClient(settings)
+
+    # Then
+    assert client.database.write_concern.is_server_default
+    assert client.bulk_database.write_concern.is_server_default
+
+
+# save many items
+def test_save_many_items(mocker, mongo_client, collection_name):
+    # Given
+    expected_inserted_item_ids = ["first", "second"]
+    mocked_response = mocker.Mock(inserted_ids=expected_inserted_item_ids)
+
+    # When
+    insert_many = mocker.patch.object(Collection, "insert_many", return_value=mocked_response)
+    actual_inserted_item_ids = mongo_client.save_many_items(
+        collection_name, [{"status": 200}, {"status": 404}]
+    )
+
+    # Then
+    assert actual_inserted_item_ids == expected_inserted_item_ids
+    insert_many.assert_called_once()
+
+
+def test_delete_one_item_and_return_when_one_item_exist_and_expects_item_returned(
+    mocker, mongo_client, collection_name, collection_filter
+):
+    # Given
+    expected_document = {"name": "model", "size": 3}
+    projection = {"_id": False, "name": True, "size": True}
+
+    # When
+    find_one_and_delete = mocker.patch.object(
+        Collection, "find_one_and_delete", return_value=expected_document
+    )
+    actual_document = mongo_client.delete_one_item_and_return(
+        collection_name, collection_filter, projection
+    )
+    # Then
+    assert actual_document == expected_document
+    find_one_and_delete.assert_called_once_with(collection_filter, projection)
+
+
+# update one item
+def test_update_one_item_when_item_is_not_satisfied_to_filter_and_expects_false(
+    mocker, mongo_client, collection_name
+):
+    # Given
+    mocker.patch.object(Collection, "update_one", side_effect=DuplicateKeyError("E11000"))
+
+    # When
+    is_updated = mongo_client.update_one_item(
+        collection_name, {"_id": "my-model", "size": {"$lte": 10}}, {"$inc": {"size": 5}}, True
+    )
+
+    # Then
+    assert not is_updated
+
+
+def test_update_one_item_when_item_is_inserted_and_expects_true(
+    mocker, mongo_client, collection_name
+):
+    # Given
+    response = mocker.Mock(matched_count=0, upserted_id="my-model")
+    update_one = mocker.patch.object(Collection, "update_one", return_value=response)
+
+    # When
+    is_updated = mongo_client.update_one_item(
+        collection_name, {"_id": "my-model"}, {"$inc": {"size": 5}}, upsert=True
+    )
+
+    # Then
+    assert is_updated
+    update_one.assert_called_once_with({"_id": "my-model"}, {"$inc": {"size": 5}}, upsert=True)
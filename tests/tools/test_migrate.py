@@ -0,0 +1,185 @@
+import dataclasses
+
+import pytest
+
+from src.core.models_repositories import FileSystemModelsRepository
+from src.core.settings import FileSystemModelsRepositorySettings
+from src.tools.migrate import (
+    Checkpoint,
+    ModelMismatchError,
+    copy_model,
+    main,
+    migrate,
+    verify_model,
+)
+
+
+def create_repo(directory) -> FileSystemModelsRepository:
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(directory))
+    return FileSystemModelsRepository(settings)
+
+
+@pytest.fixture()
+def source(tmp_path_factory, model) -> FileSystemModelsRepository:
+    repo = create_repo(tmp_path_factory.mktemp("source"))
+    for version in ("1.0.0", "1.1.0", "2.0.0"):
+        repo.save_model(dataclasses.replace(model, version=version))
+    return repo
+
+
+@pytest.fixture()
+def target(tmp_path_factory) -> FileSystemModelsRepository:
+    return create_repo(tmp_path_factory.mktemp("target"))
+
+
+def test_migrate_when_copy_action_used_and_expects_every_model_copied(source, target, model):
+    # When
+    report = migrate(source, target, copy_model, workers=2)
+
+    # Then
+    assert report.processed == 3
+    assert report.failed == 0
+    assert report.transferred_bytes == 3 * len(model.content)
+    assert sorted(info.version for info in target.list_models()) == ["1.0.0", "1.1.0", "2.0.0"]
+
+
+def test_migrate_when_checkpoint_contains_processed_models_and_expects_them_skipped(
+    source, target, tmp_path
+):
+    # Given
+    checkpoint_path = tmp_path / "checkpoint"
+    first_model_info = next(iter(source.list_models()))
+    Checkpoint(checkpoint_path).mark(first_model_info)
+
+    # When
+    report = migrate(source, target, copy_model, checkpoint=Checkpoint(checkpoint_path))
+
+    # Then
+    assert report.skipped == 1
+    assert report.processed == 2
+    assert len(Checkpoint(checkpoint_path).processed) == 3
+
+
+def test_migrate_when_target_contains_another_content_and_expects_failure_reported(
+    source, target, model
+):
+    # Given
+    target.save_model(dataclasses.replace(model, version="1.0.0", content=b"another content"))
+
+    # When
+    report = migrate(source, target, copy_model)
+
+    # Then
+    assert report.processed == 2
+    assert report.failed == 1
+
+
+def test_verify_model_when_model_is_missing_in_target_and_expects_model_mismatch_error(
+    source, target
+):
+    # Given
+    model_info = next(iter(source.list_models()))
+
+    # Then
+    with pytest.raises(ModelMismatchError):
+        verify_model(source, target, model_info)
+
+
+def test_main_when_export_action_used_and_expects_models_in_directory(source, tmp_path):
+    # Given
+    env_path = tmp_path / "source.env"
+    env_path.write_text(
+        "version=1.0.0\nenvironment=test\n"
+        "models_repository__source=fs\n"
+        f"models_repository__directory={source.resources_dir}\n"
+    )
+    directory = tmp_path / "exported"
+
+    # When
+    exit_code = main(["export", "--source", str(env_path), "--directory", str(directory)])
+
+    # Then
+    assert exit_code == 0
+    assert len(list(create_repo(directory).list_models())) == 3
+    assert main(["verify", "--source", str(env_path), "--target", str(env_path)]) == 0
+
+
+def test_copy_model_when_model_larger_than_chunk_and_expects_content_streamed_in_chunks(
+    source, target, model, mocker
+):
+    # Given
+    large_model = dataclasses.replace(model, version="3.0.0", content=bytes(range(256)) * 5)
+    source.save_model(large_model)
+    model_info = source.get_model_info(large_model.name, large_model.version)
+    mocker.patch.object(target, "UPLOAD_CHUNK_SIZE", 512)
+    get_model = mocker.spy(source, "get_model")
+    read_model_range = mocker.spy(source, "read_model_range")
+
+    # When
+    transferred = copy_model(source, target, model_info)
+
+    # Then
+    assert transferred == len(large_model.content)
+    assert target.get_model(large_model.name, large_model.version) == large_model
+    assert read_model_range.call_count == 3
+    assert get_model.call_count == 0
+
+
+def test_copy_model_when_model_is_empty_and_expects_model_copied(source, target, model):
+    # Given
+    empty_model = dataclasses.replace(model, version="3.0.0", content=b"")
+    source.save_model(empty_model)
+    model_info = source.get_model_info(empty_model.name, empty_model.version)
+
+    # When
+    transferred = copy_model(source, target, model_info)
+
+    # Then
+    assert transferred == 0
+    assert target.get_model(empty_model.name, empty_model.version) == empty_model
+
+
+def test_copy_model_when_target_contains_same_model_and_expects_digests_compared(
+    source, target, model, mocker
+):
+    # Given
+    model_info = source.get_model_info(model.name, "1.0.0")
+    copy_model(source, target, model_info)
+    mocker.patch.object(source, "get_model_digest", return_value="digest")
+    mocker.patch.object(target, "get_model_digest", return_value="digest")
+    source_read_model_range = mocker.spy(source, "read_model_range")
+    target_read_model_range = mocker.spy(target, "read_model_range")
+
+    # When
+    transferred = copy_model(source, target, model_info)
+
+    # Then
+    assert transferred == 0
+    assert source_read_model_range.call_count == 0
+    assert target_read_model_range.call_count == 0
+
+
+def test_verify_model_when_digests_differ_and_expects_model_mismatch_error(
+    source, target, model, mocker
+):
+    # Given
+    model_info = source.get_model_info(model.name, "1.0.0")
+    copy_model(source, target, model_info)
+    mocker.patch.object(target, "get_model_digest", return_value="another digest")
+
+    # When & Then
+    with pytest.raises(ModelMismatchError, match="contents differ"):
+        verify_model(source, target, model_info)
+
+
+def test_migrate_when_action_raises_unexpected_error_and_expects_failure_reported(source, target):
+    # Given
+    def action(*_):
+        raise RuntimeError("unexpected")
+
+    # When
+    report = migrate(source, target, action)
+
+    # Then
+    assert report.processed == 0
+    assert report.failed == 3
@@ -0,0 +1,87 @@
+import dataclasses
+import sys
+
+import pytest
+
+from src.core.models_repositories import FileSystemModelsRepository
+from src.core.settings import FileSystemModelsRepositorySettings
+from src.tools.snapshot import main
+
+
+def create_repo(directory) -> FileSystemModelsRepository:
+    settings = FileSystemModelsRepositorySettings(source="fs", directory=str(directory))
+    return FileSystemModelsRepository(settings)
+
+
+def create_env_file(path, repo: FileSystemModelsRepository):
+    path.write_text(
+        "version=1.0.0\nenvironment=test\n"
+        "models_repository__source=fs\n"
+        f"models_repository__directory={repo.resources_dir}\n"
+    )
+    return path
+
+
+@pytest.fixture()
+def source(tmp_path_factory, model) -> FileSystemModelsRepository:
+    repo = create_repo(tmp_path_factory.mktemp("source"))
+    for version in ("1.0.0", "1.1.0", "2.0.0"):
+        repo.save_model(dataclasses.replace(model, version=version))
+    return repo
+
+
+@pytest.fixture()
+def target(tmp_path_factory) -> FileSystemModelsRepository:
+    return create_repo(tmp_path_factory.mktemp("target"))
+
+
+@pytest.mark.parametrize("compression", ["none", "gz", "zst"])
+def test_main_when_exported_snapshot_imported_and_expects_models_restored(
+    tmp_path, source, target, model, compression
+):
+    # Given
+    source_env = create_env_file(tmp_path / "source.env", source)
+    target_env = create_env_file(tmp_path / "target.env", target)
+    archive_path = tmp_path / "snapshot.tar"
+    compression_args = ["--compression", compression]
+
+    # When
+    export_code = main(
+        ["export", "--env", str(source_env), "--output", str(archive_path), *compression_args]
+    )
+    import_code = main(
+        ["import", "--env", str(target_env), "--input", str(archive_path), *compression_args]
+    )
+
+    # Then
+    assert (export_code, import_code) == (0, 0)
+    versions = sorted(model_info.version for model_info in target.list_models())
+    assert versions == ["1.0.0", "1.1.0", "2.0.0"]
+    assert target.get_model(model.name, "1.1.0").content == model.content
+
+
+def test_main_when_snapshot_piped_to_standard_input_and_expects_models_restored(
+    tmp_path, monkeypatch, source, target
+):
+    # Given
+    archive_path = tmp_path / "snapshot.tar"
+    main(
+        [
+            "export",
+            "--env",
+            str(create_env_file(tmp_path / "source.env", source)),
+            "--output",
+            str(archive_path),
+        ]
+    )
+
+    # When
+    with open(archive_path, encoding="utf-8") as archive:
+        monkeypatch.setattr(sys, "stdin", archive)
+        exit_code = main(
+            ["import", "--env", str(create_env_file(tmp_path / "target.env", target))]
+        )
+
+    # Then
+    assert exit_code == 0
+    assert len(list(target.list_models())) == 3